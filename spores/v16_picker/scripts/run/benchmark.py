@@ -0,0 +1,473 @@
+"""
+Бенчмарки горячих путей динамики и пайплайна дерева (без окна Ursina).
+
+Каждый кейс запускается на нескольких размерах задачи с фиксированным seed,
+результаты пишутся в JSON. Режим сравнения показывает, какие кейсы стали
+медленнее/быстрее относительно сохранённого эталона.
+
+Для запуска из корня проекта:
+    python scripts/run/benchmark.py                          # все кейсы, все размеры
+    python scripts/run/benchmark.py --only step_jit,batch_step --sizes small
+    python scripts/run/benchmark.py --save-baseline          # сохранить эталон
+    python scripts/run/benchmark.py --compare                # сравнить с эталоном
+    python scripts/run/benchmark.py --compare --fail-on-regression   # для CI
+"""
+
+import sys
+import os
+import argparse
+import contextlib
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.logic.pendulum import PendulumSystem
+from src.logic.control_tree import ControlTreeBuilder
+from src.logic.tree.spore_tree import SporeTree
+from src.logic.tree.spore_tree_config import SporeTreeConfig
+
+
+DEFAULT_OUTPUT = os.path.join("buffer", "benchmarks", "latest.json")
+DEFAULT_BASELINE = os.path.join("buffer", "benchmarks", "baseline.json")
+SIZE_LABELS = ('small', 'medium', 'large')
+FORMAT_VERSION = 1
+
+
+@dataclass
+class BenchmarkCase:
+    """
+    Кейс бенчмарка.
+
+    setup(size, rng) готовит данные (не замеряется) и возвращает функцию
+    без аргументов, время которой измеряется. size — число элементов
+    (вызовов, состояний, деревьев, узлов), на него делится время.
+    """
+    name: str
+    sizes: Dict[str, int]
+    setup: Callable[[int, np.random.Generator], Callable[[], object]]
+    repeats: int = 5
+    unit: str = 'item'
+    description: str = ''
+    quiet: bool = False  # глушить print внутри замеряемой функции
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Общие данные
+# ──────────────────────────────────────────────────────────────────────
+_pendulum: Optional[PendulumSystem] = None
+
+
+def _get_pendulum() -> PendulumSystem:
+    global _pendulum
+    if _pendulum is None:
+        _pendulum = PendulumSystem()
+    return _pendulum
+
+
+def _random_states(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Случайные состояния [theta, theta_dot] в рабочей области демо."""
+    return np.column_stack((rng.uniform(-np.pi, np.pi, n), rng.uniform(-2.0, 2.0, n)))
+
+
+def _random_trees(rng: np.random.Generator, n: int, dt: float = 0.05, factor: float = 0.2) -> List[SporeTree]:
+    """Деревья глубины 2 в случайных точках (как временное дерево оптимизации в InputManager)."""
+    pendulum = _get_pendulum()
+    trees = []
+    for state in _random_states(rng, n):
+        config = SporeTreeConfig(initial_position=state, dt_base=dt,
+                                 dt_grandchildren_factor=factor, show_debug=False)
+        trees.append(SporeTree(pendulum=pendulum, config=config, auto_create=True, show=False))
+    return trees
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Кейсы
+# ──────────────────────────────────────────────────────────────────────
+def _setup_step(method: str):
+    def setup(n: int, rng: np.random.Generator):
+        pendulum = _get_pendulum()
+        u_max = float(pendulum.get_control_bounds()[1])
+        states = _random_states(rng, n)
+        controls = rng.uniform(-u_max, u_max, n)
+        # RK45 из SciPy интегрирует только вперёд, JIT-ядро — в обе стороны
+        dts = rng.uniform(0.001, 0.1, n) if method == 'rk45' else rng.uniform(-0.1, 0.1, n)
+
+        def run():
+            for i in range(n):
+                pendulum.step(states[i], controls[i], dts[i], method=method)
+        return run
+    return setup
+
+
+def _setup_batch_step(n: int, rng: np.random.Generator):
+    pendulum = _get_pendulum()
+    u_max = float(pendulum.get_control_bounds()[1])
+    states = _random_states(rng, n)
+    controls = rng.uniform(-u_max, u_max, n)
+    dts = rng.uniform(-0.1, 0.1, n)
+    return lambda: pendulum.batch_step(states, controls, dts)
+
+
+def _setup_batch_dopri5(n: int, rng: np.random.Generator):
+    pendulum = _get_pendulum()
+    u_max = float(pendulum.get_control_bounds()[1])
+    states = _random_states(rng, n)
+    controls = rng.uniform(-u_max, u_max, n)
+    dts = rng.uniform(-0.5, 0.5, n)
+    return lambda: pendulum.batch_step_dopri5(states, controls, dts)
+
+
+def _setup_control_tree_grid(n: int, rng: np.random.Generator):
+    builder = ControlTreeBuilder(_get_pendulum())
+    roots = _random_states(rng, n)
+    return lambda: builder.build_trees_batch(roots)
+
+
+def _setup_discretize(n: int, rng: np.random.Generator):
+    pendulum = _get_pendulum()
+    states = _random_states(rng, n)
+    dts = rng.uniform(0.001, 0.1, n)
+
+    def run():
+        for i in range(n):
+            A, B = pendulum.get_linearized_matrices_at_state(states[i])
+            pendulum.discretize(A, B, dts[i])
+    return run
+
+
+def _setup_spore_tree(n: int, rng: np.random.Generator):
+    # Состояния генерируем заранее, чтобы каждый повтор строил одни и те же деревья
+    seed = int(rng.integers(2 ** 31))
+    return lambda: _random_trees(np.random.default_rng(seed), n)
+
+
+def _setup_find_optimal_pairs(n: int, rng: np.random.Generator):
+    from src.logic.tree.pairs.find_optimal_pairs import find_optimal_pairs
+    from src.logic.tree.pairs.stage_graph import clear_pair_stages
+    trees = _random_trees(rng, n)
+
+    def run():
+        # Каждый повтор — полный анализ, а не кэш этапов прошлого повтора
+        clear_pair_stages()
+        return [find_optimal_pairs(tree, show=False) for tree in trees]
+    return run
+
+
+def _setup_optimize_tree_area(n: int, rng: np.random.Generator):
+    from src.logic.tree.pairs.find_optimal_pairs import find_optimal_pairs
+    from src.logic.tree.area_opt.optimize_tree_area import optimize_tree_area
+
+    pendulum = _get_pendulum()
+    jobs = []
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        # Берём только деревья, для которых нашлись пары, пока не наберём n
+        while len(jobs) < n:
+            tree = _random_trees(rng, 1)[0]
+            pairs = find_optimal_pairs(tree, show=False)
+            if pairs:
+                jobs.append((tree, pairs))
+
+    def run():
+        for tree, pairs in jobs:
+            optimize_tree_area(tree, pairs, pendulum, constraint_distance=1e-3,
+                               dt_bounds=(0.001, 0.05), max_iterations=1500, show=False)
+    return run
+
+
+def _setup_merge_ghost_tree(n: int, rng: np.random.Generator):
+    from src.managers.buffer_merge_manager import BufferMergeManager
+    trees = _random_trees(rng, n)
+    manager = BufferMergeManager()
+
+    def run():
+        for tree in trees:
+            manager.merge_ghost_tree(tree, save_image=False)
+    return run
+
+
+def _fake_spore_manager(rng: np.random.Generator, n: int, links_per_node: int = 2) -> SimpleNamespace:
+    """Граф из n спор и ~links_per_node*n линков в формате SporeManager."""
+    positions = _random_states(rng, n)
+    spores = [SimpleNamespace(id=i, is_goal=(i == 0), calc_2d_pos=lambda p=positions[i]: p,
+                              logic=SimpleNamespace(optimal_dt=0.05, cost=float(i)))
+              for i in range(n)]
+    links = []
+    parents = rng.integers(0, n, links_per_node * n)
+    children = rng.integers(0, n, links_per_node * n)
+    for k, (parent, child) in enumerate(zip(parents, children)):
+        links.append(SimpleNamespace(link_id=f"link_{k}", parent_spore=spores[parent], child_spore=spores[child],
+                                     control_value=float(rng.choice((-2.0, 2.0))),
+                                     dt_value=float(rng.uniform(-0.1, 0.1)), color=None))
+    return SimpleNamespace(objects=spores, links=links)
+
+
+def _setup_graph_export(fmt: str):
+    def setup(n: int, rng: np.random.Generator):
+        from src.core.graph_snapshot import GraphSnapshot
+        spore_manager = _fake_spore_manager(rng, n)
+        out_dir = os.path.abspath('graph_export')  # внутри временной рабочей папки прогона
+        os.makedirs(out_dir, exist_ok=True)
+
+        def run():
+            snapshot = GraphSnapshot.from_spore_manager(spore_manager, version=1)
+            if fmt == 'npz':
+                snapshot.save(os.path.join(out_dir, 'graph.npz'))
+            else:
+                snapshot.save_json(os.path.join(out_dir, 'graph.json'))
+        return run
+    return setup
+
+
+CASES: List[BenchmarkCase] = [
+    BenchmarkCase('step_jit', {'small': 100, 'medium': 1_000, 'large': 10_000}, _setup_step('jit'),
+                  unit='step', description='PendulumSystem.step, RK4 numba'),
+    BenchmarkCase('step_rk45', {'small': 10, 'medium': 50, 'large': 200}, _setup_step('rk45'),
+                  repeats=3, unit='step', description='PendulumSystem.step, scipy solve_ivp'),
+    BenchmarkCase('batch_step', {'small': 1_000, 'medium': 10_000, 'large': 100_000}, _setup_batch_step,
+                  unit='state', description='PendulumSystem.batch_step'),
+    BenchmarkCase('batch_dopri5', {'small': 1_000, 'medium': 10_000, 'large': 100_000}, _setup_batch_dopri5,
+                  unit='state', description='PendulumSystem.batch_step_dopri5, rtol=1e-6'),
+    BenchmarkCase('control_tree_grid', {'small': 100, 'medium': 1_000, 'large': 10_000},
+                  _setup_control_tree_grid, unit='root', description='ControlTreeBuilder.build_trees_batch'),
+    BenchmarkCase('discretize', {'small': 10, 'medium': 100, 'large': 1_000}, _setup_discretize,
+                  unit='call', description='линеаризация + PendulumSystem.discretize'),
+    BenchmarkCase('spore_tree', {'small': 1, 'medium': 10, 'large': 50}, _setup_spore_tree,
+                  unit='tree', description='SporeTree(auto_create=True)', quiet=True),
+    BenchmarkCase('find_optimal_pairs', {'small': 1, 'medium': 3, 'large': 10}, _setup_find_optimal_pairs,
+                  repeats=3, unit='tree', description='find_optimal_pairs', quiet=True),
+    BenchmarkCase('optimize_tree_area', {'small': 1, 'medium': 3, 'large': 10}, _setup_optimize_tree_area,
+                  repeats=3, unit='tree', description='optimize_tree_area (SLSQP)', quiet=True),
+    BenchmarkCase('merge_ghost_tree', {'small': 1, 'medium': 5, 'large': 20}, _setup_merge_ghost_tree,
+                  repeats=3, unit='tree', description='BufferMergeManager.merge_ghost_tree', quiet=True),
+    BenchmarkCase('graph_export_npz', {'small': 1_000, 'medium': 10_000, 'large': 100_000},
+                  _setup_graph_export('npz'), repeats=3, unit='node', description='GraphSnapshot → .npz'),
+    BenchmarkCase('graph_export_json', {'small': 1_000, 'medium': 3_000, 'large': 10_000},
+                  _setup_graph_export('json'), repeats=3, unit='node', description='GraphSnapshot → JSON'),
+]
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Запуск
+# ──────────────────────────────────────────────────────────────────────
+def run_case(case: BenchmarkCase, size_label: str, seed: int) -> Dict:
+    """Запускает кейс на одном размере: прогрев + case.repeats замеров."""
+    size = case.sizes[size_label]
+    # Свой поток случайных чисел на (кейс, размер) — не зависит от состава прогона
+    rng = np.random.default_rng([seed, zlib.crc32(f"{case.name}:{size_label}".encode())])
+    result = {'case': case.name, 'size_label': size_label, 'size': size, 'unit': case.unit}
+
+    sink = open(os.devnull, 'w') if case.quiet else None
+    try:
+        with contextlib.redirect_stdout(sink) if sink else contextlib.nullcontext():
+            fn = case.setup(size, rng)
+            fn()  # прогрев: JIT, кэши импортов, ленивые модули
+
+            times = []
+            for _ in range(case.repeats):
+                start = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - start)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        return result
+    finally:
+        if sink:
+            sink.close()
+
+    times_ms = np.array(times) * 1000.0
+    median_ms = float(np.median(times_ms))
+    result.update({
+        'repeats': case.repeats,
+        'min_ms': round(float(times_ms.min()), 4),
+        'median_ms': round(median_ms, 4),
+        'mean_ms': round(float(times_ms.mean()), 4),
+        'per_unit_us': round(median_ms * 1000.0 / max(size, 1), 4),
+    })
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _environment() -> Dict:
+    import numba
+    import scipy
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'numba': numba.__version__,
+        'numba_threads': numba.config.NUMBA_NUM_THREADS,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+    }
+
+
+def run_benchmarks(cases: List[BenchmarkCase], size_labels: List[str], seed: int = 0,
+                   verbose: bool = True) -> Dict:
+    """
+    Запускает кейсы на выбранных размерах.
+
+    Returns:
+        dict: {'format_version', 'seed', 'environment', 'results': [...]}
+    """
+    results = []
+    # merge_ghost_tree и прочие экспорты пишут в ./buffer — уводим их во временную папку
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='bench_') as workdir:
+        os.chdir(workdir)
+        try:
+            for case in cases:
+                for label in size_labels:
+                    if label not in case.sizes:
+                        continue
+                    result = run_case(case, label, seed)
+                    results.append(result)
+                    if verbose:
+                        _print_result(result)
+        finally:
+            os.chdir(cwd)
+
+    return {'format_version': FORMAT_VERSION, 'seed': seed, 'environment': _environment(), 'results': results}
+
+
+def _key(result: Dict) -> str:
+    return f"{result['case']}[{result['size_label']}]"
+
+
+def _print_result(result: Dict) -> None:
+    if 'error' in result:
+        print(f"   ❌ {_key(result):<34} {result['error']}")
+        return
+    print(f"   {_key(result):<34} n={result['size']:<7} median {result['median_ms']:10.3f} мс"
+          f"   {result['per_unit_us']:10.2f} мкс/{result['unit']}")
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float = 1.3) -> List[Dict]:
+    """
+    Сравнивает медианы с эталоном.
+
+    Args:
+        threshold: во сколько раз кейс должен замедлиться, чтобы считаться регрессией
+
+    Returns:
+        list: по строке на кейс: {'key', 'baseline_ms', 'current_ms', 'ratio', 'status'}
+              status: 'regression' | 'improvement' | 'ok' | 'new' | 'error'
+    """
+    base = {_key(r): r for r in baseline.get('results', []) if 'error' not in r}
+    rows = []
+    for result in current.get('results', []):
+        key = _key(result)
+        row = {'key': key, 'baseline_ms': None, 'current_ms': result.get('median_ms'), 'ratio': None}
+        if 'error' in result:
+            row['status'] = 'error'
+        elif key not in base or base[key]['size'] != result['size']:
+            row['status'] = 'new'
+        else:
+            row['baseline_ms'] = base[key]['median_ms']
+            row['ratio'] = result['median_ms'] / max(base[key]['median_ms'], 1e-9)
+            if row['ratio'] > threshold:
+                row['status'] = 'regression'
+            elif row['ratio'] < 1.0 / threshold:
+                row['status'] = 'improvement'
+            else:
+                row['status'] = 'ok'
+        rows.append(row)
+    return rows
+
+
+def print_comparison(rows: List[Dict], baseline: Dict) -> None:
+    env = baseline.get('environment', {})
+    print(f"\n📊 СРАВНЕНИЕ С ЭТАЛОНОМ (commit {env.get('git_commit')}, {env.get('timestamp')}):")
+    icons = {'regression': '🐢', 'improvement': '🚀', 'ok': '  ', 'new': '🆕', 'error': '❌'}
+    for row in rows:
+        if row['ratio'] is None:
+            print(f"   {icons[row['status']]} {row['key']:<34} {row['status']}")
+            continue
+        print(f"   {icons[row['status']]} {row['key']:<34} {row['baseline_ms']:10.3f} → "
+              f"{row['current_ms']:10.3f} мс   ×{row['ratio']:.2f}")
+
+
+def save_json(data: Dict, path: str) -> str:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки горячих путей без окна Ursina")
+    parser.add_argument('--only', default='', help="кейсы через запятую (по умолчанию все)")
+    parser.add_argument('--sizes', default=','.join(SIZE_LABELS), help="размеры: small,medium,large")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="куда записать результаты (JSON)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="путь к эталону")
+    parser.add_argument('--save-baseline', action='store_true', help="сохранить результаты как эталон")
+    parser.add_argument('--compare', action='store_true', help="сравнить с эталоном")
+    parser.add_argument('--threshold', type=float, default=1.3, help="порог регрессии (отношение медиан)")
+    parser.add_argument('--fail-on-regression', action='store_true', help="код возврата 1 при регрессии")
+    parser.add_argument('--list', action='store_true', help="показать кейсы и выйти")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for case in CASES:
+            sizes = ', '.join(f"{label}={n}" for label, n in case.sizes.items())
+            print(f"{case.name:<20} {case.description:<40} {sizes}")
+        return 0
+
+    names = [name.strip() for name in args.only.split(',') if name.strip()]
+    unknown = set(names) - {case.name for case in CASES}
+    if unknown:
+        parser.error(f"неизвестные кейсы: {', '.join(sorted(unknown))}")
+    cases = [case for case in CASES if not names or case.name in names]
+    size_labels = [label.strip() for label in args.sizes.split(',') if label.strip()]
+
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline)
+
+    print(f"⏱️ Бенчмарки: {len(cases)} кейсов, размеры {', '.join(size_labels)}, seed={args.seed}")
+    results = run_benchmarks(cases, size_labels, seed=args.seed)
+    print(f"💾 Результаты: {save_json(results, output)}")
+
+    if args.save_baseline:
+        print(f"📌 Эталон: {save_json(results, baseline_path)}")
+
+    exit_code = 1 if any('error' in r for r in results['results']) else 0
+    if args.compare:
+        if not os.path.exists(baseline_path):
+            print(f"⚠️ Эталон не найден: {baseline_path} (запустите с --save-baseline)")
+            return exit_code
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare_results(results, baseline, threshold=args.threshold)
+        print_comparison(rows, baseline)
+        if args.fail_on_regression and any(row['status'] == 'regression' for row in rows):
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+"""
+Шаг сборки: заранее компилирует numba-ядра (src/logic/kernels.py)
+для всех явных сигнатур и сохраняет их в кэш numba (__pycache__).
+
+После этого демо и тесты загружают машинный код из кэша вместо JIT-компиляции.
+
+Для запуска из корня проекта:
+    python scripts/run/build_kernels.py
+"""
+
+import sys
+import os
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.logic.kernels import KERNELS, compile_kernels
+
+
+if __name__ == "__main__":
+    print(f"🔧 Компиляция {len(KERNELS)} numba-ядер...")
+    start = time.perf_counter()
+    compile_kernels(verbose=True)
+    print(f"✅ Ядра в кэше за {time.perf_counter() - start:.2f} с")
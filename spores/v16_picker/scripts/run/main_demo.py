@@ -17,14 +17,14 @@
 ✅ Консистентный интерфейс во всех демо
 """
 
+from time import perf_counter as _perf_counter
+_startup_t0 = _perf_counter()  # точка отсчёта для отчёта о времени запуска
+
 import sys
 import os
 from ursina import *
 import numpy as np
 import time
-from colorsys import hsv_to_rgb
-from matplotlib.colors import LinearSegmentedColormap
-import matplotlib.pyplot as plt
 import json
 import collections.abc
 
@@ -58,6 +58,13 @@ with open(os.path.join(project_root, 'config', 'json', 'sizes.json'), 'r') as f:
 
 # ColorManager загружает свой конфиг 'colors.json' самостоятельно
 
+# --- Отчёт о времени запуска (импорты и первый кадр) ---
+from src.utils.startup_timer import StartupTimer
+startup_timer = StartupTimer(t0=_startup_t0,
+                             enabled=config.get('debug', {}).get('startup_report', True))
+startup_timer.mark('ursina + конфиг')
+startup_timer.install_import_hook()
+
 # --- Основные импорты из нашего проекта ---
 from src.visual.spawn_area_visualizer import SpawnAreaVisualizer
 from src.logic.spawn_area import SpawnArea as SpawnAreaLogic
@@ -81,7 +88,15 @@ from src.managers.spawn_area_manager import SpawnAreaManager
 from src.managers.manual_spore_manager import ManualSporeManager  # v13_manual: для ручного создания спор
 from src.managers.picker_manager import PickerManager  # v16_picker: для отслеживания близких спор
 from src.utils.debug_output import init_debug_output
+from src.utils.tracer import init_tracer
 from src.managers.dt_manager import DTManager
+from src.logic.kernels import start_warmup_thread
+from src.utils.hot_reload import HotReloader, RESTART_EXIT_CODE
+
+# JIT-ядра маятника и площади подгружаются из кэша numba в фоне, пока строится сцена
+start_warmup_thread(verbose=True)
+
+startup_timer.mark('импорты проекта')
 
 print("=== ДЕМОНСТРАЦИЯ UI_SETUP ===")
 print("🎨 Готовые настройки UI для демо скриптов")
@@ -92,12 +107,28 @@ print("=" * 40)
 # ===== ИНИЦИАЛИЗАЦИЯ ОТЛАДОЧНОГО ВЫВОДА =====
 init_debug_output(config)
 print("✅ Система отладочного вывода инициализирована")
+if init_tracer(config).enabled:
+    print("✅ Трассировка кадров включена (debug.tracing)")
+
+# ===== ГОРЯЧАЯ ПЕРЕЗАГРУЗКА (watcher.py --hot или debug.hot_reload) =====
+# Логические модули перезагружаются на лету; изменения в модулях со сценой
+# под watcher.py завершают процесс кодом RESTART_EXIT_CODE, и watcher запускает
+# его заново. Без watcher (только debug.hot_reload) — лишь предупреждение.
+hot_reloader = None
+under_watcher = os.environ.get('SPORES_HOT_RELOAD') == '1'
+if under_watcher or config['debug'].get('hot_reload', False):
+    hot_reloader = HotReloader(
+        project_root,
+        on_restart_required=(lambda paths: os._exit(RESTART_EXIT_CODE)) if under_watcher else None)
+    if not hot_reloader.start():
+        hot_reloader = None
 
 # ===== НАСТРОЙКИ v13_manual =====
 USE_SPAWN_AREA = False  # v13_manual: отключаем автоматический spawn area для ручного создания спор
 
 # ===== ИНИЦИАЛИЗАЦИЯ =====
 app = Ursina()
+startup_timer.mark('окно Ursina')
 
 # ===== СОЗДАНИЕ МЕНЕДЖЕРОВ =====
 color_manager = ColorManager()
@@ -343,7 +374,7 @@ scene_setup.enable_input_manager_mode(True)
 scene_setup._update_cursor_state()
 
 # Дублирующая явная подписка — чтобы исключить рассинхронизацию
-dt_manager.subscribe_on_change(input_manager._on_dt_changed)
+dt_manager.subscribe_on_change(input_manager._on_dt_changed, deferred=True)
 print(f"[MAIN] subscribed InputManager._on_dt_changed to DTManager id={id(dt_manager)}")
 
 # (опционально) можно подписать и PredictionManager напрямую на событие, чтобы он только укорачивал свои линки
@@ -363,7 +394,8 @@ update_manager = UpdateManager(
     param_manager=settings_param,
     ui_setup=ui_setup,
     input_manager=input_manager,
-    manual_spore_manager=manual_spore_manager  # v13_manual: для обновления курсора превью
+    manual_spore_manager=manual_spore_manager,  # v13_manual: для обновления курсора превью
+    dt_manager=dt_manager  # изменения dt доставляются подписчикам раз в кадр
 )
 
 # Создаем словарь с поставщиками данных
@@ -429,6 +461,10 @@ if spawn_area_visualizer:
 if cost_surface_parent:
     zoom_manager.register_object(cost_surface_parent)
 
+# Граф прошлой сессии (config graph_journal.resume)
+if spore_manager.journal_graph is not None:
+    spore_manager.restore_from_journal()
+
 zoom_manager.update_transform()
 
 # ===== ГЕНЕРАЦИЯ КАНДИДАТСКИХ СПОР =====
@@ -445,6 +481,8 @@ print(f"   📷 Камера в позиции: {scene_setup.player.position}")
 # Вся логика обновления UI теперь внутри UI_setup!
 
 # ===== КОМАНДЫ ДЕМОНСТРАЦИИ =====
+startup_timer.mark('сцена и менеджеры')
+
 print("\n🎮 5. Команды демонстрации UI:")
 # ui_setup.show_demo_commands_help()
 # ui_setup.show_game_commands_help()
@@ -456,6 +494,9 @@ print("\n🎮 5. Команды демонстрации UI:")
 def update():
     """Глобальный обработчик обновлений."""
     update_manager.update_all()
+    startup_timer.on_frame()
+    if hot_reloader is not None:
+        hot_reloader.poll()
 
 def input(key):
     """Глобальный обработчик ввода."""
@@ -489,7 +530,7 @@ print("   ВРЕМЯ: [ (сброс dt), J (статистика dt)")
 print("   ИЗОБРАЖЕНИЯ: M (генерация всех отладочных картинок)")
 print("   ДЕРЕВЬЯ: K (режим), 7/8 (глубина), P (оптимизация)")
 print("   💡 Нажмите / для отображения полной справки по управлению")
-print("   ОТЛАДКА: H (debug toggle), O (оптимизация дерева)")
+print("   ОТЛАДКА: H (debug toggle), O (оптимизация дерева), B (anytime-оптимизация)")
 print("\n" + "="*40)
 print("🚀 СИМУЛЯЦИЯ ЗАПУЩЕНА 🚀")
 print("="*40)
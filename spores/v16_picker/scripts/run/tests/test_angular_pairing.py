@@ -0,0 +1,70 @@
+"""
+Тесты сортировки внуков по углу и разбиения на пары на индексах (без Ursina).
+Файл: scripts/run/tests/test_angular_pairing.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_angular_pairing.py
+"""
+
+import sys
+import os
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.logic.pendulum import PendulumSystem
+from src.logic.tree.spore_tree import SporeTree
+from src.logic.tree.spore_tree_config import SporeTreeConfig
+from src.logic.tree.angular_pairing import angular_order, pair_validity, pair_means
+
+
+def _reference_order(positions, origin, parents):
+    """Прежний алгоритм на списках: sorted по углу, roll к родителю 0, roll +1."""
+    items = sorted(range(len(positions)), reverse=True,
+                   key=lambda i: np.arctan2(positions[i][1] - origin[1], positions[i][0] - origin[0]))
+    offset = next((k for k, i in enumerate(items) if parents[i] == 0), 0)
+    items = items[offset:] + items[:offset]
+    if parents[items[1]] == 0:
+        items = items[-1:] + items[:-1]
+    return items
+
+
+def test_matches_list_sorting():
+    """Перестановка совпадает с прежней сортировкой списков словарей."""
+    rng = np.random.default_rng(3)
+    parents = np.repeat(np.arange(4), 2)
+    for _ in range(200):
+        positions = rng.normal(size=(8, 2))
+        origin = rng.normal(size=2)
+        order = angular_order(positions, origin, parents)
+        assert order.tolist() == _reference_order(positions, origin, parents)
+
+
+def test_spore_tree_returns_permutation():
+    """SporeTree хранит перестановку, пары от разных родителей, средние точки по ней."""
+    config = SporeTreeConfig(initial_position=np.array([0.4, -0.3]), dt_base=0.05,
+                             dt_grandchildren_factor=0.2, show_debug=False)
+    tree = SporeTree(PendulumSystem(), config, auto_create=True, show=False)
+
+    order = tree.sort_and_pair_grandchildren(show=False)
+    parents = np.array([gc['parent_idx'] for gc in tree.grandchildren])
+    positions = np.array([gc['position'] for gc in tree.grandchildren])
+
+    assert sorted(order.tolist()) == list(range(8))
+    # Якорь — внук родителя 0 в начале (или вторым после дополнительного roll +1)
+    assert 0 in (parents[order[0]], parents[order[1]])
+    assert pair_validity(parents, order).all()
+    assert [gc['global_idx'] for gc in tree.sorted_grandchildren] == order.tolist()
+    assert np.allclose(tree.calculate_mean_points(show=False),
+                       (positions[order[0::2]] + positions[order[1::2]]) / 2)
+    assert np.allclose(pair_means(positions, order), tree.mean_points)
+
+
+if __name__ == "__main__":
+    test_matches_list_sorting()
+    test_spore_tree_returns_permutation()
+    print("All angular pairing tests passed")
@@ -0,0 +1,111 @@
+"""
+Тесты anytime-оптимизации площади дерева (по кадрам, с тёплым стартом).
+Файл: scripts/run/tests/test_anytime_area_optimizer.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_anytime_area_optimizer.py
+"""
+
+import sys
+import os
+
+import numpy as np
+from scipy.optimize import OptimizeResult
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.logic.pendulum import PendulumSystem
+from src.logic.tree.spore_tree import SporeTree
+from src.logic.tree.spore_tree_config import SporeTreeConfig
+from src.logic.tree.pairs.find_optimal_pairs import find_optimal_pairs
+from src.logic.tree.area_opt import optimize_tree_area, AnytimeAreaOptimizer
+
+ROOT = np.array([0.3, 0.2])
+DT = 0.1
+
+
+def _run_frames(optimizer, roots, dt=DT, shown=None):
+    """Кадры как в InputManager: показанный вектор меняется только на улучшениях."""
+    for root in roots:
+        previous = shown
+        dt_vector = optimizer.step(root, dt, shown_dt_vector=shown)
+        if dt_vector is not None:
+            if previous is not None:
+                assert optimizer.merit(dt_vector) < optimizer.merit(previous)
+            shown = dt_vector
+    return shown
+
+
+def test_converges_to_full_optimization():
+    """На неподвижном корне кадры по 2 итерации сходятся к результату optimize_tree_area."""
+    pendulum = PendulumSystem()
+    optimizer = AnytimeAreaOptimizer(pendulum, iterations_per_frame=2)
+    shown = _run_frames(optimizer, [ROOT] * 40)
+    violation, negative_area = optimizer.merit(shown)
+    optimizer.reset()
+
+    tree = SporeTree(pendulum, config=SporeTreeConfig(initial_position=ROOT, dt_base=DT,
+                                                      dt_grandchildren_factor=0.2, show_debug=False),
+                     auto_create=True)
+    full = optimize_tree_area(tree, find_optimal_pairs(tree, show=False), pendulum,
+                              constraint_distance=1e-3, dt_bounds=(0.001, DT))
+
+    assert full['success'] and optimizer._thread is None
+    assert violation == 0.0 and abs(-negative_area - full['optimized_area']) < 1e-4 * full['optimized_area']
+    assert optimizer.frames == 40 and optimizer.improvements > 0
+
+    # Знаки — как у dt узлов дерева, модули — внутри границ
+    signs = np.sign([node['dt'] for node in tree.children + tree.grandchildren])
+    assert np.array_equal(np.sign(shown), signs)
+    assert np.all((np.abs(shown) >= 0.001) & (np.abs(shown) <= DT + 1e-12))
+
+
+def test_warm_start_follows_moving_root():
+    """Корень двигается: пары не ищутся заново, решатель не перезапускается каждый кадр, итог допустим."""
+    pendulum = PendulumSystem()
+    optimizer = AnytimeAreaOptimizer(pendulum, iterations_per_frame=2, pairs_refresh_distance=0.05)
+    roots = [ROOT + np.array([0.001 * k, -0.0005 * k]) for k in range(20)] + [ROOT + [0.019, -0.0095]] * 30
+    shown = _run_frames(optimizer, roots)
+
+    assert optimizer.pair_searches == 1 and optimizer.solver_runs < optimizer.frames // 4
+    violation, negative_area = optimizer.merit(shown)
+    assert violation == 0.0 and -negative_area > 0
+    optimizer.reset()
+
+
+def test_dt_change_rescales_and_refreshes_pairs():
+    """Смена dt: пары ищутся заново, |dt| не выходит за новый dt."""
+    optimizer = AnytimeAreaOptimizer(PendulumSystem(), iterations_per_frame=3)
+    shown = _run_frames(optimizer, [ROOT] * 10)
+    assert optimizer.pair_searches == 1
+
+    # Превью масштабирует InputManager._on_dt_changed, тёплый старт — сам оптимизатор
+    shown = _run_frames(optimizer, [ROOT] * 10, dt=DT / 2, shown=shown / 2)
+    assert optimizer.pair_searches == 2 and optimizer.dt_base == DT / 2
+    assert np.all(np.abs(optimizer.x) <= DT / 2 + 1e-12) and np.all(np.abs(shown) <= DT / 2 + 1e-12)
+    optimizer.reset()
+    assert optimizer._thread is None and optimizer.x is None
+
+
+def test_callback_accepts_bare_vector():
+    """Старые SciPy передают в callback ndarray, новые — OptimizeResult с полем x."""
+    optimizer = AnytimeAreaOptimizer(PendulumSystem(), iterations_per_frame=3)
+    optimizer.dt_base = DT
+    optimizer._budget = 3
+    optimizer._on_iteration(np.full(12, 0.05))
+    assert np.array_equal(optimizer.x, np.full(12, 0.05))
+
+    optimizer._on_iteration(OptimizeResult(x=np.full(12, 0.5)))
+    assert np.array_equal(optimizer.x, np.full(12, DT))  # обрезано верхней границей
+    assert optimizer._budget == 1
+
+
+if __name__ == "__main__":
+    test_converges_to_full_optimization()
+    test_warm_start_follows_moving_root()
+    test_dt_change_rescales_and_refreshes_pairs()
+    test_callback_accepts_bare_vector()
+    print("All anytime area optimizer tests passed")
@@ -0,0 +1,156 @@
+"""
+Тесты пакетной материализации буферного графа (без окна Ursina).
+Файл: scripts/run/tests/test_bulk_materialize.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_bulk_materialize.py
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+from scipy import optimize
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.logic.pendulum import PendulumSystem
+from src.logic.spore_logic import SporeLogic
+from src.logic.optimizer import SporeOptimizer
+from src.core.graph_snapshot import GraphSnapshot
+from src.managers.spore_manager import SporeManager
+from src.managers.color_manager import ColorManager
+from src.managers.buffer_merge_manager import BufferMergeManager
+
+
+def _zoom_manager():
+    """Минимальный ZoomManager: пакетная регистрация в словарь объектов."""
+    zoom_manager = SimpleNamespace(a_transformation=1.0, b_translation=np.zeros(3),
+                                   spores_scale=1.0, objects={})
+    zoom_manager.register_objects = lambda objects: zoom_manager.objects.update(objects)
+    return zoom_manager
+
+
+def test_batch_optimizer_matches_lbfgs():
+    """Векторный поиск шага в пределах 1e-6 от L-BFGS-B: из find_optimal_step и из найденной точки."""
+    pendulum = PendulumSystem()
+    optimizer = SporeOptimizer(pendulum, {})
+    rng = np.random.default_rng(0)
+    spores = [SimpleNamespace(logic=SporeLogic(pendulum=pendulum, dt=0.05, goal_position_2d=goal,
+                                               initial_position_2d=rng.uniform(-3, 3, 2)))
+              for goal in [np.array([np.pi, 0.0])] * 30 + list(rng.uniform(-3, 3, (30, 2)))]
+
+    controls, dts = optimizer.find_optimal_steps_batch(spores)
+    bounds = pendulum.get_control_bounds()
+    assert np.all((controls >= bounds[0]) & (controls <= bounds[1]))
+    assert np.all((dts >= 0.01) & (dts <= 0.1))
+    for spore, control, dt in zip(spores, controls, dts):
+        cost = optimizer._objective_function(np.array([control, dt]), spore)
+        assert cost <= optimizer.find_optimal_step(spore).fun + 1e-6
+        polished = optimize.minimize(optimizer._objective_function, [control, dt], args=(spore,),
+                                     method='L-BFGS-B', bounds=[bounds, (0.01, 0.1)])
+        assert cost <= polished.fun + 1e-6
+
+
+def test_materialize_publishes_one_version():
+    """Все споры и связи — одна версия графа; картинка и снимок пишутся в фоне по снимку."""
+    # Линки ищут models/arrow.obj как в main_demo
+    from ursina import application
+    application.asset_folder = Path(project_root) / 'scripts' / 'run'
+    application.compressed_models_folder = Path(tempfile.gettempdir()) / 'models_compressed'
+
+    pendulum = PendulumSystem()
+    zoom_manager = _zoom_manager()
+    spore_manager = SporeManager(pendulum, zoom_manager, None, ColorManager(), config={})
+    versions = []
+    spore_manager.subscribe_graph_change(versions.append)
+
+    manager = BufferMergeManager()
+    manager.buffer_positions = {'buffer_root': np.zeros(2)}
+    manager.buffer_positions.update({f"buffer_{i}": np.array([0.1 * i, -0.05 * i]) for i in range(1, 40)})
+    # Знак управления задаёт цвет и тип ребра; связь на несуществующую спору пропускается с ошибкой
+    manager.buffer_links = [
+        {'parent_id': 'buffer_root', 'child_id': 'buffer_1', 'link_type': 'ghost_max',
+         'source_info': "root-child_0(dt=0.050,u=2.0)"},
+        {'parent_id': 'buffer_2', 'child_id': 'buffer_root', 'link_type': 'ghost_min',
+         'source_info': "root-child_1(dt=-0.030,u=-1.5)"},
+        {'parent_id': 'buffer_1', 'child_id': 'buffer_3', 'link_type': 'default',
+         'source_info': "child_0-grandchild_0(dt=0.020,u=0.0)"},
+        {'parent_id': 'buffer_3', 'child_id': 'buffer_missing', 'link_type': 'default',
+         'source_info': "child_1-grandchild_0(dt=0.020,u=1.0)"},
+    ]
+    manager._manual_spore_manager_ref = SimpleNamespace(spore_groups_history=[], group_links_history=[])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager.export_dir = tmp
+        result = manager.materialize_buffer_to_real(spore_manager=spore_manager, zoom_manager=zoom_manager,
+                                                    color_manager=spore_manager.color_manager,
+                                                    pendulum=pendulum, config={})
+        assert manager.wait_for_output(timeout=60)
+        snapshot = GraphSnapshot.load(result['stats']['real_graph_export_path'])
+        assert os.path.exists(result['stats']['visualization_path'])
+
+    assert result['success'] and result['stats']['spores_created'] == 40
+    assert result['stats']['links_created'] == 3 and len(result['stats']['errors']) == 1
+    assert versions == [spore_manager.graph_version] and len(spore_manager.graph.nodes) == 40
+    assert snapshot.num_nodes == 40 and snapshot.is_goal.tolist().count(True) == 1
+    assert result['spores']['buffer_root'].is_goal
+
+    spores = list(result['spores'].values())
+    assert len({spore.id for spore in spores}) == 40
+    assert all(spore.logic.optimal_dt >= 0.01 for spore in spores)
+
+    # Связи: визуальные номера в link_id, dt/управление из source_info, цвет и тип ребра по знаку
+    links = result['links']
+    expected = {('buffer_root', 'buffer_1'): (0.05, 2.0, 'ghost_max', 'real_max'),
+                ('buffer_2', 'buffer_root'): (-0.03, -1.5, 'ghost_min', 'real_min'),
+                ('buffer_1', 'buffer_3'): (0.02, 0.0, 'link_default', 'real_default')}
+    assert set(links) == set(expected)
+    visual_number = {id(spore): i for i, spore in enumerate(spore_manager.objects, start=1)}
+    for (parent_id, child_id), (dt, control, color_key, link_type) in expected.items():
+        link = links[(parent_id, child_id)]
+        parent, child = result['spores'][parent_id], result['spores'][child_id]
+        assert link.parent_spore is parent and link.child_spore is child
+        assert link.link_id == f"link_{visual_number[id(parent)]}_to_{visual_number[id(child)]}"
+        assert link.dt_value == dt and link.control_value == control
+        assert link.color == spore_manager.color_manager.get_color('link', color_key)
+        edge = spore_manager.graph.get_edge_info(str(parent.spore_id), str(child.spore_id))
+        assert edge.link_type == link_type and edge.link_object is link
+    assert len(spore_manager.graph.edges) == 3 and spore_manager.links == list(links.values())
+    assert snapshot.num_edges == 3
+
+    # В ZoomManager регистрируются только новые споры и связи
+    assert set(zoom_manager.objects) == {spore._zoom_manager_key for spore in spores} | \
+        {link._zoom_manager_key for link in links.values()}
+    assert manager._manual_spore_manager_ref.spore_groups_history == [spores]
+    assert manager._manual_spore_manager_ref.group_links_history == [list(links.values())]
+    assert manager.buffer_positions == {} and manager.buffer_links == []
+
+
+def test_add_links_bulk():
+    """Пакет линков — рёбра в графе и одно уведомление подписчиков."""
+    spore_manager = SporeManager(PendulumSystem(), _zoom_manager(), None, ColorManager(), config={})
+    versions = []
+    spore_manager.subscribe_graph_change(versions.append)
+    spores = [SimpleNamespace(id=i, spore_id=f"s{i}") for i in range(3)]
+    links = [SimpleNamespace(link_id=f"l{i}", parent_spore=spores[i], child_spore=spores[i + 1],
+                             dt_value=0.05, control_value=2.0) for i in range(2)]
+
+    spore_manager.add_links_bulk(links, ['real_max', 'real_max'])
+    assert spore_manager.links == links and len(spore_manager.graph.edges) == 2
+    assert len(versions) == 1
+    spore_manager.add_links_bulk([], [])
+    assert len(versions) == 1
+
+
+if __name__ == "__main__":
+    test_batch_optimizer_matches_lbfgs()
+    test_materialize_publishes_one_version()
+    test_add_links_bulk()
+    print("All bulk materialize tests passed")
@@ -0,0 +1,59 @@
+"""
+Тесты пакетного построения ControlTreeBuilder (без Ursina).
+Файл: scripts/run/tests/test_control_tree_batch.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_control_tree_batch.py
+"""
+
+import sys
+import os
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.logic.pendulum import PendulumSystem
+from src.logic.control_tree import ControlTreeBuilder
+
+_DT = np.array([0.05, 0.08, 0.1, 0.03, 0.07, 0.06, 0.09, 0.04])
+
+
+def test_batch_matches_single_trees():
+    """build_trees_batch по сетке корней совпадает с build_tree для каждого корня."""
+    builder = ControlTreeBuilder(PendulumSystem(), dt_vector=_DT)
+    roots = np.array([[0.3, -0.2], [-1.0, 0.5], [2.0, 1.5]])
+
+    batch = builder.build_trees_batch(roots)
+    assert batch['points'].shape == (3, 8, 3, 2)
+    for r, root in enumerate(roots):
+        tree = builder.build_tree(root)
+        for traj in tree['trajectories']:
+            assert np.allclose(batch['points'][r, traj.id], np.array(traj.points))
+        for group in tree['convergence_info']['groups']:
+            assert np.isclose(batch['max_deviation'][r, group['group_id']], group['max_deviation'])
+
+
+def test_accuracy_mode_matches_rk45():
+    """Режим с допуском совпадает с пошаговым solve_ivp лучше, чем один RK4-шаг."""
+    pendulum = PendulumSystem()
+    root = np.array([0.3, -0.2])
+    fast = ControlTreeBuilder(pendulum, dt_vector=_DT).build_tree(root)
+    accurate = ControlTreeBuilder(pendulum, dt_vector=_DT, tolerance=1e-10).build_tree(root)
+
+    for traj_fast, traj_accurate in zip(fast['trajectories'], accurate['trajectories']):
+        state = root.copy()
+        for u, dt in traj_fast.sequence:
+            state = pendulum.scipy_rk45_step(state, u, dt)
+        error_fast = np.abs(traj_fast.points[-1] - state).max()
+        error_accurate = np.abs(traj_accurate.points[-1] - state).max()
+        assert error_accurate < 1e-7 and error_accurate <= error_fast
+
+
+if __name__ == "__main__":
+    test_batch_matches_single_trees()
+    test_accuracy_mode_matches_rk45()
+    print("All control tree batch tests passed")
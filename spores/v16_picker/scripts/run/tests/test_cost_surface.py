@@ -0,0 +1,67 @@
+"""
+Тесты построителя поверхности стоимости (без Ursina).
+Файл: scripts/run/tests/test_cost_surface.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_cost_surface.py
+"""
+
+import sys
+import os
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.logic.cost_function import CostFunction
+from src.logic.cost_surface import CostSurfaceBuilder, marching_squares
+from src.logic.spawn_area import SpawnArea
+
+
+def test_cost_many_matches_scalar():
+    """get_cost_many / get_gradient_many совпадают с поточечными версиями."""
+    cost = CostFunction(np.array([1.0, -0.5]), k=0.3, c=2.0)
+    points = np.random.default_rng(0).normal(size=(50, 2))
+
+    expected_cost = np.array([cost.get_cost(p) for p in points])
+    expected_grad = np.array([cost.get_gradient(p) for p in points])
+
+    assert np.allclose(cost.get_cost_many(points), expected_cost)
+    assert np.allclose(cost.get_gradient_many(points), expected_grad)
+
+
+def test_marching_squares_circle():
+    """Линия уровня x² + z² = 0.5 лежит на окружности радиуса √0.5."""
+    x = np.linspace(-1, 1, 60)
+    z = np.linspace(-1, 1, 50)
+    gx, gz = np.meshgrid(x, z)
+    segments = marching_squares(x, z, gx**2 + gz**2, 0.5)
+
+    assert segments.shape[1:] == (2, 2)
+    radii = np.linalg.norm(segments, axis=2)
+    assert np.allclose(radii, np.sqrt(0.5), atol=5e-3)
+
+
+def test_builder_cache():
+    """Повторная сборка с теми же параметрами берётся из кэша."""
+    cost = CostFunction(np.array([1.0, 0.0]))
+    area = SpawnArea(np.array([0.0, 0.0]), np.array([1.0, 0.0]), 0.9)
+    builder = CostSurfaceBuilder(cost, area)
+
+    surface = builder.build(boundary_points=32, interior_min_radius=0.2, num_levels=5, grid_resolution=40)
+    assert surface is not None
+    assert len(surface.contours) > 0
+    assert builder.build(boundary_points=32, interior_min_radius=0.2, num_levels=5, grid_resolution=40) is surface
+
+    area.set_eccentricity(0.8)
+    assert builder.build(boundary_points=32, interior_min_radius=0.2, num_levels=5, grid_resolution=40) is not surface
+    assert builder.get_cache_stats() == {'size': 2, 'hits': 1, 'misses': 2}
+
+
+if __name__ == "__main__":
+    test_cost_many_matches_scalar()
+    test_marching_squares_circle()
+    test_builder_cache()
+    print("All cost surface tests passed")
@@ -0,0 +1,107 @@
+"""
+Тесты категорий отладочного вывода (без Ursina).
+Файл: scripts/run/tests/test_debug_output.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_debug_output.py
+"""
+
+import ast
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.utils.debug_output import CategoryLogger, DebugOutput, DEBUG, INFO, WARNING
+
+
+class _ListWriter:
+    def __init__(self):
+        self.lines = []
+
+    def write(self, text):
+        self.lines.append(text)
+
+
+def test_levels_and_lazy_formatting():
+    """Сообщения ниже уровня не форматируются, ленивое сообщение вызывается один раз."""
+    writer = _ListWriter()
+    log = CategoryLogger('merge', writer, level=INFO)
+    calls = []
+
+    def message():
+        calls.append(1)
+        return "дорогое сообщение"
+
+    log.debug(message)
+    assert calls == [] and writer.lines == []
+
+    log.info(message)
+    log.warning("позиция:", 1.5, end="")
+    assert calls == [1]
+    assert writer.lines == ["дорогое сообщение\n", "позиция: 1.5"]
+    assert log.is_enabled(WARNING) and not log.is_enabled(DEBUG)
+
+
+def test_rate_limit_counts_suppressed():
+    """Сверх лимита сообщения подавляются, счётчик печатается со следующим сообщением."""
+    writer = _ListWriter()
+    log = CategoryLogger('picker', writer, level=INFO, rate_limit=3)
+    for i in range(10):
+        log.info(f"сообщение {i}")
+    log.error("ошибка")  # ошибки не ограничиваются
+
+    assert writer.lines[:3] == ["сообщение 0\n", "сообщение 1\n", "сообщение 2\n"]
+    assert "подавлено сообщений: 7" in writer.lines[3]
+    assert writer.lines[3].endswith("ошибка\n")
+
+
+def test_log_levels_override_flags():
+    """log_levels из конфига переопределяют флаги enable_*."""
+    debug = DebugOutput({'debug': {'enable_detailed_evolution': True,
+                                   'log_levels': {'evolution': 'off', 'trajectory': 'info'}}})
+    assert not debug.is_evolution_enabled()
+    assert debug.is_trajectory_enabled()
+
+
+def test_category_calls_format_lazily():
+    """Вызовы категорий в src не форматируют f-строки заранее, а постоянные строки — без лямбды."""
+    lazy_functions = {'debug_print', 'evolution_print', 'candidate_print', 'trajectory_print'}
+    eager, needless_lambda = [], []
+    for directory, _, files in os.walk(os.path.join(project_root, 'src')):
+        for name in files:
+            if not name.endswith('.py'):
+                continue
+            path = os.path.join(directory, name)
+            with open(path, encoding='utf-8') as f:
+                tree = ast.parse(f.read())
+            for node in ast.walk(tree):
+                if not isinstance(node, ast.Call) or not node.args:
+                    continue
+                func = node.func
+                is_category = (isinstance(func, ast.Name) and func.id in lazy_functions) or \
+                    (isinstance(func, ast.Attribute) and func.attr in ('debug', 'info')
+                     and isinstance(func.value, ast.Name) and func.value.id == '_log')
+                message = node.args[0]
+                if is_category and isinstance(message, ast.JoinedStr) and \
+                        any(isinstance(part, ast.FormattedValue) for part in message.values):
+                    eager.append(f"{os.path.relpath(path, project_root)}:{node.lineno}")
+                # Лямбда без подстановок только мешает читать: строка и так постоянная
+                body = message.body if isinstance(message, ast.Lambda) else None
+                constant_body = isinstance(body, ast.Constant) or (isinstance(body, ast.JoinedStr) and not any(
+                    isinstance(part, ast.FormattedValue) for part in body.values))
+                if is_category and constant_body:
+                    needless_lambda.append(f"{os.path.relpath(path, project_root)}:{node.lineno}")
+    assert eager == [], eager
+    assert needless_lambda == [], needless_lambda
+
+
+if __name__ == "__main__":
+    test_levels_and_lazy_formatting()
+    test_rate_limit_counts_suppressed()
+    test_log_levels_override_flags()
+    test_category_calls_format_lazily()
+    print("All debug output tests passed")
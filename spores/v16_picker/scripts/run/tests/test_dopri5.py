@@ -0,0 +1,64 @@
+"""
+Тесты JIT-интегратора Дорманда–Принса (без Ursina).
+Файл: scripts/run/tests/test_dopri5.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_dopri5.py
+"""
+
+import sys
+import os
+
+import numpy as np
+from scipy.integrate import solve_ivp
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.logic.pendulum import PendulumSystem
+
+
+def _reference(pendulum, state, control, t):
+    return solve_ivp(lambda _, y: pendulum.pendulum_dynamics(y, control), [0.0, t], state,
+                     rtol=1e-12, atol=1e-12).y[:, -1]
+
+
+def _random_triples(n=40, seed=0):
+    rng = np.random.default_rng(seed)
+    states = np.column_stack((rng.uniform(-3.0, 3.0, n), rng.uniform(-2.0, 2.0, n)))
+    return states, rng.uniform(-2.0, 2.0, n), rng.uniform(-1.0, 1.0, n)
+
+
+def test_batch_forward_and_backward_match_reference():
+    """Пакет с dt обоих знаков совпадает с эталоном на уровне допусков; dt = 0 не меняет состояние."""
+    pendulum = PendulumSystem()
+    states, controls, dts = _random_triples()
+    dts[0] = 0.0
+
+    result = pendulum.batch_step_dopri5(states, controls, dts, rtol=1e-9, atol=1e-11)
+    reference = np.array([_reference(pendulum, s, u, t) for s, u, t in zip(states, controls, dts)])
+    assert np.abs(result - reference).max() < 1e-7
+    assert np.array_equal(result[0], states[0])
+    assert np.allclose(pendulum.step(states[1], controls[1], dts[1], method='dopri5'),
+                       pendulum.scipy_rk45_step(states[1], controls[1], dts[1]), atol=1e-4)
+
+
+def test_dense_output_inside_interval():
+    """Плотный вывод даёт состояние в промежуточные моменты и совпадает с концами интервала."""
+    pendulum = PendulumSystem()
+    states, controls, dts = _random_triples(seed=1)
+    dense = pendulum.batch_dense_dopri5(states, controls, dts, rtol=1e-10, atol=1e-12)
+
+    assert np.array_equal(dense.at_fraction(0.0), states)
+    assert np.allclose(dense.at_fraction(1.0), dense.final_states, atol=1e-12)
+    middle = dense.at_fraction(0.37)
+    reference = np.array([_reference(pendulum, s, u, 0.37 * t) for s, u, t in zip(states, controls, dts)])
+    assert np.abs(middle - reference).max() < 1e-8
+
+
+if __name__ == "__main__":
+    test_batch_forward_and_backward_match_reference()
+    test_dense_output_inside_interval()
+    print("All DOPRI5 tests passed")
@@ -0,0 +1,86 @@
+"""
+Тесты слияния уведомлений DTManager (без Ursina).
+Файл: scripts/run/tests/test_dt_manager.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_dt_manager.py
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.managers.dt_manager import DTManager
+from src.managers.input_manager import InputManager
+
+
+def test_dt_changes_coalesced_per_frame():
+    """Пять нажатий за кадр — одно уведомление; отложенный подписчик ждёт паузы."""
+    dt_manager = DTManager({'pendulum': {'dt': 0.05}, 'dt_manager': {'deferred_idle_frames': 2}}, None)
+    calls = []
+    dt_manager.subscribe_on_change(lambda: calls.append(('fast', dt_manager.get_dt())))
+    dt_manager.subscribe_on_change(lambda: calls.append(('heavy', dt_manager.get_dt())), deferred=True)
+
+    for _ in range(5):
+        dt_manager.increase_dt()
+    assert calls == []
+
+    dt_manager.on_frame()
+    assert calls == [('fast', dt_manager.get_dt())]
+
+    dt_manager.decrease_dt()
+    dt_manager.on_frame()
+    dt_manager.on_frame()
+    assert [name for name, _ in calls] == ['fast', 'fast']
+    dt_manager.on_frame()
+    assert calls[-1] == ('heavy', dt_manager.get_dt())
+    assert dt_manager.notify_stats == {'changes': 6, 'propagations': 2, 'deferred_runs': 1}
+    assert not dt_manager.has_pending_changes()
+
+
+def _manual_spore_manager(config):
+    """Минимальный ManualSporeManager: только то, что трогают сброс dt и _on_dt_changed."""
+    prediction_manager = SimpleNamespace(clear_predictions=lambda: None, update_links_max_length=lambda _: None,
+                                         prediction_links=[], debug_ghost_tree=False)
+    return SimpleNamespace(deps=SimpleNamespace(config=config), prediction_manager=prediction_manager,
+                           _update_predictions=lambda: None, ghost_tree_dt_vector=None, ghost_dt_baseline=None)
+
+
+def test_reset_from_changed_dt_keeps_standard_vector():
+    """Сброс dt (оба обработчика): отложенное уведомление не масштабирует стандартный вектор повторно."""
+    config = {'pendulum': {'dt': 0.05}, 'dt_manager': {'deferred_idle_frames': 2},
+              'tree': {'dt_grandchildren_factor': 0.2}}
+    for handler_name in ('_handle_dt_reset', '_handle_standard_reset'):
+        dt_manager = DTManager(config, None)
+        manual_spore_manager = _manual_spore_manager(config)
+        input_manager = InputManager(manual_spore_manager=manual_spore_manager, dt_manager=dt_manager)
+
+        # Превью подстроено под изменённый dt
+        for _ in range(4):
+            dt_manager.increase_dt()
+        manual_spore_manager.ghost_tree_dt_vector = np.full(12, 0.03)
+        manual_spore_manager.ghost_dt_baseline = dt_manager.get_dt()
+        for _ in range(3):
+            dt_manager.on_frame()
+
+        getattr(input_manager, handler_name)()
+        for _ in range(3):
+            dt_manager.on_frame()
+
+        expected = np.array([0.05, -0.05, 0.05, -0.05] + [0.01, -0.01] * 4)
+        assert not dt_manager.has_pending_changes()
+        assert np.allclose(manual_spore_manager.ghost_tree_dt_vector, expected), handler_name
+        assert manual_spore_manager.ghost_dt_baseline == 0.05
+
+
+if __name__ == "__main__":
+    test_dt_changes_coalesced_per_frame()
+    test_reset_from_changed_dt_keeps_standard_vector()
+    print("All DTManager tests passed")
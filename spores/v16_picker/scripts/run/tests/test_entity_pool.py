@@ -0,0 +1,122 @@
+"""
+Тесты пула сущностей: споры, столбы и визуализаторы предсказаний (без окна Ursina).
+Файл: scripts/run/tests/test_entity_pool.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_entity_pool.py
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from ursina import scene
+
+from src.core.spore import Spore
+from src.visual.pillar import Pillar
+from src.visual.prediction_visualizer import PredictionVisualizer
+from src.visual.entity_pool import EntityPool, entity_pool
+from src.logic.pendulum import PendulumSystem
+from src.logic.cost_function import CostFunction
+from src.managers.id_manager import IDManager
+
+
+def _zoom_manager():
+    """Минимальный ZoomManager: трансформация и словарь зарегистрированных объектов."""
+    zoom_manager = SimpleNamespace(a_transformation=1.0, b_translation=np.zeros(3),
+                                   spores_scale=1.0, objects={})
+    zoom_manager.register_object = lambda obj, name: zoom_manager.objects.__setitem__(name, obj)
+    zoom_manager.unregister_object = lambda name: zoom_manager.objects.pop(name, None)
+    return zoom_manager
+
+
+def _root_spore(id_manager):
+    return Spore(dt=0.1, pendulum=PendulumSystem(), goal_position=(0, 0),
+                 position=(0.1, 0.0, 0.2), scale=0.05, id_manager=id_manager)
+
+
+def test_recycled_spore_looks_new():
+    """Спора из пула получает новый spore_id и теряет навешенные поля."""
+    pool = EntityPool()
+    id_manager = IDManager()
+    spore = pool.acquire(Spore, dt=0.1, pendulum=PendulumSystem(), goal_position=(0, 0),
+                         position=(0.5, 0.0, -0.5), id_manager=id_manager)
+    spore.id = 42
+    spore._zoom_manager_key = 'spore_1'
+    spore.mark_evolution_completed()
+    zoom_manager = _zoom_manager()
+    zoom_manager.register_object(spore, 'spore_1')
+
+    pool.release(spore, zoom_manager)
+    assert not spore.enabled and 'spore_1' not in zoom_manager.objects
+    pool.release(spore)  # повторное освобождение игнорируется
+    assert pool.stats()['Spore']['free'] == 1
+
+    again = pool.acquire(Spore, dt=0.2, pendulum=PendulumSystem(), goal_position=(1, 1),
+                         position=(-0.3, 0.0, 0.4), is_ghost=True, id_manager=id_manager)
+    assert again is spore and again.enabled
+    assert again.spore_id == 1 and again.is_ghost and not again.evolution_completed
+    assert not isinstance(again.id, int) and not hasattr(again, '_zoom_manager_key')
+    assert np.allclose(again.logic.position_2d, [-0.3, 0.4]) and again.dt == 0.2
+    assert np.allclose(again.real_position, [-0.3, 0.0, 0.4])
+    assert pool.stats()['Spore'] == {'created': 1, 'reused': 1, 'released': 1, 'destroyed': 0, 'free': 0}
+
+
+def test_clone_and_foreign_entities():
+    """clone() идёт через общий пул; сущность, созданная в обход пула, уничтожается."""
+    id_manager = IDManager()
+    root = _root_spore(id_manager)
+    clone = root.clone(new_position=np.array([0.3, 0.0, 0.3]))
+    entity_pool.release(clone)
+    assert root.clone() is clone and np.allclose(clone.real_position, root.real_position)
+    entity_pool.release(clone)
+
+    pool = EntityPool()
+    pool.release(root)
+    assert pool.stats()['Spore']['destroyed'] == 1 and pool.stats()['Spore']['free'] == 0
+
+
+def test_prediction_cycles_create_no_new_nodes():
+    """Пересоздание визуализаторов (призрак, ангел, столб) в установившемся режиме не создаёт узлов."""
+    id_manager = IDManager()
+    zoom_manager = _zoom_manager()
+    root = _root_spore(id_manager)
+    config = {'spore': {'show_ghosts': True},
+              'angel': {'show_angels': True, 'show_pillars': True, 'pillar_width': 0.05}}
+    cost_function = CostFunction(goal_position_2d=np.zeros(2))
+
+    def cycle(state):
+        visualizers = [PredictionVisualizer(root, root.color_manager, zoom_manager, cost_function,
+                                            config, f"pred_{i}", id_manager) for i in range(4)]
+        for visualizer in visualizers:
+            visualizer.update(state)
+        assert all(isinstance(v.pillar, Pillar) for v in visualizers)
+        for visualizer in visualizers:
+            visualizer.destroy()
+
+    cycle(np.array([0.3, 0.1]))
+    n_entities = len(scene.entities)
+    before = entity_pool.stats()
+    for k in range(5):
+        cycle(np.array([0.3, 0.1 * k]))
+
+    after = entity_pool.stats()
+    assert len(scene.entities) == n_entities
+    assert after['Spore']['created'] == before['Spore']['created']
+    assert after['Pillar']['created'] == before['Pillar']['created']
+    assert after['Spore']['reused'] - before['Spore']['reused'] == 5 * 8  # призрак + ангел
+    assert zoom_manager.objects == {}  # ангелы и столбы сняты с регистрации
+
+
+if __name__ == "__main__":
+    test_recycled_spore_looks_new()
+    test_clone_and_foreign_entities()
+    test_prediction_cycles_create_no_new_nodes()
+    print("All entity pool tests passed")
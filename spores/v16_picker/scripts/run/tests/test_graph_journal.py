@@ -0,0 +1,209 @@
+"""
+Тесты журнала изменений графа и загрузчика без Ursina.
+Файл: scripts/run/tests/test_graph_journal.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_graph_journal.py
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.core.spore_graph import SporeGraph
+from src.core.graph_journal import GraphJournal, load_graph_journal
+from src.managers.valence_manager import ValenceManager
+from src.logic.pendulum import PendulumSystem
+from src.core.spore import Spore
+from src.visual.link import Link
+from src.managers.spore_manager import SporeManager
+from src.managers.color_manager import ColorManager
+
+
+def _spore(spore_id, x, y, is_goal=False):
+    return SimpleNamespace(spore_id=spore_id, is_goal=is_goal, calc_2d_pos=lambda: np.array([x, y]),
+                           logic=SimpleNamespace(optimal_dt=0.05, optimal_control=np.array([2.0])))
+
+
+def _link(link_id, dt, control):
+    return SimpleNamespace(link_id=link_id, dt_value=dt, control_value=control)
+
+
+def _grow(graph, prefix, n_chains=6):
+    """Цепочки с чередованием управления — чтобы у валентности были внуки."""
+    root = _spore(f"{prefix}0", 0.0, 0.0, is_goal=True)
+    graph.add_spore(root)
+    for k in range(n_chains):
+        parent = root
+        for depth in range(3):
+            child = _spore(f"{prefix}{k}_{depth}", 0.1 * k, 0.1 * depth)
+            control = 2.0 if (k + depth) % 2 else -2.0
+            graph.add_edge(parent, child, link_type='real_max' if control > 0 else 'real_min',
+                           link_object=_link(f"l{k}_{depth}", 0.05 * (depth + 1), control))
+            parent = child
+
+
+def _structure(graph):
+    edges = {key: (info.link_type, info.link_object.link_id, info.link_object.dt_value,
+                   info.link_object.control_value) for key, info in graph.edges.items()}
+    nodes = {spore_id: tuple(np.round(spore.calc_2d_pos(), 12)) for spore_id, spore in graph.nodes.items()}
+    return nodes, edges
+
+
+def test_journal_roundtrip():
+    """Добавления и удаления воспроизводятся; узлы хранят позицию, цель и шаг."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'graph.journal')
+        graph = SporeGraph('real')
+        journal = GraphJournal(path, checkpoint_every=0)
+        journal.attach(graph)
+        _grow(graph, 's')
+        graph.remove_edge('s2_0', 's2_1')
+        graph.remove_spore('s4_2')
+        journal.close()
+
+        loaded = load_graph_journal(path)
+
+    assert _structure(loaded) == _structure(graph)
+    goal = loaded.nodes['s0']
+    assert goal.is_goal and goal.optimal_dt == 0.05 and goal.optimal_control == 2.0
+    assert not loaded.nodes['s1_0'].is_goal
+
+
+def test_checkpoint_tail_and_torn_record():
+    """Контрольная точка + хвост равны полному доигрыванию; оборванная запись отбрасывается и при resume."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'graph.journal')
+        graph = SporeGraph('real')
+        journal = GraphJournal(path, checkpoint_every=7)
+        journal.attach(graph)
+        _grow(graph, 'a')
+        graph.clear()
+        _grow(graph, 'b', n_chains=4)
+        graph.remove_spore('b3_1')
+        journal.close()
+        assert os.path.exists(journal.checkpoint_path)
+
+        with open(path, 'ab') as f:
+            f.write(b'\x02\x40\x00\x00\x00partial')  # падение посреди записи
+        from_checkpoint = load_graph_journal(path)
+        full_replay = load_graph_journal(path, use_checkpoint=False)
+
+        # Продолжение после падения: новые записи пишутся после последней целой
+        resumed = GraphJournal(path, checkpoint_every=0, resume=True)
+        session_graph = SporeGraph('real')
+        resumed.attach(session_graph)
+        for i in range(5):
+            session_graph.add_spore(_spore(f"c{i}", 1.0 + i, 0.0))
+        resumed.close()
+        after_resume = [load_graph_journal(path), load_graph_journal(path, use_checkpoint=False)]
+
+        # Новая сессия без resume откладывает прошлый журнал
+        GraphJournal(path, resume=False).close()
+        assert os.path.exists(path + '.prev') and load_graph_journal(path).nodes == {}
+
+    assert _structure(from_checkpoint) == _structure(full_replay) == _structure(graph)
+    assert not any(spore_id.startswith('a') for spore_id in full_replay.nodes)
+    for loaded in after_resume:
+        assert set(loaded.nodes) == set(graph.nodes) | {f"c{i}" for i in range(5)}
+        assert _structure(loaded)[1] == _structure(graph)[1]
+
+
+def test_loaded_graph_valence():
+    """Загруженный граф годится для ValenceManager как обычный."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'graph.journal')
+        graph = SporeGraph('real')
+        journal = GraphJournal(path)
+        journal.attach(graph)
+        _grow(graph, 'v')
+        journal.close()
+        loaded = load_graph_journal(path)
+
+    expected = ValenceManager(SimpleNamespace(graph=graph, objects=list(graph.nodes.values())))
+    actual = ValenceManager(SimpleNamespace(graph=loaded, objects=list(loaded.nodes.values())))
+    actual.update_from_graph()
+    for spore_id in graph.nodes:
+        assert repr(actual.analyze_spore_valence(spore_id)) == \
+            repr(expected.analyze_spore_valence(spore_id, use_cache=False))
+
+
+def _session(path, resume):
+    """SporeManager без окна с журналом графа; линки ищут models/arrow.obj как в main_demo."""
+    from ursina import application
+    application.asset_folder = Path(project_root) / 'scripts' / 'run'
+    application.compressed_models_folder = Path(tempfile.gettempdir()) / 'models_compressed'
+    zoom_manager = SimpleNamespace(a_transformation=1.0, b_translation=np.zeros(3), spores_scale=1.0, objects={})
+    zoom_manager.register_objects = lambda objects: zoom_manager.objects.update(objects)
+    config = {'graph_journal': {'enabled': True, 'path': path, 'checkpoint_every': 0, 'resume': resume}}
+    return SporeManager(PendulumSystem(), zoom_manager, None, ColorManager(), config=config)
+
+
+def _new_spore(spore_manager, x, y):
+    return Spore(pendulum=spore_manager.pendulum, dt=0.05, scale=0.1, position=(x, 0, y), goal_position=[0, 0],
+                 color_manager=spore_manager.color_manager, id_manager=spore_manager.id_manager, config={})
+
+
+def _new_link(spore_manager, parent, child, control):
+    link = Link(parent_spore=parent, child_spore=child, zoom_manager=spore_manager.zoom_manager,
+                color_manager=spore_manager.color_manager, config={}, id_manager=spore_manager.id_manager)
+    link.dt_value, link.control_value = 0.05, control
+    return link
+
+
+def test_spore_manager_resume_and_restore():
+    """Сессия 1 пишет споры и линки; сессия 2 продолжает журнал и строит сцену с прежними ID."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'real_graph.journal')
+
+        first = _session(path, resume=False)
+        spores = [_new_spore(first, 0.1 * i, -0.05 * i) for i in range(6)]
+        first.add_spores_bulk(spores)
+        links = [_new_link(first, spores[i], spores[i + 1], 2.0 if i % 2 else -2.0) for i in range(5)]
+        first.add_links_bulk(links, ['real_max' if i % 2 else 'real_min' for i in range(5)])
+        first.graph_journal.close()
+        saved_ids = set(first.graph.nodes)
+        saved_edges = {key: (info.link_type, str(info.link_object.link_id)) for key, info in first.graph.edges.items()}
+
+        second = _session(path, resume=True)
+        assert second.journal_graph is not None and set(second.journal_graph.nodes) == saved_ids
+        counts = second.restore_from_journal()
+        assert counts == {'spores': 6, 'links': 5} and second.journal_graph is None
+        assert set(second.graph.nodes) == saved_ids and len(second.objects) == 6
+        assert {key: (info.link_type, str(info.link_object.link_id))
+                for key, info in second.graph.edges.items()} == saved_edges
+        assert set(second.zoom_manager.objects) == {obj._zoom_manager_key for obj in second.objects + second.links}
+
+        # Новые ID не пересекаются с восстановленными; журнал продолжается после восстановления
+        extra = _new_spore(second, 1.0, 1.0)
+        extra_link = _new_link(second, second.objects[0], extra, 2.0)
+        assert str(extra.spore_id) not in saved_ids
+        assert str(extra_link.link_id) not in {link_id for _, link_id in saved_edges.values()}
+        second.add_spores_bulk([extra])
+        second.add_links_bulk([extra_link], ['real_max'])
+        second.graph_journal.close()
+        reloaded = load_graph_journal(path)
+        assert set(reloaded.nodes) == saved_ids | {str(extra.spore_id)} and len(reloaded.edges) == 6
+
+        # Без resume прошлый журнал уходит в *.prev целиком
+        third = _session(path, resume=False)
+        third.graph_journal.close()
+        assert third.journal_graph is None and load_graph_journal(path).nodes == {}
+        assert set(load_graph_journal(path + '.prev').nodes) == set(reloaded.nodes)
+
+
+if __name__ == "__main__":
+    test_journal_roundtrip()
+    test_checkpoint_tail_and_torn_record()
+    test_loaded_graph_valence()
+    test_spore_manager_resume_and_restore()
+    print("All graph journal tests passed")
@@ -0,0 +1,78 @@
+"""
+Тесты колоночного снимка графа (без Ursina).
+Файл: scripts/run/tests/test_graph_snapshot.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_graph_snapshot.py
+"""
+
+import sys
+import os
+import tempfile
+from types import SimpleNamespace
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.core.graph_snapshot import GraphSnapshot
+
+
+def _fake_spore_manager():
+    """Три споры и три линка, один из которых ведёт к споре вне objects."""
+    def spore(i, pos, is_goal=False):
+        return SimpleNamespace(id=i, is_goal=is_goal, calc_2d_pos=lambda p=pos: np.array(p),
+                               logic=SimpleNamespace(optimal_dt=0.1 * i, cost=float(i)))
+
+    spores = [spore(10, [0.0, 0.0], is_goal=True), spore(11, [1.0, 0.5]), spore(12, [-1.0, 2.0])]
+    orphan = spore(99, [5.0, 5.0])
+
+    def link(n, parent, child, control, dt):
+        return SimpleNamespace(link_id=f"link_{n}", parent_spore=parent, child_spore=child,
+                               control_value=control, dt_value=dt, color=None)
+
+    links = [link(1, spores[1], spores[0], 2.0, 0.05),
+             link(2, spores[2], orphan, -2.0, 0.05),
+             link(3, spores[2], spores[1], -2.0, -0.07)]
+    return SimpleNamespace(objects=spores, links=links)
+
+
+def test_snapshot_arrays():
+    """Рёбра индексируются позициями спор, осиротевшие линки пропускаются."""
+    snapshot = GraphSnapshot.from_spore_manager(_fake_spore_manager(), version=3)
+
+    assert snapshot.positions.shape == (3, 2)
+    assert snapshot.edge_parent.tolist() == [1, 2]
+    assert snapshot.edge_child.tolist() == [0, 1]
+    assert snapshot.edge_number.tolist() == [1, 3]
+    assert np.allclose(snapshot.edge_dt, [0.05, -0.07])
+    assert snapshot.is_goal.tolist() == [True, False, False]
+
+
+def test_snapshot_roundtrip_and_json():
+    """Снимок переживает сохранение и даёт JSON в старом формате."""
+    snapshot = GraphSnapshot.from_spore_manager(_fake_spore_manager(), version=3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        loaded = GraphSnapshot.load(snapshot.save(os.path.join(tmp, 'graph.npz')))
+        csv_path = snapshot.export_sparse_csv(os.path.join(tmp, 'graph.csv'))
+        rows = np.loadtxt(csv_path, delimiter=',', skiprows=1)
+
+    assert loaded.version == 3
+    assert loaded.spore_ids.tolist() == ['10', '11', '12']
+    assert np.array_equal(loaded.edge_child, snapshot.edge_child)
+    assert rows.shape == (2, 5)
+
+    data = loaded.to_json_dict()
+    assert data['statistics']['total_links'] == 2
+    assert data['spores'][2]['out_links'][0] == {
+        'to_spore_id': 2, 'link_number': 3, 'control': -2.0, 'dt': 0.07, 'dt_sign': -1}
+    assert data['spores'][0]['in_links'][0]['from_spore_id'] == 2
+
+
+if __name__ == "__main__":
+    test_snapshot_arrays()
+    test_snapshot_roundtrip_and_json()
+    print("All graph snapshot tests passed")
@@ -0,0 +1,160 @@
+"""
+Тесты версий SporeGraph и частичной инвалидации кешей (без окна Ursina).
+Файл: scripts/run/tests/test_graph_versions.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_graph_versions.py
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.core.spore_graph import SporeGraph
+from src.managers.valence_manager import ValenceManager
+from src.managers.picker_manager import PickerManager
+
+
+def _spore(name):
+    return SimpleNamespace(spore_id=name)
+
+
+def _link(dt, control):
+    return SimpleNamespace(link_id=f"l{dt}", dt_value=dt, control_value=control)
+
+
+def _add_tree(graph, prefix, root=None):
+    """Корень, 4 ребёнка и по 2 внука с чередованием управления (как у дерева спор)."""
+    root = root or _spore(f"{prefix}r")
+    for i, (control, dt) in enumerate([(2.0, 0.05), (2.0, -0.05), (-2.0, 0.05), (-2.0, -0.05)]):
+        child = _spore(f"{prefix}c{i}")
+        graph.add_edge(*((root, child) if dt > 0 else (child, root)), link_object=_link(abs(dt), control))
+        for k, gdt in enumerate((0.01, -0.01)):
+            grandchild = _spore(f"{prefix}g{i}{k}")
+            graph.add_edge(*((child, grandchild) if gdt > 0 else (grandchild, child)),
+                           link_object=_link(abs(gdt), -control))
+    return root
+
+
+def test_versions_and_dirty_nodes():
+    """Версия растёт на каждом изменении; окрестность — два шага от изменённых узлов."""
+    graph = SporeGraph('real')
+    a, b, c, d = (_spore(name) for name in 'abcd')
+    graph.add_edge(a, b)
+    graph.add_edge(b, c)
+    version = graph.version
+    graph.add_spore(a)  # тот же объект — без новой версии
+    assert graph.version == version
+
+    graph.add_edge(c, d)
+    assert graph.dirty_since(version) == {'c', 'd'}
+    assert graph.affected_since(version, hops=1) == {'b', 'c', 'd'}
+    assert graph.affected_since(version) == {'a', 'b', 'c', 'd'}
+    assert graph.node_versions['d'] == graph.version
+
+    version = graph.version
+    assert graph.remove_spore('d') == 1 and 'd' not in graph.nodes
+    assert graph.dirty_since(version) == {'c', 'd'}
+
+    graph.clear()
+    assert graph.dirty_since(version) is None and graph.dirty_since(graph.version) == set()
+
+
+def test_valence_revalidates_only_near_changes():
+    """Добавление дерева к большому графу пересчитывает только его окрестность."""
+    graph = SporeGraph('real')
+    for k in range(30):
+        _add_tree(graph, f"t{k}_")
+    spore_manager = SimpleNamespace(graph=graph, objects=list(graph.nodes.values()))
+    manager = ValenceManager(spore_manager)
+    manager.update_from_graph()
+
+    # Новое дерево растёт из внука первого дерева
+    _add_tree(graph, "new_", root=graph.nodes['t0_g00'])
+    refreshed = manager.refresh_from_graph()
+    assert 0 < refreshed < 40 and manager.refresh_from_graph() == 0
+
+    expected = ValenceManager(spore_manager)
+    for spore_id in graph.nodes:
+        assert repr(manager.analyze_spore_valence(spore_id)) == \
+            repr(expected.analyze_spore_valence(spore_id, use_cache=False))
+
+    # Удаление ребра — частичный пересчёт, удаление споры — полный
+    graph.remove_edge('t0_c0', 't0_g00')
+    assert manager.refresh_from_graph() < 40
+    assert repr(manager.analyze_spore_valence('t0_c0')) == \
+        repr(expected.analyze_spore_valence('t0_c0', use_cache=False))
+    graph.remove_spore('t5_r')
+    assert manager.refresh_from_graph() == len(graph.nodes)
+
+
+def test_picker_neighbor_cache_keeps_unaffected():
+    """PickerManager сбрасывает только записи кеша соседей рядом с изменением."""
+    graph = SporeGraph('real')
+    _add_tree(graph, "a_")
+    _add_tree(graph, "b_")
+    spore_manager = SimpleNamespace(graph=graph, objects=list(graph.nodes.values()))
+    picker = PickerManager(SimpleNamespace(), spore_manager, verbose_output=False)
+    picker._neighbor_cache = {spore_id: {1: []} for spore_id in graph.nodes}
+
+    graph.add_edge(graph.nodes['a_g00'], _spore('x'), link_object=_link(0.01, 2.0))
+    picker._on_graph_changed(1)
+    assert 'a_g00' not in picker._neighbor_cache and 'a_c0' not in picker._neighbor_cache
+    assert 'a_r' not in picker._neighbor_cache and 'a_c1' in picker._neighbor_cache  # 2 и 3 шага
+    assert all(spore_id in picker._neighbor_cache for spore_id in graph.nodes if spore_id.startswith('b_'))
+
+    # Удаление спор сдвигает визуальные ID — кеш сбрасывается целиком
+    spore_manager.objects.pop()
+    picker._on_graph_changed(2)
+    assert picker._neighbor_cache == {}
+
+
+def test_picker_neighbor_cache_sees_moved_spores_and_new_dt():
+    """Позиции спор и dt линков меняются без новой версии графа — запись кеша соседей пересобирается."""
+    graph = SporeGraph('real')
+    positions = {}
+
+    def spore(name, x, y):
+        positions[name] = np.array([x, y])
+        return SimpleNamespace(spore_id=name, calc_2d_pos=lambda: positions[name])
+
+    root, child, grandchild = spore('r', 0.0, 0.0), spore('c', 0.1, 0.0), spore('g', 0.2, 0.1)
+    link = _link(0.05, 2.0)
+    graph.add_edge(root, child, link_object=link)
+    graph.add_edge(child, grandchild, link_object=_link(0.01, -2.0))
+    spore_manager = SimpleNamespace(graph=graph, objects=list(graph.nodes.values()))
+    picker = PickerManager(SimpleNamespace(), spore_manager, distance_threshold=10.0, verbose_output=False)
+    version = graph.version
+
+    collected = []
+    collect = picker._collect_neighbors_snapshot
+    picker._collect_neighbors_snapshot = lambda spore_id: collected.append(spore_id) or collect(spore_id)
+
+    def neighbors(spore_id):
+        picker._update_close_spores(0.0, 0.0)
+        return {entry['target_id']: entry for entry in picker._neighbor_cache[spore_id][1]}
+
+    assert neighbors('r')['c']['dt_values'] == [0.05] and len(collected) == 3
+    neighbors('r')
+    assert len(collected) == 3  # ничего не менялось — всё из кеша
+
+    link.dt_value = 0.08
+    assert neighbors('r')['c']['dt_values'] == [0.08]
+    positions['g'] = np.array([0.3, 0.2])
+    assert neighbors('c')['g']['position'] == (0.3, 0.2)
+    assert graph.version == version
+
+
+if __name__ == "__main__":
+    test_versions_and_dirty_nodes()
+    test_valence_revalidates_only_near_changes()
+    test_picker_neighbor_cache_keeps_unaffected()
+    test_picker_neighbor_cache_sees_moved_spores_and_new_dt()
+    print("All graph version tests passed")
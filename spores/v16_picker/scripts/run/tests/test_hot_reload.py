@@ -0,0 +1,173 @@
+"""
+Тесты горячей перезагрузки логических модулей (без Ursina).
+Файл: scripts/run/tests/test_hot_reload.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_hot_reload.py
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.utils.hot_reload import HotReloader, is_hot_reloadable, module_name_for_path, RESTART_EXIT_CODE
+from src.utils import watcher
+
+_MODEL_V1 = '''
+GAIN = 1.0
+_LIMIT = 32
+_cache = {}
+_state = 'old'
+__hot_reload_keep__ = ('_state',)
+
+class Model:
+    def value(self, x):
+        return x * GAIN
+
+def helper(x):
+    return x + 1
+'''
+
+_MODEL_V2 = _MODEL_V1.replace('x * GAIN', 'x * GAIN * 10').replace('x + 1', 'x + 2').replace('GAIN = 1.0', 'GAIN = 2.0') \
+    .replace('_LIMIT = 32', '_LIMIT = 64').replace("_state = 'old'", "_state = 'new'")
+
+_USER = '''
+from .model import Model, helper, GAIN
+'''
+
+
+def _write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    # importlib сверяет mtime исходника с кэшем байткода
+    stamp = time.time() + 10
+    os.utime(path, (stamp, stamp))
+
+
+def test_reload_keeps_identity_and_state():
+    """Существующие экземпляры и from-импорты видят новый код, кэши сохраняются, константы — новые."""
+    with tempfile.TemporaryDirectory() as tmp:
+        package_dir = os.path.join(tmp, 'hotpkg_test')
+        os.makedirs(package_dir)
+        _write(os.path.join(package_dir, '__init__.py'), '')
+        _write(os.path.join(package_dir, 'model.py'), _MODEL_V1)
+        _write(os.path.join(package_dir, 'user.py'), _USER)
+        sys.path.insert(0, tmp)
+        try:
+            from hotpkg_test import model, user
+            instance = model.Model()
+            model._cache['kept'] = True
+            assert instance.value(1.0) == 1.0 and user.helper(1) == 2
+
+            _write(os.path.join(package_dir, 'model.py'), _MODEL_V2)
+            reloader = HotReloader(tmp, packages=('hotpkg_test',))
+            report = reloader.reload_modules(['hotpkg_test.model'])
+
+            assert report['error'] is None and report['reloaded'] == ['hotpkg_test.model']
+            assert isinstance(instance, model.Model) and user.Model is model.Model
+            assert instance.value(1.0) == 20.0
+            assert user.helper(1) == 3
+            assert user.GAIN == 2.0
+            assert model._cache == {'kept': True}
+            assert model._LIMIT == 64 and model._state == 'old'
+
+            # Синтаксическая ошибка: старый код продолжает работать
+            _write(os.path.join(package_dir, 'model.py'), 'def broken(:\n')
+            report = reloader.reload_modules(['hotpkg_test.model'])
+            assert report['error'] is not None and report['reloaded'] == []
+            assert instance.value(1.0) == 20.0
+        finally:
+            sys.path.remove(tmp)
+            for name in [n for n in sys.modules if n.startswith('hotpkg_test')]:
+                del sys.modules[name]
+
+
+def test_hot_reloadable_paths():
+    """На лету перезагружаются только src/logic без Ursina."""
+    logic = os.path.join(project_root, 'src', 'logic', 'pendulum.py')
+    manager = os.path.join(project_root, 'src', 'managers', 'spore_manager.py')
+    assert module_name_for_path(logic, project_root) == 'src.logic.pendulum'
+    assert is_hot_reloadable(logic, project_root)
+    assert not is_hot_reloadable(manager, project_root)
+
+
+class _FakeProcess:
+    """Процесс демо без запуска: returncode выставляет тест."""
+    def __init__(self, *args, **kwargs):
+        self.pid = 0
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        self.returncode = -15
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+
+def _runner(hot, launches):
+    runner = watcher.ScriptRunner(hot=hot, debounce=0.05)
+    runner.current_script = 'main_demo.py'
+
+    def popen(*args, **kwargs):
+        launches.append(args)
+        return _FakeProcess()
+
+    watcher.subprocess.Popen = popen
+    assert runner.run_script(runner.current_script)
+    return runner
+
+
+def test_watcher_restarts_once_per_save():
+    """Одно сохранение (пачка событий) — один перезапуск, даже если демо само просит перезапуск."""
+    popen = watcher.subprocess.Popen
+    logic = os.path.join(project_root, 'src', 'logic', 'pendulum.py')
+    visual = os.path.join(project_root, 'src', 'visual', 'link.py')
+    demo = os.path.join(project_root, 'scripts', 'run', 'main_demo.py')
+    try:
+        # Без горячего режима: несколько событий подряд — один перезапуск после тишины
+        launches = []
+        runner = _runner(False, launches)
+        for path in (logic, visual, logic):
+            runner.on_file_changed(path)
+            runner.check_changes()
+        assert len(launches) == 1
+        time.sleep(0.1)
+        runner.check_changes()
+        runner.check_changes()
+        assert len(launches) == 2
+
+        # Горячий режим: src/ (логика и сцена) отдаётся демо, оно выходит с RESTART_EXIT_CODE
+        launches = []
+        runner = _runner(True, launches)
+        for path in (logic, visual, demo):
+            runner.on_file_changed(path)
+        runner.process.returncode = RESTART_EXIT_CODE
+        runner.check_and_restart()
+        time.sleep(0.1)
+        runner.check_changes()
+        assert len(launches) == 2
+
+        # Только логика и сцена без выхода демо — сторож не перезапускает
+        runner.on_file_changed(logic)
+        runner.on_file_changed(visual)
+        time.sleep(0.1)
+        runner.check_changes()
+        assert len(launches) == 2
+    finally:
+        watcher.subprocess.Popen = popen
+
+
+if __name__ == "__main__":
+    test_reload_keeps_identity_and_state()
+    test_hot_reloadable_paths()
+    test_watcher_restarts_once_per_save()
+    print("All hot reload tests passed")
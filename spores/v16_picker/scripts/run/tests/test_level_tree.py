@@ -0,0 +1,125 @@
+"""
+Тесты дерева спор произвольной глубины на массивах (без Ursina).
+Файл: scripts/run/tests/test_level_tree.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_level_tree.py
+"""
+
+import sys
+import os
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.logic.pendulum import PendulumSystem
+from src.logic.control_tree import ControlTreeBuilder
+from src.logic.tree.spore_tree import SporeTree
+from src.logic.tree.spore_tree_config import SporeTreeConfig
+from src.logic.tree.level_tree import LevelTree
+from src.logic.tree.area_opt.tree_area_evaluator import TreeAreaEvaluator
+from src.logic.tree.area_opt.get_tree_area import get_tree_area
+from src.logic.tree.area_opt.create_distance_constraints import create_distance_constraints
+
+_ROOT = np.array([0.4, -0.3])
+
+
+def test_depth_two_matches_spore_tree():
+    """Глубина 2 совпадает с SporeTree: позиции, площадь, оценщик."""
+    pendulum = PendulumSystem()
+    config = SporeTreeConfig(initial_position=_ROOT, dt_base=0.05, dt_grandchildren_factor=0.2)
+    tree = SporeTree(pendulum, config, auto_create=True, show=False)
+    levels = LevelTree(pendulum, _ROOT, depth=2, dt_vector=config.get_default_dt_vector())
+
+    assert levels.level_sizes() == [1, 4, 8] and levels.dt_size == 12
+    assert np.allclose(levels.level(1), [c['position'] for c in tree.children])
+    assert np.allclose(levels.level(2), [gc['position'] for gc in tree.grandchildren])
+    assert np.allclose(levels.level_parents(2), [gc['parent_idx'] for gc in tree.grandchildren])
+    assert np.isclose(levels.area(), get_tree_area(tree))
+    assert TreeAreaEvaluator(tree).test_area_calculation(tree)['success']
+
+
+def test_deep_tree_levels():
+    """Глубина 4: уровни 4·2^(l-1), листья через предков совпадают с полным расчётом."""
+    pendulum = PendulumSystem()
+    levels = LevelTree(pendulum, _ROOT, depth=4)
+    dt_vector = levels.default_dt_vector(0.05, 0.5)
+    levels.update(dt_vector)
+
+    assert levels.level_sizes() == [1, 4, 8, 16, 32] and levels.dt_size == 60
+    # Потомки берут обратное управление родителя
+    leaf = levels.level_slice(4)
+    assert np.all(levels.controls[leaf] == -levels.controls[levels.parents[leaf]])
+
+    leaves = np.arange(leaf.start, leaf.stop)
+    assert np.allclose(levels.node_positions(dt_vector, leaves), levels.positions[leaves])
+
+    # Площадь оценщика равна сумме треугольников дед → родитель → узел
+    area = 0.0
+    for node in range(levels.offsets[2], levels.n_nodes):
+        a, b, c = levels.positions[levels.parents[levels.parents[node]]], levels.positions[levels.parents[node]], levels.positions[node]
+        (bx, by), (cx, cy) = b - a, c - a
+        area += 0.5 * abs(bx * cy - by * cx)
+    assert np.isclose(TreeAreaEvaluator(levels).area(dt_vector), area)
+
+    # Кандидаты на спаривание — только от разных родителей
+    i, j = levels.candidate_pairs()
+    parents = levels.level_parents(4)
+    assert len(i) == 32 * 31 // 2 - 16 and np.all(parents[i] != parents[j])
+
+    # Констрейнт пары листьев
+    constraints, info = create_distance_constraints(
+        [(0, 5, {'distance': 0.1, 'meeting_time': 0.0})], levels, pendulum, constraint_distance=1e-5)
+    expected = 1e-5 - np.linalg.norm(levels.level(4)[0] - levels.level(4)[5])
+    assert np.isclose(constraints[0](dt_vector), expected)
+    assert info[0]['gc_j_parent'] == parents[5]
+
+
+def test_control_tree_custom_depth():
+    """ControlTreeBuilder с траекториями из трёх шагов."""
+    pendulum = PendulumSystem()
+    sequences = [[(1, 1), (-1, 1), (1, -1)], [(-1, 1), (1, 1), (-1, -1)]]
+    builder = ControlTreeBuilder(pendulum, dt_vector=[0.05, 0.08, 0.03],
+                                 control_sequences=sequences, convergence_groups=[[0, 1]],
+                                 dt_indices=[[0, 1, 2], [1, 0, 2]])
+    tree = builder.build_tree(_ROOT)
+
+    assert builder.compute_trajectory_points(_ROOT).shape == (1, 2, 4, 2)
+    assert len(tree['nodes']) == 1 + 2 * 3 and len(tree['edges']) == 2 * 3
+    state = _ROOT.copy()
+    for u, dt in tree['trajectories'][1].sequence:
+        state = pendulum.step(state, u, dt)
+    assert np.allclose(tree['trajectories'][1].points[-1], state)
+
+
+def test_control_tree_rejects_partial_custom_layout():
+    """Свои последовательности без групп и маппинга dt (или с неверной формой) — понятная ValueError."""
+    pendulum = PendulumSystem()
+    sequences = [[(1, 1), (-1, 1), (1, -1)], [(-1, 1), (1, 1), (-1, -1)]]
+    invalid = [
+        dict(control_sequences=sequences),
+        dict(control_sequences=sequences, convergence_groups=[[0, 1]]),
+        dict(convergence_groups=[[0, 1]], dt_indices=[[0, 1, 2], [1, 0, 2]]),
+        dict(control_sequences=sequences, convergence_groups=[[0, 1]], dt_indices=[[0, 1], [1, 0]]),
+        dict(control_sequences=sequences, convergence_groups=[[0, 2]], dt_indices=[[0, 1, 2], [1, 0, 2]]),
+        dict(control_sequences=[[(1, 1)], [(1, 1), (-1, 1)]], convergence_groups=[[0, 1]],
+             dt_indices=[[0, 1], [1, 0]]),
+    ]
+    for kwargs in invalid:
+        try:
+            ControlTreeBuilder(pendulum, **kwargs)
+        except ValueError:
+            continue
+        raise AssertionError(f"ожидалась ValueError для {sorted(kwargs)}")
+
+
+if __name__ == "__main__":
+    test_depth_two_matches_spore_tree()
+    test_deep_tree_levels()
+    test_control_tree_custom_depth()
+    test_control_tree_rejects_partial_custom_layout()
+    print("All level tree tests passed")
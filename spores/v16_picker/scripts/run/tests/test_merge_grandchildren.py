@@ -0,0 +1,67 @@
+"""
+Тесты объединения близких внуков (без Ursina).
+Файл: scripts/run/tests/test_merge_grandchildren.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_merge_grandchildren.py
+"""
+
+import sys
+import os
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.logic.pendulum import PendulumSystem
+from src.logic.tree.spore_tree import SporeTree
+from src.logic.tree.spore_tree_config import SporeTreeConfig
+from src.logic.tree.clustering import cluster_close_points
+
+
+def _tree():
+    config = SporeTreeConfig(initial_position=np.array([0.4, -0.3]), dt_base=0.05,
+                             dt_grandchildren_factor=0.2, show_debug=False)
+    return SporeTree(pendulum=PendulumSystem(), config=config, auto_create=True, show=False)
+
+
+def test_chain_is_one_cluster():
+    """Цепочка a-b-c с шагом меньше порога — один кластер, даже если a и c дальше порога."""
+    positions = np.array([[0.0, 0.0], [0.8, 0.0], [1.6, 0.0], [5.0, 5.0]])
+    labels, pairs, _ = cluster_close_points(positions, 1.0)
+    assert labels.tolist() == [0, 0, 0, 3]
+    assert pairs.tolist() == [[0, 1], [1, 2]]
+
+
+def test_merge_triple_keeps_provenance():
+    """Тройка близких внуков объединяется в одного, исходные данные сохраняются."""
+    tree = _tree()
+    base = np.array(tree.grandchildren[0]['position'])
+    for k, offset in zip((0, 3, 5), (0.0, 1e-4, 2e-4)):
+        tree.grandchildren[k]['position'] = base + offset
+    original_dicts = list(tree.grandchildren)
+    expected_ids = [tree.grandchildren[k]['global_idx'] for k in (0, 3, 5)]
+
+    result = tree.merge_close_grandchildren(distance_threshold=5e-4)
+
+    assert result['total_merged'] == 1
+    assert len(tree.grandchildren) == len(original_dicts) - 2
+    merged = tree.grandchildren[0]
+    assert merged['merged_from'] == expected_ids
+    assert np.allclose(merged['position'], base + 1e-4)
+    assert len(merged['original_positions']) == 3
+    # Отладочная копия — исходные внуки, а не ссылки на объединённые
+    assert len(tree._original_grandchildren) == len(original_dicts)
+    assert tree._original_grandchildren[3]['global_idx'] == expected_ids[1]
+
+    # Повторное объединение не выполняется
+    assert tree.merge_close_grandchildren(distance_threshold=5e-4)['total_merged'] == 0
+
+
+if __name__ == "__main__":
+    test_chain_is_one_cluster()
+    test_merge_triple_keeps_provenance()
+    print("All grandchild merge tests passed")
@@ -0,0 +1,116 @@
+"""
+Тесты графа этапов анализа пар с мемоизацией по дереву (без Ursina).
+Файл: scripts/run/tests/test_pair_stages.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_pair_stages.py
+"""
+
+import sys
+import os
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.logic.pendulum import PendulumSystem
+from src.logic.tree.spore_tree import SporeTree
+from src.logic.tree.spore_tree_config import SporeTreeConfig
+from src.logic.tree.pairs.stage_graph import PairStageGraph, pair_stages, pair_stage_stats, clear_pair_stages
+from src.logic.tree.pairs.find_optimal_pairs import find_optimal_pairs
+from src.logic.tree.pairs.complete_meeting_analysis import complete_meeting_analysis
+from src.logic.tree.pairs.build_distance_tables import build_grandchild_parent_distance_tables
+from src.utils.tracer import get_tracer
+
+
+def _make_tree(dt_base=0.05):
+    config = SporeTreeConfig(initial_position=np.array([0.4, -0.3]), dt_base=dt_base,
+                             dt_grandchildren_factor=0.2, show_debug=False)
+    return SporeTree(PendulumSystem(), config, auto_create=True, show=False)
+
+
+def test_graph_keys_by_tree_and_bounds():
+    """Зависимости считаются один раз; этап без границ общий для разных dt_bounds."""
+    graph = PairStageGraph(max_trees=2)
+    calls = []
+
+    @graph.stage('base')
+    def base(tree, pendulum, bounds):
+        calls.append('base')
+        return len(tree.grandchildren)
+
+    @graph.stage('scaled', deps=('base',), uses_bounds=True)
+    def scaled(tree, pendulum, bounds, n):
+        calls.append('scaled')
+        return n * bounds[1]
+
+    tree = _make_tree()
+    assert graph.get('scaled', tree, bounds=(0.0, 2.0)) == 16.0
+    assert graph.get('scaled', tree, bounds=[0.0, 2.0]) == 16.0
+    assert graph.get('scaled', tree, bounds=(0.0, 3.0)) == 24.0
+    assert calls == ['base', 'scaled', 'scaled']
+
+    # Другое дерево — новый ключ; LRU на два дерева вытесняет самое старое
+    graph.get('base', _make_tree(0.07))
+    graph.get('base', _make_tree(0.09))
+    stats = graph.stats()
+    assert stats['trees'] == 2 and stats['stages']['base']['misses'] == 3
+    graph.get('base', tree)
+    assert graph.stats()['stages']['base']['misses'] == 4
+
+
+def test_pipeline_shares_tables():
+    """find_optimal_pairs и complete_meeting_analysis на одном дереве берут таблицы из кэша."""
+    clear_pair_stages(reset_stats=True)
+    tree = _make_tree()
+
+    pairs = find_optimal_pairs(tree)
+    assert find_optimal_pairs(tree) == pairs
+    stages = pair_stage_stats()['stages']
+    assert stages['adaptive_pair_optimization']['misses'] == 1
+    assert stages['adaptive_pair_optimization']['hits'] == 1
+
+    # Полный анализ переиспользует скорости сближения внук-внук
+    first = complete_meeting_analysis(tree, tree.pendulum, show=False)
+    second = complete_meeting_analysis(tree, tree.pendulum, show=False)
+    stages = pair_stage_stats()['stages']
+    assert stages['gc_gc_convergence']['misses'] == 1
+    assert stages['meeting_gc_gc_tables']['misses'] == 1
+    assert np.array_equal(first['gc_gc_tables']['distance_table'].values,
+                          second['gc_gc_tables']['distance_table'].values, equal_nan=True)
+
+    # Новые границы — новая оптимизация, таблицы сходимости те же
+    tables = build_grandchild_parent_distance_tables(tree, tree.pendulum, dt_bounds=(0.001, 0.1))
+    build_grandchild_parent_distance_tables(tree, tree.pendulum, dt_bounds=(0.001, 0.05))
+    assert tables['convergence_table'] is pair_stages.get('gc_parent_convergence', tree)
+    stages = pair_stage_stats()['stages']
+    assert stages['gc_parent_tables']['misses'] == 2
+    assert stages['gc_parent_convergence']['misses'] == 1
+
+
+def test_find_optimal_pairs_traced():
+    """Спаны есть и у find_optimal_pairs, и у этапа (этап кэша вызывает обёрнутую функцию)."""
+    clear_pair_stages(reset_stats=True)
+    tracer = get_tracer()
+    was_enabled = tracer.enabled
+    tracer.clear()
+    tracer.enable()
+    try:
+        find_optimal_pairs(_make_tree())
+        summary = tracer.get_summary()
+    finally:
+        tracer.clear()
+        if not was_enabled:
+            tracer.disable()
+    assert summary['find_optimal_pairs']['calls'] == 1
+    assert summary['adaptive_pair_optimization']['calls'] == 1
+
+
+if __name__ == "__main__":
+    test_graph_keys_by_tree_and_bounds()
+    test_pipeline_shares_tables()
+    test_find_optimal_pairs_traced()
+    print("All pair stage tests passed")
@@ -0,0 +1,80 @@
+"""
+Тесты сэмплирования дисков Пуассона (numba-ядра Бридсона, без Ursina).
+Файл: scripts/run/tests/test_poisson_disk.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_poisson_disk.py
+"""
+
+import sys
+import os
+
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.spatial.distance import pdist
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.utils.poisson_disk import PoissonDiskSampler
+from src.logic.kernels import KERNELS
+
+# Статистика прежней реализации на Python (seeds 0..9 через np.random.seed):
+# (радиус, размерность) -> (среднее число точек, среднее расстояние до ближайшего соседа / r)
+_REFERENCE = {
+    (0.1, 2): (206.3, 1.0897),
+    (0.25, 3): (183.9, 1.0617),
+}
+
+
+def test_min_distance_and_bounds():
+    """Все пары не ближе r, все точки в единичном круге / шаре (ядро 2D и общее n-D)."""
+    for (radius, n_dim) in _REFERENCE:
+        points = PoissonDiskSampler(radius, n_dim, seed=1).sample()
+        assert points.shape[1] == n_dim and len(points) > 50
+        assert pdist(points).min() >= radius
+        assert np.all(np.linalg.norm(points, axis=1) <= 1.0)
+
+
+def test_seeded_runs_are_deterministic():
+    """Один seed — одинаковые точки, другой seed — другие; Generator принимается как seed."""
+    for (radius, n_dim) in _REFERENCE:
+        first = PoissonDiskSampler(radius, n_dim, seed=7).sample()
+        assert np.array_equal(first, PoissonDiskSampler(radius, n_dim, seed=7).sample())
+        assert np.array_equal(first, PoissonDiskSampler(radius, n_dim, seed=np.random.default_rng(7)).sample())
+        assert not np.array_equal(first, PoissonDiskSampler(radius, n_dim, seed=8).sample())
+
+
+def test_matches_previous_statistics():
+    """Плотность и расстояние до ближайшего соседа — как у прежней реализации."""
+    for (radius, n_dim), (reference_count, reference_spacing) in _REFERENCE.items():
+        counts, spacings = [], []
+        for seed in range(10):
+            points = PoissonDiskSampler(radius, n_dim, seed=seed).sample()
+            counts.append(len(points))
+            spacings.append(cKDTree(points).query(points, 2)[0][:, 1].mean() / radius)
+        assert abs(np.mean(counts) - reference_count) < 0.03 * reference_count
+        assert abs(np.mean(spacings) - reference_spacing) < 0.015 * reference_spacing
+
+
+def test_warmup_signatures_cover_calls():
+    """Сигнатуры из KERNELS совпадают с реальными вызовами: прогрев не оставляет докомпиляцию."""
+    for name in ('bridson_kernel_2d', 'bridson_kernel'):
+        kernel, signatures = KERNELS[name]
+        for signature in signatures:
+            kernel.compile(signature)
+    PoissonDiskSampler(0.25, 2, seed=0).sample()
+    PoissonDiskSampler(0.5, 3, seed=0).sample()
+    for name in ('bridson_kernel_2d', 'bridson_kernel'):
+        kernel, signatures = KERNELS[name]
+        assert len(kernel.signatures) == len(signatures)
+
+
+if __name__ == "__main__":
+    test_min_distance_and_bounds()
+    test_seeded_runs_are_deterministic()
+    test_matches_previous_statistics()
+    test_warmup_signatures_cover_calls()
+    print("All Poisson disk tests passed")
@@ -0,0 +1,84 @@
+"""
+Тесты пакетного поиска встреч квадратичных траекторий (без Ursina).
+Файл: scripts/run/tests/test_quadratic_meetings.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_quadratic_meetings.py
+"""
+
+import sys
+import os
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.logic.pendulum import PendulumSystem
+from src.logic.tree.spore_tree import SporeTree
+from src.logic.tree.spore_tree_config import SporeTreeConfig
+from src.logic.tree.pairs.find_optimal_pairs import find_optimal_pairs
+from src.logic.tree.pairs.stage_graph import pair_stages
+
+
+def test_meeting_times_solve_both_models():
+    """В каждом валидном корне обе квадратичные модели дают одно состояние; скалярная версия согласована."""
+    pendulum = PendulumSystem()
+    rng = np.random.default_rng(0)
+    states = np.column_stack((rng.uniform(-3.0, 3.0, 12), rng.uniform(-2.0, 2.0, 12)))
+    controls = rng.uniform(-2.0, 2.0, 12)
+
+    t1, t2, valid = pendulum.quadratic_meeting_times(states, controls)
+    assert t1.shape == t2.shape == valid.shape == (12, 12, 2)
+    assert valid.any()
+
+    acc = -pendulum.g / pendulum.l * np.sin(states[:, 0]) - pendulum.damping * states[:, 1] \
+        + controls * pendulum._inv_ml2
+    for i, j, k in zip(*np.nonzero(valid)):
+        a, b = t1[i, j, k], t2[i, j, k]
+        first = [states[i, 0] + states[i, 1] * a + 0.5 * acc[i] * a**2, states[i, 1] + acc[i] * a]
+        second = [states[j, 0] + states[j, 1] * b + 0.5 * acc[j] * b**2, states[j, 1] + acc[j] * b]
+        assert np.allclose(first, second, atol=1e-6)
+
+    scalar = pendulum.find_all_quadratic_intersections(states[0], states[1], controls[0], controls[1])
+    assert len(scalar) == valid[0, 1].sum()
+
+
+def test_prefilter_keeps_pairs():
+    """С префильтром пары внуков находятся так же, как без него."""
+    pendulum = PendulumSystem()
+    config = SporeTreeConfig(initial_position=np.array([0.4, -0.3]), dt_base=0.05,
+                             dt_grandchildren_factor=0.2, show_debug=False)
+    tree = SporeTree(pendulum=pendulum, config=config, auto_create=True, show=False)
+
+    plain = find_optimal_pairs(tree, prefilter=False)
+    filtered = find_optimal_pairs(tree, prefilter=True)
+    assert sorted((i, j) for i, j, _ in plain) == sorted((i, j) for i, j, _ in filtered)
+
+
+def test_prefilter_keeps_pairs_on_random_trees():
+    """Случайные корни, dt и factor: пары те же, что без префильтра, и префильтр что-то отбрасывает."""
+    pendulum = PendulumSystem()
+    rng = np.random.default_rng(5)
+    skipped = 0
+    for _ in range(40):
+        config = SporeTreeConfig(initial_position=rng.uniform([-np.pi, -2.0], [np.pi, 2.0]),
+                                 dt_base=rng.uniform(0.02, 0.2),
+                                 dt_grandchildren_factor=rng.uniform(0.05, 0.5), show_debug=False)
+        tree = SporeTree(pendulum=pendulum, config=config, auto_create=True, show=False)
+
+        plain = find_optimal_pairs(tree, prefilter=False) or []
+        filtered = find_optimal_pairs(tree, prefilter=True) or []
+        assert sorted((i, j) for i, j, _ in plain) == sorted((i, j) for i, j, _ in filtered)
+        skipped += pair_stages.get('adaptive_pair_optimization', tree, pendulum,
+                                   ('adaptive', True))['skipped_by_prefilter']
+    assert skipped > 0
+
+
+if __name__ == "__main__":
+    test_meeting_times_solve_both_models()
+    test_prefilter_keeps_pairs()
+    test_prefilter_keeps_pairs_on_random_trees()
+    print("All quadratic meeting tests passed")
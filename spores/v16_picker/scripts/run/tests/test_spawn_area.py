@@ -0,0 +1,54 @@
+"""
+Тесты векторизованной геометрии SpawnArea (без Ursina).
+Файл: scripts/run/tests/test_spawn_area.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_spawn_area.py
+"""
+
+import sys
+import os
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.logic.spawn_area import SpawnArea
+
+_AREAS = [
+    SpawnArea(np.array([-1.0, 0.5]), np.array([2.0, -0.5]), 0.8),
+    SpawnArea(np.array([0.0, 0.0, 0.0]), np.array([1.0, 2.0, -1.0]), 0.5),
+]
+
+
+def test_is_inside_many_matches_is_inside():
+    """Векторная проверка совпадает со скалярной, в том числе на границе."""
+    rng = np.random.default_rng(0)
+    for area in _AREAS:
+        points = area.center + rng.uniform(-1.5, 1.5, (2000, area.n_dim)) * area.a
+        boundary = area.get_points(50)
+        points = np.vstack([points, boundary])
+        expected = np.array([area.is_inside(point) for point in points])
+        assert np.array_equal(area.is_inside_many(points), expected)
+        assert expected.any() and not expected.all()
+        assert area.is_inside_many(boundary).all()
+
+
+def test_sample_uniform_inside_and_spread():
+    """Все точки sample_uniform внутри, seed воспроизводим, центр выборки — центр эллипсоида."""
+    for area in _AREAS:
+        points = area.sample_uniform(100_000, seed=3)
+        assert points.shape == (100_000, area.n_dim)
+        assert area.is_inside_many(points).all()
+        assert np.array_equal(points, area.sample_uniform(100_000, seed=3))
+        assert np.allclose(points.mean(axis=0), area.center, atol=0.02 * area.a)
+        assert area.is_inside(area.sample_random_point())
+
+
+if __name__ == "__main__":
+    test_is_inside_many_matches_is_inside()
+    test_sample_uniform_inside_and_spread()
+    print("All spawn area tests passed")
@@ -0,0 +1,98 @@
+"""
+Тесты трассировщика участков (без Ursina).
+Файл: scripts/run/tests/test_tracer.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_tracer.py
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.utils.tracer import Tracer
+
+
+def test_nested_spans_and_frames():
+    """Собственное время родителя не включает вложенные участки, кадр агрегирует их."""
+    tracer = Tracer(enabled=True)
+
+    @tracer.trace('inner')
+    def inner():
+        time.sleep(0.002)
+
+    tracer.begin_frame()
+    with tracer.span('outer', size=3):
+        inner()
+        inner()
+    frame = tracer.end_frame()
+
+    summary = tracer.get_summary()
+    assert summary['inner']['calls'] == 2
+    assert summary['outer']['total_ms'] >= summary['inner']['total_ms']
+    assert summary['outer']['self_ms'] < summary['inner']['total_ms']
+    assert frame['spans']['inner'][0] == 2
+    assert 'frame' not in frame['spans']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(tracer.export_chrome_trace(os.path.join(tmp, 'trace.json'))) as f:
+            events = json.load(f)['traceEvents']
+    assert [e['name'] for e in events] == ['inner', 'inner', 'outer', 'frame']
+    assert events[2]['args'] == {'size': 3}
+
+
+def test_disabled_tracer_records_nothing():
+    """Выключенный трассировщик ничего не пишет, а декоратор просто вызывает функцию."""
+    tracer = Tracer(enabled=False)
+    traced_sum = tracer.trace()(lambda a, b: a + b)
+
+    tracer.begin_frame()
+    with tracer.span('noop'):
+        assert traced_sum(1, 2) == 3
+    assert tracer.end_frame() is None
+    assert not tracer.events and not tracer.totals
+
+
+def test_background_threads_stay_out_of_frames():
+    """Участки фоновых потоков (решатель, вывод) — в общей статистике, но не в кадре главного потока."""
+    tracer = Tracer(enabled=True)
+    inside = threading.Event()
+    release = threading.Event()
+
+    def worker():
+        with tracer.span('background'):
+            inside.set()
+            release.wait(5)
+        for _ in range(1000):
+            with tracer.span('background.step'):
+                pass
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    inside.wait(5)
+    tracer.begin_frame()
+    with tracer.span('main'):
+        release.set()
+        thread.join()
+    frame = tracer.end_frame()
+
+    assert set(frame['spans']) == {'main'}
+    summary = tracer.get_summary()
+    assert summary['background']['calls'] == 1 and summary['background.step']['calls'] == 1000
+    # Собственное время участка главного потока не уменьшают участки другого потока
+    assert summary['main']['self_ms'] == summary['main']['total_ms']
+
+
+if __name__ == "__main__":
+    test_nested_spans_and_frames()
+    test_disabled_tracer_records_nothing()
+    test_background_threads_stay_out_of_frames()
+    print("All tracer tests passed")
@@ -0,0 +1,76 @@
+"""
+Тесты пакетной валентности графа (без окна Ursina).
+Файл: scripts/run/tests/test_valence_table.py
+
+Для запуска из корня проекта:
+    python scripts/run/tests/test_valence_table.py
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.core.spore_graph import SporeGraph
+from src.managers.valence_manager import ValenceManager
+from src.logic.valence_table import build_valence_table
+
+
+def _random_manager(seed, n_nodes=12, n_edges=30):
+    """ValenceManager над случайным графом с лёгкими объектами вместо спор и линков."""
+    rng = np.random.default_rng(seed)
+    spores = [SimpleNamespace(spore_id=f"s{i}") for i in range(n_nodes)]
+    graph = SporeGraph('real')
+    for spore in spores:
+        graph.add_spore(spore)
+    # Различные упорядоченные пары, включая петли и встречные рёбра
+    for flat in rng.choice(n_nodes * n_nodes, size=n_edges, replace=False):
+        a, b = divmod(int(flat), n_nodes)
+        link = SimpleNamespace(link_id=f"l{a}_{b}", dt_value=float(rng.uniform(-0.1, 0.1)),
+                               control_value=float(rng.choice([-2.0, 2.0, 0.0])))
+        graph.add_edge(spores[a], spores[b], link_type='default', link_object=link)
+    return ValenceManager(SimpleNamespace(graph=graph, objects=spores))
+
+
+def test_batch_matches_per_node_analysis():
+    """Таблица совпадает с поузловым analyze_spore_valence, включая конфликты слотов."""
+    for seed in range(20):
+        manager = _random_manager(seed)
+        expected = {sid: repr(manager.analyze_spore_valence(sid, use_cache=False))
+                    for sid in manager.spore_manager.graph.nodes}
+
+        manager.update_from_graph()
+        assert manager.valence_cache == {}  # объекты создаются лениво
+        for sid, valence_repr in expected.items():
+            assert repr(manager.analyze_spore_valence(sid)) == valence_repr
+        assert len(manager.get_all_valences()) == len(expected)
+
+
+def test_table_layout():
+    """Цепочка a→b→c: слоты детей и внуков по индексам SporeValence."""
+    table = build_valence_table(['a', 'b', 'c'], [0, 1], [1, 2], [0.05, 0.02], [2.0, -2.0])
+
+    assert table.occupied.shape == (3, 12)
+    # a: ребёнок b (forward_max), внук c (forward_max_forward_min)
+    valence = table.materialize('a')
+    assert valence.find_slot_by_name('forward_max').neighbor_id == 'b'
+    slot = valence.find_slot_by_name('forward_max_forward_min')
+    assert slot.neighbor_id == 'c' and np.isclose(slot.dt_value, 0.07)
+    # c: родитель b (backward_min), через него a (backward_min_backward_max)
+    valence = table.materialize('c')
+    assert valence.find_slot_by_name('backward_min').dt_value == -0.02
+    assert valence.find_slot_by_name('backward_min_backward_max').dt_sequence == [-0.02, -0.05]
+    assert table.occupied_counts().tolist() == [2, 2, 2]
+    assert table.materialize('missing') is None
+
+
+if __name__ == "__main__":
+    test_batch_matches_per_node_analysis()
+    test_table_layout()
+    print("All valence table tests passed")
@@ -0,0 +1,409 @@
+"""
+GraphJournal - журнал изменений реального графа (только дозапись).
+
+Каждое изменение SporeGraph (add_spore / add_edge / remove_edge /
+remove_spore / clear) дописывается в конец бинарного файла одной
+короткой записью, поэтому сохранение стоит O(изменения), а не O(граф).
+Слияние спор в реальном графе — это ребро к уже существующей споре,
+отдельной записи для него не нужно.
+
+Периодически (каждые checkpoint_every записей) рядом пишется
+контрольная точка <path>.ckpt.npz — полное логическое состояние графа и
+смещение в журнале, до которого оно совпадает с журналом. Загрузчик
+читает последнюю контрольную точку и доигрывает только хвост журнала;
+оборванная последняя запись (падение посреди записи) отбрасывается, а
+при продолжении журнала (resume) файл обрезается по ней.
+
+Формат записи: '<BI' (код операции, длина данных) + данные; строки —
+'<H' длина + UTF-8. Файл начинается с заголовка JOURNAL_MAGIC.
+
+Использование:
+    journal = GraphJournal("buffer/real_graph.journal")
+    journal.attach(spore_manager.graph)     # дальше всё пишется само
+    ...
+    graph = load_graph_journal("buffer/real_graph.journal")  # без Ursina
+"""
+
+import os
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from .spore_graph import SporeGraph
+
+JOURNAL_MAGIC = b'SPGJ\x01\x00\x00\x00'
+
+# Коды операций
+OP_ADD_SPORE = 1
+OP_ADD_EDGE = 2
+OP_REMOVE_EDGE = 3
+OP_REMOVE_SPORE = 4
+OP_CLEAR = 5
+
+_RECORD_HEADER = struct.Struct('<BI')
+_STRING_LENGTH = struct.Struct('<H')
+_SPORE_FIELDS = struct.Struct('<dddd?')   # x, y, optimal_dt, optimal_control, is_goal
+_EDGE_FIELDS = struct.Struct('<dd')       # dt_value, control_value
+
+
+@dataclass
+class JournalSpore:
+    """Узел графа, восстановленный из журнала (без сущности Ursina)."""
+    spore_id: str
+    position: np.ndarray
+    is_goal: bool = False
+    optimal_dt: float = float('nan')
+    optimal_control: float = float('nan')
+
+    def calc_2d_pos(self) -> np.ndarray:
+        return self.position.copy()
+
+
+@dataclass
+class JournalLink:
+    """Ребро графа, восстановленное из журнала (без сущности Ursina)."""
+    link_id: str
+    parent_spore: JournalSpore
+    child_spore: JournalSpore
+    dt_value: float = float('nan')
+    control_value: float = float('nan')
+
+
+# ----------------------------------------------------------------------
+# Кодирование записей
+# ----------------------------------------------------------------------
+def _pack_string(value: Any) -> bytes:
+    data = str(value).encode('utf-8')
+    return _STRING_LENGTH.pack(len(data)) + data
+
+
+def _unpack_string(payload: bytes, offset: int) -> Tuple[str, int]:
+    (length,) = _STRING_LENGTH.unpack_from(payload, offset)
+    offset += _STRING_LENGTH.size
+    return payload[offset:offset + length].decode('utf-8'), offset + length
+
+
+def _as_float(value: Any) -> float:
+    """Число из скаляра или массива управления (NaN — неизвестно)."""
+    if value is None:
+        return float('nan')
+    flat = np.ravel(value)
+    return float(flat[0]) if len(flat) else float('nan')
+
+
+def _spore_state(spore) -> Tuple[float, float, float, float, bool]:
+    """(x, y, optimal_dt, optimal_control, is_goal) споры или JournalSpore."""
+    if hasattr(spore, 'calc_2d_pos'):
+        x, y = np.asarray(spore.calc_2d_pos(), dtype=np.float64)[:2]
+    else:
+        x = y = float('nan')
+    source = getattr(spore, 'logic', None) or spore
+    return (float(x), float(y),
+            _as_float(getattr(source, 'optimal_dt', None)),
+            _as_float(getattr(source, 'optimal_control', None)),
+            bool(getattr(spore, 'is_goal', False)))
+
+
+def _edge_state(edge_info) -> Tuple[str, float, float]:
+    """(link_id, dt, control) ребра; для ребра без линка — пустой id и NaN."""
+    link = edge_info.link_object
+    if link is None:
+        return '', float('nan'), float('nan')
+    return (str(getattr(link, 'link_id', '') or ''),
+            _as_float(getattr(link, 'dt_value', None)),
+            _as_float(getattr(link, 'control_value', None)))
+
+
+class GraphJournal:
+    """
+    Дозаписываемый журнал изменений одного SporeGraph.
+
+    Attributes:
+        path: Путь к файлу журнала
+        checkpoint_path: Путь к контрольной точке (<path>.ckpt.npz)
+        checkpoint_every: Записей между контрольными точками (0 — только вручную)
+        records_written: Записей в этой сессии
+    """
+
+    def __init__(self, path: str, checkpoint_every: int = 2000, resume: bool = True):
+        """
+        Args:
+            path: Файл журнала
+            checkpoint_every: Записей между автоматическими контрольными точками
+            resume: Продолжить существующий журнал; иначе старый журнал и
+                контрольная точка переименовываются в *.prev
+        """
+        self.path = path
+        self.checkpoint_path = path + '.ckpt.npz'
+        self.checkpoint_every = checkpoint_every
+        self.records_written = 0
+        self.graph: Optional[SporeGraph] = None
+        self._since_checkpoint = 0
+        self._paused = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not resume:
+            for file_path in (self.path, self.checkpoint_path):
+                if os.path.exists(file_path):
+                    os.replace(file_path, file_path + '.prev')
+
+        if resume and os.path.exists(self.path):
+            self._truncate_torn_tail()
+
+        self._file = open(self.path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(JOURNAL_MAGIC)
+            self._file.flush()
+
+    def _truncate_torn_tail(self) -> None:
+        """
+        Обрезает журнал по концу последней целой записи.
+
+        После падения посреди записи новые записи иначе легли бы за
+        оборванной, и загрузчик читал бы их со сдвигом.
+        """
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        if not data:
+            return
+        if not data.startswith(JOURNAL_MAGIC):
+            raise ValueError(f"{self.path}: не журнал графа (неверный заголовок)")
+        end = _complete_records_end(data, len(JOURNAL_MAGIC))
+        if end < len(data):
+            print(f"[GraphJournal] ⚠️ Оборванная запись в конце журнала: отброшено {len(data) - end} байт")
+            with open(self.path, 'r+b') as f:
+                f.truncate(end)
+
+    # ------------------------------------------------------------------
+    # Подключение
+    # ------------------------------------------------------------------
+    def attach(self, graph: SporeGraph) -> None:
+        """
+        Начинает журналировать graph. Если в графе уже есть узлы,
+        сразу пишется контрольная точка — журнал догоняет граф.
+        """
+        self.graph = graph
+        graph.journal = self
+        if graph.nodes:
+            self.checkpoint()
+
+    def detach(self) -> None:
+        """Отключает журнал от графа (файл остаётся открытым)."""
+        if self.graph is not None and getattr(self.graph, 'journal', None) is self:
+            self.graph.journal = None
+        self.graph = None
+
+    def pause(self) -> None:
+        """Временно не писать изменения (например, при восстановлении из журнала)."""
+        self._paused += 1
+
+    def resume(self) -> None:
+        self._paused = max(0, self._paused - 1)
+
+    # ------------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------------
+    def _append(self, op: int, payload: bytes = b'') -> None:
+        if self._paused or self._file.closed:
+            return
+        self._file.write(_RECORD_HEADER.pack(op, len(payload)))
+        self._file.write(payload)
+        self.records_written += 1
+        self._since_checkpoint += 1
+        if self.checkpoint_every and self._since_checkpoint >= self.checkpoint_every \
+                and self.graph is not None:
+            self.checkpoint()
+
+    def record_add_spore(self, spore_id: str, spore) -> None:
+        self._append(OP_ADD_SPORE, _pack_string(spore_id) + _SPORE_FIELDS.pack(*_spore_state(spore)))
+
+    def record_add_edge(self, parent_id: str, child_id: str, edge_info) -> None:
+        link_id, dt_value, control_value = _edge_state(edge_info)
+        self._append(OP_ADD_EDGE, _pack_string(parent_id) + _pack_string(child_id)
+                     + _pack_string(edge_info.link_type) + _pack_string(link_id)
+                     + _EDGE_FIELDS.pack(dt_value, control_value))
+
+    def record_remove_edge(self, parent_id: str, child_id: str) -> None:
+        self._append(OP_REMOVE_EDGE, _pack_string(parent_id) + _pack_string(child_id))
+
+    def record_remove_spore(self, spore_id: str) -> None:
+        self._append(OP_REMOVE_SPORE, _pack_string(spore_id))
+
+    def record_clear(self) -> None:
+        self._append(OP_CLEAR)
+
+    def flush(self) -> None:
+        if not self._file.closed:
+            self._file.flush()
+
+    def close(self) -> None:
+        self.detach()
+        if not self._file.closed:
+            self._file.close()
+
+    # ------------------------------------------------------------------
+    # Контрольные точки
+    # ------------------------------------------------------------------
+    def checkpoint(self) -> str:
+        """
+        Пишет контрольную точку подключённого графа (O(граф)).
+
+        Файл подменяется атомарно; смещение указывает на конец уже
+        сброшенного на диск журнала.
+        """
+        if self.graph is None:
+            raise ValueError("GraphJournal.checkpoint: журнал не подключён к графу")
+        self.flush()
+        offset = self._file.tell()
+
+        node_ids = list(self.graph.nodes)
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        node_state = np.array([_spore_state(spore) for spore in self.graph.nodes.values()],
+                              dtype=np.float64).reshape(-1, 5)
+
+        edges = [(key, edge_info) for key, edge_info in self.graph.edges.items()
+                 if key[0] in index and key[1] in index]
+        edge_state = [_edge_state(edge_info) for _, edge_info in edges]
+
+        arrays = {
+            'journal_offset': np.array(offset, dtype=np.int64),
+            'node_ids': np.array(node_ids, dtype=np.str_),
+            'positions': node_state[:, :2],
+            'node_dt': node_state[:, 2],
+            'node_control': node_state[:, 3],
+            'is_goal': node_state[:, 4].astype(bool),
+            'edge_parent': np.array([index[key[0]] for key, _ in edges], dtype=np.int64),
+            'edge_child': np.array([index[key[1]] for key, _ in edges], dtype=np.int64),
+            'edge_type': np.array([edge_info.link_type for _, edge_info in edges], dtype=np.str_),
+            'edge_ids': np.array([state[0] for state in edge_state], dtype=np.str_),
+            'edge_dt': np.array([state[1] for state in edge_state], dtype=np.float64),
+            'edge_control': np.array([state[2] for state in edge_state], dtype=np.float64),
+        }
+
+        # Пишем во временный файл и подменяем, чтобы загрузчик не увидел половину точки
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, self.checkpoint_path)
+        self._since_checkpoint = 0
+        return self.checkpoint_path
+
+
+# ----------------------------------------------------------------------
+# Загрузка
+# ----------------------------------------------------------------------
+def _load_checkpoint(path: str, journal_size: int):
+    """Состояние из контрольной точки и смещение (None — точки нет или она не подходит)."""
+    checkpoint_path = path + '.ckpt.npz'
+    if not os.path.exists(checkpoint_path):
+        return None
+    with np.load(checkpoint_path, allow_pickle=False) as data:
+        offset = int(data['journal_offset'])
+        if offset > journal_size:
+            return None  # Точка от другого (перезаписанного) журнала
+        node_ids = [str(node_id) for node_id in data['node_ids']]
+        nodes = {node_id: [float(x), float(y), float(dt), float(control), bool(goal)]
+                 for node_id, (x, y), dt, control, goal
+                 in zip(node_ids, data['positions'], data['node_dt'], data['node_control'], data['is_goal'])}
+        edges = {(node_ids[parent], node_ids[child]): (str(link_type), str(link_id), float(dt), float(control))
+                 for parent, child, link_type, link_id, dt, control
+                 in zip(data['edge_parent'], data['edge_child'], data['edge_type'],
+                        data['edge_ids'], data['edge_dt'], data['edge_control'])}
+    return nodes, edges, offset
+
+
+def _replay(payload_reader, nodes: Dict, edges: Dict) -> int:
+    """Доигрывает записи журнала в словари nodes / edges; возвращает число записей."""
+    count = 0
+    for op, payload in payload_reader:
+        count += 1
+        if op == OP_ADD_SPORE:
+            spore_id, offset = _unpack_string(payload, 0)
+            nodes[spore_id] = list(_SPORE_FIELDS.unpack_from(payload, offset))
+        elif op == OP_ADD_EDGE:
+            parent_id, offset = _unpack_string(payload, 0)
+            child_id, offset = _unpack_string(payload, offset)
+            link_type, offset = _unpack_string(payload, offset)
+            link_id, offset = _unpack_string(payload, offset)
+            dt_value, control_value = _EDGE_FIELDS.unpack_from(payload, offset)
+            edges[(parent_id, child_id)] = (link_type, link_id, dt_value, control_value)
+        elif op == OP_REMOVE_EDGE:
+            parent_id, offset = _unpack_string(payload, 0)
+            child_id, _ = _unpack_string(payload, offset)
+            edges.pop((parent_id, child_id), None)
+        elif op == OP_REMOVE_SPORE:
+            spore_id, _ = _unpack_string(payload, 0)
+            nodes.pop(spore_id, None)
+        elif op == OP_CLEAR:
+            nodes.clear()
+            edges.clear()
+    return count
+
+
+def _read_records(data: bytes, offset: int):
+    """Записи журнала начиная с offset; оборванная последняя запись пропускается."""
+    end = len(data)
+    while offset + _RECORD_HEADER.size <= end:
+        op, length = _RECORD_HEADER.unpack_from(data, offset)
+        start = offset + _RECORD_HEADER.size
+        if start + length > end:
+            break
+        yield op, data[start:start + length]
+        offset = start + length
+
+
+def _complete_records_end(data: bytes, offset: int) -> int:
+    """Смещение конца последней целой записи, начиная с offset."""
+    end = len(data)
+    while offset + _RECORD_HEADER.size <= end:
+        _, length = _RECORD_HEADER.unpack_from(data, offset)
+        if offset + _RECORD_HEADER.size + length > end:
+            break
+        offset += _RECORD_HEADER.size + length
+    return offset
+
+
+def load_graph_journal(path: str, use_checkpoint: bool = True) -> SporeGraph:
+    """
+    Восстанавливает логический граф из журнала без Ursina.
+
+    Узлы — JournalSpore, линки рёбер — JournalLink (ID, dt и управление
+    сохранены), поэтому ValenceManager, PickerManager и экспорт работают
+    с результатом как с обычным графом. Сущности сцены строит
+    SporeManager.restore_from_journal.
+
+    Args:
+        path: Файл журнала
+        use_checkpoint: Начинать с контрольной точки (False — доиграть весь журнал)
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(JOURNAL_MAGIC):
+        raise ValueError(f"{path}: не журнал графа (неверный заголовок)")
+
+    loaded = _load_checkpoint(path, len(data)) if use_checkpoint else None
+    if loaded is not None:
+        nodes, edges, offset = loaded
+    else:
+        nodes, edges, offset = {}, {}, len(JOURNAL_MAGIC)
+    _replay(_read_records(data, offset), nodes, edges)
+
+    # Граф собирается один раз, после доигрывания всех записей
+    graph = SporeGraph('real')
+    spores = {}
+    for spore_id, (x, y, dt, control, is_goal) in nodes.items():
+        spores[spore_id] = JournalSpore(spore_id=spore_id, position=np.array([x, y]), is_goal=bool(is_goal),
+                                        optimal_dt=dt, optimal_control=control)
+        graph.add_spore(spores[spore_id])
+    for (parent_id, child_id), (link_type, link_id, dt_value, control_value) in edges.items():
+        parent, child = spores.get(parent_id), spores.get(child_id)
+        if parent is None or child is None:
+            continue
+        link = JournalLink(link_id=link_id, parent_spore=parent, child_spore=child,
+                           dt_value=dt_value, control_value=control_value)
+        graph.add_edge(parent, child, link_type=link_type, link_object=link)
+    return graph
@@ -0,0 +1,327 @@
+"""
+GraphSnapshot - колоночный снимок реального графа спор.
+
+Снимок хранит граф в виде плоских numpy массивов:
+- узлы: позиции (N, 2), spore_id, флаги цели/жизни, dt и стоимость;
+- рёбра: индексы концов (L,), управление, знаковое dt, номер и id линка, цвет.
+
+Снимок строится за O(N + L) (один проход по спорам и один по линкам)
+и сохраняется в несжатый .npz, массивы которого читаются без pickle.
+JSON (старый формат real_graph_latest.json) и CSV строятся из снимка
+только по явному запросу.
+"""
+
+import csv
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+_ARRAY_FIELDS = (
+    'positions', 'spore_ids', 'is_goal', 'is_alive', 'node_dt', 'node_cost',
+    'edge_parent', 'edge_child', 'edge_control', 'edge_dt',
+    'edge_number', 'edge_ids', 'edge_color',
+)
+
+
+def _color_to_rgb(color_obj) -> tuple:
+    """Цвет Ursina (или None) в кортеж (r, g, b); жёлтый по умолчанию."""
+    if color_obj is not None and hasattr(color_obj, 'r') and hasattr(color_obj, 'g') and hasattr(color_obj, 'b'):
+        return (float(color_obj.r), float(color_obj.g), float(color_obj.b))
+    return (1.0, 1.0, 0.0)
+
+
+@dataclass
+class GraphSnapshot:
+    """
+    Колоночное представление графа.
+
+    Индекс узла совпадает с позицией споры в SporeManager.objects,
+    поэтому визуальный номер споры равен индексу + 1.
+
+    Attributes:
+        positions: Позиции спор (N, 2).
+        spore_ids: Внутренние ID спор (N,), строки.
+        is_goal: Флаг целевой споры (N,).
+        is_alive: Флаг живой споры (N,).
+        node_dt: Оптимальный dt споры (N,).
+        node_cost: Стоимость споры (N,).
+        edge_parent: Индекс родителя ребра (L,).
+        edge_child: Индекс ребёнка ребра (L,).
+        edge_control: Управление на ребре (L,).
+        edge_dt: Знаковое dt ребра (L,).
+        edge_number: Порядковый номер линка (L,), начиная с 1.
+        edge_ids: link_id линков (L,), строки.
+        edge_color: Цвета линков (L, 3).
+        version: Номер версии графа, из которой построен снимок.
+        metadata: Произвольные метаданные (время экспорта и т.п.).
+    """
+    positions: np.ndarray
+    spore_ids: np.ndarray
+    is_goal: np.ndarray
+    is_alive: np.ndarray
+    node_dt: np.ndarray
+    node_cost: np.ndarray
+    edge_parent: np.ndarray
+    edge_child: np.ndarray
+    edge_control: np.ndarray
+    edge_dt: np.ndarray
+    edge_number: np.ndarray
+    edge_ids: np.ndarray
+    edge_color: np.ndarray
+    version: int = 0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.positions)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edge_parent)
+
+    # ------------------------------------------------------------------
+    # Построение
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_spore_manager(cls, spore_manager, version: int = 0) -> 'GraphSnapshot':
+        """
+        Строит снимок по текущему состоянию SporeManager за O(N + L).
+
+        Линки, концы которых отсутствуют в spore_manager.objects, пропускаются.
+        """
+        spores = spore_manager.objects
+        n = len(spores)
+
+        positions = np.zeros((n, 2), dtype=np.float64)
+        spore_ids = []
+        is_goal = np.zeros(n, dtype=bool)
+        is_alive = np.ones(n, dtype=bool)
+        node_dt = np.zeros(n, dtype=np.float64)
+        node_cost = np.zeros(n, dtype=np.float64)
+        index_of: Dict[int, int] = {}
+
+        for i, spore in enumerate(spores):
+            index_of[id(spore)] = i
+            if hasattr(spore, 'calc_2d_pos'):
+                positions[i] = spore.calc_2d_pos()
+            spore_ids.append(str(spore.id) if hasattr(spore, 'id') else f"spore_{i}")
+            is_goal[i] = bool(getattr(spore, 'is_goal', False))
+            if hasattr(spore, 'is_alive'):
+                is_alive[i] = bool(spore.is_alive())
+            logic = getattr(spore, 'logic', None)
+            if logic is not None:
+                node_dt[i] = getattr(logic, 'optimal_dt', 0.0) or 0.0
+                node_cost[i] = getattr(logic, 'cost', 0.0) or 0.0
+
+        parents, children, controls, dts = [], [], [], []
+        numbers, link_ids, colors = [], [], []
+
+        for number, link in enumerate(spore_manager.links, start=1):
+            if not getattr(link, 'link_id', None):
+                continue
+            parent_idx = index_of.get(id(link.parent_spore))
+            child_idx = index_of.get(id(link.child_spore))
+            if parent_idx is None or child_idx is None:
+                continue
+            parents.append(parent_idx)
+            children.append(child_idx)
+            controls.append(float(getattr(link, 'control_value', 0.0) or 0.0))
+            dts.append(float(getattr(link, 'dt_value', 0.0) or 0.0))
+            numbers.append(number)
+            link_ids.append(str(link.link_id))
+            colors.append(_color_to_rgb(getattr(link, 'color', None)))
+
+        return cls(
+            positions=positions,
+            spore_ids=np.array(spore_ids, dtype=np.str_),
+            is_goal=is_goal,
+            is_alive=is_alive,
+            node_dt=node_dt,
+            node_cost=node_cost,
+            edge_parent=np.array(parents, dtype=np.int64),
+            edge_child=np.array(children, dtype=np.int64),
+            edge_control=np.array(controls, dtype=np.float64),
+            edge_dt=np.array(dts, dtype=np.float64),
+            edge_number=np.array(numbers, dtype=np.int64),
+            edge_ids=np.array(link_ids, dtype=np.str_),
+            edge_color=np.array(colors, dtype=np.float64).reshape(-1, 3),
+            version=int(version),
+            metadata={'export_time': datetime.now().isoformat()},
+        )
+
+    # ------------------------------------------------------------------
+    # Бинарный формат
+    # ------------------------------------------------------------------
+    def save(self, path: str) -> str:
+        """Сохраняет снимок в несжатый .npz (запись O(N + L))."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        arrays = {name: getattr(self, name) for name in _ARRAY_FIELDS}
+        arrays['format_version'] = np.array(SNAPSHOT_FORMAT_VERSION)
+        arrays['graph_version'] = np.array(self.version, dtype=np.int64)
+        arrays['metadata_json'] = np.array(json.dumps(self.metadata, ensure_ascii=False))
+
+        # Пишем во временный файл и подменяем, чтобы читатель не увидел половину снимка
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'GraphSnapshot':
+        """Загружает снимок из .npz (без pickle)."""
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in _ARRAY_FIELDS}
+            version = int(data['graph_version'])
+            metadata = json.loads(str(data['metadata_json']))
+        return cls(version=version, metadata=metadata, **arrays)
+
+    # ------------------------------------------------------------------
+    # Экспорт по запросу
+    # ------------------------------------------------------------------
+    def to_json_dict(self, extra_statistics: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Словарь в формате real_graph_latest.json (RealGraphExporter).
+
+        Ссылки на споры в линках — визуальные номера (индекс + 1).
+        """
+        spores_data = []
+        for i in range(self.num_nodes):
+            is_goal = bool(self.is_goal[i])
+            spores_data.append({
+                'index': i,
+                'spore_id': str(self.spore_ids[i]),
+                'position': [float(self.positions[i, 0]), float(self.positions[i, 1])],
+                'type': 'goal' if is_goal else 'normal',
+                'is_goal': is_goal,
+                'is_alive': bool(self.is_alive[i]),
+                'dt': float(self.node_dt[i]),
+                'cost': float(self.node_cost[i]),
+                'in_links': [],
+                'out_links': [],
+            })
+
+        links_data = []
+        for k in np.argsort(self.edge_number, kind='stable'):
+            parent_id = int(self.edge_parent[k]) + 1
+            child_id = int(self.edge_child[k]) + 1
+            number = int(self.edge_number[k])
+            control = float(self.edge_control[k])
+            raw_dt = float(self.edge_dt[k])
+            dt_sign = 1 if raw_dt >= 0 else -1
+
+            links_data.append({
+                'link_number': number,
+                'link_id': str(self.edge_ids[k]),
+                'parent_spore_id': parent_id,
+                'child_spore_id': child_id,
+                'control': control,
+                'dt': abs(raw_dt),
+                'dt_sign': dt_sign,
+                'raw_dt': raw_dt,
+                'direction': 'forward' if raw_dt >= 0 else 'backward',
+                'color': [float(c) for c in self.edge_color[k]],
+            })
+            spores_data[parent_id - 1]['out_links'].append({
+                'to_spore_id': child_id,
+                'link_number': number,
+                'control': control,
+                'dt': abs(raw_dt),
+                'dt_sign': dt_sign,
+            })
+            spores_data[child_id - 1]['in_links'].append({
+                'from_spore_id': parent_id,
+                'link_number': number,
+                'control': control,
+                'dt': abs(raw_dt),
+                'dt_sign': dt_sign,
+            })
+
+        statistics = {
+            'total_spores': self.num_nodes,
+            'total_links': len(links_data),
+            'goal_spores': int(np.count_nonzero(self.is_goal)),
+        }
+        if extra_statistics:
+            statistics.update(extra_statistics)
+
+        return {
+            'metadata': {
+                'export_time': self.metadata.get('export_time', datetime.now().isoformat()),
+                'version': 'RealGraphExporter_v3.0',
+                'graph_version': self.version,
+                'description': 'Реальный граф спор с правильными номерами линков для анализа пикером',
+            },
+            'statistics': statistics,
+            'spores': spores_data,
+            'links': links_data,
+        }
+
+    def save_json(self, path: str, extra_statistics: Optional[Dict[str, Any]] = None) -> str:
+        """Сохраняет снимок в JSON формате RealGraphExporter."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json_dict(extra_statistics), f, indent=2, ensure_ascii=False)
+        return path
+
+    def export_sparse_csv(self, path: str) -> str:
+        """
+        Экспортирует рёбра в разреженный CSV (одна строка на ребро).
+
+        Колонки: parent, child (визуальные номера), link_number, control, dt.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        table = np.column_stack([
+            self.edge_parent + 1,
+            self.edge_child + 1,
+            self.edge_number,
+            self.edge_control,
+            self.edge_dt,
+        ]) if self.num_edges else np.empty((0, 5))
+
+        np.savetxt(path, table, delimiter=',', fmt=['%d', '%d', '%d', '%.10g', '%.10g'],
+                   header='parent,child,link_number,control,dt', comments='')
+        return path
+
+    def export_matrix_csv(self, path: str) -> str:
+        """
+        Экспортирует плотную N×N матрицу связей (формат spores_links_matrix.csv).
+
+        Строка — ребёнок, столбец — родитель, ячейка "управление +dt";
+        в симметричную ячейку пишется та же связь с обратным временем.
+        Размер файла O(N²), поэтому вызывается только по явному запросу.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        n = self.num_nodes
+        cells: Dict[tuple, str] = {}
+        for parent, child, control, dt_value in zip(self.edge_parent.tolist(), self.edge_child.tolist(),
+                                                    self.edge_control.tolist(), self.edge_dt.tolist()):
+            control_str = f"+{control}" if control >= 0 else str(control)
+            forward = abs(dt_value)
+            cells[(child, parent)] = f"{control_str} +{forward}"
+            cells[(parent, child)] = f"{control_str} {-forward:+.3f}"
+
+        with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow([''] + [str(i + 1) for i in range(n)])
+            for row in range(n):
+                writer.writerow([str(row + 1)] + [cells.get((row, col), '') for col in range(n)])
+        return path
@@ -1,5 +1,6 @@
 from __future__ import annotations
 from ..visual.spore_visual import SporeVisual
+from ..visual.entity_pool import entity_pool
 from ..logic.spore_logic import SporeLogic
 from ..managers.color_manager import ColorManager
 import numpy as np
@@ -29,7 +30,34 @@ class Spore(SporeVisual):
         # Инициализируем визуальную часть (Entity.id остается нетронутым)
         super().__init__(model=model, color_manager=color_manager,
                          is_goal=is_goal, *args, **kwargs)
-        
+        self._init_state(dt, pendulum, goal_position, model, color_manager,
+                         is_goal, is_ghost, id_manager, spore_id, kwargs)
+
+    def reinit(self,
+               dt: float,
+               pendulum: PendulumSystem,
+               goal_position: (np.ndarray | Tuple[float, float] |
+                               Tuple[float, float, float]),
+               model: str = 'sphere',
+               color_manager: Optional[ColorManager] = None,
+               is_goal: bool = False,
+               is_ghost: bool = False,
+               id_manager=None,
+               spore_id=None,
+               **kwargs: Any) -> None:
+        """
+        Повторная инициализация споры из пула (visual/entity_pool.py).
+        Аргументы те же, что у конструктора; спора получает новый spore_id.
+        """
+        super().reinit(model=model, color_manager=color_manager,
+                       is_goal=is_goal, **kwargs)
+        self._init_state(dt, pendulum, goal_position, model, color_manager,
+                         is_goal, is_ghost, id_manager, spore_id, kwargs)
+
+    def _init_state(self, dt, pendulum, goal_position, model, color_manager,
+                    is_goal, is_ghost, id_manager, spore_id,
+                    kwargs: Dict[str, Any]) -> None:
+        """Невизуальное состояние споры (общая часть __init__ и reinit)."""
         # 🔧 НОВАЯ СИСТЕМА: Наш собственный spore_id
         if spore_id is not None:
             # Явно переданный ID (приоритет)
@@ -223,6 +251,7 @@ class Spore(SporeVisual):
         """
         Обратная совместимость: создает копию споры.
         Можно передать новую позицию для клона.
+        Сущность берётся из entity_pool — освобождать через entity_pool.release().
         """
         init_kwargs = self._initial_kwargs.copy()
         init_kwargs['position'] = (new_position if new_position is not None
@@ -235,7 +264,8 @@ class Spore(SporeVisual):
             if key in init_kwargs:
                 del init_kwargs[key]
         
-        new_spore = Spore(
+        new_spore = entity_pool.acquire(
+            Spore,
             pendulum=self._initial_pendulum,
             dt=self._initial_dt,
             model=self._initial_model,
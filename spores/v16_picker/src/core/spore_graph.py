@@ -6,9 +6,17 @@ SporeGraph - Центральное хранилище структуры свя
 - Направление связи (parent_spore -> child_spore)
 - Тип связи (цвет: ghost_max, ghost_min, default)
 - Граф может быть реальным или призрачным
+
+Каждое изменение структуры (add_spore / add_edge / remove_edge /
+remove_spore) увеличивает версию графа и отмечает затронутые узлы.
+Производные кеши (валентность, соседи в PickerManager) по журналу
+изменений пересчитывают только узлы в пределах двух шагов от них.
+Если подключён GraphJournal (core/graph_journal.py), каждое изменение
+ещё и дописывается в файл журнала.
 """
 
-from typing import Dict, Optional, Set, List, Tuple, Any
+from bisect import bisect_right
+from typing import Dict, Iterable, Optional, Set, List, Tuple, Any
 from ..core.spore import Spore
 from ..visual.link import Link
 
@@ -58,8 +66,17 @@ class SporeGraph:
 
     Хранит структуру связей отдельно от визуальных объектов Link.
     Позволяет легко копировать структуру между реальным и призрачным графом.
+
+    Attributes:
+        version: Монотонно растущая версия структуры графа
+        node_versions: Версия последнего изменения каждого узла
+        journal: Подключённый GraphJournal (None — изменения не пишутся)
     """
 
+    # Максимальная длина журнала изменений; более старые версии
+    # требуют полной инвалидации кешей
+    MAX_CHANGE_LOG = 100_000
+
     def __init__(self, graph_type: str = 'real'):
         """
         Args:
@@ -75,6 +92,71 @@ class SporeGraph:
         self.outgoing: Dict[str, Set[str]] = {}
         self.incoming: Dict[str, Set[str]] = {}
 
+        # Версия и журнал изменённых узлов
+        self.version: int = 0
+        self.node_versions: Dict[str, int] = {}
+        self._log_versions: List[int] = []
+        self._log_nodes: List[str] = []
+        self._log_floor: int = 0
+
+        # Файловый журнал изменений (подключает GraphJournal.attach)
+        self.journal = None
+
+    # ------------------------------------------------------------------
+    # Версии и грязные узлы
+    # ------------------------------------------------------------------
+    def _touch(self, *node_ids: str) -> None:
+        """Новая версия графа: отмечает изменённые узлы."""
+        self.version += 1
+        for node_id in node_ids:
+            self.node_versions[node_id] = self.version
+            self._log_versions.append(self.version)
+            self._log_nodes.append(node_id)
+
+        if len(self._log_versions) > self.MAX_CHANGE_LOG:
+            cut = len(self._log_versions) // 2
+            self._log_floor = self._log_versions[cut - 1]
+            del self._log_versions[:cut]
+            del self._log_nodes[:cut]
+
+    def dirty_since(self, version: int) -> Optional[Set[str]]:
+        """
+        Узлы, изменённые после версии version.
+
+        Returns:
+            Множество ID (может содержать удалённые узлы) или None, если
+            журнал не покрывает version — тогда нужна полная инвалидация
+        """
+        if version < self._log_floor:
+            return None
+        start = bisect_right(self._log_versions, version)
+        return set(self._log_nodes[start:])
+
+    def neighborhood(self, node_ids: Iterable[str], hops: int = 2) -> Set[str]:
+        """Узлы в пределах hops рёбер (в обе стороны) от node_ids, включая их самих."""
+        result = set(node_ids)
+        frontier = result
+        for _ in range(hops):
+            reached: Set[str] = set()
+            for node_id in frontier:
+                reached |= self.outgoing.get(node_id, set())
+                reached |= self.incoming.get(node_id, set())
+            frontier = reached - result
+            if not frontier:
+                break
+            result |= frontier
+        return result
+
+    def affected_since(self, version: int, hops: int = 2) -> Optional[Set[str]]:
+        """
+        Узлы, производные данные которых могли устареть после version:
+        изменённые узлы и их окрестность радиуса hops. None — см. dirty_since.
+        """
+        dirty = self.dirty_since(version)
+        if dirty is None:
+            return None
+        return self.neighborhood(dirty, hops) if dirty else dirty
+
     def add_spore(self, spore: Spore) -> None:
         """Добавляет спору в граф"""
         # Проверяем наличие нашего spore_id
@@ -89,11 +171,16 @@ class SporeGraph:
         if not spore_id or spore_id == 'None':
             raise ValueError(f"Spore имеет пустой spore_id: {spore}")
 
+        is_new = self.nodes.get(spore_id) is not spore
+        if is_new:
+            self._touch(spore_id)
         self.nodes[spore_id] = spore
         if spore_id not in self.outgoing:
             self.outgoing[spore_id] = set()
         if spore_id not in self.incoming:
             self.incoming[spore_id] = set()
+        if is_new and self.journal is not None:
+            self.journal.record_add_spore(spore_id, spore)
 
     def add_edge(self,
                  parent_spore: Spore,
@@ -137,6 +224,9 @@ class SporeGraph:
         child_id = self._get_spore_id(child_spore)
         self.outgoing[parent_id].add(child_id)
         self.incoming[child_id].add(parent_id)
+        self._touch(parent_id, child_id)
+        if self.journal is not None:
+            self.journal.record_add_edge(parent_id, child_id, edge_info)
 
         return edge_info
     
@@ -169,9 +259,35 @@ class SporeGraph:
             self.outgoing[parent_id].discard(child_id)
         if child_id in self.incoming:
             self.incoming[child_id].discard(parent_id)
+        self._touch(parent_id, child_id)
+        if self.journal is not None:
+            self.journal.record_remove_edge(parent_id, child_id)
 
         return True
 
+    def remove_spore(self, spore_id: str) -> int:
+        """
+        Удаляет спору и все её связи из графа.
+
+        Returns:
+            int: Количество удалённых рёбер
+        """
+        removed = 0
+        for child_id in list(self.outgoing.get(spore_id, ())):
+            removed += self.remove_edge(spore_id, child_id)
+        for parent_id in list(self.incoming.get(spore_id, ())):
+            removed += self.remove_edge(parent_id, spore_id)
+
+        if spore_id in self.nodes:
+            del self.nodes[spore_id]
+            self._touch(spore_id)
+            if self.journal is not None:
+                self.journal.record_remove_spore(spore_id)
+        self.outgoing.pop(spore_id, None)
+        self.incoming.pop(spore_id, None)
+        self.node_versions.pop(spore_id, None)
+        return removed
+
     def get_children(self, parent_id: str) -> List[Spore]:
         """Возвращает всех детей данной споры"""
         child_ids = self.outgoing.get(parent_id, set())
@@ -280,6 +396,9 @@ class SporeGraph:
         print(f"   🔗 Создано визуальных линков: {created_links}")
         print(f"   ⏭️ Пропущено связей: {skipped_links}")
 
+        if created_links and hasattr(spore_manager, 'mark_graph_changed'):
+            spore_manager.mark_graph_changed()
+
         # Обновляем трансформации всех объектов
         if spore_manager and hasattr(spore_manager, 'zoom_manager'):
             spore_manager.zoom_manager.update_transform()
@@ -291,6 +410,15 @@ class SporeGraph:
         self.outgoing.clear()
         self.incoming.clear()
 
+        # Все прежние версии недействительны
+        self.version += 1
+        self.node_versions.clear()
+        self._log_versions.clear()
+        self._log_nodes.clear()
+        self._log_floor = self.version
+        if self.journal is not None:
+            self.journal.record_clear()
+
     def get_stats(self) -> Dict[str, Any]:
         """Возвращает статистику графа"""
         link_types = {}
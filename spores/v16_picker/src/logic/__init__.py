@@ -1,4 +1,8 @@
 # Logic package initialization 
 
-# re-export bridge for convenience
-from .tree import run_area_optimization 
\ No newline at end of file
+from ..utils.lazy_import import lazy_exports
+
+# re-export bridge for convenience (loaded on first use: pulls scipy.optimize)
+__getattr__ = lazy_exports(__name__, {
+    'run_area_optimization': '.tree',
+})
@@ -10,17 +10,36 @@ from dataclasses import dataclass, field
 
 @dataclass
 class Trajectory:
-    """Траектория из двух шагов управления."""
+    """Траектория из нескольких шагов управления (по умолчанию двух)."""
     id: int
-    sequence: List[Tuple[float, float]]  # [(u1, dt1), (u2, dt2)]
-    points: List[np.ndarray]  # [начальная, промежуточная, конечная]
-    convergence_group: int  # Номер группы схождения (0-3)
+    sequence: List[Tuple[float, float]]  # [(u1, dt1), (u2, dt2), ...]
+    points: List[np.ndarray]  # [начальная, промежуточные..., конечная]
+    convergence_group: int  # Номер группы схождения
     
     def __repr__(self):
         seq_str = " → ".join([f"({u:+.0f}u, {dt:+.0f}T)" for u, dt in self.sequence])
         return f"Traj{self.id}: {seq_str}"
 
 
+@dataclass
+class SimpleNode:
+    """Узел дерева для визуализации."""
+    id: str
+    level: int
+    position_2d: np.ndarray
+
+
+@dataclass
+class SimpleEdge:
+    """Ребро дерева для визуализации."""
+    parent_id: str
+    child_id: str
+    control: float
+    dt: float
+    is_forward: bool
+    control_type: str
+
+
 class ControlTreeBuilder:
     """
     Построитель системы траекторий со схождением.
@@ -34,22 +53,32 @@ class ControlTreeBuilder:
     - dt[6], dt[7] - для группы 3 (траектории 6-7)
     
     В каждой группе траектории используют одинаковые dt в обратном порядке для схождения.
+    
+    Последовательности, группы и маппинг dt можно передать свои: тогда
+    траектории могут быть любой длины (глубины), а длина dt_vector равна
+    dt_indices.max() + 1. Все расчёты идут по уровням — один пакетный
+    вызов ядра на шаг траектории.
     """
     
-    def __init__(self, pendulum_system, dt_vector: Optional[np.ndarray] = None):
+    def __init__(self, pendulum_system, dt_vector: Optional[np.ndarray] = None,
+                 tolerance: Optional[float] = None,
+                 control_sequences: Optional[List[List[Tuple[int, int]]]] = None,
+                 convergence_groups: Optional[List[List[int]]] = None,
+                 dt_indices: Optional[np.ndarray] = None):
         """
         Args:
             pendulum_system: Система маятника для расчета динамики
-            dt_vector: Вектор из 8 временных шагов (по умолчанию np.ones(8) * 0.1)
+            dt_vector: Вектор временных шагов (по умолчанию np.ones(8) * 0.05)
+            tolerance: Допуск DOPRI5 в режиме с контролем точности (None — один RK4-шаг на dt)
+            control_sequences: Свои последовательности [(знак u, знак dt), ...] одинаковой длины
+            convergence_groups: Группы траекторий, сходящихся в одну точку
+            dt_indices: (траекторий, шагов) индексы dt_vector для каждого шага
+
+        Свои control_sequences, convergence_groups и dt_indices передаются
+        только все три сразу, иначе ValueError.
         """
         self.pendulum = pendulum_system
-        
-        # Вектор временных шагов для 8 траекторий
-        if dt_vector is None:
-            self.dt_vector = np.ones(8) * 0.05
-        else:
-            assert len(dt_vector) == 8, "dt_vector должен содержать ровно 8 элементов"
-            self.dt_vector = np.array(dt_vector)
+        self.tolerance = tolerance
         
         # Получаем границы управления
         control_bounds = self.pendulum.get_control_bounds()
@@ -85,24 +114,135 @@ class ControlTreeBuilder:
             [4, 5],  # Группа 2
             [6, 7],  # Группа 3
         ]
+        
+        # Маппинг: какой элемент dt_vector использовать на каждом шаге траектории.
+        # Внутри группы траектории используют те же dt в обратном порядке:
+        # траектория 0 — dt[0], dt[1]; траектория 1 — dt[1], dt[0] и т.д.
+        self.dt_indices = np.array([[0, 1], [1, 0], [2, 3], [3, 2],
+                                    [4, 5], [5, 4], [6, 7], [7, 6]])
+        
+        custom = (control_sequences, convergence_groups, dt_indices)
+        if any(arg is not None for arg in custom):
+            # Группы и маппинг dt описывают именно эти последовательности — задаются только вместе
+            if any(arg is None for arg in custom):
+                raise ValueError("control_sequences, convergence_groups и dt_indices задаются только вместе")
+            self.control_sequences = [list(seq) for seq in control_sequences]
+            self.convergence_groups = [list(g) for g in convergence_groups]
+            self.dt_indices = np.asarray(dt_indices, dtype=np.int64)
+            if len({len(seq) for seq in self.control_sequences}) != 1:
+                raise ValueError("control_sequences должны быть непустыми и одинаковой длины")
+            if self.dt_indices.shape != (len(self.control_sequences), len(self.control_sequences[0])):
+                raise ValueError(f"dt_indices должен иметь форму (траекторий, шагов) = "
+                                 f"({len(self.control_sequences)}, {len(self.control_sequences[0])}), "
+                                 f"получено {self.dt_indices.shape}")
+            if self.dt_indices.min() < 0:
+                raise ValueError("dt_indices должны быть неотрицательными")
+            if any(not 0 <= i < len(self.control_sequences) for group in self.convergence_groups for i in group):
+                raise ValueError("convergence_groups ссылаются на несуществующие траектории")
+        
+        # Те же последовательности в виде массивов (траекторий, шагов) для пакетного расчёта
+        self._u_signs = np.array([[u for u, _ in seq] for seq in self.control_sequences], dtype=np.float64)
+        self._dt_signs = np.array([[t for _, t in seq] for seq in self.control_sequences], dtype=np.float64)
+        self.n_trajectories, self.n_steps = self._u_signs.shape
+        self.dt_size = int(self.dt_indices.max()) + 1
+        
+        # Вектор временных шагов
+        if dt_vector is None:
+            self.dt_vector = np.ones(self.dt_size) * 0.05
+        else:
+            assert len(dt_vector) == self.dt_size, f"dt_vector должен содержать ровно {self.dt_size} элементов"
+            self.dt_vector = np.array(dt_vector)
     
-    def _apply_control(self, state_2d: np.ndarray, control: float, dt: float) -> np.ndarray:
+    def _apply_controls(self, states: np.ndarray, controls: np.ndarray, dts: np.ndarray) -> np.ndarray:
         """
-        Применяет управление к состоянию.
+        Применяет управления к пачке состояний одним вызовом ядра.
         
         Args:
-            state_2d: Текущее 2D состояние
-            control: Управляющее воздействие (уже масштабированное)
-            dt: Временной шаг (может быть отрицательным)
+            states: (N, 2) текущие 2D состояния
+            controls: (N,) управляющие воздействия (уже масштабированные)
+            dts: (N,) временные шаги (могут быть отрицательными)
             
         Returns:
-            Новое 2D состояние
+            (N, 2) новые 2D состояния
         """
-        return self.pendulum.scipy_rk45_step(state_2d, control, dt)
+        if self.tolerance is None:
+            return self.pendulum.batch_step(states, controls, dts)
+        return self.pendulum.batch_step_dopri5(states, controls, dts, rtol=self.tolerance, atol=self.tolerance)
+    
+    def compute_trajectory_points(self, initial_positions: np.ndarray,
+                                  dt_vectors: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Считает точки всех траекторий для многих корней и/или dt-векторов сразу.
+        
+        Args:
+            initial_positions: (2,) или (R, 2) начальные позиции
+            dt_vectors: (D,) или (R, D); по умолчанию self.dt_vector
+            
+        Returns:
+            (R, T, S+1, 2): для каждого корня и траектории точки после каждого шага
+            (для стандартного набора T=8, S=2: [начальная, промежуточная, конечная])
+        """
+        roots = np.atleast_2d(np.asarray(initial_positions, dtype=np.float64))
+        dts = np.atleast_2d(np.asarray(self.dt_vector if dt_vectors is None else dt_vectors,
+                                       dtype=np.float64))
+        assert dts.shape[1] == self.dt_size, f"dt_vector должен содержать ровно {self.dt_size} элементов"
+        count = max(len(roots), len(dts))
+        n_traj = self.n_trajectories
+        roots = np.broadcast_to(roots, (count, 2))
+        dts = np.broadcast_to(dts, (count, self.dt_size))
+        
+        # Шаг k всех траекторий всех корней: dt = dt_vector[dt_indices[:, k]] * знак
+        controls = self.u_max * self._u_signs                      # (T, S)
+        step_dts = dts[:, self.dt_indices] * self._dt_signs         # (R, T, S)
+        
+        points = np.empty((count, n_traj, self.n_steps + 1, 2))
+        points[:, :, 0] = roots[:, None, :]
+        for step in range(self.n_steps):
+            points[:, :, step + 1] = self._apply_controls(
+                points[:, :, step].reshape(-1, 2),
+                np.tile(controls[:, step], count),
+                step_dts[:, :, step].reshape(-1),
+            ).reshape(count, n_traj, 2)
+        return points
+    
+    def convergence_deviation(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Средние точки групп и максимальные отклонения концов от них.
+        
+        Args:
+            points: (R, T, S+1, 2) из compute_trajectory_points
+            
+        Returns:
+            (mean_points (R, G, 2), max_deviation (R, G)) для G групп схождения
+        """
+        groups = np.asarray(self.convergence_groups)
+        endpoints = points[:, groups, -1]                           # (R, G, размер группы, 2)
+        mean_points = endpoints.mean(axis=2)
+        deviation = np.linalg.norm(endpoints - mean_points[:, :, None], axis=-1).max(axis=2)
+        return mean_points, deviation
+    
+    def build_trees_batch(self, initial_positions: np.ndarray,
+                          dt_vectors: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Строит деревья для сетки корней и/или dt-векторов без создания объектов Trajectory.
+        Удобно для анализа схождения по сетке начальных точек.
+        
+        Returns:
+            Словарь массивов: 'points' (R, T, S+1, 2), 'mean_points' (R, G, 2),
+            'max_deviation' (R, G), 'converged' (R, G)
+        """
+        points = self.compute_trajectory_points(initial_positions, dt_vectors)
+        mean_points, deviation = self.convergence_deviation(points)
+        return {
+            'points': points,
+            'mean_points': mean_points,
+            'max_deviation': deviation,
+            'converged': deviation < 1e-4,
+        }
     
     def build_tree(self, initial_position_2d: np.ndarray, show: bool = False) -> Dict[str, Any]:
         """
-        Строит все 8 траекторий из начальной точки.
+        Строит все траектории из начальной точки.
         
         Args:
             initial_position_2d: Начальная 2D позиция
@@ -114,59 +254,31 @@ class ControlTreeBuilder:
         self.trajectories.clear()
         
         if show:
-            print(f"🚀 Построение 8 траекторий из точки ({initial_position_2d[0]:.3f}, {initial_position_2d[1]:.3f})")
+            print(f"🚀 Построение {self.n_trajectories} траекторий из точки ({initial_position_2d[0]:.3f}, {initial_position_2d[1]:.3f})")
             print("=" * 60)
         
-        # Маппинг: какой элемент dt_vector использовать для каждого кортежа
-        # Группа 0: траектории 0-1, используют dt[0-1]
-        # Группа 1: траектории 2-3, используют dt[2-3]  
-        # Группа 2: траектории 4-5, используют dt[4-5]
-        # Группа 3: траектории 6-7, используют dt[6-7]
-        dt_mapping = {
-            0: [0, 1],  # Траектория 0: dt[0] для 1-го шага, dt[1] для 2-го
-            1: [1, 0],  # Траектория 1: dt[1] для 1-го шага, dt[0] для 2-го (обратный порядок)
-            2: [2, 3],  # Траектория 2: dt[2] для 1-го шага, dt[3] для 2-го
-            3: [3, 2],  # Траектория 3: dt[3] для 1-го шага, dt[2] для 2-го (обратный порядок)
-            4: [4, 5],  # Траектория 4: dt[4] для 1-го шага, dt[5] для 2-го
-            5: [5, 4],  # Траектория 5: dt[5] для 1-го шага, dt[4] для 2-го (обратный порядок)
-            6: [6, 7],  # Траектория 6: dt[6] для 1-го шага, dt[7] для 2-го
-            7: [7, 6],  # Траектория 7: dt[7] для 1-го шага, dt[6] для 2-го (обратный порядок)
-        }
+        # Все траектории считаются одним пакетным вызовом ядра на шаг
+        points = self.compute_trajectory_points(initial_position_2d)[0]
+        group_of = {traj_id: group_id for group_id, group in enumerate(self.convergence_groups)
+                    for traj_id in group}
         
-        # Строим каждую траекторию
-        for traj_id in range(8):
-            # Получаем последовательность управлений для этой траектории
-            control_seq = self.control_sequences[traj_id]
-            dt_indices = dt_mapping[traj_id]
+        for traj_id in range(self.n_trajectories):
+            dt_indices = self.dt_indices[traj_id]
             
-            # Определяем группу схождения
-            convergence_group = traj_id // 2  # 0-1 → 0, 2-3 → 1, 4-5 → 2, 6-7 → 3
+            # Определяем группу схождения (стандартный набор: 0-1 → 0, 2-3 → 1, 4-5 → 2, 6-7 → 3)
+            convergence_group = group_of.get(traj_id, -1)
             
-            # Вычисляем точки траектории
-            points = [initial_position_2d.copy()]  # Начальная точка
-            current_pos = initial_position_2d.copy()
-            
-            # Строим последовательность с индивидуальными dt для каждого шага
-            actual_sequence = []
-            for step_idx, (u_sign, dt_sign) in enumerate(control_seq):
-                # Масштабируем управление
-                u = self.u_max * u_sign
-                # Используем соответствующий dt из вектора
-                dt = self.dt_vector[dt_indices[step_idx]]
-                step_dt = dt * dt_sign  # dt_sign определяет направление времени
-                
-                # Применяем управление
-                next_pos = self._apply_control(current_pos, u, step_dt)
-                points.append(next_pos.copy())
-                current_pos = next_pos
-                
-                actual_sequence.append((u, step_dt))
+            actual_sequence = [
+                (self.u_max * u_sign, self.dt_vector[dt_indices[step_idx]] * dt_sign)
+                for step_idx, (u_sign, dt_sign) in enumerate(self.control_sequences[traj_id])
+            ]
+            traj_points = [points[traj_id, k].copy() for k in range(self.n_steps + 1)]
             
             # Создаем объект траектории
             trajectory = Trajectory(
                 id=traj_id,
                 sequence=actual_sequence,
-                points=points,
+                points=traj_points,
                 convergence_group=convergence_group
             )
             
@@ -175,10 +287,9 @@ class ControlTreeBuilder:
             if show:
             # Выводим информацию
                 seq_str = " → ".join([f"({u:+.1f}, {dt:+.3f})" for u, dt in actual_sequence])
-                dt_idx_str = f"dt[{dt_indices[0]}], dt[{dt_indices[1]}]"
+                dt_idx_str = ", ".join(f"dt[{k}]" for k in dt_indices)
                 print(f"Траектория {traj_id} (группа {convergence_group}, {dt_idx_str}): {seq_str}")
-                print(f"  Точки: начало → ({points[1][0]:.3f}, {points[1][1]:.3f}) → "
-                    f"({points[2][0]:.3f}, {points[2][1]:.3f})")
+                print("  Точки: начало → " + " → ".join(f"({p[0]:.3f}, {p[1]:.3f})" for p in traj_points[1:]))
         
         # Анализируем схождение
         convergence_info = self._analyze_convergence(show)
@@ -242,7 +353,7 @@ class ControlTreeBuilder:
         # Общая статистика
         num_converged = sum(1 for g in convergence_quality if g['converged'])
         if show:
-            print(f"\n📈 ИТОГО: {num_converged}/4 групп сошлись")
+            print(f"\n📈 ИТОГО: {num_converged}/{len(self.convergence_groups)} групп сошлись")
         
         return {
             'groups': convergence_quality,
@@ -254,54 +365,34 @@ class ControlTreeBuilder:
         """
         Создает структуру узлов и рёбер для совместимости с визуализацией.
         """
-        from dataclasses import dataclass
-        
-        @dataclass
-        class SimpleNode:
-            id: str
-            level: int
-            position_2d: np.ndarray
-            
-        @dataclass  
-        class SimpleEdge:
-            parent_id: str
-            child_id: str
-            control: float
-            dt: float
-            is_forward: bool
-            control_type: str
-        
         nodes = {}
         edges = []
         
         # Корневой узел
         nodes['root'] = SimpleNode('root', 0, self.trajectories[0].points[0])
         
-        # Для каждой траектории создаем узлы и рёбра
+        # Для каждой траектории создаем узлы и рёбра по шагам:
+        # mid_{id} (первый шаг), mid{k}_{id} (промежуточные), end_{id} (последний)
+        last = self.n_steps
         for traj in self.trajectories:
-            # Промежуточный узел
-            mid_id = f'mid_{traj.id}'
-            nodes[mid_id] = SimpleNode(mid_id, 1, traj.points[1])
-            
-            # Конечный узел
-            end_id = f'end_{traj.id}'
-            nodes[end_id] = SimpleNode(end_id, 2, traj.points[2])
-            
-            # Ребро от корня к промежуточному узлу
-            u1, dt1 = traj.sequence[0]
-            edges.append(SimpleEdge(
-                'root', mid_id, u1, dt1,
-                is_forward=(dt1 > 0),
-                control_type='max' if u1 > 0 else 'min'
-            ))
-            
-            # Ребро от промежуточного к конечному узлу
-            u2, dt2 = traj.sequence[1]
-            edges.append(SimpleEdge(
-                mid_id, end_id, u2, dt2,
-                is_forward=(dt2 > 0),
-                control_type='max' if u2 > 0 else 'min'
-            ))
+            prev_id = 'root'
+            for level in range(1, last + 1):
+                if level == last:
+                    node_id = f'end_{traj.id}'
+                elif level == 1:
+                    node_id = f'mid_{traj.id}'
+                else:
+                    node_id = f'mid{level}_{traj.id}'
+                nodes[node_id] = SimpleNode(node_id, level, traj.points[level])
+                
+                # Ребро от предыдущего узла траектории
+                u, dt = traj.sequence[level - 1]
+                edges.append(SimpleEdge(
+                    prev_id, node_id, u, dt,
+                    is_forward=(dt > 0),
+                    control_type='max' if u > 0 else 'min'
+                ))
+                prev_id = node_id
         
         return nodes, edges
     
@@ -320,7 +411,7 @@ class ControlTreeBuilder:
     
     def update_dt_vector(self, new_dt_vector: np.ndarray):
         """Обновляет вектор временных шагов."""
-        assert len(new_dt_vector) == 8, "new_dt_vector должен содержать ровно 8 элементов"
+        assert len(new_dt_vector) == self.dt_size, f"new_dt_vector должен содержать ровно {self.dt_size} элементов"
         self.dt_vector = np.array(new_dt_vector)
         print(f"✅ Обновлен dt_vector: {self.dt_vector}")
     
@@ -42,4 +42,30 @@ class CostFunction:
             np.ndarray: 2D-вектор градиента.
         """
         grad_2d = 2 * self.k * (np.asarray(position_2d) - self.goal_position_2d)
-        return grad_2d 
\ No newline at end of file
+        return grad_2d
+
+    def get_cost_many(self, positions_2d: np.ndarray) -> np.ndarray:
+        """
+        Векторизованный расчет стоимости для массива 2D-точек.
+        
+        Args:
+            positions_2d (np.ndarray): Массив позиций формы (N, 2).
+            
+        Returns:
+            np.ndarray: Массив стоимостей формы (N,).
+        """
+        diff = np.asarray(positions_2d, dtype=float).reshape(-1, 2) - self.goal_position_2d
+        return self.k * np.einsum('ij,ij->i', diff, diff) + self.c
+
+    def get_gradient_many(self, positions_2d: np.ndarray) -> np.ndarray:
+        """
+        Векторизованный расчет градиента для массива 2D-точек.
+        
+        Args:
+            positions_2d (np.ndarray): Массив позиций формы (N, 2).
+            
+        Returns:
+            np.ndarray: Массив градиентов формы (N, 2).
+        """
+        diff = np.asarray(positions_2d, dtype=float).reshape(-1, 2) - self.goal_position_2d
+        return 2 * self.k * diff
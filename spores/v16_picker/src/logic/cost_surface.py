@@ -0,0 +1,313 @@
+"""
+Построение поверхности стоимости без зависимостей от Ursina и matplotlib.
+
+Модуль готовит все данные для CostVisualizer одним проходом:
+- облако точек области спавна и его триангуляцию Делоне;
+- высоты и градиенты (векторизованно через CostFunction);
+- линии уровня, найденные алгоритмом marching squares на регулярной сетке.
+
+Результаты кэшируются по параметрам области спавна и генерации,
+поэтому повторная генерация с теми же параметрами ничего не пересчитывает.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .cost_function import CostFunction
+from .spawn_area import SpawnArea
+
+if TYPE_CHECKING:
+    from scipy.spatial import Delaunay
+
+
+# Таблица сегментов marching squares.
+# Биты угла ячейки: 1 = (i, j), 2 = (i, j+1), 4 = (i+1, j+1), 8 = (i+1, j).
+# Рёбра ячейки: 0 = нижнее, 1 = правое, 2 = верхнее, 3 = левое.
+# Для седловых случаев 5 и 10 выбор зависит от значения в центре ячейки.
+_SEGMENT_TABLE: Dict[int, List[Tuple[int, int]]] = {
+    1: [(3, 0)],
+    2: [(0, 1)],
+    3: [(3, 1)],
+    4: [(1, 2)],
+    6: [(0, 2)],
+    7: [(3, 2)],
+    8: [(3, 2)],
+    9: [(0, 2)],
+    11: [(1, 2)],
+    12: [(3, 1)],
+    13: [(0, 1)],
+    14: [(3, 0)],
+}
+
+# (центр выше уровня, центр ниже уровня)
+_SADDLE_TABLE: Dict[int, Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]] = {
+    5: ([(0, 1), (3, 2)], [(3, 0), (1, 2)]),
+    10: ([(3, 0), (1, 2)], [(0, 1), (3, 2)]),
+}
+
+
+def _edge_crossings(grid_x: np.ndarray, grid_z: np.ndarray, values: np.ndarray,
+                    level: float) -> List[np.ndarray]:
+    """
+    Точки пересечения уровня с четырьмя рёбрами каждой ячейки.
+
+    Returns:
+        Список из 4 массивов формы (ny-1, nx-1, 2) — по одному на ребро.
+    """
+    v00, v01 = values[:-1, :-1], values[:-1, 1:]
+    v11, v10 = values[1:, 1:], values[1:, :-1]
+    x0, x1 = grid_x[:-1], grid_x[1:]
+    z0, z1 = grid_z[:-1], grid_z[1:]
+
+    def lerp(va, vb):
+        denom = vb - va
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(denom != 0, (level - va) / denom, 0.5)
+        return np.clip(t, 0.0, 1.0)
+
+    nx_cells, nz_cells = len(x0), len(z0)
+    xs0 = np.broadcast_to(x0[None, :], (nz_cells, nx_cells))
+    xs1 = np.broadcast_to(x1[None, :], (nz_cells, nx_cells))
+    zs0 = np.broadcast_to(z0[:, None], (nz_cells, nx_cells))
+    zs1 = np.broadcast_to(z1[:, None], (nz_cells, nx_cells))
+
+    t_bottom = lerp(v00, v01)
+    t_right = lerp(v01, v11)
+    t_top = lerp(v10, v11)
+    t_left = lerp(v00, v10)
+
+    bottom = np.stack([xs0 + t_bottom * (xs1 - xs0), zs0], axis=-1)
+    right = np.stack([xs1, zs0 + t_right * (zs1 - zs0)], axis=-1)
+    top = np.stack([xs0 + t_top * (xs1 - xs0), zs1], axis=-1)
+    left = np.stack([xs0, zs0 + t_left * (zs1 - zs0)], axis=-1)
+    return [bottom, right, top, left]
+
+
+def marching_squares(grid_x: np.ndarray, grid_z: np.ndarray, values: np.ndarray,
+                     level: float) -> np.ndarray:
+    """
+    Извлекает линию уровня из значений на регулярной сетке.
+
+    Ячейки, в углах которых есть NaN, пропускаются — так маскируются
+    области вне триангуляции.
+
+    Args:
+        grid_x: Координаты узлов по x, форма (nx,).
+        grid_z: Координаты узлов по z, форма (nz,).
+        values: Значения в узлах, форма (nz, nx).
+        level: Значение уровня.
+
+    Returns:
+        np.ndarray: Отрезки формы (S, 2, 2) в координатах (x, z).
+    """
+    values = np.asarray(values, dtype=float)
+    if values.shape[0] < 2 or values.shape[1] < 2:
+        return np.empty((0, 2, 2))
+
+    v00, v01 = values[:-1, :-1], values[:-1, 1:]
+    v11, v10 = values[1:, 1:], values[1:, :-1]
+    valid = np.isfinite(v00) & np.isfinite(v01) & np.isfinite(v11) & np.isfinite(v10)
+
+    cases = ((v00 >= level).astype(np.int8)
+             | ((v01 >= level).astype(np.int8) << 1)
+             | ((v11 >= level).astype(np.int8) << 2)
+             | ((v10 >= level).astype(np.int8) << 3))
+    cases[~valid] = 0
+
+    if not np.any((cases != 0) & (cases != 15)):
+        return np.empty((0, 2, 2))
+
+    edges = _edge_crossings(np.asarray(grid_x, dtype=float), np.asarray(grid_z, dtype=float),
+                            values, level)
+    segments: List[np.ndarray] = []
+
+    for case, pairs in _SEGMENT_TABLE.items():
+        mask = cases == case
+        if not mask.any():
+            continue
+        for ea, eb in pairs:
+            segments.append(np.stack([edges[ea][mask], edges[eb][mask]], axis=1))
+
+    center_above = (v00 + v01 + v11 + v10) * 0.25 >= level
+    for case, (pairs_above, pairs_below) in _SADDLE_TABLE.items():
+        case_mask = cases == case
+        if not case_mask.any():
+            continue
+        for center_mask, pairs in ((center_above, pairs_above), (~center_above, pairs_below)):
+            mask = case_mask & center_mask
+            if not mask.any():
+                continue
+            for ea, eb in pairs:
+                segments.append(np.stack([edges[ea][mask], edges[eb][mask]], axis=1))
+
+    if not segments:
+        return np.empty((0, 2, 2))
+    return np.concatenate(segments, axis=0)
+
+
+@dataclass
+class CostSurface:
+    """
+    Готовые данные поверхности стоимости.
+
+    Attributes:
+        points_2d: Узлы меша (N, 2) в координатах (x, z).
+        heights: Стоимость в узлах (N,).
+        gradients: Градиент стоимости в узлах (N, 2).
+        triangles: Индексы треугольников (M, 3).
+        triangulation: Объект Delaunay, по которому построен меш.
+        contours: Пары (уровень, отрезки (S, 2, 2)) — по одной на линию уровня.
+    """
+    points_2d: np.ndarray
+    heights: np.ndarray
+    gradients: np.ndarray
+    triangles: np.ndarray
+    triangulation: Optional['Delaunay'] = None
+    contours: List[Tuple[float, np.ndarray]] = field(default_factory=list)
+
+    @property
+    def vertices_3d(self) -> np.ndarray:
+        """Вершины меша (N, 3) в порядке (x, cost, z)."""
+        return np.column_stack([self.points_2d[:, 0], self.heights, self.points_2d[:, 1]])
+
+    def unique_edges(self) -> np.ndarray:
+        """Уникальные рёбра триангуляции (E, 2)."""
+        if len(self.triangles) == 0:
+            return np.empty((0, 2), dtype=np.int64)
+        edges = np.concatenate([
+            self.triangles[:, [0, 1]],
+            self.triangles[:, [1, 2]],
+            self.triangles[:, [2, 0]],
+        ])
+        edges.sort(axis=1)
+        return np.unique(edges, axis=0)
+
+
+class CostSurfaceBuilder:
+    """
+    Строит и кэширует CostSurface для пары (CostFunction, SpawnArea).
+
+    Ключ кэша — фокусы и эксцентриситет области спавна, параметры
+    функции стоимости и параметры генерации меша/линий уровня.
+    """
+
+    def __init__(self, cost_function: CostFunction, spawn_area: SpawnArea, max_cache_size: int = 8):
+        self.cost_function: CostFunction = cost_function
+        self.spawn_area: SpawnArea = spawn_area
+        self.max_cache_size: int = max_cache_size
+        self._cache: "OrderedDict[tuple, CostSurface]" = OrderedDict()
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+
+    def cache_key(self, boundary_points: int, interior_min_radius: float,
+                  num_levels: int, grid_resolution: int) -> tuple:
+        """Ключ кэша для текущих параметров области и функции стоимости."""
+        area = self.spawn_area
+        cost = self.cost_function
+        return (
+            area.A.tobytes(), area.B.tobytes(), float(area.eccentricity),
+            cost.goal_position_2d.tobytes(), float(cost.k), float(cost.c),
+            int(boundary_points), float(interior_min_radius),
+            int(num_levels), int(grid_resolution),
+        )
+
+    def build(self, boundary_points: int = 128, interior_min_radius: float = 0.01,
+              num_levels: int = 0, grid_resolution: int = 150) -> Optional[CostSurface]:
+        """
+        Возвращает поверхность стоимости (из кэша, если параметры не менялись).
+
+        Args:
+            boundary_points: Число точек на границе области.
+            interior_min_radius: Минимальное расстояние Пуассоновского сэмплирования.
+            num_levels: Число линий уровня (0 — не строить).
+            grid_resolution: Разрешение сетки для marching squares.
+
+        Returns:
+            CostSurface или None, если облако точек вырождено.
+        """
+        key = self.cache_key(boundary_points, interior_min_radius, num_levels, grid_resolution)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return cached
+
+        self.cache_misses += 1
+        surface = self._build_surface(boundary_points, interior_min_radius)
+        if surface is None:
+            return None
+        if num_levels > 0:
+            surface.contours = self._build_contours(surface, num_levels, grid_resolution)
+
+        self._cache[key] = surface
+        while len(self._cache) > self.max_cache_size:
+            self._cache.popitem(last=False)
+        return surface
+
+    def clear_cache(self) -> None:
+        """Очищает кэш поверхностей."""
+        self._cache.clear()
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Статистика кэша."""
+        return {
+            'size': len(self._cache),
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+        }
+
+    def _build_surface(self, boundary_points: int, interior_min_radius: float) -> Optional[CostSurface]:
+        """Облако точек, триангуляция и высоты."""
+        from scipy.spatial import Delaunay
+
+        boundary = self.spawn_area.get_points(n_points=boundary_points)
+        interior = self.spawn_area.sample_poisson_disk(min_radius=interior_min_radius)
+        points_2d = boundary if interior.size == 0 else np.vstack([boundary, interior])
+
+        if len(points_2d) < 3:
+            return None
+
+        try:
+            tri = Delaunay(points_2d)
+        except Exception:
+            return None
+
+        return CostSurface(
+            points_2d=points_2d,
+            heights=self.cost_function.get_cost_many(points_2d),
+            gradients=self.cost_function.get_gradient_many(points_2d),
+            triangles=tri.simplices.astype(np.int64),
+            triangulation=tri,
+        )
+
+    def _build_contours(self, surface: CostSurface, num_levels: int,
+                        grid_resolution: int) -> List[Tuple[float, np.ndarray]]:
+        """Линии уровня на регулярной сетке, замаскированной по области спавна."""
+        x, z = surface.points_2d[:, 0], surface.points_2d[:, 1]
+        if x.min() == x.max() or z.min() == z.max():
+            return []
+
+        grid_x = np.linspace(x.min(), x.max(), grid_resolution)
+        grid_z = np.linspace(z.min(), z.max(), grid_resolution)
+        gx, gz = np.meshgrid(grid_x, grid_z)
+        grid_points = np.column_stack([gx.ravel(), gz.ravel()])
+
+        # Стоимость задана аналитически, поэтому интерполяция не нужна
+        values = self.cost_function.get_cost_many(grid_points)
+        values[~self.spawn_area.is_inside_many(grid_points)] = np.nan
+        values = values.reshape(gx.shape)
+
+        finite = values[np.isfinite(values)]
+        if finite.size == 0 or finite.min() == finite.max():
+            return []
+
+        levels = np.linspace(finite.min(), finite.max(), num_levels + 2)[1:-1]
+        contours = []
+        for level in levels:
+            segments = marching_squares(grid_x, grid_z, values, level)
+            if len(segments) > 0:
+                contours.append((float(level), segments))
+        return contours
@@ -17,21 +17,13 @@ class GhostProcessor:
     def process(self, current_state_2d, controls):
         """
         Рассчитывает будущие 2D-позиции на основе текущего состояния и набора управлений.
-        Использует scipy RK45 интегрирование для высокой точности.
+        Все управления интегрируются одним вызовом JIT DOPRI5 (допуски как у scipy RK45).
 
         :param current_state_2d: np.array, текущая 2D-позиция (состояние).
         :param controls: list | np.array, список управляющих воздействий.
         :return: list[np.array], список будущих 2D-позиций "призраков".
         """
-        # Оптимизация: заранее выделяем память под результат
-        future_states = [None] * len(controls)
-
-        for i, control in enumerate(controls):
-            # Используем RK45 интегрирование для каждого управления
-            next_state = self.pendulum.scipy_rk45_step(current_state_2d, control, self.dt)
-            future_states[i] = next_state
-            
-        return future_states
+        return list(self._integrate(current_state_2d, controls, self.dt))
     
 
     def process_backward(self, current_state_2d, controls):
@@ -42,11 +34,12 @@ class GhostProcessor:
         :param controls: list, список управлений
         :return: list[np.array], список прошлых состояний
         """
-        past_states = []
-        
-        for control in controls:
-            # Простой шаг назад
-            past_state = self.pendulum.scipy_rk45_step_backward(current_state_2d, control, self.dt)
-            past_states.append(past_state)
-        
-        return past_states
\ No newline at end of file
+        return list(self._integrate(current_state_2d, controls, -self.dt))
+
+    def _integrate(self, current_state_2d, controls, dt):
+        """Пакетный шаг DOPRI5 из одного состояния для всех управлений."""
+        controls = np.asarray(controls, dtype=np.float64)
+        if controls.size == 0:
+            return np.empty((0, 2))
+        states = np.tile(np.asarray(current_state_2d, dtype=np.float64), (controls.size, 1))
+        return self.pendulum.batch_step_dopri5(states, controls, np.full(controls.size, dt))
\ No newline at end of file
@@ -0,0 +1,375 @@
+"""
+Numba-ядра маятника и площади дерева с явными сигнатурами
+(сюда же в KERNELS внесены ядра дисков Пуассона из utils.poisson_disk).
+
+Ядра объявлены лениво (без сигнатуры в декораторе), а все используемые
+сигнатуры перечислены в KERNELS. Это позволяет:
+- скомпилировать/подгрузить из кэша numba все специализации заранее
+  (compile_kernels() — шаг сборки scripts/run/build_kernels.py);
+- прогреть ядра в фоновом потоке при старте (start_warmup_thread()),
+  чтобы первый превью-ход мыши или первая оптимизация не ждали JIT.
+
+Вызовы с другими типами аргументов по-прежнему работают — numba
+докомпилирует специализацию при первом таком вызове.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from numba import njit, prange, float64, int32, int64, types
+
+from ..utils.poisson_disk import _bridson_kernel, _bridson_kernel_2d
+
+
+# ──────────────────────────────────────────────────────────────────────
+# 1. Одиночный RK4-шаг маятника
+# ──────────────────────────────────────────────────────────────────────
+@njit(cache=True, fastmath=True)
+def rk4_step(state, u, dt, g, l, c, inv_ml2):
+    th, om = state[0], state[1]
+    k1t, k1o = om, -g / l * np.sin(th) - c * om + u * inv_ml2
+    k2t, k2o = om + 0.5 * dt * k1o, -g / l * np.sin(th + 0.5 * dt * k1t) - c * (om + 0.5 * dt * k1o) + u * inv_ml2
+    k3t, k3o = om + 0.5 * dt * k2o, -g / l * np.sin(th + 0.5 * dt * k2t) - c * (om + 0.5 * dt * k2o) + u * inv_ml2
+    k4t, k4o = om + dt * k3o,       -g / l * np.sin(th + dt * k3t)       - c * (om + dt * k3o)       + u * inv_ml2
+    th_n = th + (dt / 6.0) * (k1t + 2 * k2t + 2 * k3t + k4t)
+    om_n = om + (dt / 6.0) * (k1o + 2 * k2o + 2 * k3o + k4o)
+    return np.array([th_n, om_n])
+
+
+# ──────────────────────────────────────────────────────────────────────
+# 2. Пакетный RK4-шаг (параллельный prange)
+# ──────────────────────────────────────────────────────────────────────
+@njit(parallel=True, fastmath=True, cache=True)
+def batch_rk4(states, controls, dts, g, l, c, inv_ml2):
+    out = np.empty_like(states)
+    for i in prange(states.shape[0]):
+        th, om = states[i, 0], states[i, 1]
+        u, dt = controls[i], dts[i]
+
+        k1t, k1o = om, -g / l * np.sin(th) - c * om + u * inv_ml2
+        k2t, k2o = om + 0.5 * dt * k1o, -g / l * np.sin(th + 0.5 * dt * k1t) - c * (om + 0.5 * dt * k1o) + u * inv_ml2
+        k3t, k3o = om + 0.5 * dt * k2o, -g / l * np.sin(th + 0.5 * dt * k2t) - c * (om + 0.5 * dt * k2o) + u * inv_ml2
+        k4t, k4o = om + dt * k3o,       -g / l * np.sin(th + dt * k3t)       - c * (om + dt * k3o)       + u * inv_ml2
+
+        out[i, 0] = th + (dt / 6.0) * (k1t + 2 * k2t + 2 * k3t + k4t)
+        out[i, 1] = om + (dt / 6.0) * (k1o + 2 * k2o + 2 * k3o + k4o)
+    return out
+
+
+# ──────────────────────────────────────────────────────────────────────
+# 2b. Адаптивный Дорманд–Принс 5(4) с плотным выводом
+# ──────────────────────────────────────────────────────────────────────
+# Коэффициенты как в scipy.integrate.RK45 / DOPRI5 (Hairer, Nørsett, Wanner)
+_A21 = 1.0 / 5.0
+_A31, _A32 = 3.0 / 40.0, 9.0 / 40.0
+_A41, _A42, _A43 = 44.0 / 45.0, -56.0 / 15.0, 32.0 / 9.0
+_A51, _A52, _A53, _A54 = 19372.0 / 6561.0, -25360.0 / 2187.0, 64448.0 / 6561.0, -212.0 / 729.0
+_A61, _A62, _A63, _A64, _A65 = 9017.0 / 3168.0, -355.0 / 33.0, 46732.0 / 5247.0, 49.0 / 176.0, -5103.0 / 18656.0
+_B1, _B3, _B4, _B5, _B6 = 35.0 / 384.0, 500.0 / 1113.0, 125.0 / 192.0, -2187.0 / 6784.0, 11.0 / 84.0
+# Разность решений 5-го и 4-го порядков (оценка ошибки)
+_E1, _E3, _E4, _E5, _E6, _E7 = (71.0 / 57600.0, -71.0 / 16695.0, 71.0 / 1920.0,
+                                -17253.0 / 339200.0, 22.0 / 525.0, -1.0 / 40.0)
+# Плотный вывод 4-го порядка (contd5)
+_D1, _D3, _D4 = -12715105075.0 / 11282082432.0, 87487479700.0 / 32700410799.0, -10690763975.0 / 1880347072.0
+_D5, _D6, _D7 = 701980252875.0 / 199316789632.0, -1453857185.0 / 822651844.0, 69997945.0 / 29380423.0
+
+# Число коэффициентов плотного вывода на шаг: y(θ) = r0 + θ(r1 + (1-θ)(r2 + θ(r3 + (1-θ) r4)))
+DENSE_ORDER = 5
+
+
+@njit(inline='always', fastmath=True)
+def _pendulum_rhs(th, om, u, g, l, c, inv_ml2):
+    return om, -g / l * np.sin(th) - c * om + u * inv_ml2
+
+
+@njit(fastmath=True)
+def _dopri5_integrate(th, om, u, dt, rtol, atol, max_steps, g, l, c, inv_ml2,
+                      t_nodes, coeffs, store):
+    """
+    Интегрирует одну траекторию от 0 до dt (dt может быть отрицательным).
+
+    Если store, на каждом принятом шаге k записывает t_nodes[k + 1]
+    (время конца шага со знаком) и coeffs[k] (DENSE_ORDER x 2).
+
+    Returns:
+        (theta, omega, число принятых шагов; -1, если не хватило max_steps)
+    """
+    if dt == 0.0:
+        return th, om, 0
+    direction = 1.0 if dt > 0.0 else -1.0
+    span = abs(dt)
+    t = 0.0
+    h = span
+    steps = 0
+    rejected = False
+    k1t, k1o = _pendulum_rhs(th, om, u, g, l, c, inv_ml2)
+
+    while t < span:
+        if steps >= max_steps:
+            return th, om, -1
+        last = t + h >= span
+        if last:
+            h = span - t
+        s = h * direction
+
+        k2t, k2o = _pendulum_rhs(th + s * _A21 * k1t, om + s * _A21 * k1o, u, g, l, c, inv_ml2)
+        k3t, k3o = _pendulum_rhs(th + s * (_A31 * k1t + _A32 * k2t),
+                                 om + s * (_A31 * k1o + _A32 * k2o), u, g, l, c, inv_ml2)
+        k4t, k4o = _pendulum_rhs(th + s * (_A41 * k1t + _A42 * k2t + _A43 * k3t),
+                                 om + s * (_A41 * k1o + _A42 * k2o + _A43 * k3o), u, g, l, c, inv_ml2)
+        k5t, k5o = _pendulum_rhs(th + s * (_A51 * k1t + _A52 * k2t + _A53 * k3t + _A54 * k4t),
+                                 om + s * (_A51 * k1o + _A52 * k2o + _A53 * k3o + _A54 * k4o),
+                                 u, g, l, c, inv_ml2)
+        k6t, k6o = _pendulum_rhs(th + s * (_A61 * k1t + _A62 * k2t + _A63 * k3t + _A64 * k4t + _A65 * k5t),
+                                 om + s * (_A61 * k1o + _A62 * k2o + _A63 * k3o + _A64 * k4o + _A65 * k5o),
+                                 u, g, l, c, inv_ml2)
+        th_new = th + s * (_B1 * k1t + _B3 * k3t + _B4 * k4t + _B5 * k5t + _B6 * k6t)
+        om_new = om + s * (_B1 * k1o + _B3 * k3o + _B4 * k4o + _B5 * k5o + _B6 * k6o)
+        k7t, k7o = _pendulum_rhs(th_new, om_new, u, g, l, c, inv_ml2)
+
+        # Взвешенная RMS-норма ошибки, как в scipy
+        err_t = s * (_E1 * k1t + _E3 * k3t + _E4 * k4t + _E5 * k5t + _E6 * k6t + _E7 * k7t)
+        err_o = s * (_E1 * k1o + _E3 * k3o + _E4 * k4o + _E5 * k5o + _E6 * k6o + _E7 * k7o)
+        sc_t = atol + rtol * max(abs(th), abs(th_new))
+        sc_o = atol + rtol * max(abs(om), abs(om_new))
+        err = np.sqrt(0.5 * ((err_t / sc_t) ** 2 + (err_o / sc_o) ** 2))
+
+        if err <= 1.0:
+            if store:
+                dth, dom = th_new - th, om_new - om
+                bsp_t, bsp_o = s * k1t - dth, s * k1o - dom
+                coeffs[steps, 0, 0], coeffs[steps, 0, 1] = th, om
+                coeffs[steps, 1, 0], coeffs[steps, 1, 1] = dth, dom
+                coeffs[steps, 2, 0], coeffs[steps, 2, 1] = bsp_t, bsp_o
+                coeffs[steps, 3, 0] = dth - s * k7t - bsp_t
+                coeffs[steps, 3, 1] = dom - s * k7o - bsp_o
+                coeffs[steps, 4, 0] = s * (_D1 * k1t + _D3 * k3t + _D4 * k4t + _D5 * k5t + _D6 * k6t + _D7 * k7t)
+                coeffs[steps, 4, 1] = s * (_D1 * k1o + _D3 * k3o + _D4 * k4o + _D5 * k5o + _D6 * k6o + _D7 * k7o)
+                t_nodes[steps + 1] = direction * (span if last else t + h)
+            t = span if last else t + h
+            th, om = th_new, om_new
+            k1t, k1o = k7t, k7o  # FSAL
+            steps += 1
+            factor = 10.0 if err == 0.0 else min(10.0, 0.9 * err ** -0.2)
+            if rejected:
+                factor = min(1.0, factor)
+            rejected = False
+        else:
+            factor = max(0.2, 0.9 * err ** -0.2)
+            rejected = True
+        h *= factor
+        if h < 1e-14 * span:
+            return th, om, -1
+    return th, om, steps
+
+
+@njit(parallel=True, cache=True)
+def batch_dopri5(states, controls, dts, rtol, atol, max_steps, g, l, c, inv_ml2):
+    """Конечные состояния и число принятых шагов (-1 — не сошлось) для каждой тройки."""
+    n = states.shape[0]
+    out = np.empty_like(states)
+    n_steps = np.empty(n, dtype=np.int64)
+    dummy_t = np.empty(0)
+    dummy_c = np.empty((0, DENSE_ORDER, 2))
+    for i in prange(n):
+        th, om, k = _dopri5_integrate(states[i, 0], states[i, 1], controls[i], dts[i], rtol, atol,
+                                      max_steps, g, l, c, inv_ml2, dummy_t, dummy_c, False)
+        out[i, 0] = th
+        out[i, 1] = om
+        n_steps[i] = k
+    return out, n_steps
+
+
+@njit(parallel=True, cache=True)
+def batch_dopri5_dense(states, controls, dts, rtol, atol, max_steps, g, l, c, inv_ml2):
+    """
+    Как batch_dopri5, плюс плотный вывод:
+    t_nodes (N, max_steps + 1) — узлы шагов (время со знаком, t_nodes[:, 0] = 0),
+    coeffs  (N, max_steps, DENSE_ORDER, 2) — коэффициенты полинома на каждом шаге.
+    """
+    n = states.shape[0]
+    out = np.empty_like(states)
+    n_steps = np.empty(n, dtype=np.int64)
+    t_nodes = np.zeros((n, max_steps + 1))
+    coeffs = np.zeros((n, max_steps, DENSE_ORDER, 2))
+    for i in prange(n):
+        th, om, k = _dopri5_integrate(states[i, 0], states[i, 1], controls[i], dts[i], rtol, atol,
+                                      max_steps, g, l, c, inv_ml2, t_nodes[i], coeffs[i], True)
+        out[i, 0] = th
+        out[i, 1] = om
+        n_steps[i] = k
+    return out, n_steps, t_nodes, coeffs
+
+
+@njit(parallel=True, cache=True)
+def dopri5_dense_eval(t_nodes, coeffs, n_steps, states0, times):
+    """
+    Состояния траекторий в моменты times (N,) по плотному выводу batch_dopri5_dense.
+    Моменты за пределами [0, dt] прижимаются к концам; несошедшиеся траектории дают NaN.
+    """
+    n = times.shape[0]
+    out = np.empty((n, 2))
+    for i in prange(n):
+        steps = n_steps[i]
+        if steps == 0:  # dt == 0
+            out[i, 0] = states0[i, 0]
+            out[i, 1] = states0[i, 1]
+            continue
+        if steps < 0:
+            out[i, 0] = np.nan
+            out[i, 1] = np.nan
+            continue
+        t = times[i]
+        total = t_nodes[i, steps]
+        # Время в долях интервала, чтобы одинаково работать вперёд и назад
+        frac = min(max(t / total, 0.0), 1.0) if total != 0.0 else 0.0
+        k = 0
+        while k < steps - 1 and t_nodes[i, k + 1] / total < frac:
+            k += 1
+        t0, t1 = t_nodes[i, k] / total, t_nodes[i, k + 1] / total
+        theta = (frac - t0) / (t1 - t0)
+        theta1 = 1.0 - theta
+        for j in range(2):
+            out[i, j] = coeffs[i, k, 0, j] + theta * (coeffs[i, k, 1, j] + theta1 * (
+                coeffs[i, k, 2, j] + theta * (coeffs[i, k, 3, j] + theta1 * coeffs[i, k, 4, j])))
+    return out
+
+
+# ──────────────────────────────────────────────────────────────────────
+# 3. Площадь дерева: сумма треугольников корень → ребёнок → внук
+# ──────────────────────────────────────────────────────────────────────
+@njit(cache=True, fastmath=True)
+def tree_area(root_pos, children_pos, grandchildren_pos, parent_indices):
+    """
+    Сумма площадей треугольников root-child-grandchild для всех внуков.
+
+    root_pos          : (2,)
+    children_pos      : (C, 2)
+    grandchildren_pos : (G, 2)
+    parent_indices    : (G,) индекс ребёнка-родителя каждого внука
+    """
+    total_area = 0.0
+    for i in range(grandchildren_pos.shape[0]):
+        p2 = children_pos[parent_indices[i]]
+        p3 = grandchildren_pos[i]
+        total_area += 0.5 * abs(root_pos[0] * (p2[1] - p3[1]) +
+                                p2[0] * (p3[1] - root_pos[1]) +
+                                p3[0] * (root_pos[1] - p2[1]))
+    return total_area
+
+
+# ──────────────────────────────────────────────────────────────────────
+# 3b. Площадь дерева произвольной глубины (узлы по уровням в одном массиве)
+# ──────────────────────────────────────────────────────────────────────
+@njit(cache=True, fastmath=True)
+def level_tree_area(positions, parents):
+    """
+    Сумма площадей треугольников дед → родитель → узел для всех узлов
+    начиная с третьего уровня. Для глубины 2 совпадает с tree_area.
+
+    positions : (N, 2) все узлы, корень — узел 0
+    parents   : (N,) глобальный индекс родителя (-1 у корня)
+    """
+    total_area = 0.0
+    for i in range(positions.shape[0]):
+        p = parents[i]
+        if p < 0 or parents[p] < 0:
+            continue
+        a = positions[parents[p]]
+        b = positions[p]
+        c = positions[i]
+        total_area += 0.5 * abs(a[0] * (b[1] - c[1]) +
+                                b[0] * (c[1] - a[1]) +
+                                c[0] * (a[1] - b[1]))
+    return total_area
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Явные сигнатуры (C-непрерывные массивы, как в реальных вызовах)
+# ──────────────────────────────────────────────────────────────────────
+_SCALARS = (float64, float64, float64, float64)  # g, l, c, inv_ml2
+
+KERNELS: Dict[str, Tuple[Callable, List]] = {
+    'rk4_step': (rk4_step, [
+        float64[::1](float64[::1], float64, float64, *_SCALARS),
+    ]),
+    'batch_rk4': (batch_rk4, [
+        float64[:, ::1](float64[:, ::1], float64[::1], float64[::1], *_SCALARS),
+    ]),
+    'batch_dopri5': (batch_dopri5, [
+        types.Tuple((float64[:, ::1], int64[::1]))(
+            float64[:, ::1], float64[::1], float64[::1], float64, float64, int64, *_SCALARS),
+    ]),
+    'batch_dopri5_dense': (batch_dopri5_dense, [
+        types.Tuple((float64[:, ::1], int64[::1], float64[:, ::1], float64[:, :, :, ::1]))(
+            float64[:, ::1], float64[::1], float64[::1], float64, float64, int64, *_SCALARS),
+    ]),
+    'dopri5_dense_eval': (dopri5_dense_eval, [
+        float64[:, ::1](float64[:, ::1], float64[:, :, :, ::1], int64[::1], float64[:, ::1], float64[::1]),
+    ]),
+    'tree_area': (tree_area, [
+        float64(float64[::1], float64[:, ::1], float64[:, ::1], int32[::1]),
+        float64(float64[::1], float64[:, ::1], float64[:, ::1], int64[::1]),
+    ]),
+    'level_tree_area': (level_tree_area, [
+        float64(float64[:, ::1], int64[::1]),
+    ]),
+    # rng — np.random.Generator; min_r, n_dim, k, cell_size, grid_size — как в PoissonDiskSampler
+    'bridson_kernel_2d': (_bridson_kernel_2d, [
+        float64[:, ::1](types.npy_rng, float64, int64, float64, int64),
+    ]),
+    'bridson_kernel': (_bridson_kernel, [
+        float64[:, ::1](types.npy_rng, float64, int64, int64, float64, int64, int64[::1], int64[:, ::1]),
+    ]),
+}
+
+
+def compile_kernels(verbose: bool = False) -> Dict[str, float]:
+    """
+    Компилирует (или загружает из кэша numba) все сигнатуры из KERNELS.
+
+    Returns:
+        dict: имя ядра -> затраченное время в секундах
+    """
+    timings = {}
+    for name, (kernel, signatures) in KERNELS.items():
+        start = time.perf_counter()
+        for signature in signatures:
+            kernel.compile(signature)
+        timings[name] = time.perf_counter() - start
+        if verbose:
+            print(f"   ⚙️ {name}: {len(signatures)} сигнатур, {timings[name] * 1000:.0f} мс")
+    return timings
+
+
+_warmup_thread: Optional[threading.Thread] = None
+
+
+def start_warmup_thread(verbose: bool = False) -> threading.Thread:
+    """
+    Запускает фоновый прогрев ядер (один раз на процесс).
+
+    Вызовы ядер из главного потока во время прогрева просто дождутся
+    блокировки компилятора numba, повторной компиляции не будет.
+    """
+    global _warmup_thread
+    if _warmup_thread is None:
+        def _run():
+            timings = compile_kernels()
+            if verbose:
+                total = sum(timings.values())
+                print(f"🔥 JIT-ядра прогреты за {total * 1000:.0f} мс")
+
+        _warmup_thread = threading.Thread(target=_run, name='kernel-warmup', daemon=True)
+        _warmup_thread.start()
+    return _warmup_thread
+
+
+def wait_for_warmup(timeout: Optional[float] = None) -> bool:
+    """Ждёт окончания фонового прогрева. Возвращает True, если прогрев завершён."""
+    if _warmup_thread is None:
+        return False
+    _warmup_thread.join(timeout)
+    return not _warmup_thread.is_alive()
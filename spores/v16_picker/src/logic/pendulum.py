@@ -1,9 +1,39 @@
 import numpy as np
 from scipy.linalg import expm
-from typing import Tuple
-from scipy.integrate import solve_ivp
-import numba
-from numba import njit, prange, float64
+from typing import Optional, Tuple
+from .kernels import (rk4_step, batch_rk4,
+                      batch_dopri5, batch_dopri5_dense, dopri5_dense_eval)
+
+class DenseTrajectories:
+    """
+    Плотный вывод пакета траекторий DOPRI5 (см. PendulumSystem.batch_dense_dopri5).
+
+    t_nodes : (N, S + 1) узлы принятых шагов, время со знаком (t_nodes[:, 0] = 0)
+    coeffs  : (N, S, 5, 2) коэффициенты полинома 4-й степени на каждом шаге
+    n_steps : (N,) число принятых шагов (-1 — не хватило max_steps)
+    """
+
+    def __init__(self, initial_states: np.ndarray, final_states: np.ndarray, dts: np.ndarray,
+                 n_steps: np.ndarray, t_nodes: np.ndarray, coeffs: np.ndarray):
+        self.initial_states = initial_states
+        self.final_states = final_states
+        self.dts = dts
+        self.n_steps = n_steps
+        self.t_nodes = t_nodes
+        self.coeffs = coeffs
+
+    def __len__(self) -> int:
+        return len(self.final_states)
+
+    def __call__(self, times: np.ndarray) -> np.ndarray:
+        """Состояния (N, 2) в моменты times (скаляр или (N,), того же знака, что dt)."""
+        times = np.ascontiguousarray(np.broadcast_to(np.asarray(times, dtype=np.float64), (len(self),)))
+        return dopri5_dense_eval(self.t_nodes, self.coeffs, self.n_steps, self.initial_states, times)
+
+    def at_fraction(self, fraction) -> np.ndarray:
+        """Состояния (N, 2) в долях fraction ∈ [0, 1] от dt каждой траектории."""
+        return self(np.asarray(fraction, dtype=np.float64) * self.dts)
+
 
 class PendulumSystem:
     """
@@ -206,6 +236,9 @@ class PendulumSystem:
         Returns:
             np.ndarray: Следующее состояние системы.
         """
+        # scipy.integrate грузится при первом вызове, а не при старте приложения
+        from scipy.integrate import solve_ivp
+
         # solve_ivp решает систему от t_span[0] до t_span[1]
         # Мы хотим сделать всего один шаг, поэтому t_span = [0, dt]
         t_span = [0, dt]
@@ -260,122 +293,110 @@ class PendulumSystem:
             point: Вектор состояния в точке пересечения [theta, omega].
             theta, omega: Координаты пересечения для удобства.
         """
-        # Рассчитываем производные для обеих спор
-        theta_dot1, theta_ddot1, theta_dddot1 = self.get_all_derivatives(state1, control1, control_dot1)
-        theta_dot2, theta_ddot2, theta_dddot2 = self.get_all_derivatives(state2, control2, control_dot2)
-        
-        # Новый алгоритм: ищем пересечения траекторий в разные моменты времени
-
-        # Аналитическое решение системы квадратных уравнений
-        # 
-        # Система уравнений:
-        # θ₁₀ + θ̇₁₀·t₁ + 0.5·θ̈₁·t₁² = θ₂₀ + θ̇₂₀·t₂ + 0.5·θ̈₂·t₂²    (углы)
-        # θ̇₁₀ + θ̈₁·t₁            = θ̇₂₀ + θ̈₂·t₂              (скорости)
-        #
-        # Из второго уравнения выражаем t₂:
-        # t₂ = (θ̇₁₀ + θ̈₁·t₁ - θ̇₂₀) / θ̈₂
-        #
-        # Подставляем в первое уравнение и получаем квадратное уравнение на t₁
-        
+        # Скалярная обёртка над пакетной версией (control_dot в квадратичной модели не участвует)
+        t1, t2, valid = self.quadratic_meeting_times(
+            np.reshape(state1, (1, 2)), np.array([control1]),
+            np.reshape(state2, (1, 2)), np.array([control2]),
+            tolerance=tolerance,
+        )
+        _, theta_ddot1, _ = self.get_all_derivatives(state1, control1, control_dot1)
+        _, theta_ddot2, _ = self.get_all_derivatives(state2, control2, control_dot2)
+
         all_intersections = []
-        
-        # Проверяем, не равно ли ускорение второй споры нулю
-        if abs(theta_ddot2) < tolerance:
-            # Случай θ̈₂ ≈ 0: вторая спора движется равномерно
-            # Из второго уравнения: t₁ = (θ̇₂₀ - θ̇₁₀) / θ̈₁
-            if abs(theta_ddot1) > tolerance:
-                t1 = (state2[1] - state1[1]) / theta_ddot1
-                t2 = state2[1]  # константная скорость
-                
-                # Проверяем первое уравнение (используем напрямую начальные состояния)
-                theta1_t = state1[0] + state1[1] * t1 + 0.5 * theta_ddot1 * t1**2
-                theta2_t = state2[0] + state2[1] * t2
-                
-                if abs(theta1_t - theta2_t) < tolerance:
-                    intersection_point = np.array([(theta1_t + theta2_t)/2, state2[1]])
-                    all_intersections.append({
-                        "t1": t1,
-                        "t2": t2, 
-                        "point": intersection_point,
-                        "theta": intersection_point[0],
-                        "omega": intersection_point[1]
-                    })
-        else:
-            # Общий случай: t₂ = (ω₁₀ + θ̈₁·t₁ - ω₂₀) / θ̈₂
-            # Подставляем в уравнение для углов:
-            # θ₁₀ + θ̇₁₀·t₁ + 0.5·θ̈₁·t₁² = θ₂₀ + θ̇₂₀·t₂ + 0.5·θ̈₂·t₂²
-            #
-            # Получаем квадратное уравнение на t₁: a·t₁² + b·t₁ + c = 0
-            
-            dtheta_0 = state1[0] - state2[0]     # разность начальных углов  
-            domega_0 = state1[1] - state2[1]    # разность начальных скоростей
-            
-            # Точный вывод коэффициентов квадратного уравнения
-            # После подстановки t₂ и упрощения получаем: a·t₁² + b·t₁ + c = 0
-            
-            # Обозначения для ясности
-            w1, w2 = state1[1], state2[1]  # начальные скорости
-            dd1, dd2 = theta_ddot1, theta_ddot2  # ускорения
-            
-            # ИСПРАВЛЕННЫЕ коэффициенты - полный пересчёт
-            # Подставляем t₂ = (w1 + dd1*t₁ - w2)/dd2 в уравнение углов
-            # После алгебраических упрощений получаем:
-            a = 0.5 * (dd1 - dd1**2 / dd2)
-            b = w1 * (1 - dd1 / dd2)  
-            c = dtheta_0 - w2 * (w1 - w2) / dd2 - 0.5 * dd2 * ((w1 - w2) / dd2)**2
-            
-            # Решаем квадратное уравнение
-            if abs(a) < tolerance:
-                # Линейный случай
-                if abs(b) > tolerance:
-                    t1 = -c / b
-                    t2 = (state1[1] + theta_ddot1 * t1 - state2[1]) / theta_ddot2
-                    
-                    # Проверяем решение (используем напрямую начальные состояния)
-                    theta1_t = state1[0] + state1[1] * t1 + 0.5 * theta_ddot1 * t1**2
-                    omega1_t = state1[1] + theta_ddot1 * t1
-                    theta2_t = state2[0] + state2[1] * t2 + 0.5 * theta_ddot2 * t2**2
-                    omega2_t = state2[1] + theta_ddot2 * t2
-                    
-                    if (abs(theta1_t - theta2_t) < tolerance and 
-                        abs(omega1_t - omega2_t) < tolerance):
-                        intersection_point = np.array([(theta1_t + theta2_t)/2, (omega1_t + omega2_t)/2])
-                        all_intersections.append({
-                            "t1": t1,
-                            "t2": t2,
-                            "point": intersection_point, 
-                            "theta": intersection_point[0],
-                            "omega": intersection_point[1]
-                        })
-            else:
-                # Квадратный случай
-                discriminant = b**2 - 4*a*c
-                if discriminant >= 0:
-                    sqrt_d = np.sqrt(discriminant)
-                    
-                    # Два решения
-                    for t1 in [(-b + sqrt_d)/(2*a), (-b - sqrt_d)/(2*a)]:
-                        t2 = (state1[1] + theta_ddot1 * t1 - state2[1]) / theta_ddot2
-                        
-                        # Проверяем решение (используем напрямую начальные состояния)
-                        theta1_t = state1[0] + state1[1] * t1 + 0.5 * theta_ddot1 * t1**2
-                        omega1_t = state1[1] + theta_ddot1 * t1
-                        theta2_t = state2[0] + state2[1] * t2 + 0.5 * theta_ddot2 * t2**2
-                        omega2_t = state2[1] + theta_ddot2 * t2
-                        
-                        if (abs(theta1_t - theta2_t) < tolerance and 
-                            abs(omega1_t - omega2_t) < tolerance):
-                            intersection_point = np.array([(theta1_t + theta2_t)/2, (omega1_t + omega2_t)/2])
-                            all_intersections.append({
-                                "t1": t1,
-                                "t2": t2,
-                                "point": intersection_point,
-                                "theta": intersection_point[0], 
-                                "omega": intersection_point[1]
-                            })
+        for root in np.flatnonzero(valid[0, 0]):
+            t1_k, t2_k = float(t1[0, 0, root]), float(t2[0, 0, root])
+            theta1_t = state1[0] + state1[1] * t1_k + 0.5 * theta_ddot1 * t1_k**2
+            omega1_t = state1[1] + theta_ddot1 * t1_k
+            theta2_t = state2[0] + state2[1] * t2_k + 0.5 * theta_ddot2 * t2_k**2
+            omega2_t = state2[1] + theta_ddot2 * t2_k
+            intersection_point = np.array([(theta1_t + theta2_t) / 2, (omega1_t + omega2_t) / 2])
+            all_intersections.append({
+                "t1": t1_k,
+                "t2": t2_k,
+                "point": intersection_point,
+                "theta": intersection_point[0],
+                "omega": intersection_point[1]
+            })
 
         return all_intersections
 
+    def quadratic_meeting_times(
+        self,
+        states1: np.ndarray,
+        controls1: np.ndarray,
+        states2: Optional[np.ndarray] = None,
+        controls2: Optional[np.ndarray] = None,
+        tolerance: float = 1e-6,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Пакетный аналог find_all_quadratic_intersections для всех пар (i, j).
+
+        Траектории приближаются квадратично с постоянным ускорением
+        θ̈ = f(θ₀, ω₀, u):  θ(t) = θ₀ + ω₀·t + ½·θ̈·t²,  ω(t) = ω₀ + θ̈·t.
+        Ищутся t1, t2 такие, что state1_i(t1) = state2_j(t2).
+
+        Args:
+            states1, controls1: (N, 2), (N,) — первые споры.
+            states2, controls2: (M, 2), (M,) — вторые споры (по умолчанию те же, что первые).
+            tolerance: Порог вырождения и допустимая невязка решения.
+
+        Returns:
+            (t1, t2, valid): массивы (N, M, 2) — два корня на каждую пару и маска
+            корней, для которых встреча существует и проверена подстановкой.
+        """
+        states1 = np.asarray(states1, dtype=np.float64).reshape(-1, 2)
+        controls1 = np.asarray(controls1, dtype=np.float64).reshape(-1)
+        if states2 is None:
+            states2, controls2 = states1, controls1
+        states2 = np.asarray(states2, dtype=np.float64).reshape(-1, 2)
+        controls2 = np.asarray(controls2, dtype=np.float64).reshape(-1)
+
+        def acceleration(states, controls):
+            return -self.g / self.l * np.sin(states[:, 0]) - self.damping * states[:, 1] + controls * self._inv_ml2
+
+        th1, w1, dd1 = states1[:, 0, None], states1[:, 1, None], acceleration(states1, controls1)[:, None]
+        th2, w2, dd2 = states2[None, :, 0], states2[None, :, 1], acceleration(states2, controls2)[None, :]
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            dw = w1 - w2
+            # Общий случай θ̈₂ ≠ 0: t₂ = (ω₁₀ + θ̈₁·t₁ - ω₂₀) / θ̈₂, для t₁ — a·t₁² + b·t₁ + c = 0
+            a = 0.5 * (dd1 - dd1**2 / dd2)
+            b = w1 * (1 - dd1 / dd2)
+            c = (th1 - th2) - w2 * dw / dd2 - 0.5 * dw**2 / dd2
+            discriminant = b**2 - 4 * a * c
+            sqrt_d = np.sqrt(np.maximum(discriminant, 0.0))
+            # Устойчивая форма корней: порядок как у (-b + √D)/2a, (-b - √D)/2a
+            q = -0.5 * (b + np.copysign(sqrt_d, b))
+            root_plus = np.where(b >= 0, c / q, q / a)
+            root_minus = np.where(b >= 0, q / a, c / q)
+
+            quadratic = np.abs(a) >= tolerance
+            linear = ~quadratic & (np.abs(b) >= tolerance)
+            t1 = np.stack([np.where(quadratic, root_plus, -c / b),
+                           np.where(quadratic, root_minus, np.nan)], axis=-1)
+            ok = np.stack([(quadratic & (discriminant >= 0)) | linear, quadratic & (discriminant >= 0)], axis=-1)
+            t2 = (dw[..., None] + dd1[..., None] * t1) / dd2[..., None]
+
+            # Вырожденный случай θ̈₂ ≈ 0: ω₂ постоянна, t₁ из равенства скоростей, t₂ — из углов
+            flat2 = np.broadcast_to(np.abs(dd2) < tolerance, dw.shape)
+            t1_flat = -dw / dd1
+            theta1_flat = th1 + w1 * t1_flat + 0.5 * dd1 * t1_flat**2
+            t2_flat = np.where(np.abs(w2) >= tolerance, (theta1_flat - th2) / w2, 0.0)
+            t1[..., 0] = np.where(flat2, t1_flat, t1[..., 0])
+            t2[..., 0] = np.where(flat2, t2_flat, t2[..., 0])
+            ok[..., 0] = np.where(flat2, np.abs(dd1) >= tolerance, ok[..., 0])
+            ok[..., 1] &= ~flat2
+
+            # Проверка подстановкой в обе квадратичные модели
+            theta1_t = th1[..., None] + w1[..., None] * t1 + 0.5 * dd1[..., None] * t1**2
+            omega1_t = w1[..., None] + dd1[..., None] * t1
+            theta2_t = th2[..., None] + w2[..., None] * t2 + 0.5 * dd2[..., None] * t2**2
+            omega2_t = w2[..., None] + dd2[..., None] * t2
+            valid = (ok & np.isfinite(t1) & np.isfinite(t2)
+                     & (np.abs(theta1_t - theta2_t) < tolerance)
+                     & (np.abs(omega1_t - omega2_t) < tolerance))
+        return t1, t2, valid
+
     def scipy_rk45_step_backward(self, state: np.ndarray, control: float, dt: float) -> np.ndarray:
         """
         Простой шаг назад во времени - интегрируем с отрицательным dt.
@@ -393,41 +414,13 @@ class PendulumSystem:
     
 
 # ──────────────────────────────────────────────────────────────────────
-    # 1. JIT-ядро: одиночный RK4–шаг (fastmath + параллель разрешён)
+    # 1–2. JIT-ядра одиночного и пакетного RK4-шага (см. kernels.py:
+    #      там же явные сигнатуры и фоновый прогрев)
     # ──────────────────────────────────────────────────────────────────────
-    @staticmethod
-    @njit(float64[:](float64[:], float64, float64,          # state, u, dt
-                     float64, float64, float64, float64),   # g, l, c, inv_ml2
-          cache=True, fastmath=True)
-    def _rk4_step(state, u, dt, g, l, c, inv_ml2):
-        th, om = state
-        k1t, k1o = om, -g / l * np.sin(th) - c * om + u * inv_ml2
-        k2t, k2o = om + 0.5 * dt * k1o, -g / l * np.sin(th + 0.5 * dt * k1t) - c * (om + 0.5 * dt * k1o) + u * inv_ml2
-        k3t, k3o = om + 0.5 * dt * k2o, -g / l * np.sin(th + 0.5 * dt * k2t) - c * (om + 0.5 * dt * k2o) + u * inv_ml2
-        k4t, k4o = om + dt * k3o,       -g / l * np.sin(th + dt * k3t)       - c * (om + dt * k3o)       + u * inv_ml2
-        th_n = th + (dt / 6.0) * (k1t + 2 * k2t + 2 * k3t + k4t)
-        om_n = om + (dt / 6.0) * (k1o + 2 * k2o + 2 * k3o + k4o)
-        return np.array([th_n, om_n])
-
-    # ──────────────────────────────────────────────────────────────────────
-    # 2. ПАКЕТНЫЙ шаг для векторных вычислений (параллельный prange)
-    # ──────────────────────────────────────────────────────────────────────
-    @staticmethod
-    @njit(parallel=True, fastmath=True, cache=True)
-    def _batch_rk4(states, controls, dts, g, l, c, inv_ml2):
-        out = np.empty_like(states)
-        for i in prange(states.shape[0]):
-            th, om = states[i]
-            u, dt = controls[i], dts[i]
-
-            k1t, k1o = om, -g / l * np.sin(th) - c * om + u * inv_ml2
-            k2t, k2o = om + 0.5 * dt * k1o, -g / l * np.sin(th + 0.5 * dt * k1t) - c * (om + 0.5 * dt * k1o) + u * inv_ml2
-            k3t, k3o = om + 0.5 * dt * k2o, -g / l * np.sin(th + 0.5 * dt * k2t) - c * (om + 0.5 * dt * k2o) + u * inv_ml2
-            k4t, k4o = om + dt * k3o,       -g / l * np.sin(th + dt * k3t)       - c * (om + dt * k3o)       + u * inv_ml2
-
-            out[i, 0] = th + (dt / 6.0) * (k1t + 2 * k2t + 2 * k3t + k4t)
-            out[i, 1] = om + (dt / 6.0) * (k1o + 2 * k2o + 2 * k3o + k4o)
-        return out
+    _rk4_step = staticmethod(rk4_step)
+    _batch_rk4 = staticmethod(batch_rk4)
+    _batch_dopri5 = staticmethod(batch_dopri5)
+    _batch_dopri5_dense = staticmethod(batch_dopri5_dense)
 
     # ──────────────────────────────────────────────────────────────────────
     # 3. Публичный одиночный шаг
@@ -435,10 +428,16 @@ class PendulumSystem:
     def step(self, state: np.ndarray, control: float, dt: float, method: str = "jit") -> np.ndarray:
         """
         Выполняет один интеграционный шаг.
-        method = "jit"  (быстро)  или  "rk45" (fallback SciPy, медленно).
+        method = "jit"    (быстро, один RK4-шаг),
+                 "dopri5" (JIT с контролем ошибки, точность scipy RK45)
+                 или "rk45" (fallback SciPy, медленно).
         """
         if method == "jit":
-            return self._rk4_step(state, control, dt, self.g, self.l, self.damping, self._inv_ml2)
+            # Приводим аргументы к прогретой сигнатуре, чтобы не запускать новую JIT-компиляцию
+            return self._rk4_step(np.ascontiguousarray(state, dtype=np.float64), float(control), float(dt),
+                                  self.g, self.l, self.damping, self._inv_ml2)
+        elif method == "dopri5":
+            return self.dopri5_step(state, control, dt)
         elif method == "rk45":
             from scipy.integrate import RK45
 
@@ -452,7 +451,7 @@ class PendulumSystem:
             solver.step()
             return solver.y
         else:
-            raise ValueError("method must be 'jit' or 'rk45'")
+            raise ValueError("method must be 'jit', 'dopri5' or 'rk45'")
 
     # ──────────────────────────────────────────────────────────────────────
     # 4. Публичный batch-шаг (используйте его в SporeTree)
@@ -464,6 +463,57 @@ class PendulumSystem:
         controls : (N,)
         dts      : (N,)
         """
+        states = np.ascontiguousarray(states, dtype=np.float64)
+        controls = np.ascontiguousarray(controls, dtype=np.float64)
+        dts = np.ascontiguousarray(dts, dtype=np.float64)
         return self._batch_rk4(states, controls, dts, self.g, self.l, self.damping, self._inv_ml2)
 
     # ──────────────────────────────────────────────────────────────────────
+    # 5. Адаптивный DOPRI5 (точность уровня scipy RK45, скорость JIT)
+    # ──────────────────────────────────────────────────────────────────────
+    def batch_step_dopri5(self, states: np.ndarray, controls: np.ndarray, dts: np.ndarray,
+                          rtol: float = 1e-6, atol: float = 1e-8, max_steps: int = 10_000) -> np.ndarray:
+        """
+        Пакетное интегрирование с контролем ошибки (Дорманд–Принс 5(4)).
+        dts могут быть отрицательными (интегрирование назад во времени).
+
+        states   : (N, 2)
+        controls : (N,)
+        dts      : (N,)
+        """
+        states = np.ascontiguousarray(states, dtype=np.float64)
+        out, n_steps = self._batch_dopri5(states,
+                                          np.ascontiguousarray(controls, dtype=np.float64),
+                                          np.ascontiguousarray(dts, dtype=np.float64),
+                                          float(rtol), float(atol), int(max_steps),
+                                          self.g, self.l, self.damping, self._inv_ml2)
+        self._warn_if_failed(n_steps, max_steps)
+        return out
+
+    def batch_dense_dopri5(self, states: np.ndarray, controls: np.ndarray, dts: np.ndarray,
+                           rtol: float = 1e-6, atol: float = 1e-8, max_steps: int = 256) -> DenseTrajectories:
+        """
+        Как batch_step_dopri5, но с плотным выводом: возвращённый объект
+        вычисляет состояние каждой траектории в любой момент внутри [0, dt].
+        """
+        states = np.ascontiguousarray(states, dtype=np.float64)
+        dts = np.ascontiguousarray(dts, dtype=np.float64)
+        out, n_steps, t_nodes, coeffs = self._batch_dopri5_dense(
+            states, np.ascontiguousarray(controls, dtype=np.float64), dts,
+            float(rtol), float(atol), int(max_steps), self.g, self.l, self.damping, self._inv_ml2)
+        self._warn_if_failed(n_steps, max_steps)
+        return DenseTrajectories(states, out, dts, n_steps, t_nodes, coeffs)
+
+    def dopri5_step(self, state: np.ndarray, control: float, dt: float,
+                    rtol: float = 1e-6, atol: float = 1e-8) -> np.ndarray:
+        """Одиночный шаг DOPRI5; замена scipy_rk45_step с теми же допусками."""
+        return self.batch_step_dopri5(np.reshape(state, (1, 2)), np.array([control]), np.array([dt]),
+                                      rtol=rtol, atol=atol)[0]
+
+    @staticmethod
+    def _warn_if_failed(n_steps: np.ndarray, max_steps: int) -> None:
+        failed = int(np.count_nonzero(n_steps < 0))
+        if failed:
+            print(f"⚠️ DOPRI5: {failed} траекторий не сошлись за {max_steps} шагов")
+
+    # ──────────────────────────────────────────────────────────────────────
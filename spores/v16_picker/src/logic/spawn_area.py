@@ -1,6 +1,6 @@
 import numpy as np
 from ..utils.poisson_disk import PoissonDiskSampler
-from typing import List, Callable
+from typing import List, Callable, Optional
 
 class SpawnArea:
     """
@@ -67,6 +67,12 @@ class SpawnArea:
         N = np.outer(n, n)
         self.T: np.ndarray = self.a * N + self.b * (np.eye(self.n_dim) - N)
 
+        # Обратное преобразование кэшируется: is_inside вызывается очень часто
+        try:
+            self.T_inv: Optional[np.ndarray] = np.linalg.inv(self.T)
+        except np.linalg.LinAlgError:
+            self.T_inv = None
+
     def get_points(self, n_points: int = 100) -> np.ndarray:
         """
         Возвращает точки на границе эллипсоида.
@@ -86,43 +92,58 @@ class SpawnArea:
         """
         Проверяет, находится ли точка внутри эллипсоида.
         """
-        point = np.asarray(point, dtype=float)
-        centered_point = point - self.center
-        
-        try:
-            T_inv = np.linalg.inv(self.T)
-            transformed_point = centered_point @ T_inv.T
-            distance_squared = np.sum(transformed_point**2)
-            return distance_squared <= 1.0 or np.isclose(distance_squared, 1.0)
-        except np.linalg.LinAlgError:
-            return False
+        return bool(self.is_inside_many(np.asarray(point, dtype=float).reshape(1, -1))[0])
+
+    def is_inside_many(self, points: np.ndarray) -> np.ndarray:
+        """
+        Векторизованная проверка принадлежности точек эллипсоиду.
+
+        :param points: массив формы (N, n_dim).
+        :return: булев массив формы (N,).
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, self.n_dim)
+        if self.T_inv is None:
+            return np.zeros(len(points), dtype=bool)
+
+        transformed = (points - self.center) @ self.T_inv.T
+        distance_squared = np.einsum('ij,ij->i', transformed, transformed)
+        return (distance_squared <= 1.0) | np.isclose(distance_squared, 1.0)
+
+    def sample_uniform(self, n: int, seed: Optional[int] = None) -> np.ndarray:
+        """
+        Генерирует n равномерно распределенных точек внутри эллипсоида за один вызов.
+
+        Точки единичного шара переводятся в эллипсоид аффинным преобразованием,
+        поэтому отбраковка не нужна.
+
+        :param n: количество точек.
+        :param seed: зерно генератора для воспроизводимости (None — случайно).
+        :return: массив формы (n, n_dim).
+        """
+        rng = np.random.default_rng(seed)
+        directions = rng.standard_normal((n, self.n_dim))
+        norms = np.linalg.norm(directions, axis=1, keepdims=True)
+        norms[norms == 0.0] = 1.0
+        radii = rng.random((n, 1)) ** (1.0 / self.n_dim)
+        return (directions / norms * radii) @ self.T + self.center
 
     def sample_random_point(self) -> np.ndarray:
         """
         Генерирует одну случайную точку внутри n-мерного эллипсоида.
         """
-        while True:
-            # Генерируем точку в единичной n-мерной сфере
-            p = np.random.randn(self.n_dim)
-            p /= np.linalg.norm(p)
-            r = np.random.rand()**(1/self.n_dim)
-            point_in_sphere = p * r
-            
-            # Преобразуем точку в эллипсоид
-            point_in_ellipsoid = point_in_sphere @ self.T + self.center
-            
-            # Проверяем, что точка действительно внутри (для безопасности)
-            if self.is_inside(point_in_ellipsoid):
-                return point_in_ellipsoid
+        return self.sample_uniform(1)[0]
 
-    def sample_poisson_disk(self, min_radius: float) -> np.ndarray:
+    def sample_poisson_disk(self, min_radius: float, seed: Optional[int] = None) -> np.ndarray:
         """
         Генерирует точки с контролируемым минимальным расстоянием внутри эллипсоида.
+
+        :param min_radius: минимальное расстояние в единичной сфере, (0, 2].
+        :param seed: зерно генератора для воспроизводимости (None — случайно).
         """
         if not (0 < min_radius <= 2):
             raise ValueError("min_radius должен быть в диапазоне (0, 2].")
 
-        sampler = PoissonDiskSampler(min_radius=min_radius, n_dim=self.n_dim)
+        sampler = PoissonDiskSampler(min_radius=min_radius, n_dim=self.n_dim, seed=seed)
         points_in_sphere = sampler.sample()
 
         if len(points_in_sphere) == 0:
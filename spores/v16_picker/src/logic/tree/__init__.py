@@ -1,7 +1,10 @@
 # Logic tree package initialization
 
-# re-export bridge for convenience
-from .tree_area_bridge import run_area_optimization
+from ...utils.lazy_import import lazy_exports
 
-# re-export area optimization
-from .area_opt import optimize_tree_area
+# re-export bridge and area optimization (loaded on first use: pull scipy.optimize)
+__getattr__ = lazy_exports(__name__, {
+    'run_area_optimization': '.tree_area_bridge',
+    'optimize_tree_area': '.area_opt',
+    'AnytimeAreaOptimizer': '.area_opt',
+})
@@ -0,0 +1,63 @@
+"""
+Сортировка внуков по углу и разбиение на пары — на индексах.
+
+Вместо сортировки списков словарей работаем с массивом позиций (N, 2)
+и массивом родителей (N,): порядок — перестановка индексов, пары —
+соседние элементы перестановки (0,1), (2,3), ...
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+def angular_order(positions: np.ndarray, origin: np.ndarray, parent_idx: np.ndarray,
+                  anchor_parent: Optional[int] = 0) -> np.ndarray:
+    """
+    Перестановка узлов по углу от origin (против часовой стрелки, от большего угла).
+
+    1. argsort по arctan2 (устойчивый, как sorted(..., reverse=True));
+    2. roll, чтобы первым стал первый узел родителя anchor_parent (None — без якоря);
+    3. roll +1, если первые два узла от одного родителя.
+
+    Args:
+        positions: (N, 2) позиции
+        origin: (2,) точка отсчёта углов (корень)
+        parent_idx: (N,) индекс родителя каждого узла
+
+    Returns:
+        order (N,): индексы узлов в порядке пар
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    parent_idx = np.asarray(parent_idx)
+    angles = np.arctan2(positions[:, 1] - origin[1], positions[:, 0] - origin[0])
+    order = np.argsort(-angles, kind='stable')
+
+    # Оба roll сводятся к одному сдвигу начала перестановки
+    n = len(order)
+    shift = 0
+    if anchor_parent is not None:
+        is_anchor = parent_idx[order] == anchor_parent
+        if is_anchor.any():
+            shift = int(is_anchor.argmax())
+    if n >= 2 and parent_idx[order[shift % n]] == parent_idx[order[(shift + 1) % n]]:
+        shift -= 1
+    if shift:
+        order = np.concatenate((order[shift:], order[:shift]))
+    return order
+
+
+def pair_validity(parent_idx: np.ndarray, order: np.ndarray) -> np.ndarray:
+    """(N//2,) True для пар (order[2k], order[2k+1]) от разных родителей."""
+    parent_idx = np.asarray(parent_idx)
+    n = len(order) // 2 * 2
+    return parent_idx[order[0:n:2]] != parent_idx[order[1:n:2]]
+
+
+def pair_means(positions: np.ndarray, order: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """(N//2, 2) средние точки пар (order[2k], order[2k+1])."""
+    n = len(order) // 2 * 2
+    out = np.empty((n // 2, 2)) if out is None else out
+    np.add(positions[order[0:n:2]], positions[order[1:n:2]], out=out)
+    out *= 0.5
+    return out
@@ -2,3 +2,4 @@
 
 # Export the main optimization function
 from .optimize_tree_area import optimize_tree_area
+from .anytime_area_optimizer import AnytimeAreaOptimizer
@@ -0,0 +1,252 @@
+"""
+Anytime-оптимизация площади дерева для превью под курсором.
+
+Вместо одного длинного запуска optimize_tree_area (клавиша O) каждый кадр
+делается несколько итераций решателя на текущем корне превью:
+- структура дерева (LevelTree), оценщик площади и констрейнты пар строятся
+  один раз и переиспользуются — при движении курсора сдвигается только
+  корень (levels.positions[0]);
+- решатель не перезапускается каждый кадр: один вызов minimize живёт в
+  фоновом потоке и засыпает в callback после iterations_per_frame
+  итераций, пока step() не сдвинет корень и не выдаст новый бюджет.
+  Так сохраняется и тёплый старт (итерация прошлого кадра), и
+  квазиньютоновское состояние SLSQP: перезапуск с maxiter=2 каждый кадр
+  сбрасывает гессиан, и итерации уходят из допустимой области;
+- после сходимости следующий кадр запускает решатель заново с
+  последнего решения — корень двигается непрерывно, оптимум рядом;
+- пары пересчитываются, только когда корень ушёл дальше
+  pairs_refresh_distance от корня, на котором их нашли;
+- наружу отдаётся вектор, только если он лучше показанного сейчас
+  (сначала нарушение констрейнтов, затем площадь).
+"""
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from scipy.optimize import minimize
+
+from .create_distance_constraints import create_distance_constraints
+from .tree_area_evaluator import TreeAreaEvaluator
+from ..level_tree import LevelTree
+from ..spore_tree import SporeTree
+from ..spore_tree_config import SporeTreeConfig
+from ..pairs.find_optimal_pairs import find_optimal_pairs
+
+
+class AnytimeAreaOptimizer:
+    """Пошаговая оптимизация dt_vector дерева глубины 2 с тёплым стартом."""
+
+    def __init__(self, pendulum, *,
+                 dt_grandchildren_factor: float = 0.2,
+                 dt_bounds: Tuple[float, float] = (0.001, 0.2),
+                 constraint_distance: float = 1e-3,
+                 iterations_per_frame: int = 2,
+                 pairs_refresh_distance: float = 0.05,
+                 max_iterations: int = 1500,
+                 optimization_method: str = 'SLSQP',
+                 feasibility_tol: float = 1e-6):
+        """
+        Args:
+            pendulum: PendulumSystem
+            dt_grandchildren_factor: dt внуков = dt_base · factor (как в SporeTreeConfig)
+            dt_bounds: границы |dt|; верхняя дополнительно ограничивается dt_base
+            constraint_distance: допустимое расстояние в парах
+            iterations_per_frame: итераций решателя за один step()
+            pairs_refresh_distance: сдвиг корня, после которого пары ищутся заново
+            max_iterations: итераций одного запуска решателя (по кадрам суммарно)
+            optimization_method: метод scipy.optimize.minimize
+            feasibility_tol: допуск на нарушение констрейнтов
+        """
+        self.pendulum = pendulum
+        self.dt_grandchildren_factor = dt_grandchildren_factor
+        self.dt_bounds = (max(dt_bounds[0], 0.001), dt_bounds[1])
+        self.constraint_distance = constraint_distance
+        self.iterations_per_frame = max(1, int(iterations_per_frame))
+        self.pairs_refresh_distance = pairs_refresh_distance
+        self.max_iterations = max_iterations
+        self.optimization_method = optimization_method
+        self.feasibility_tol = feasibility_tol
+
+        # Статистика для отладки и тестов
+        self.frames = 0
+        self.improvements = 0
+        self.pair_searches = 0
+        self.solver_runs = 0
+
+        self._thread: Optional[threading.Thread] = None
+        self.reset()
+
+    @classmethod
+    def from_config(cls, pendulum, config: Dict[str, Any]) -> 'AnytimeAreaOptimizer':
+        """Параметры из секции tree конфига (area_optimization, area_optimization.anytime, pairing)."""
+        tree_config = config.get('tree', {})
+        area_config = tree_config.get('area_optimization', {})
+        anytime_config = area_config.get('anytime', {})
+        return cls(
+            pendulum,
+            dt_grandchildren_factor=tree_config.get('pairing', {}).get('dt_grandchildren_factor', 0.2),
+            dt_bounds=tuple(area_config.get('dt_bounds', (0.001, 0.2))),
+            constraint_distance=area_config.get('constraint_distance', 1e-3),
+            iterations_per_frame=anytime_config.get('iterations_per_frame', 2),
+            pairs_refresh_distance=anytime_config.get('pairs_refresh_distance', 0.05),
+            max_iterations=area_config.get('max_iterations', 1500),
+            optimization_method=area_config.get('method', 'SLSQP'),
+        )
+
+    def reset(self) -> None:
+        """Останавливает решатель и забывает пары и тёплый старт: следующий step() начнёт с дерева по умолчанию."""
+        self._stop_solver()
+        self.levels: Optional[LevelTree] = None
+        self.pairs = None
+        self.pairs_root: Optional[np.ndarray] = None
+        self.dt_base: Optional[float] = None
+        self.x: Optional[np.ndarray] = None
+        self.last_area: Optional[float] = None
+        self._area_evaluator = None
+        self._constraints = []
+        self._scipy_constraints = []
+
+    # ------------------------------------------------------------------
+    # Кадр
+    # ------------------------------------------------------------------
+    def step(self, root_position: np.ndarray, dt_base: float,
+             shown_dt_vector: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        Несколько итераций решателя на корне root_position.
+
+        Args:
+            root_position: (2,) текущий корень превью
+            dt_base: текущий dt (dt детей дерева по умолчанию и верхняя граница |dt|)
+            shown_dt_vector: вектор, который сейчас показывает превью; None — дерево по умолчанию
+
+        Returns:
+            np.ndarray из 12 dt со знаками узлов дерева (как после O), если он
+            лучше показанного на этом корне, иначе None
+        """
+        self.frames += 1
+        root_position = np.asarray(root_position, dtype=np.float64)
+        self._sync_dt_base(float(dt_base))
+
+        if self.pairs is None or np.linalg.norm(root_position - self.pairs_root) > self.pairs_refresh_distance:
+            self._find_pairs(root_position)
+        if not self._constraints:
+            return None
+
+        baseline = self.levels.default_dt_vector(self.dt_base, self.dt_grandchildren_factor) \
+            if shown_dt_vector is None or len(shown_dt_vector) != self.levels.dt_size \
+            else np.abs(np.asarray(shown_dt_vector, dtype=np.float64))
+        if self.x is None:
+            self.x = baseline.copy()
+
+        # Решатель стоит в callback (или не запущен) — корень можно двигать
+        self.levels.positions[0] = root_position
+        self._budget = self.iterations_per_frame
+        if self._thread is None:
+            self._start_solver()
+        else:
+            self._resume.release()
+        self._paused.acquire()
+        if self._solver_done:
+            self._thread.join()
+            self._thread = None
+
+        merit = self.merit(self.x)
+        self.last_area = -merit[1]
+        if merit < self.merit(baseline):
+            self.improvements += 1
+            return self.x * self.levels.dt_signs[1:]
+        return None
+
+    def merit(self, dt_vector: np.ndarray) -> Tuple[float, float]:
+        """(нарушение сверх допуска, -площадь) на текущем корне; меньше — лучше."""
+        dt_vector = np.abs(np.asarray(dt_vector, dtype=np.float64))
+        violation = max(0.0, -min(fn(dt_vector) for fn in self._constraints))
+        return max(0.0, violation - self.feasibility_tol), -self._area_evaluator.area(dt_vector)
+
+    # ------------------------------------------------------------------
+    # Внутреннее
+    # ------------------------------------------------------------------
+    def _bounds(self) -> Tuple[float, float]:
+        return self.dt_bounds[0], max(self.dt_bounds[0], min(self.dt_bounds[1], self.dt_base))
+
+    def _objective(self, dt_vector: np.ndarray) -> float:
+        return -self._area_evaluator.area(np.abs(dt_vector))
+
+    def _start_solver(self) -> None:
+        """Новый запуск minimize с текущего self.x в фоновом потоке."""
+        self.solver_runs += 1
+        self._resume = threading.Semaphore(0)
+        self._paused = threading.Semaphore(0)
+        self._solver_done = False
+        self._stop_requested = False
+        x0 = np.clip(self.x, *self._bounds())
+        bounds = [self._bounds()] * self.levels.dt_size
+        self._thread = threading.Thread(target=self._solve, args=(x0, bounds), daemon=True)
+        self._thread.start()
+
+    def _solve(self, x0: np.ndarray, bounds) -> None:
+        try:
+            minimize(
+                fun=self._objective,
+                x0=x0,
+                method=self.optimization_method,
+                bounds=bounds,
+                constraints=self._scipy_constraints,
+                callback=self._on_iteration,
+                options={'maxiter': self.max_iterations, 'ftol': 1e-9, 'disp': False},
+            )
+        except Exception as e:
+            print(f"[AnytimeAreaOpt] ⚠️ Ошибка решателя: {e}")
+        finally:
+            self._solver_done = True
+            self._paused.release()
+
+    def _on_iteration(self, intermediate_result) -> None:
+        """Callback решателя: публикует итерацию и засыпает, когда бюджет кадра исчерпан."""
+        # SciPy < 1.11 передаёт в callback только вектор x, новые — OptimizeResult
+        x = np.asarray(getattr(intermediate_result, 'x', intermediate_result), dtype=np.float64)
+        if np.all(np.isfinite(x)):
+            self.x = np.clip(x, *self._bounds())
+        self._budget -= 1
+        if self._budget > 0:
+            return
+        self._paused.release()
+        self._resume.acquire()
+        if self._stop_requested:
+            raise StopIteration
+
+    def _stop_solver(self) -> None:
+        if self._thread is None:
+            return
+        self._stop_requested = True
+        self._resume.release()
+        self._thread.join()
+        self._thread = None
+
+    def _sync_dt_base(self, dt_base: float) -> None:
+        """Смена dt масштабирует тёплый старт так же, как InputManager масштабирует превью."""
+        if self.dt_base is not None and self.x is not None and self.dt_base > 0 and dt_base != self.dt_base:
+            self._stop_solver()
+            self.x = self.x * (dt_base / self.dt_base)
+            self.pairs = None  # дерево по умолчанию другое — пары ищем заново
+        self.dt_base = dt_base
+
+    def _find_pairs(self, root_position: np.ndarray) -> None:
+        """Пары внуков на дереве по умолчанию в root_position; структура и констрейнты — общие на все кадры."""
+        self._stop_solver()
+        self.pair_searches += 1
+        tree = SporeTree(
+            pendulum=self.pendulum,
+            config=SporeTreeConfig(initial_position=root_position.copy(), dt_base=self.dt_base,
+                                   dt_grandchildren_factor=self.dt_grandchildren_factor, show_debug=False),
+            auto_create=True,
+        )
+        self.pairs = find_optimal_pairs(tree, show=False) or []
+        self.pairs_root = root_position.copy()
+
+        self.levels = LevelTree.from_spore_tree(tree)
+        self._area_evaluator = TreeAreaEvaluator(self.levels)
+        self._constraints, _ = create_distance_constraints(self.pairs, self.levels, self.pendulum,
+                                                           self.constraint_distance)
+        self._scipy_constraints = [{'type': 'ineq', 'fun': fn} for fn in self._constraints]
@@ -1,21 +1,24 @@
 import numpy as np
+from ..level_tree import LevelTree
 
 
 def create_distance_constraints(pairs, tree, pendulum, constraint_distance=1e-5, show=False):
     """
     Создает список функций-констрейнтов для оптимизации площади.
     
-    Для каждой пары внуков создает лямбда-функцию, которая:
-    1. Принимает dt_vector [4 dt детей + 8 dt внуков]
-    2. Вычисляет позиции обоих внуков в паре при этих временах
-    3. Возвращает расстояние между ними
+    Для каждой пары листьев (внуков) создает функцию, которая:
+    1. Принимает dt_vector (|dt| всех узлов по уровням, для глубины 2 — [4 dt детей + 8 dt внуков])
+    2. Вычисляет позиции обоих листьев в паре, проходя только по их предкам
+       (один пакетный шаг на уровень для обоих листьев сразу)
+    3. Возвращает constraint_distance - расстояние между ними
     
     Констрейнт считается выполненным когда расстояние <= constraint_distance.
     
     Args:
-        pairs: список пар [(gc_i, gc_j, meeting_info), ...] от find_optimal_pairs()
-        tree: исходное дерево SporeTree для получения структуры
-        pendulum: объект маятника для вычисления step
+        pairs: список пар [(gc_i, gc_j, meeting_info), ...] от find_optimal_pairs();
+               индексы — global_idx внуков SporeTree или индексы узлов последнего уровня LevelTree
+        tree: исходное дерево SporeTree или LevelTree любой глубины
+        pendulum: объект маятника для вычисления step (для SporeTree берется tree.pendulum)
         constraint_distance: float - максимально допустимое расстояние в парах
         show: bool - вывод отладочной информации
         
@@ -36,31 +39,16 @@ def create_distance_constraints(pairs, tree, pendulum, constraint_distance=1e-5,
             print(f"Создаем констрейнты для {len(pairs)} пар")
             print(f"Максимальное допустимое расстояние: {constraint_distance}")
         
-        # Собираем информацию о структуре дерева
-        root_position = tree.root['position']
-        
-        # Информация о детях: индекс -> (control, sign_dt)
-        children_info = {}
-        for i, child in enumerate(tree.children):
-            children_info[i] = {
-                'control': child['control'],
-                'sign_dt': np.sign(child['dt'])  # +1 для forward, -1 для backward
-            }
-        
-        # Информация о внуках: global_idx -> (parent_idx, control, sign_dt)
-        grandchildren_info = {}
-        for gc in tree.grandchildren:
-            grandchildren_info[gc['global_idx']] = {
-                'parent_idx': gc['parent_idx'],
-                'control': gc['control'],
-                'sign_dt': np.sign(gc['dt'])  # +1 для forward, -1 для backward
-            }
+        # Структура дерева по уровням (родители, управления, знаки dt)
+        levels = tree if isinstance(tree, LevelTree) else LevelTree.from_spore_tree(tree)
+        leaf_offset = int(levels.offsets[levels.depth])
+        leaf_parents = levels.level_parents(levels.depth)
+        leaf_signs = levels.dt_signs[levels.level_slice(levels.depth)]
         
         if show:
             print(f"\nИнформация о структуре:")
-            print(f"  Корень: {root_position}")
-            print(f"  Детей: {len(children_info)}")
-            print(f"  Внуков: {len(grandchildren_info)}")
+            print(f"  Корень: {levels.positions[0]}")
+            print(f"  Узлов по уровням: {levels.level_sizes()}")
         
         # Создаем функции-констрейнты
         constraints = []
@@ -68,12 +56,11 @@ def create_distance_constraints(pairs, tree, pendulum, constraint_distance=1e-5,
         
         for pair_idx, (gc_i, gc_j, meeting_info) in enumerate(pairs):
             
-            # Получаем информацию о внуках в паре
-            gc_i_info = grandchildren_info[gc_i]
-            gc_j_info = grandchildren_info[gc_j]
+            # Глобальные индексы листьев пары в LevelTree
+            pair_nodes = np.array([leaf_offset + gc_i, leaf_offset + gc_j], dtype=np.int64)
             
             # Создаем замыкание для текущей пары
-            def create_constraint_for_pair(gc_i_idx, gc_j_idx, gc_i_data, gc_j_data):
+            def create_constraint_for_pair(nodes):
                 """
                 Создает функцию-констрейнт для конкретной пары.
                 Использует замыкание для захвата параметров пары.
@@ -84,7 +71,7 @@ def create_distance_constraints(pairs, tree, pendulum, constraint_distance=1e-5,
                     Функция-констрейнт для scipy.optimize.minimize.
                     
                     Args:
-                        dt_vector: np.array из 12 элементов [4 dt детей + 8 dt внуков]
+                        dt_vector: np.array |dt| всех узлов по уровням
                         
                     Returns:
                         float: constraint_distance - расстояние_между_парой
@@ -92,36 +79,10 @@ def create_distance_constraints(pairs, tree, pendulum, constraint_distance=1e-5,
                         Отрицательное значение = констрейнт нарушен
                     """
                     try:
-                        # Извлекаем времена из вектора
-                        dt_children = dt_vector[0:4]
-                        dt_grandchildren = dt_vector[4:12]
-                        
-                        # Вычисляем позицию первого внука
-                        parent_i_idx = gc_i_data['parent_idx']
-                        parent_i_control = children_info[parent_i_idx]['control']
-                        parent_i_dt_signed = dt_children[parent_i_idx] * children_info[parent_i_idx]['sign_dt']
-                        
-                        # Позиция родителя gc_i
-                        parent_i_pos = pendulum.step(root_position, parent_i_control, parent_i_dt_signed)
-                        
-                        # Позиция внука gc_i
-                        gc_i_dt_signed = dt_grandchildren[gc_i_idx] * gc_i_data['sign_dt']
-                        gc_i_pos = pendulum.step(parent_i_pos, gc_i_data['control'], gc_i_dt_signed)
-                        
-                        # Вычисляем позицию второго внука
-                        parent_j_idx = gc_j_data['parent_idx']
-                        parent_j_control = children_info[parent_j_idx]['control']
-                        parent_j_dt_signed = dt_children[parent_j_idx] * children_info[parent_j_idx]['sign_dt']
-                        
-                        # Позиция родителя gc_j
-                        parent_j_pos = pendulum.step(root_position, parent_j_control, parent_j_dt_signed)
-                        
-                        # Позиция внука gc_j
-                        gc_j_dt_signed = dt_grandchildren[gc_j_idx] * gc_j_data['sign_dt']
-                        gc_j_pos = pendulum.step(parent_j_pos, gc_j_data['control'], gc_j_dt_signed)
+                        pos_i, pos_j = levels.node_positions(dt_vector, nodes)
                         
-                        # Расстояние между внуками
-                        distance = np.linalg.norm(gc_i_pos - gc_j_pos)
+                        # Расстояние между листьями
+                        distance = np.linalg.norm(pos_i - pos_j)
                         
                         # Возвращаем constraint_distance - distance
                         # Положительное = констрейнт выполнен (расстояние меньше порога)
@@ -135,31 +96,31 @@ def create_distance_constraints(pairs, tree, pendulum, constraint_distance=1e-5,
                 return constraint_function
             
             # Создаем функцию для текущей пары
-            constraint_func = create_constraint_for_pair(gc_i, gc_j, gc_i_info, gc_j_info)
+            constraint_func = create_constraint_for_pair(pair_nodes)
             constraints.append(constraint_func)
             
             # Сохраняем информацию о констрейнте
             constraint_info[pair_idx] = {
                 'gc_i': gc_i,
                 'gc_j': gc_j,
-                'gc_i_parent': gc_i_info['parent_idx'],
-                'gc_j_parent': gc_j_info['parent_idx'],
+                'gc_i_parent': int(leaf_parents[gc_i]),
+                'gc_j_parent': int(leaf_parents[gc_j]),
                 'target_distance': constraint_distance,
                 'original_distance': meeting_info['distance'],
                 'meeting_time': meeting_info['meeting_time']
             }
             
             if show:
-                gc_i_dir = "F" if gc_i_info['sign_dt'] > 0 else "B"
-                gc_j_dir = "F" if gc_j_info['sign_dt'] > 0 else "B"
+                gc_i_dir = "F" if leaf_signs[gc_i] > 0 else "B"
+                gc_j_dir = "F" if leaf_signs[gc_j] > 0 else "B"
                 print(f"  Констрейнт {pair_idx+1}: gc_{gc_i}({gc_i_dir}) ↔ gc_{gc_j}({gc_j_dir})")
-                print(f"    Родители: {gc_i_info['parent_idx']} ↔ {gc_j_info['parent_idx']}")
+                print(f"    Родители: {leaf_parents[gc_i]} ↔ {leaf_parents[gc_j]}")
                 print(f"    Целевое расстояние: <= {constraint_distance}")
                 print(f"    Исходное расстояние: {meeting_info['distance']:.6f}")
         
         if show:
             print(f"\nСоздано {len(constraints)} функций-констрейнтов")
-            print(f"Формат dt_vector: [4 dt детей] + [8 dt внуков] = 12 элементов")
+            print(f"Формат dt_vector: {' + '.join(str(n) for n in levels.level_sizes()[1:])} = {levels.dt_size} элементов")
             print(f"Констрейнт выполнен когда функция возвращает >= 0")
             
             print(f"\nПример использования в scipy.optimize.minimize:")
@@ -1,28 +1,6 @@
 import numpy as np
-from numba import jit
+from ...kernels import tree_area as _calculate_total_area_numba
 
-# Мы будем использовать ту же JIT-компилированную функцию, что и раньше.
-# Ее определение должно быть выполнено один раз в вашем коде.
-# Если вы используете Jupyter Notebook или аналогичную среду,
-# достаточно выполнить эту ячейку один раз.
-@jit(nopython=True)
-def _calculate_total_area_numba(root_pos, children_pos, grandchildren_pos, parent_indices):
-    """
-    JIT-компилированная функция для быстрого расчета общей площади.
-    Предполагается, что на вход подаются NumPy-массивы.
-    """
-    total_area = 0.0
-    num_grandchildren = grandchildren_pos.shape[0]
-
-    for i in range(num_grandchildren):
-        p1 = root_pos
-        p2 = children_pos[parent_indices[i]]
-        p3 = grandchildren_pos[i]
-
-        area = 0.5 * np.abs(p1[0] * (p2[1] - p3[1]) + p2[0] * (p3[1] - p1[1]) + p3[0] * (p1[1] - p2[1]))
-        total_area += area
-        
-    return total_area
 
 # --- ГЛАВНАЯ ФУНКЦИЯ ---
 def get_tree_area(tree):
@@ -35,11 +13,11 @@ def get_tree_area(tree):
         return 0.0
 
     # 1. Извлечение данных из дерева и преобразование в NumPy-массивы
-    root_pos = np.array(tree.root['position'])
+    root_pos = np.array(tree.root['position'], dtype=np.float64)
     
-    children_positions = np.array([child['position'] for child in tree.children])
+    children_positions = np.array([child['position'] for child in tree.children], dtype=np.float64)
     
-    grandchildren_positions = np.array([gc['position'] for gc in tree.grandchildren])
+    grandchildren_positions = np.array([gc['position'] for gc in tree.grandchildren], dtype=np.float64)
 
     # 2. Создание индекса для связи внуков с их родителями
     # Это работает, если внуки упорядочены по родителям:
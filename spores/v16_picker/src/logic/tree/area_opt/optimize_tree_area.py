@@ -2,8 +2,10 @@ import numpy as np
 from scipy.optimize import minimize
 from .create_distance_constraints import create_distance_constraints, test_constraints
 from .tree_area_evaluator import TreeAreaEvaluator
+from ....utils.tracer import traced
 
 
+@traced('optimize_tree_area')
 def optimize_tree_area(tree, pairs, pendulum, constraint_distance=1e-5, 
                       dt_bounds=(0.001, 0.1), max_iterations=1000, 
                       optimization_method='SLSQP', show=False):
@@ -150,7 +152,7 @@ def optimize_tree_area(tree, pairs, pendulum, constraint_distance=1e-5,
         x0 = original_dt_vector.copy()
         
         # Границы: все времена положительные
-        bounds = [(dt_bounds[0], dt_bounds[1]) for _ in range(12)]
+        bounds = [(dt_bounds[0], dt_bounds[1]) for _ in range(len(x0))]
         
         if show:
             print(f"Начальное приближение: {x0}")
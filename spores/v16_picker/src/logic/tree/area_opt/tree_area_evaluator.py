@@ -1,48 +1,14 @@
 import numpy as np
-from numba import jit
-
-@jit(nopython=True, cache=True, fastmath=True)
-def _calculate_total_area_numba(root_pos, children_pos, grandchildren_pos, parent_indices):
-    """
-    JIT-компилированная функция для быстрого расчета общей площади дерева.
-    
-    Вычисляет сумму площадей треугольников root-child-grandchild для всех внуков.
-    
-    Args:
-        root_pos: np.array([theta, theta_dot]) - позиция корня
-        children_pos: np.array((4, 2)) - позиции детей  
-        grandchildren_pos: np.array((8, 2)) - позиции внуков
-        parent_indices: np.array([0,0,1,1,2,2,3,3]) - индексы родителей для каждого внука
-        
-    Returns:
-        float: общая площадь дерева
-    """
-    total_area = 0.0
-    num_grandchildren = grandchildren_pos.shape[0]
-
-    for i in range(num_grandchildren):
-        # Треугольник: корень -> родитель -> внук
-        p1 = root_pos
-        p2 = children_pos[parent_indices[i]]
-        p3 = grandchildren_pos[i]
-
-        # Площадь треугольника через векторное произведение
-        area = 0.5 * abs(p1[0] * (p2[1] - p3[1]) + 
-                        p2[0] * (p3[1] - p1[1]) + 
-                        p3[0] * (p1[1] - p2[1]))
-        total_area += area
-        
-    return total_area
-
+from ..level_tree import LevelTree
 
 class TreeAreaEvaluator:
     """
     Быстрый оценщик площади дерева для оптимизации.
     
     Минимальная реализация без легаси - только то что нужно для площади:
-    - JIT-оптимизированные вычисления
-    - Быстрое обновление позиций
-    - Вычисление общей площади дерева
+    - позиции считаются одним пакетным шагом на уровень (LevelTree)
+    - JIT-вычисление общей площади дерева
+    - работает с деревьями любой глубины (SporeTree или LevelTree)
     """
     
     def __init__(self, tree, show=False):
@@ -50,101 +16,55 @@ class TreeAreaEvaluator:
         Инициализирует оценщик с базовой структурой дерева.
         
         Args:
-            tree: SporeTree объект с созданными детьми и внуками
+            tree: SporeTree с созданными детьми и внуками или LevelTree любой глубины
             show: вывод отладочной информации
         """
         
         if show:
             print("Создание TreeAreaEvaluator...")
         
-        # Проверки
-        if not hasattr(tree, '_children_created') or not tree._children_created:
-            raise ValueError("Дерево должно иметь созданных детей")
-        if not hasattr(tree, '_grandchildren_created') or not tree._grandchildren_created:
-            raise ValueError("Дерево должно иметь созданных внуков")
-        
-        # Сохраняем ссылки на основные объекты
-        self.pendulum = tree.pendulum
-        self.root_position = tree.root['position'].copy()
-        
-        # Извлекаем структурную информацию (не меняется при оптимизации)
-        self.children_info = []
-        for child in tree.children:
-            self.children_info.append({
-                'control': child['control'],
-                'dt_sign': np.sign(child['dt'])  # +1 для forward, -1 для backward
-            })
-        
-        self.grandchildren_info = []
-        for gc in tree.grandchildren:
-            self.grandchildren_info.append({
-                'parent_idx': gc['parent_idx'],
-                'control': gc['control'], 
-                'dt_sign': np.sign(gc['dt'])  # +1 для forward, -1 для backward
-            })
+        if isinstance(tree, LevelTree):
+            self.levels = tree
+        else:
+            # Проверки
+            if not hasattr(tree, '_children_created') or not tree._children_created:
+                raise ValueError("Дерево должно иметь созданных детей")
+            if not hasattr(tree, '_grandchildren_created') or not tree._grandchildren_created:
+                raise ValueError("Дерево должно иметь созданных внуков")
+            # Структура (родители, управления, знаки dt) не меняется при оптимизации
+            self.levels = LevelTree.from_spore_tree(tree)
         
-        # Маппинг внук -> родитель для numba (константный массив)
-        self.parent_indices = np.array([gc['parent_idx'] for gc in tree.grandchildren], dtype=np.int32)
+        self.pendulum = self.levels.pendulum
+        self.root_position = self.levels.positions[0].copy()
         
-        # Кэш для позиций (переиспользуем массивы)
-        self.children_positions = np.zeros((len(self.children_info), 2))
-        self.grandchildren_positions = np.zeros((len(self.grandchildren_info), 2))
+        # Кэш для позиций (переиспользуем массив)
+        self.positions = np.zeros((self.levels.n_nodes, 2))
         
         if show:
             print(f"TreeAreaEvaluator создан:")
-            print(f"  Детей: {len(self.children_info)}")
-            print(f"  Внуков: {len(self.grandchildren_info)}")
+            print(f"  Узлов по уровням: {self.levels.level_sizes()}")
+            print(f"  Длина dt_vector: {self.levels.dt_size}")
     
     def area(self, dt_vector, show=False):
         """
         Вычисляет общую площадь дерева при заданных временах.
         
         Args:
-            dt_vector: np.array из 12 элементов [4 dt детей + 8 dt внуков]
+            dt_vector: |dt| всех узлов по уровням (для глубины 2 — [4 dt детей + 8 dt внуков])
             show: вывод отладочной информации
             
         Returns:
             float: общая площадь дерева
         """
         try:
-            dt_vector = np.asarray(dt_vector).ravel()
-            
-            if len(dt_vector) != 12:
-                raise ValueError(f"dt_vector должен содержать 12 элементов, получено {len(dt_vector)}")
-            
-            # Извлекаем времена (всегда положительные)
-            dt_children = np.abs(dt_vector[0:4])
-            dt_grandchildren = np.abs(dt_vector[4:12])
-            
             if show:
                 print(f"Вычисление площади для dt_vector: {dt_vector}")
             
-            # Обновляем позиции детей
-            for i, child_info in enumerate(self.children_info):
-                dt_signed = dt_children[i] * child_info['dt_sign']
-                self.children_positions[i] = self.pendulum.step(
-                    self.root_position, 
-                    child_info['control'], 
-                    dt_signed
-                )
-            
-            # Обновляем позиции внуков
-            for i, gc_info in enumerate(self.grandchildren_info):
-                parent_pos = self.children_positions[gc_info['parent_idx']]
-                dt_signed = dt_grandchildren[i] * gc_info['dt_sign']
-                self.grandchildren_positions[i] = self.pendulum.step(
-                    parent_pos,
-                    gc_info['control'],
-                    dt_signed
-                )
+            # Позиции всех уровней (знаки dt применяются внутри)
+            self.levels.compute_positions(dt_vector, out=self.positions)
             
             # Вычисляем общую площадь через JIT
-            total_area = _calculate_total_area_numba(
-                self.root_position,
-                self.children_positions,
-                self.grandchildren_positions,
-                self.parent_indices
-            )
+            total_area = self.levels.area(self.positions)
             
             if show:
                 print(f"Вычисленная площадь: {total_area:.6f}")
@@ -0,0 +1,90 @@
+"""
+Кластеризация близких точек: матрица расстояний + union-find.
+
+Используется для объединения внуков (SporeTree.merge_close_grandchildren):
+все пары ближе порога находятся одним векторным расчётом, а компоненты
+связности собираются через union-find, поэтому цепочки и тройки близких
+точек попадают в один кластер.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+# До этого числа точек полная матрица расстояний не медленнее KD-дерева
+_DENSE_LIMIT = 32
+
+
+def close_pairs(positions: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Все пары точек ближе threshold.
+
+    Args:
+        positions: (N, 2) координаты
+        threshold: порог расстояния (строго меньше)
+
+    Returns:
+        (pairs (P, 2) с i < j, distances (P,))
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    n = len(positions)
+    if n < 2:
+        return np.empty((0, 2), dtype=np.int64), np.empty(0)
+
+    if n <= _DENSE_LIMIT:
+        x, y = positions[:, 0], positions[:, 1]
+        squared = (x[:, None] - x[None, :]) ** 2 + (y[:, None] - y[None, :]) ** 2
+        i, j = np.nonzero(np.triu(squared < threshold * threshold, k=1))
+        return np.column_stack((i, j)).astype(np.int64), np.sqrt(squared[i, j])
+
+    # Большие структуры: соседи через KD-дерево, без O(N²) памяти
+    from scipy.spatial import cKDTree
+    pairs = cKDTree(positions).query_pairs(threshold, output_type='ndarray').astype(np.int64)
+    if len(pairs) == 0:
+        return pairs.reshape(0, 2), np.empty(0)
+    distances = np.linalg.norm(positions[pairs[:, 0]] - positions[pairs[:, 1]], axis=1)
+    keep = distances < threshold
+    return pairs[keep], distances[keep]
+
+
+def union_find_labels(n: int, pairs: np.ndarray) -> np.ndarray:
+    """
+    Компоненты связности графа из n вершин и рёбер pairs.
+
+    Векторный union-find: каждая вершина указывает на минимальный индекс
+    своей компоненты (распространение минимума + сжатие путей).
+
+    Returns:
+        labels (n,): индекс представителя (наименьший индекс в кластере)
+    """
+    labels = np.arange(n)
+    if len(pairs) == 0:
+        return labels
+    a, b = pairs[:, 0], pairs[:, 1]
+    while True:
+        low = np.minimum(labels[a], labels[b])
+        updated = labels.copy()
+        np.minimum.at(updated, labels[a], low)
+        np.minimum.at(updated, labels[b], low)
+        # Сжатие путей
+        updated = updated[updated]
+        while True:
+            compressed = updated[updated]
+            if np.array_equal(compressed, updated):
+                break
+            updated = compressed
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def cluster_close_points(positions: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Кластеры точек, связанных цепочками расстояний < threshold.
+
+    Returns:
+        (labels (N,), pairs (P, 2), distances (P,)) — labels как в union_find_labels
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    pairs, distances = close_pairs(positions, threshold)
+    return union_find_labels(len(positions), pairs), pairs, distances
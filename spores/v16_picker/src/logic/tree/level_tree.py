@@ -0,0 +1,205 @@
+"""
+Дерево спор произвольной глубины на массивах.
+
+Узлы хранятся по уровням в одном непрерывном массиве позиций (N, 2):
+корень — узел 0, затем 4 ребёнка, 8 внуков, 16 правнуков ...
+(уровень l содержит 4·2^(l-1) узлов). Структура задаётся массивами
+parents / controls / dt_signs той же длины, поэтому каждый уровень
+считается одним пакетным вызовом ядра, без словарей на узел.
+
+Правила построения совпадают с SporeTree:
+- дети: управления [u_max, u_max, u_min, u_min], знаки dt [+, -, +, -];
+- каждый следующий уровень: по 2 потомка с ОБРАТНЫМ управлением
+  родителя, один вперёд (+dt), другой назад (-dt).
+
+Вектор времён dt_vector содержит |dt| всех узлов кроме корня в порядке
+уровней: для глубины 2 это привычные [4 dt детей + 8 dt внуков].
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ..kernels import level_tree_area
+
+
+def level_size(level: int) -> int:
+    """Число узлов на уровне (корень — уровень 0)."""
+    return 1 if level == 0 else 4 * 2 ** (level - 1)
+
+
+class LevelTree:
+    """Дерево спор глубины depth с уровнями в непрерывных массивах."""
+
+    def __init__(self, pendulum, root_position: np.ndarray, depth: int = 2,
+                 dt_vector: Optional[np.ndarray] = None):
+        """
+        Args:
+            pendulum: PendulumSystem
+            root_position: (2,) позиция корня
+            depth: число уровней под корнем (2 — дети и внуки)
+            dt_vector: |dt| всех узлов кроме корня; если None, позиции не считаются
+        """
+        if depth < 1:
+            raise ValueError(f"depth должен быть >= 1, получен: {depth}")
+        self.pendulum = pendulum
+        self.depth = depth
+        self.offsets = np.cumsum([0] + [level_size(l) for l in range(depth + 1)])
+        self.n_nodes = int(self.offsets[-1])
+
+        u_min, u_max = pendulum.get_control_bounds()
+        parents = [np.array([-1])]
+        controls = [np.zeros(1)]
+        dt_signs = [np.zeros(1)]
+        parents.append(np.zeros(4, dtype=np.int64))
+        controls.append(np.array([u_max, u_max, u_min, u_min], dtype=np.float64))
+        dt_signs.append(np.array([1.0, -1.0, 1.0, -1.0]))
+        for level in range(2, depth + 1):
+            local_parents = np.repeat(np.arange(level_size(level - 1)), 2)
+            parents.append(local_parents + self.offsets[level - 1])
+            controls.append(-controls[-1][local_parents])
+            dt_signs.append(np.tile([1.0, -1.0], level_size(level - 1)))
+
+        self._set_structure(np.concatenate(parents), np.concatenate(controls), np.concatenate(dt_signs))
+        self.positions = np.zeros((self.n_nodes, 2))
+        self.positions[0] = root_position
+        self.dt_vector: Optional[np.ndarray] = None
+        if dt_vector is not None:
+            self.update(dt_vector)
+
+    @classmethod
+    def from_spore_tree(cls, tree) -> 'LevelTree':
+        """
+        Структура глубины 2 из SporeTree с созданными детьми и внуками.
+
+        Управления, знаки dt и родители берутся из словарей дерева, порядок
+        узлов — порядок списков tree.children / tree.grandchildren.
+        """
+        levels = cls(tree.pendulum, np.asarray(tree.root['position'], dtype=np.float64), depth=2)
+        n_children, n_grandchildren = len(tree.children), len(tree.grandchildren)
+        levels.offsets = np.array([0, 1, 1 + n_children, 1 + n_children + n_grandchildren])
+        levels.n_nodes = int(levels.offsets[-1])
+
+        nodes = tree.children + tree.grandchildren
+        parents = np.array([-1, *[0] * n_children, *[1 + gc['parent_idx'] for gc in tree.grandchildren]])
+        controls = np.array([0.0, *[node['control'] for node in nodes]])
+        dt_signs = np.array([0.0, *[1.0 if node['dt'] > 0 else -1.0 for node in nodes]])
+        levels._set_structure(parents, controls, dt_signs)
+
+        levels.positions = np.zeros((levels.n_nodes, 2))
+        levels.positions[0] = tree.root['position']
+        for i, node in enumerate(nodes):
+            levels.positions[1 + i] = node['position']
+        levels.dt_vector = np.abs([node['dt'] for node in nodes]).astype(np.float64)
+        return levels
+
+    def _set_structure(self, parents: np.ndarray, controls: np.ndarray, dt_signs: np.ndarray):
+        self.parents = np.ascontiguousarray(parents, dtype=np.int64)
+        self.controls = np.ascontiguousarray(controls, dtype=np.float64)
+        self.dt_signs = np.ascontiguousarray(dt_signs, dtype=np.float64)
+
+    # ------------------------------------------------------------------
+    # Уровни
+    # ------------------------------------------------------------------
+    @property
+    def dt_size(self) -> int:
+        """Длина dt_vector (все узлы кроме корня)."""
+        return self.n_nodes - 1
+
+    def level_slice(self, level: int) -> slice:
+        return slice(int(self.offsets[level]), int(self.offsets[level + 1]))
+
+    def level(self, level: int, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """(n_level, 2) позиции уровня — view в общий массив."""
+        return (self.positions if positions is None else positions)[self.level_slice(level)]
+
+    def level_parents(self, level: int) -> np.ndarray:
+        """Индексы родителей узлов уровня внутри предыдущего уровня."""
+        return self.parents[self.level_slice(level)] - self.offsets[level - 1]
+
+    def default_dt_vector(self, dt_base: float, factor: float) -> np.ndarray:
+        """dt уровня l = dt_base · factor^(l-1), как в SporeTree._create_tree_auto."""
+        return np.concatenate([np.full(level_size(l), dt_base * factor ** (l - 1))
+                               for l in range(1, self.depth + 1)])
+
+    # ------------------------------------------------------------------
+    # Позиции
+    # ------------------------------------------------------------------
+    def _check_dt_vector(self, dt_vector) -> np.ndarray:
+        dt_vector = np.abs(np.asarray(dt_vector, dtype=np.float64).ravel())
+        if len(dt_vector) != self.dt_size:
+            raise ValueError(f"dt_vector должен содержать {self.dt_size} элементов, получено {len(dt_vector)}")
+        return dt_vector
+
+    def compute_positions(self, dt_vector: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Позиции всех узлов при заданных |dt|: один пакетный шаг на уровень.
+
+        Returns:
+            (N, 2) позиции (out, если передан)
+        """
+        dts = self._check_dt_vector(dt_vector) * self.dt_signs[1:]
+        positions = np.empty((self.n_nodes, 2)) if out is None else out
+        positions[0] = self.positions[0]
+        for level in range(1, len(self.offsets) - 1):
+            nodes = self.level_slice(level)
+            positions[nodes] = self.pendulum.batch_step(
+                positions[self.parents[nodes]], self.controls[nodes], dts[nodes.start - 1:nodes.stop - 1])
+        return positions
+
+    def update(self, dt_vector: np.ndarray) -> np.ndarray:
+        """Пересчитывает self.positions под новый dt_vector."""
+        self.compute_positions(dt_vector, out=self.positions)
+        self.dt_vector = self._check_dt_vector(dt_vector)
+        return self.positions
+
+    def ancestors(self, nodes: np.ndarray) -> np.ndarray:
+        """
+        Пути от уровня 1 до узлов (глобальные индексы одного уровня).
+
+        Returns:
+            (level, len(nodes)): строка k — предок на уровне k+1
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        path = [nodes]
+        while self.parents[path[-1][0]] > 0:
+            path.append(self.parents[path[-1]])
+        return np.array(path[::-1])
+
+    def node_positions(self, dt_vector: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        """
+        Позиции выбранных узлов одного уровня, считая только их предков.
+
+        Returns:
+            (len(nodes), 2)
+        """
+        dts = self._check_dt_vector(dt_vector) * self.dt_signs[1:]
+        path = self.ancestors(nodes)
+        states = np.repeat(self.positions[:1], path.shape[1], axis=0)
+        for step in path:
+            states = self.pendulum.batch_step(states, self.controls[step], dts[step - 1])
+        return states
+
+    # ------------------------------------------------------------------
+    # Площадь и пары
+    # ------------------------------------------------------------------
+    def area(self, positions: Optional[np.ndarray] = None) -> float:
+        """Сумма треугольников дед → родитель → узел по всем уровням."""
+        positions = self.positions if positions is None else positions
+        return level_tree_area(np.ascontiguousarray(positions), self.parents)
+
+    def candidate_pairs(self, level: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Пары узлов уровня от разных родителей (кандидаты на спаривание).
+
+        Returns:
+            (i, j) локальные индексы внутри уровня, i < j
+        """
+        level = self.depth if level is None else level
+        parents = self.level_parents(level)
+        i, j = np.triu_indices(len(parents), k=1)
+        keep = parents[i] != parents[j]
+        return i[keep], j[keep]
+
+    def level_sizes(self) -> List[int]:
+        return [int(n) for n in np.diff(self.offsets)]
@@ -1,109 +1,19 @@
-def complete_meeting_analysis(tree, pendulum, dt_bounds=(0.001, 0.1), 
-                              export_results=False, output_dir="results", show=True):
-    """
-    Полный анализ всех возможных встреч в дереве спор.
-    
-    Создает:
-    1. Таблицу минимальных расстояний внук-внук
-    2. Таблицу оптимальных времен внук-внук  
-    3. Таблицу минимальных расстояний внук-родитель
-    4. Таблицу оптимальных времен внук-родитель
-    5. Хронологию встреч для каждого внука
-    
-    Args:
-        tree: SporeTree - объект дерева с созданными внуками
-        pendulum: PendulumSystem - объект маятника
-        dt_bounds: tuple - границы поиска |dt| (учитывает направления времени)
-        export_results: bool - экспортировать результаты в CSV
-        output_dir: str - директория для экспорта
-        show: bool - показать весь процесс анализа
-        
-    Returns:
-        dict: полные результаты анализа
-    """
+from .stage_graph import pair_stages
+
+
+@pair_stages.stage('meeting_gc_gc_tables', deps=('gc_gc_converging_pairs',), uses_bounds=True)
+def _meeting_gc_gc_stage(tree, pendulum, dt_bounds, converging_pairs):
+    """Этап графа: встречи внук-внук (L-BFGS-B от середины границ), массивы (n_gc, n_gc)."""
     import numpy as np
-    import pandas as pd
-    import os
+    from scipy.optimize import minimize
     
-    if not tree._grandchildren_created:
-        raise RuntimeError("Сначала создайте внуков через tree.create_grandchildren()")
-    
-    if show:
-        print("ПОЛНЫЙ АНАЛИЗ ВСТРЕЧ В ДЕРЕВЕ СПОР")
-        print("=" * 60)
-        print(f"Внуков: {len(tree.grandchildren)}")
-        print(f"Родителей: {len(tree.children)}")
-        print(f"Границы dt: {dt_bounds}")
-        
-        # Показываем направления времени внуков
-        forward_count = sum(1 for gc in tree.grandchildren if gc['dt'] > 0)
-        backward_count = len(tree.grandchildren) - forward_count
-        print(f"Forward внуков: {forward_count}, Backward внуков: {backward_count}")
-    
-    # ========================================================================
-    # ЭТАП 1: АНАЛИЗ ВСТРЕЧ ВНУК-ВНУК
-    # ========================================================================
-    
-    if show:
-        print(f"\nЭТАП 1: АНАЛИЗ ВСТРЕЧ ВНУК-ВНУК")
-        print("-" * 50)
-    
-    # Вычисляем скорости сближения внуков
     n_gc = len(tree.grandchildren)
-    gc_gc_convergence = np.zeros((n_gc, n_gc))
-    
-    # Вычисляем скорости всех внуков
-    velocities = []
-    for gc in tree.grandchildren:
-        time_sign = np.sign(gc['dt'])
-        dynamics = pendulum.pendulum_dynamics(gc['position'], gc['control'])
-        velocity_vector = time_sign * dynamics
-        velocities.append(velocity_vector)
-    
-    # Заполняем таблицу скоростей сближения
-    for i in range(n_gc):
-        for j in range(i+1, n_gc):
-            r_diff = tree.grandchildren[i]['position'] - tree.grandchildren[j]['position']
-            v_diff = velocities[i] - velocities[j]
-            distance = np.linalg.norm(r_diff)
-            
-            if distance < 1e-10:
-                derivative_value = 0.0
-            else:
-                derivative_value = np.dot(r_diff, v_diff) / distance
-            
-            gc_gc_convergence[i, j] = derivative_value
-            gc_gc_convergence[j, i] = derivative_value
-    
-    gc_gc_convergence_df = pd.DataFrame(
-        gc_gc_convergence,
-        index=[f"gc_{i}" for i in range(n_gc)],
-        columns=[f"gc_{i}" for i in range(n_gc)]
-    )
+    distance_table = np.full((n_gc, n_gc), np.nan)
+    time_i_table = np.full((n_gc, n_gc), np.nan)
+    time_j_table = np.full((n_gc, n_gc), np.nan)
+    optimization_results = {}
     
-    # Находим сближающиеся пары внук-внук
-    gc_gc_converging_pairs = []
-    for i in range(n_gc):
-        for j in range(i+1, n_gc):
-            velocity = gc_gc_convergence[i, j]
-            if velocity < -1e-6:
-                gc_gc_converging_pairs.append({
-                    'gc_i': i, 'gc_j': j, 'velocity': velocity,
-                    'pair_name': f"gc_{i}-gc_{j}"
-                })
-    
-    gc_gc_converging_pairs.sort(key=lambda x: x['velocity'])
-    
-    if show:
-        print(f"Найдено {len(gc_gc_converging_pairs)} сближающихся пар внук-внук")
-    
-    # Оптимизируем встречи внук-внук
-    gc_gc_distance_table = np.full((n_gc, n_gc), np.nan)
-    gc_gc_time_i_table = np.full((n_gc, n_gc), np.nan)
-    gc_gc_time_j_table = np.full((n_gc, n_gc), np.nan)
-    gc_gc_optimization_results = {}
-    
-    for pair in gc_gc_converging_pairs:
+    for pair in converging_pairs:
         gc_i_idx, gc_j_idx = pair['gc_i'], pair['gc_j']
         gc_i = tree.grandchildren[gc_i_idx]
         gc_j = tree.grandchildren[gc_j_idx]
@@ -131,8 +41,6 @@ def complete_meeting_analysis(tree, pendulum, dt_bounds=(0.001, 0.1),
             except:
                 return 1e6
         
-        from scipy.optimize import minimize
-        
         x0 = [(dt_i_bounds[0] + dt_i_bounds[1]) / 2, 
               (dt_j_bounds[0] + dt_j_bounds[1]) / 2]
         bounds = [dt_i_bounds, dt_j_bounds]
@@ -140,40 +48,47 @@ def complete_meeting_analysis(tree, pendulum, dt_bounds=(0.001, 0.1),
         try:
             result = minimize(distance_function, x0=x0, bounds=bounds, method='L-BFGS-B')
             if result.success:
-                gc_gc_distance_table[gc_i_idx, gc_j_idx] = result.fun
-                gc_gc_distance_table[gc_j_idx, gc_i_idx] = result.fun
-                gc_gc_time_i_table[gc_i_idx, gc_j_idx] = result.x[0]
-                gc_gc_time_j_table[gc_i_idx, gc_j_idx] = result.x[1]
-                gc_gc_time_i_table[gc_j_idx, gc_i_idx] = result.x[1]
-                gc_gc_time_j_table[gc_j_idx, gc_i_idx] = result.x[0]
+                distance_table[gc_i_idx, gc_j_idx] = result.fun
+                distance_table[gc_j_idx, gc_i_idx] = result.fun
+                time_i_table[gc_i_idx, gc_j_idx] = result.x[0]
+                time_j_table[gc_i_idx, gc_j_idx] = result.x[1]
+                time_i_table[gc_j_idx, gc_i_idx] = result.x[1]
+                time_j_table[gc_j_idx, gc_i_idx] = result.x[0]
                 
-                gc_gc_optimization_results[pair['pair_name']] = {
+                optimization_results[pair['pair_name']] = {
                     'success': True, 'min_distance': result.fun,
                     'optimal_dt_i': result.x[0], 'optimal_dt_j': result.x[1]
                 }
         except:
-            gc_gc_optimization_results[pair['pair_name']] = {'success': False}
-    
-    # ========================================================================
-    # ЭТАП 2: АНАЛИЗ ВСТРЕЧ ВНУК-РОДИТЕЛЬ
-    # ========================================================================
+            optimization_results[pair['pair_name']] = {'success': False}
     
-    if show:
-        print(f"\nЭТАП 2: АНАЛИЗ ВСТРЕЧ ВНУК-РОДИТЕЛЬ")
-        print("-" * 50)
+    return {
+        'distance_table': distance_table,
+        'time_table_i': time_i_table,
+        'time_table_j': time_j_table,
+        'optimization_results': optimization_results
+    }
+
+
+@pair_stages.stage('meeting_gc_parent_convergence')
+def _meeting_gc_parent_convergence(tree, pendulum, bounds):
+    """
+    Этап графа: сближение внуков с чужими родителями с учетом скорости родителей
+    (в отличие от compute_grandchild_parent_convergence_table, где родители статичны).
+    """
+    import numpy as np
+    import pandas as pd
     
-    # Вычисляем скорости сближения внук-родитель
+    n_gc = len(tree.grandchildren)
     n_parents = len(tree.children)
-    gc_parent_convergence = np.full((n_gc, n_parents), np.nan)
+    convergence = np.full((n_gc, n_parents), np.nan)
+    
+    def signed_velocity(node):
+        return np.sign(node['dt']) * pendulum.pendulum_dynamics(node['position'], node['control'])
     
-    # Вычисляем скорости родителей
-    parent_velocities = []
-    for parent in tree.children:
-        time_sign = np.sign(parent['dt'])
-        dynamics = pendulum.pendulum_dynamics(parent['position'], parent['control'])
-        parent_velocities.append(time_sign * dynamics)
+    velocities = [signed_velocity(gc) for gc in tree.grandchildren]
+    parent_velocities = [signed_velocity(parent) for parent in tree.children]
     
-    # Заполняем таблицу сближения внук-родитель
     for gc_idx, gc in enumerate(tree.grandchildren):
         for parent_idx in range(n_parents):
             if parent_idx == gc['parent_idx']:  # Пропускаем своего родителя
@@ -188,36 +103,34 @@ def complete_meeting_analysis(tree, pendulum, dt_bounds=(0.001, 0.1),
             else:
                 derivative_value = np.dot(r_diff, v_diff) / distance
             
-            gc_parent_convergence[gc_idx, parent_idx] = derivative_value
+            convergence[gc_idx, parent_idx] = derivative_value
     
-    gc_parent_convergence_df = pd.DataFrame(
-        gc_parent_convergence,
+    return pd.DataFrame(
+        convergence,
         index=[f"gc_{i}" for i in range(n_gc)],
         columns=[f"parent_{i}" for i in range(n_parents)]
     )
+
+
+@pair_stages.stage('meeting_gc_parent_converging_pairs', deps=('meeting_gc_parent_convergence',))
+def _meeting_gc_parent_converging_pairs(tree, pendulum, bounds, convergence_df):
+    from .find_converging_pairs import find_converging_grandchild_parent_pairs
+    return find_converging_grandchild_parent_pairs(convergence_df)
+
+
+@pair_stages.stage('meeting_gc_parent_tables', deps=('meeting_gc_parent_converging_pairs',), uses_bounds=True)
+def _meeting_gc_parent_stage(tree, pendulum, dt_bounds, converging_pairs):
+    """Этап графа: встречи внук-родитель (minimize_scalar bounded), массивы (n_gc, n_parents)."""
+    import numpy as np
+    from scipy.optimize import minimize_scalar
     
-    # Находим сближающиеся пары внук-родитель
-    gc_parent_converging_pairs = []
-    for gc_idx in range(n_gc):
-        for parent_idx in range(n_parents):
-            velocity = gc_parent_convergence[gc_idx, parent_idx]
-            if not np.isnan(velocity) and velocity < -1e-6:
-                gc_parent_converging_pairs.append({
-                    'gc_idx': gc_idx, 'parent_idx': parent_idx, 'velocity': velocity,
-                    'pair_name': f"gc_{gc_idx}-parent_{parent_idx}"
-                })
-    
-    gc_parent_converging_pairs.sort(key=lambda x: x['velocity'])
-    
-    if show:
-        print(f"Найдено {len(gc_parent_converging_pairs)} сближающихся пар внук-родитель")
-    
-    # Оптимизируем встречи внук-родитель
-    gc_parent_distance_table = np.full((n_gc, n_parents), np.nan)
-    gc_parent_time_table = np.full((n_gc, n_parents), np.nan)
-    gc_parent_optimization_results = {}
+    n_gc = len(tree.grandchildren)
+    n_parents = len(tree.children)
+    distance_table = np.full((n_gc, n_parents), np.nan)
+    time_table = np.full((n_gc, n_parents), np.nan)
+    optimization_results = {}
     
-    for pair in gc_parent_converging_pairs:
+    for pair in converging_pairs:
         gc_idx, parent_idx = pair['gc_idx'], pair['parent_idx']
         gc = tree.grandchildren[gc_idx]
         
@@ -237,19 +150,114 @@ def complete_meeting_analysis(tree, pendulum, dt_bounds=(0.001, 0.1),
             except:
                 return 1e6
         
-        from scipy.optimize import minimize_scalar
-        
         try:
             result = minimize_scalar(distance_function, bounds=dt_bounds_signed, method='bounded')
             if result.success:
-                gc_parent_distance_table[gc_idx, parent_idx] = result.fun
-                gc_parent_time_table[gc_idx, parent_idx] = result.x
+                distance_table[gc_idx, parent_idx] = result.fun
+                time_table[gc_idx, parent_idx] = result.x
                 
-                gc_parent_optimization_results[pair['pair_name']] = {
+                optimization_results[pair['pair_name']] = {
                     'success': True, 'min_distance': result.fun, 'optimal_dt': result.x
                 }
         except:
-            gc_parent_optimization_results[pair['pair_name']] = {'success': False}
+            optimization_results[pair['pair_name']] = {'success': False}
+    
+    return {
+        'distance_table': distance_table,
+        'time_table': time_table,
+        'optimization_results': optimization_results
+    }
+
+
+def complete_meeting_analysis(tree, pendulum, dt_bounds=(0.001, 0.1), 
+                              export_results=False, output_dir="results", show=True):
+    """
+    Полный анализ всех возможных встреч в дереве спор.
+    
+    Создает:
+    1. Таблицу минимальных расстояний внук-внук
+    2. Таблицу оптимальных времен внук-внук  
+    3. Таблицу минимальных расстояний внук-родитель
+    4. Таблицу оптимальных времен внук-родитель
+    5. Хронологию встреч для каждого внука
+    
+    Args:
+        tree: SporeTree - объект дерева с созданными внуками
+        pendulum: PendulumSystem - объект маятника
+        dt_bounds: tuple - границы поиска |dt| (учитывает направления времени)
+        export_results: bool - экспортировать результаты в CSV
+        output_dir: str - директория для экспорта
+        show: bool - показать весь процесс анализа
+        
+    Returns:
+        dict: полные результаты анализа
+    
+    Оптимизации встреч — этапы графа stage_graph: повторный анализ того же
+    дерева с теми же dt_bounds берет таблицы из кэша.
+    """
+    import numpy as np
+    import pandas as pd
+    import os
+    
+    if not tree._grandchildren_created:
+        raise RuntimeError("Сначала создайте внуков через tree.create_grandchildren()")
+    
+    if show:
+        print("ПОЛНЫЙ АНАЛИЗ ВСТРЕЧ В ДЕРЕВЕ СПОР")
+        print("=" * 60)
+        print(f"Внуков: {len(tree.grandchildren)}")
+        print(f"Родителей: {len(tree.children)}")
+        print(f"Границы dt: {dt_bounds}")
+        
+        # Показываем направления времени внуков
+        forward_count = sum(1 for gc in tree.grandchildren if gc['dt'] > 0)
+        backward_count = len(tree.grandchildren) - forward_count
+        print(f"Forward внуков: {forward_count}, Backward внуков: {backward_count}")
+    
+    # ========================================================================
+    # ЭТАП 1: АНАЛИЗ ВСТРЕЧ ВНУК-ВНУК
+    # ========================================================================
+    
+    if show:
+        print(f"\nЭТАП 1: АНАЛИЗ ВСТРЕЧ ВНУК-ВНУК")
+        print("-" * 50)
+    
+    n_gc = len(tree.grandchildren)
+    n_parents = len(tree.children)
+    
+    # Скорости сближения и пары — общие этапы графа (stage_graph)
+    gc_gc_convergence_df = pair_stages.get('gc_gc_convergence', tree, pendulum)
+    gc_gc_convergence = gc_gc_convergence_df.values
+    gc_gc_converging_pairs = pair_stages.get('gc_gc_converging_pairs', tree, pendulum)
+    
+    if show:
+        print(f"Найдено {len(gc_gc_converging_pairs)} сближающихся пар внук-внук")
+    
+    gc_gc = pair_stages.get('meeting_gc_gc_tables', tree, pendulum, dt_bounds)
+    gc_gc_distance_table = gc_gc['distance_table']
+    gc_gc_time_i_table = gc_gc['time_table_i']
+    gc_gc_time_j_table = gc_gc['time_table_j']
+    gc_gc_optimization_results = gc_gc['optimization_results']
+    
+    # ========================================================================
+    # ЭТАП 2: АНАЛИЗ ВСТРЕЧ ВНУК-РОДИТЕЛЬ
+    # ========================================================================
+    
+    if show:
+        print(f"\nЭТАП 2: АНАЛИЗ ВСТРЕЧ ВНУК-РОДИТЕЛЬ")
+        print("-" * 50)
+    
+    gc_parent_convergence_df = pair_stages.get('meeting_gc_parent_convergence', tree, pendulum)
+    gc_parent_convergence = gc_parent_convergence_df.values
+    gc_parent_converging_pairs = pair_stages.get('meeting_gc_parent_converging_pairs', tree, pendulum)
+    
+    if show:
+        print(f"Найдено {len(gc_parent_converging_pairs)} сближающихся пар внук-родитель")
+    
+    gc_parent = pair_stages.get('meeting_gc_parent_tables', tree, pendulum, dt_bounds)
+    gc_parent_distance_table = gc_parent['distance_table']
+    gc_parent_time_table = gc_parent['time_table']
+    gc_parent_optimization_results = gc_parent['optimization_results']
     
     # ========================================================================
     # ЭТАП 3: СОЗДАНИЕ ХРОНОЛОГИИ
@@ -3,9 +3,9 @@ import pandas as pd
 from scipy.optimize import minimize, minimize_scalar
 
 # Импорты всех необходимых функций из пайплайна
-from .compute_convergence_tables import compute_distance_derivative_table, compute_grandchild_parent_convergence_table
-from .find_converging_pairs import find_converging_grandchild_pairs, find_converging_grandchild_parent_pairs
+from .stage_graph import pair_stages
 from .extract_pairs_from_chronology import extract_pairs_from_chronology
+from ....utils.tracer import span, traced
 
 
 def optimize_grandchild_pair_distance(gc_i_idx, gc_j_idx, grandchildren, children, pendulum, 
@@ -168,7 +168,122 @@ def optimize_grandchild_parent_distance(gc_idx, parent_idx, grandchildren, child
     }
 
 
-def find_optimal_pairs(tree, show=False):
+def quadratic_pair_prefilter(tree, pendulum, dt_max, distance_constraint, margin=2.0, grid_size=16):
+    """
+    Квадратичный префильтр пар внук-внук.
+
+    Внук i движется из позиции родителя с управлением control, время того же
+    знака, что его dt, |t| в (0.001, dt_max). Для всех пар сразу считается
+    минимальное расстояние квадратичных траекторий на сетке grid_size x grid_size;
+    пары, у которых оно больше margin * distance_constraint плюс запас на шаг
+    сетки, отбрасываются (точная оптимизация их всё равно не примет). Без
+    запаса грубая сетка теряет пары, которые точно встречаются.
+
+    Returns:
+        set: {(gc_i, gc_j)} пары, прошедшие префильтр
+    """
+    grandchildren = tree.grandchildren
+    starts = np.array([tree.children[gc['parent_idx']]['position'] for gc in grandchildren], dtype=np.float64)
+    controls = np.array([gc['control'] for gc in grandchildren], dtype=np.float64)
+    signs = np.sign([gc['dt'] for gc in grandchildren])
+    acceleration = (-pendulum.g / pendulum.l * np.sin(starts[:, 0]) - pendulum.damping * starts[:, 1]
+                    + controls * pendulum._inv_ml2)
+
+    # Квадратичные траектории на сетке времён: (N, K)
+    times = np.linspace(0.001, dt_max, grid_size)[None, :] * signs[:, None]
+    theta = starts[:, 0, None] + starts[:, 1, None] * times + 0.5 * acceleration[:, None] * times**2
+    omega = starts[:, 1, None] + acceleration[:, None] * times
+    grid_distance = np.hypot(theta[:, None, :, None] - theta[None, :, None, :],
+                             omega[:, None, :, None] - omega[None, :, None, :])    # (N, N, K, K)
+    min_distance = grid_distance.min(axis=(2, 3))
+
+    # Запас на шаг сетки: между узлами расстояние меняется не быстрее суммы скоростей
+    step = (dt_max - 0.001) / max(grid_size - 1, 1)
+    speed = np.hypot(omega, acceleration[:, None]).max(axis=1)
+    slack = 0.5 * step * (speed[:, None] + speed[None, :])
+
+    passed = min_distance <= margin * distance_constraint + slack
+    np.fill_diagonal(passed, False)
+    return {(int(i), int(j)) for i, j in zip(*np.nonzero(passed))}
+
+
+@pair_stages.stage('adaptive_pair_optimization',
+                   deps=('gc_gc_converging_pairs', 'gc_parent_converging_pairs'), uses_bounds=True)
+@traced('adaptive_pair_optimization')
+def adaptive_pair_optimization(tree, pendulum, bounds, converging_gc_pairs, converging_gc_parent_pairs):
+    """
+    Этап 3 find_optimal_pairs как узел графа этапов: оптимизация всех сближающихся пар
+    с адаптивными границами dt и distance constraint.
+    
+    Args:
+        bounds: ('adaptive', prefilter) — ключ кэша; prefilter включает квадратичный префильтр
+        
+    Returns:
+        dict: результаты оптимизации внук-внук и внук-родитель, distance_constraint,
+              adaptive_dt_max, skipped_by_prefilter
+    """
+    prefilter = bounds[1]
+    
+    # Вычисляем distance constraint
+    parent_distances = [np.linalg.norm(parent['position'] - tree.root['position']) for parent in tree.children]
+    min_parent_distance = min(parent_distances)
+    distance_constraint = min_parent_distance / 10.0
+    
+    # Адаптивные границы dt
+    parent_times = [abs(child['dt']) for child in tree.children]
+    max_parent_time = max(parent_times)
+    adaptive_dt_max = 2 * max_parent_time
+    
+    # Квадратичный префильтр: все пары одним векторным расчётом
+    candidates = quadratic_pair_prefilter(tree, pendulum, adaptive_dt_max, distance_constraint) if prefilter else set()
+    skipped_by_prefilter = 0
+    
+    # БЫСТРАЯ оптимизация внук-внук
+    gc_gc_optimization_results = {}
+    for pair in converging_gc_pairs:
+        gc_i_idx = pair['gc_i']
+        gc_j_idx = pair['gc_j']
+        pair_name = pair['pair_name']
+    
+        if prefilter and (gc_i_idx, gc_j_idx) not in candidates:
+            # Квадратичные траектории далеко друг от друга — точную оптимизацию не запускаем
+            skipped_by_prefilter += 1
+            gc_gc_optimization_results[pair_name] = {
+                'success': False,
+                'min_distance': float('inf'),
+                'method_used': 'quadratic_prefilter',
+                'passes_constraint': False,
+                'distance_constraint': distance_constraint
+            }
+            continue
+    
+        gc_gc_optimization_results[pair_name] = optimize_grandchild_pair_distance(
+            gc_i_idx, gc_j_idx, 
+            tree.grandchildren, tree.children, pendulum,
+            dt_bounds=None,  # Адаптивные границы
+            root_position=tree.root['position']
+        )
+    
+    # БЫСТРАЯ оптимизация внук-родитель
+    gc_parent_optimization_results = {}
+    for pair in converging_gc_parent_pairs:
+        gc_parent_optimization_results[pair['pair_name']] = optimize_grandchild_parent_distance(
+            pair['gc_idx'], pair['parent_idx'],
+            tree.grandchildren, tree.children, pendulum,
+            dt_bounds=None  # Адаптивные границы
+        )
+    
+    return {
+        'gc_gc_optimization_results': gc_gc_optimization_results,
+        'gc_parent_optimization_results': gc_parent_optimization_results,
+        'distance_constraint': distance_constraint,
+        'adaptive_dt_max': adaptive_dt_max,
+        'skipped_by_prefilter': skipped_by_prefilter
+    }
+
+
+@traced('find_optimal_pairs')
+def find_optimal_pairs(tree, show=False, prefilter=True):
     """
     Находит оптимальные пары внуков в дереве спор через полный пайплайн оптимизации.
     
@@ -182,9 +297,14 @@ def find_optimal_pairs(tree, show=False):
     5. Создание хронологии встреч по времени
     6. Извлечение финальных пар из хронологии
     
+    Этапы 1-3 — узлы графа stage_graph: на том же дереве таблицы сходимости
+    и оптимизация пар берутся из кэша (статистика: pair_stage_stats()).
+    
     Args:
         tree: SporeTree объект с созданными детьми и внуками
         show: bool - вывод промежуточных результатов (False = тишина + скорость)
+        prefilter: bool - отбрасывать пары внуков, далёкие в квадратичной модели
+                   (остальные оптимизируются так же, как без префильтра)
         
     Returns:
         list: список пар [(gc_i, gc_j, meeting_info), ...] при успехе
@@ -226,330 +346,291 @@ def find_optimal_pairs(tree, show=False):
     # ЭТАП 1: ВЫЧИСЛЕНИЕ СКОРОСТЕЙ СБЛИЖЕНИЯ
     # ============================================================================
     
-    try:
-        if show:
-            print("1️⃣ Вычисление скоростей сближения...", end=" ")
-        
-        # Скорости сближения внук-внук
-        convergence_gc_gc = compute_distance_derivative_table(
-            tree.grandchildren, pendulum, show=show and False  # Детальный дебаг только при необходимости
-        )
+    with span('find_optimal_pairs.1_convergence'):
+        try:
+            if show:
+                print("1️⃣ Вычисление скоростей сближения...", end=" ")
         
-        # Скорости сближения внук-родитель
-        convergence_gc_parent = compute_grandchild_parent_convergence_table(
-            tree.grandchildren, tree.children, pendulum, show=show and False
-        )
+            # Скорости сближения внук-внук и внук-родитель (общие этапы графа, кэш по дереву)
+            convergence_gc_gc = pair_stages.get('gc_gc_convergence', tree, pendulum)
+            convergence_gc_parent = pair_stages.get('gc_parent_convergence', tree, pendulum)
         
-        # Быстрая статистика для проверки
-        gc_gc_values = convergence_gc_gc.values
-        upper_triangle = np.triu(gc_gc_values, k=1)
-        valid_values = upper_triangle[upper_triangle != 0]
-        gc_gc_converging_count = (valid_values < -1e-6).sum()
+            # Быстрая статистика для проверки
+            gc_gc_values = convergence_gc_gc.values
+            upper_triangle = np.triu(gc_gc_values, k=1)
+            valid_values = upper_triangle[upper_triangle != 0]
+            gc_gc_converging_count = (valid_values < -1e-6).sum()
         
-        gc_parent_values = convergence_gc_parent.values[~np.isnan(convergence_gc_parent.values)]
-        gc_parent_converging_count = (gc_parent_values < -1e-6).sum()
+            gc_parent_values = convergence_gc_parent.values[~np.isnan(convergence_gc_parent.values)]
+            gc_parent_converging_count = (gc_parent_values < -1e-6).sum()
         
-        if show:
-            print(f"✅ ({gc_gc_converging_count} пар внук-внук, {gc_parent_converging_count} пар внук-родитель)")
+            if show:
+                print(f"✅ ({gc_gc_converging_count} пар внук-внук, {gc_parent_converging_count} пар внук-родитель)")
             
-    except Exception as e:
-        if show:
-            print(f"❌ Ошибка на этапе 1: {e}")
-        return None
+        except Exception as e:
+            if show:
+                print(f"❌ Ошибка на этапе 1: {e}")
+            return None
     
     # ============================================================================
     # ЭТАП 2: ПОИСК СБЛИЖАЮЩИХСЯ ПАР
     # ============================================================================
     
-    try:
-        if show:
-            print("2️⃣ Поиск сближающихся пар...", end=" ")
+    with span('find_optimal_pairs.2_converging_pairs'):
+        try:
+            if show:
+                print("2️⃣ Поиск сближающихся пар...", end=" ")
         
-        converging_gc_pairs = find_converging_grandchild_pairs(convergence_gc_gc, show=show and False)
-        converging_gc_parent_pairs = find_converging_grandchild_parent_pairs(convergence_gc_parent, show=show and False)
+            converging_gc_pairs = pair_stages.get('gc_gc_converging_pairs', tree, pendulum)
+            converging_gc_parent_pairs = pair_stages.get('gc_parent_converging_pairs', tree, pendulum)
         
-        if len(converging_gc_pairs) == 0 and len(converging_gc_parent_pairs) == 0:
-            if show:
-                print("❌ Не найдено ни одной сближающейся пары")
-            return None
+            if len(converging_gc_pairs) == 0 and len(converging_gc_parent_pairs) == 0:
+                if show:
+                    print("❌ Не найдено ни одной сближающейся пары")
+                return None
         
-        if show:
-            print(f"✅ ({len(converging_gc_pairs)} внук-внук, {len(converging_gc_parent_pairs)} внук-родитель)")
+            if show:
+                print(f"✅ ({len(converging_gc_pairs)} внук-внук, {len(converging_gc_parent_pairs)} внук-родитель)")
             
-    except Exception as e:
-        if show:
-            print(f"❌ Ошибка на этапе 2: {e}")
-        return None
+        except Exception as e:
+            if show:
+                print(f"❌ Ошибка на этапе 2: {e}")
+            return None
     
     # ============================================================================
     # ЭТАП 3: ОПТИМИЗАЦИЯ ПАР (улучшенные параметры)
     # ============================================================================
     
-    try:
-        if show:
-            print("3️⃣ Оптимизация пар...", end=" ")
-        
-        # Вычисляем distance constraint
-        parent_distances = [np.linalg.norm(parent['position'] - tree.root['position']) for parent in tree.children]
-        min_parent_distance = min(parent_distances)
-        distance_constraint = min_parent_distance / 10.0
+    with span('find_optimal_pairs.3_pair_optimization'):
+        try:
+            if show:
+                print("3️⃣ Оптимизация пар...", end=" ")
         
-        # Адаптивные границы dt
-        parent_times = [abs(child['dt']) for child in tree.children]
-        max_parent_time = max(parent_times)
-        adaptive_dt_max = 2 * max_parent_time
+            # Адаптивные границы и префильтр — этап графа, кэш по (дерево, prefilter)
+            optimization = pair_stages.get('adaptive_pair_optimization', tree, pendulum, ('adaptive', prefilter))
+            distance_constraint = optimization['distance_constraint']
+            adaptive_dt_max = optimization['adaptive_dt_max']
+            skipped_by_prefilter = optimization['skipped_by_prefilter']
+            gc_gc_optimization_results = optimization['gc_gc_optimization_results']
+            gc_parent_optimization_results = optimization['gc_parent_optimization_results']
         
-        if show:
-            print(f"\n    📏 Distance constraint: {distance_constraint:.5f}")
-            print(f"    📊 Адаптивные границы dt: (0.001, {adaptive_dt_max:.5f})")
-        
-        # БЫСТРАЯ оптимизация внук-внук
-        gc_gc_optimization_results = {}
-        for pair in converging_gc_pairs:
-            gc_i_idx = pair['gc_i']
-            gc_j_idx = pair['gc_j']
-            pair_name = pair['pair_name']
-            
-            if show:
-                print(f"    Оптимизация {pair_name}...")
-            
-            result = optimize_grandchild_pair_distance(
-                gc_i_idx, gc_j_idx, 
-                tree.grandchildren, tree.children, pendulum,
-                dt_bounds=None,  # Адаптивные границы
-                root_position=tree.root['position'],
-                show=show and False  # Детальный дебаг только при необходимости
-            )
-            
-            gc_gc_optimization_results[pair_name] = result
-        
-        # БЫСТРАЯ оптимизация внук-родитель
-        gc_parent_optimization_results = {}
-        for pair in converging_gc_parent_pairs:
-            gc_idx = pair['gc_idx']
-            parent_idx = pair['parent_idx']
-            pair_name = pair['pair_name']
-            
             if show:
-                print(f"    Оптимизация {pair_name}...")
-            
-            result = optimize_grandchild_parent_distance(
-                gc_idx, parent_idx,
-                tree.grandchildren, tree.children, pendulum,
-                dt_bounds=None,  # Адаптивные границы
-                show=show and False
-            )
-            
-            gc_parent_optimization_results[pair_name] = result
+                print(f"\n    📏 Distance constraint: {distance_constraint:.5f}")
+                print(f"    📊 Адаптивные границы dt: (0.001, {adaptive_dt_max:.5f})")
         
-        # Статистика оптимизации
-        gc_gc_success = sum(1 for r in gc_gc_optimization_results.values() if r['success'])
-        gc_gc_constraint_pass = sum(1 for r in gc_gc_optimization_results.values() 
-                                   if r['success'] and r.get('passes_constraint', True))
-        gc_parent_success = sum(1 for r in gc_parent_optimization_results.values() if r['success'])
+            # Статистика оптимизации
+            gc_gc_success = sum(1 for r in gc_gc_optimization_results.values() if r['success'])
+            gc_gc_constraint_pass = sum(1 for r in gc_gc_optimization_results.values() 
+                                       if r['success'] and r.get('passes_constraint', True))
+            gc_parent_success = sum(1 for r in gc_parent_optimization_results.values() if r['success'])
         
-        if gc_gc_constraint_pass == 0 and gc_parent_success == 0:
-            if show:
-                print("❌ Ни одна оптимизация не прошла constraint или не удалась")
-            return None
+            if gc_gc_constraint_pass == 0 and gc_parent_success == 0:
+                if show:
+                    print("❌ Ни одна оптимизация не прошла constraint или не удалась")
+                return None
         
-        if show:
-            # Подсчет вызовов функции для статистики
-            total_nfev = sum(r.get('function_evaluations', 0) for r in gc_gc_optimization_results.values())
-            total_nfev += sum(r.get('function_evaluations', 0) for r in gc_parent_optimization_results.values())
-            total_pairs = len(converging_gc_pairs) + len(converging_gc_parent_pairs)
-            avg_nfev = total_nfev / total_pairs if total_pairs > 0 else 0
+            if show:
+                # Подсчет вызовов функции для статистики
+                total_nfev = sum(r.get('function_evaluations', 0) for r in gc_gc_optimization_results.values())
+                total_nfev += sum(r.get('function_evaluations', 0) for r in gc_parent_optimization_results.values())
+                total_pairs = len(converging_gc_pairs) + len(converging_gc_parent_pairs)
+                avg_nfev = total_nfev / total_pairs if total_pairs > 0 else 0
             
-            print(f"    ✅ ({gc_gc_constraint_pass}/{len(converging_gc_pairs)} внук-внук успешно, {gc_parent_success}/{len(converging_gc_parent_pairs)} внук-родитель успешно)")
-            print(f"    📊 ~{avg_nfev:.0f} вызовов функции на пару")
+                print(f"    ✅ ({gc_gc_constraint_pass}/{len(converging_gc_pairs)} внук-внук успешно, {gc_parent_success}/{len(converging_gc_parent_pairs)} внук-родитель успешно)")
+                if prefilter:
+                    print(f"    🧮 Квадратичный префильтр отбросил {skipped_by_prefilter}/{len(converging_gc_pairs)} пар внук-внук")
+                print(f"    📊 ~{avg_nfev:.0f} вызовов функции на пару")
             
-    except Exception as e:
-        if show:
-            print(f"❌ Ошибка на этапе 3: {e}")
-        return None
+        except Exception as e:
+            if show:
+                print(f"❌ Ошибка на этапе 3: {e}")
+            return None
     
     # ============================================================================
     # ЭТАП 4: ПОСТРОЕНИЕ ТАБЛИЦ
     # ============================================================================
     
-    try:
-        if show:
-            print("4️⃣ Построение итоговых таблиц...", end=" ")
-        
-        n_gc = len(tree.grandchildren)
-        n_parents = len(tree.children)
-        
-        # Инициализируем таблицы
-        gc_gc_distance_table = np.full((n_gc, n_gc), np.nan)
-        gc_gc_time_i_table = np.full((n_gc, n_gc), np.nan)
-        gc_gc_time_j_table = np.full((n_gc, n_gc), np.nan)
-        gc_parent_distance_table = np.full((n_gc, n_parents), np.nan)
-        gc_parent_time_table = np.full((n_gc, n_parents), np.nan)
-        
-        # Заполняем таблицы внук-внук
-        filled_gc_gc = 0
-        for pair_name, result in gc_gc_optimization_results.items():
-            if result['success'] and result.get('passes_constraint', True):
-                # Извлекаем индексы из имени пары
-                parts = pair_name.split('-')
-                gc_i_idx = int(parts[0].split('_')[1])
-                gc_j_idx = int(parts[1].split('_')[1])
+    with span('find_optimal_pairs.4_tables'):
+        try:
+            if show:
+                print("4️⃣ Построение итоговых таблиц...", end=" ")
+        
+            n_gc = len(tree.grandchildren)
+            n_parents = len(tree.children)
+        
+            # Инициализируем таблицы
+            gc_gc_distance_table = np.full((n_gc, n_gc), np.nan)
+            gc_gc_time_i_table = np.full((n_gc, n_gc), np.nan)
+            gc_gc_time_j_table = np.full((n_gc, n_gc), np.nan)
+            gc_parent_distance_table = np.full((n_gc, n_parents), np.nan)
+            gc_parent_time_table = np.full((n_gc, n_parents), np.nan)
+        
+            # Заполняем таблицы внук-внук
+            filled_gc_gc = 0
+            for pair_name, result in gc_gc_optimization_results.items():
+                if result['success'] and result.get('passes_constraint', True):
+                    # Извлекаем индексы из имени пары
+                    parts = pair_name.split('-')
+                    gc_i_idx = int(parts[0].split('_')[1])
+                    gc_j_idx = int(parts[1].split('_')[1])
                 
-                # Заполняем таблицы
-                gc_gc_distance_table[gc_i_idx, gc_j_idx] = result['min_distance']
-                gc_gc_distance_table[gc_j_idx, gc_i_idx] = result['min_distance']
+                    # Заполняем таблицы
+                    gc_gc_distance_table[gc_i_idx, gc_j_idx] = result['min_distance']
+                    gc_gc_distance_table[gc_j_idx, gc_i_idx] = result['min_distance']
                 
-                gc_gc_time_i_table[gc_i_idx, gc_j_idx] = result['optimal_dt_i']
-                gc_gc_time_j_table[gc_i_idx, gc_j_idx] = result['optimal_dt_j']
-                gc_gc_time_i_table[gc_j_idx, gc_i_idx] = result['optimal_dt_j']
-                gc_gc_time_j_table[gc_j_idx, gc_i_idx] = result['optimal_dt_i']
+                    gc_gc_time_i_table[gc_i_idx, gc_j_idx] = result['optimal_dt_i']
+                    gc_gc_time_j_table[gc_i_idx, gc_j_idx] = result['optimal_dt_j']
+                    gc_gc_time_i_table[gc_j_idx, gc_i_idx] = result['optimal_dt_j']
+                    gc_gc_time_j_table[gc_j_idx, gc_i_idx] = result['optimal_dt_i']
                 
-                filled_gc_gc += 1
-        
-        # Заполняем таблицы внук-родитель
-        filled_gc_parent = 0
-        for pair_name, result in gc_parent_optimization_results.items():
-            if result['success']:
-                # Извлекаем индексы из имени пары
-                parts = pair_name.split('-')
-                gc_idx = int(parts[0].split('_')[1])
-                parent_idx = int(parts[1].split('_')[1])
+                    filled_gc_gc += 1
+        
+            # Заполняем таблицы внук-родитель
+            filled_gc_parent = 0
+            for pair_name, result in gc_parent_optimization_results.items():
+                if result['success']:
+                    # Извлекаем индексы из имени пары
+                    parts = pair_name.split('-')
+                    gc_idx = int(parts[0].split('_')[1])
+                    parent_idx = int(parts[1].split('_')[1])
                 
-                gc_parent_distance_table[gc_idx, parent_idx] = result['min_distance']
-                gc_parent_time_table[gc_idx, parent_idx] = result['optimal_dt']
-                filled_gc_parent += 1
-        
-        # Создаем DataFrame
-        row_names_gc = [f"gc_{i}" for i in range(n_gc)]
-        col_names_gc = [f"gc_{i}" for i in range(n_gc)]
-        col_names_parent = [f"parent_{i}" for i in range(n_parents)]
-        
-        distance_gc_gc_df = pd.DataFrame(gc_gc_distance_table, index=row_names_gc, columns=col_names_gc)
-        time_i_gc_gc_df = pd.DataFrame(gc_gc_time_i_table, index=row_names_gc, columns=col_names_gc)
-        time_j_gc_gc_df = pd.DataFrame(gc_gc_time_j_table, index=row_names_gc, columns=col_names_gc)
-        distance_gc_parent_df = pd.DataFrame(gc_parent_distance_table, index=row_names_gc, columns=col_names_parent)
-        time_gc_parent_df = pd.DataFrame(gc_parent_time_table, index=row_names_gc, columns=col_names_parent)
-        
-        if filled_gc_gc == 0 and filled_gc_parent == 0:
-            if show:
-                print("❌ Ни одна ячейка таблиц не заполнена")
-            return None
+                    gc_parent_distance_table[gc_idx, parent_idx] = result['min_distance']
+                    gc_parent_time_table[gc_idx, parent_idx] = result['optimal_dt']
+                    filled_gc_parent += 1
+        
+            # Создаем DataFrame
+            row_names_gc = [f"gc_{i}" for i in range(n_gc)]
+            col_names_gc = [f"gc_{i}" for i in range(n_gc)]
+            col_names_parent = [f"parent_{i}" for i in range(n_parents)]
+        
+            distance_gc_gc_df = pd.DataFrame(gc_gc_distance_table, index=row_names_gc, columns=col_names_gc)
+            time_i_gc_gc_df = pd.DataFrame(gc_gc_time_i_table, index=row_names_gc, columns=col_names_gc)
+            time_j_gc_gc_df = pd.DataFrame(gc_gc_time_j_table, index=row_names_gc, columns=col_names_gc)
+            distance_gc_parent_df = pd.DataFrame(gc_parent_distance_table, index=row_names_gc, columns=col_names_parent)
+            time_gc_parent_df = pd.DataFrame(gc_parent_time_table, index=row_names_gc, columns=col_names_parent)
+        
+            if filled_gc_gc == 0 and filled_gc_parent == 0:
+                if show:
+                    print("❌ Ни одна ячейка таблиц не заполнена")
+                return None
         
-        if show:
-            print(f"✅ ({filled_gc_gc} ячеек внук-внук, {filled_gc_parent} ячеек внук-родитель)")
+            if show:
+                print(f"✅ ({filled_gc_gc} ячеек внук-внук, {filled_gc_parent} ячеек внук-родитель)")
             
-    except Exception as e:
-        if show:
-            print(f"❌ Ошибка на этапе 4: {e}")
-        return None
+        except Exception as e:
+            if show:
+                print(f"❌ Ошибка на этапе 4: {e}")
+            return None
     
     # ============================================================================
     # ЭТАП 5: СОЗДАНИЕ ХРОНОЛОГИИ (исправлено)
     # ============================================================================
     
-    try:
-        if show:
-            print("5️⃣ Создание хронологии встреч...", end=" ")
+    with span('find_optimal_pairs.5_chronology'):
+        try:
+            if show:
+                print("5️⃣ Создание хронологии встреч...", end=" ")
         
-        # Создаем хронологию из таблиц (как в оригинальном коде)
-        chronology = {}
+            # Создаем хронологию из таблиц (как в оригинальном коде)
+            chronology = {}
         
-        for gc_idx in range(len(tree.grandchildren)):
-            meetings = []
+            for gc_idx in range(len(tree.grandchildren)):
+                meetings = []
             
-            # Собираем встречи с другими внуками
-            for other_gc_idx in range(len(tree.grandchildren)):
-                if gc_idx == other_gc_idx:
-                    continue
+                # Собираем встречи с другими внуками
+                for other_gc_idx in range(len(tree.grandchildren)):
+                    if gc_idx == other_gc_idx:
+                        continue
                     
-                distance = distance_gc_gc_df.iloc[gc_idx, other_gc_idx]
-                if not np.isnan(distance):
-                    time_i = time_i_gc_gc_df.iloc[gc_idx, other_gc_idx]
-                    time_j = time_j_gc_gc_df.iloc[gc_idx, other_gc_idx]
+                    distance = distance_gc_gc_df.iloc[gc_idx, other_gc_idx]
+                    if not np.isnan(distance):
+                        time_i = time_i_gc_gc_df.iloc[gc_idx, other_gc_idx]
+                        time_j = time_j_gc_gc_df.iloc[gc_idx, other_gc_idx]
                     
-                    # Время встречи = максимум из двух времен
-                    meeting_time = max(abs(time_i), abs(time_j))
+                        # Время встречи = максимум из двух времен
+                        meeting_time = max(abs(time_i), abs(time_j))
                     
-                    meeting = {
-                        'type': 'grandchild',
-                        'partner': f"gc_{other_gc_idx}",
-                        'partner_idx': other_gc_idx,
-                        'distance': distance,
-                        'time_gc': time_i,
-                        'time_partner': time_j,
-                        'meeting_time': meeting_time,
-                        'who_waits': 'gc' if abs(time_i) > abs(time_j) else 'partner'
-                    }
-                    meetings.append(meeting)
+                        meeting = {
+                            'type': 'grandchild',
+                            'partner': f"gc_{other_gc_idx}",
+                            'partner_idx': other_gc_idx,
+                            'distance': distance,
+                            'time_gc': time_i,
+                            'time_partner': time_j,
+                            'meeting_time': meeting_time,
+                            'who_waits': 'gc' if abs(time_i) > abs(time_j) else 'partner'
+                        }
+                        meetings.append(meeting)
             
-            # Собираем встречи с чужими родителями
-            for parent_idx in range(len(tree.children)):
-                if parent_idx == tree.grandchildren[gc_idx]['parent_idx']:  # Пропускаем своего родителя
-                    continue
+                # Собираем встречи с чужими родителями
+                for parent_idx in range(len(tree.children)):
+                    if parent_idx == tree.grandchildren[gc_idx]['parent_idx']:  # Пропускаем своего родителя
+                        continue
                     
-                distance = distance_gc_parent_df.iloc[gc_idx, parent_idx]
-                if not np.isnan(distance):
-                    time_gc = time_gc_parent_df.iloc[gc_idx, parent_idx]
+                    distance = distance_gc_parent_df.iloc[gc_idx, parent_idx]
+                    if not np.isnan(distance):
+                        time_gc = time_gc_parent_df.iloc[gc_idx, parent_idx]
                     
-                    meeting = {
-                        'type': 'parent',
-                        'partner': f"parent_{parent_idx}",
-                        'partner_idx': parent_idx,
-                        'distance': distance,
-                        'time_gc': time_gc,
-                        'time_partner': None,
-                        'meeting_time': abs(time_gc),
-                        'who_waits': None
-                    }
-                    meetings.append(meeting)
+                        meeting = {
+                            'type': 'parent',
+                            'partner': f"parent_{parent_idx}",
+                            'partner_idx': parent_idx,
+                            'distance': distance,
+                            'time_gc': time_gc,
+                            'time_partner': None,
+                            'meeting_time': abs(time_gc),
+                            'who_waits': None
+                        }
+                        meetings.append(meeting)
             
-            # Сортируем встречи по времени встречи (ХРОНОЛОГИЯ!)
-            meetings.sort(key=lambda x: x['meeting_time'])
-            chronology[gc_idx] = meetings
-        
-        # Статистика хронологии
-        total_meetings = sum(len(meetings) for meetings in chronology.values())
-        unique_gc_meetings = sum(len([m for m in meetings if m['type'] == 'grandchild']) 
-                                for meetings in chronology.values()) // 2
-        total_parent_meetings = sum(len([m for m in meetings if m['type'] == 'parent']) 
-                                   for meetings in chronology.values())
-        
-        if unique_gc_meetings == 0 and total_parent_meetings == 0:
-            if show:
-                print("❌ Хронология пуста - нет встреч")
-            return None
+                # Сортируем встречи по времени встречи (ХРОНОЛОГИЯ!)
+                meetings.sort(key=lambda x: x['meeting_time'])
+                chronology[gc_idx] = meetings
+        
+            # Статистика хронологии
+            total_meetings = sum(len(meetings) for meetings in chronology.values())
+            unique_gc_meetings = sum(len([m for m in meetings if m['type'] == 'grandchild']) 
+                                    for meetings in chronology.values()) // 2
+            total_parent_meetings = sum(len([m for m in meetings if m['type'] == 'parent']) 
+                                       for meetings in chronology.values())
+        
+            if unique_gc_meetings == 0 and total_parent_meetings == 0:
+                if show:
+                    print("❌ Хронология пуста - нет встреч")
+                return None
         
-        if show:
-            print(f"✅ ({unique_gc_meetings} встреч внук-внук, {total_parent_meetings} встреч внук-родитель)")
+            if show:
+                print(f"✅ ({unique_gc_meetings} встреч внук-внук, {total_parent_meetings} встреч внук-родитель)")
             
-    except Exception as e:
-        if show:
-            print(f"❌ Ошибка на этапе 5: {e}")
-        return None
+        except Exception as e:
+            if show:
+                print(f"❌ Ошибка на этапе 5: {e}")
+            return None
     
     # ============================================================================
     # ЭТАП 6: ИЗВЛЕЧЕНИЕ ФИНАЛЬНЫХ ПАР
     # ============================================================================
     
-    try:
-        if show:
-            print("6️⃣ Извлечение пар из хронологии...", end=" ")
+    with span('find_optimal_pairs.6_extract_pairs'):
+        try:
+            if show:
+                print("6️⃣ Извлечение пар из хронологии...", end=" ")
         
-        # Извлекаем пары
-        final_pairs = extract_pairs_from_chronology(chronology, show=show and False)
+            # Извлекаем пары
+            final_pairs = extract_pairs_from_chronology(chronology, show=show and False)
         
-        if not final_pairs:
-            if show:
-                print("❌ Не удалось извлечь финальные пары")
-            return None
+            if not final_pairs:
+                if show:
+                    print("❌ Не удалось извлечь финальные пары")
+                return None
         
-        if show:
-            print(f"✅ ({len(final_pairs)} финальных пар)")
+            if show:
+                print(f"✅ ({len(final_pairs)} финальных пар)")
             
-    except Exception as e:
-        if show:
-            print(f"❌ Ошибка на этапе 6: {e}")
-        return None
+        except Exception as e:
+            if show:
+                print(f"❌ Ошибка на этапе 6: {e}")
+            return None
     
     # ============================================================================
     # ИТОГОВАЯ СТАТИСТИКА И РЕЗУЛЬТАТ
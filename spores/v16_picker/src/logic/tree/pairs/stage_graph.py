@@ -0,0 +1,159 @@
+"""
+Граф этапов анализа пар/встреч с мемоизацией по дереву.
+
+Этапы пайплайна (скорости сближения → сближающиеся пары → оптимизация
+пар → таблицы расстояний и времён) зарегистрированы как узлы графа с
+явными зависимостями. Результат этапа кэшируется по ключу дерева:
+позиции корня/детей/внуков, знаковые dt, управления, родители и
+параметры маятника — плюс границы dt для этапов, которые от них
+зависят. Поэтому create_chronological_meetings, create_meeting_chronology,
+complete_meeting_analysis и find_optimal_pairs на одном дереве считают
+каждую таблицу один раз.
+
+Кэшированные результаты общие для всех вызывающих — их нельзя изменять.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import numpy as np
+
+
+def tree_key(tree, pendulum) -> Tuple:
+    """Ключ состояния дерева: меняется при любом изменении позиций, dt или структуры."""
+    nodes = [tree.root] + tree.children + tree.grandchildren
+    positions = np.array([node['position'] for node in nodes], dtype=np.float64)
+    signed_dts = np.array([node['dt'] for node in nodes[1:]], dtype=np.float64)
+    controls = np.array([node['control'] for node in nodes[1:]], dtype=np.float64)
+    parents = tuple(gc['parent_idx'] for gc in tree.grandchildren)
+    physics = (pendulum.g, pendulum.l, pendulum.m, pendulum.damping, pendulum.max_control)
+    return (len(tree.children), positions.tobytes(), signed_dts.tobytes(),
+            controls.tobytes(), parents, physics)
+
+
+def _bounds_key(bounds) -> Hashable:
+    if bounds is None:
+        return None
+    if isinstance(bounds, (list, tuple, np.ndarray)):
+        return tuple(bounds)
+    return bounds
+
+
+class PairStageGraph:
+    """
+    Небольшой граф этапов с LRU-кэшем результатов на дерево.
+
+    Этап — функция stage(tree, pendulum, bounds, *результаты_зависимостей).
+    Этапы с uses_bounds=False кэшируются без учёта границ и разделяются
+    между вызовами с разными dt_bounds.
+    """
+
+    def __init__(self, max_trees: int = 8):
+        self.max_trees = max_trees
+        self._stages: Dict[str, Tuple[Callable, Tuple[str, ...], bool]] = {}
+        self._cache: 'OrderedDict[Tuple, Dict[Tuple, Any]]' = OrderedDict()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def stage(self, name: str, deps: Tuple[str, ...] = (), uses_bounds: bool = False):
+        """Декоратор регистрации этапа."""
+        for dep in deps:
+            if dep not in self._stages:
+                raise KeyError(f"Этап '{name}' зависит от незарегистрированного этапа '{dep}'")
+            if self._stages[dep][2] and not uses_bounds:
+                raise ValueError(f"Этап '{name}' без границ не может зависеть от '{dep}' с границами")
+
+        def register(func: Callable) -> Callable:
+            self._stages[name] = (func, tuple(deps), uses_bounds)
+            self._stats[name] = {'hits': 0, 'misses': 0, 'seconds': 0.0}
+            return func
+        return register
+
+    def get(self, name: str, tree, pendulum=None, bounds=None) -> Any:
+        """Результат этапа для дерева (с вычислением недостающих зависимостей)."""
+        if name not in self._stages:
+            raise KeyError(f"Неизвестный этап: '{name}'")
+        pendulum = tree.pendulum if pendulum is None else pendulum
+        key = tree_key(tree, pendulum)
+
+        entry = self._cache.get(key)
+        if entry is None:
+            entry = self._cache[key] = {}
+            while len(self._cache) > self.max_trees:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return self._resolve(name, entry, tree, pendulum, _bounds_key(bounds))
+
+    def _resolve(self, name: str, entry: Dict, tree, pendulum, bounds) -> Any:
+        func, deps, uses_bounds = self._stages[name]
+        key = (name, bounds if uses_bounds else None)
+        stats = self._stats[name]
+        if key in entry:
+            stats['hits'] += 1
+            return entry[key]
+
+        inputs = [self._resolve(dep, entry, tree, pendulum, bounds) for dep in deps]
+        start = time.perf_counter()
+        value = func(tree, pendulum, bounds if uses_bounds else None, *inputs)
+        stats['seconds'] += time.perf_counter() - start
+        stats['misses'] += 1
+        entry[key] = value
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Попадания/промахи и время вычисления по этапам."""
+        stages = {name: dict(values) for name, values in self._stats.items()}
+        return {
+            'trees': len(self._cache),
+            'hits': sum(s['hits'] for s in stages.values()),
+            'misses': sum(s['misses'] for s in stages.values()),
+            'stages': stages,
+        }
+
+    def clear(self, reset_stats: bool = False):
+        self._cache.clear()
+        if reset_stats:
+            for stats in self._stats.values():
+                stats.update(hits=0, misses=0, seconds=0.0)
+
+
+pair_stages = PairStageGraph()
+
+
+def pair_stage_stats() -> Dict[str, Any]:
+    """Статистика кэша этапов анализа пар."""
+    return pair_stages.stats()
+
+
+def clear_pair_stages(reset_stats: bool = False):
+    """Сбрасывает кэш этапов (например, после смены параметров маятника)."""
+    pair_stages.clear(reset_stats)
+
+
+# ============================================================================
+# БАЗОВЫЕ ЭТАПЫ: скорости сближения и сближающиеся пары
+# ============================================================================
+
+@pair_stages.stage('gc_gc_convergence')
+def _gc_gc_convergence(tree, pendulum, bounds):
+    from .compute_convergence_tables import compute_distance_derivative_table
+    return compute_distance_derivative_table(tree.grandchildren, pendulum)
+
+
+@pair_stages.stage('gc_parent_convergence')
+def _gc_parent_convergence(tree, pendulum, bounds):
+    from .compute_convergence_tables import compute_grandchild_parent_convergence_table
+    return compute_grandchild_parent_convergence_table(tree.grandchildren, tree.children, pendulum)
+
+
+@pair_stages.stage('gc_gc_converging_pairs', deps=('gc_gc_convergence',))
+def _gc_gc_converging_pairs(tree, pendulum, bounds, convergence_df):
+    from .find_converging_pairs import find_converging_grandchild_pairs
+    return find_converging_grandchild_pairs(convergence_df)
+
+
+@pair_stages.stage('gc_parent_converging_pairs', deps=('gc_parent_convergence',))
+def _gc_parent_converging_pairs(tree, pendulum, bounds, convergence_df):
+    from .find_converging_pairs import find_converging_grandchild_parent_pairs
+    return find_converging_grandchild_parent_pairs(convergence_df)
@@ -1,6 +1,8 @@
 import time
 from typing import Dict, Optional
 
+from ....utils.tracer import span
+
 
 class StageProfiler:
     """
@@ -13,6 +15,9 @@ class StageProfiler:
         profiler.end_stage("Этап 1")
         
         summary = profiler.get_summary()
+
+    Этапы также попадают в глобальный трассировщик (src/utils/tracer.py)
+    как участки, если он включён, — вложенные в текущий участок вызова.
     """
     
     def __init__(self, show: bool = True):
@@ -25,6 +30,7 @@ class StageProfiler:
         self.current_stage: Optional[str] = None
         self.start_time: Optional[float] = None
         self.total_start_time: Optional[float] = None
+        self._span = None
         
     def start_profiling(self):
         """Начинает общее профилирование"""
@@ -45,7 +51,10 @@ class StageProfiler:
             if self.show:
                 print(f"⚠️  Предыдущий этап '{self.current_stage}' не был завершен!")
         
+        self._close_span()
         self.current_stage = stage_name
+        self._span = span(stage_name)
+        self._span.__enter__()
         self.start_time = time.time()
         
         # Инициализируем запись этапа
@@ -86,6 +95,7 @@ class StageProfiler:
         })
         
         self.current_stage = None
+        self._close_span()
         
         if self.show:
             details_info = f" ({details})" if details else ""
@@ -111,11 +121,18 @@ class StageProfiler:
             })
             
             self.current_stage = None
+            self._close_span()
             
             if self.show:
                 error_info = f" - {error_msg}" if error_msg else ""
                 print(f"❌ {self._format_duration(duration)}{error_info}")
     
+    def _close_span(self):
+        """Закрывает участок трассировщика текущего этапа."""
+        if self._span is not None:
+            self._span.__exit__(None, None, None)
+            self._span = None
+    
     def get_summary(self) -> Dict:
         """
         Возвращает сводку по всем этапам
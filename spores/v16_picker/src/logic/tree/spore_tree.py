@@ -3,7 +3,10 @@ from typing import List, Dict, Any, Optional
 
 # Импорт конфигурации (должен быть в том же пакете или добавлен в путь)
 from .spore_tree_config import SporeTreeConfig
+from .clustering import cluster_close_points
+from .angular_pairing import angular_order, pair_validity, pair_means
 from ..pendulum import PendulumSystem
+from ...utils.tracer import traced
 
 class SporeTree:
     """
@@ -48,6 +51,7 @@ class SporeTree:
         self.children = []
         self.grandchildren = []
         self.sorted_grandchildren = []
+        self.grandchild_order = np.empty(0, dtype=np.int64)
         self.pairing_candidate_map: Dict[int, List[int]] = {}
         
         # Флаги состояния
@@ -118,6 +122,7 @@ class SporeTree:
 
 
 
+    @traced('SporeTree.create_children')
     def create_children(self, dt_children: Optional[np.ndarray] = None, show: bool = None) -> List[Dict[str, Any]]:
         """
         Создает 4 детей с разными управлениями.
@@ -154,16 +159,19 @@ class SporeTree:
         
         self.children = []
         
+        # Применяем знак к dt для чередования направлений
+        signed_dts = np.asarray(dt_children, dtype=np.float64) * dt_signs
+        
+        # Все 4 позиции одним пакетным шагом
+        positions = self.pendulum.batch_step(
+            np.repeat(np.atleast_2d(self.root['position']), 4, axis=0),
+            np.array(controls, dtype=np.float64),
+            signed_dts
+        )
+        
         for i in range(4):
-            # Применяем знак к dt для чередования направлений
-            signed_dt = dt_children[i] * dt_signs[i]  # ПРАВИЛЬНО: применяем знаки!
-            
-            # Вычисляем новую позицию через step
-            new_position = self.pendulum.step(
-                state=self.root['position'],
-                control=controls[i],
-                dt=signed_dt
-            )
+            signed_dt = float(signed_dts[i])
+            new_position = positions[i]
             
             child = {
                 'position': new_position,
@@ -188,6 +196,7 @@ class SporeTree:
         
         return self.children
     
+    @traced('SporeTree.create_grandchildren')
     def create_grandchildren(self, dt_grandchildren: Optional[np.ndarray] = None, show: bool = None) -> List[Dict[str, Any]]:
         """
         Создает 8 внуков (по 2 от каждого родителя) с ОБРАТНЫМ управлением.
@@ -233,6 +242,16 @@ class SporeTree:
         self.grandchildren = []
         grandchild_global_idx = 0
 
+        # Все 8 позиций одним пакетным шагом: по 2 внука на родителя,
+        # ОБРАТНОЕ управление родителя, dt со знаками +/-
+        parent_controls = np.array([child['control'] for child in self.children], dtype=np.float64)
+        signed_dts = np.abs(np.asarray(dt_grandchildren, dtype=np.float64)) * dt_signs_grandchildren
+        positions = self.pendulum.batch_step(
+            np.repeat(np.array([child['position'] for child in self.children], dtype=np.float64), 2, axis=0),
+            -np.repeat(parent_controls, 2),
+            signed_dts
+        )
+
         if show:
             print(f"👶 Создание внуков с ОБРАТНЫМ управлением:")
 
@@ -251,12 +270,8 @@ class SporeTree:
                 final_dt = dt_positive * dt_signs_grandchildren[grandchild_global_idx]
                 direction = "forward" if final_dt > 0 else "backward"
                 
-                # Вычисляем позицию внука от позиции родителя
-                new_position = self.pendulum.step(
-                    state=parent['position'],
-                    control=reversed_control,  # ОБРАТНОЕ управление!
-                    dt=final_dt
-                )
+                # Позиция внука от позиции родителя (посчитана пакетно выше)
+                new_position = positions[grandchild_global_idx]
                 
                 grandchild = {
                     'position': new_position,
@@ -340,6 +355,7 @@ class SporeTree:
         self.children = []
         self.grandchildren = []
         self.sorted_grandchildren = []
+        self.grandchild_order = np.empty(0, dtype=np.int64)
         self._children_created = False
         self._grandchildren_created = False
         self._grandchildren_sorted = False
@@ -347,7 +363,7 @@ class SporeTree:
         if self.config.show_debug:
             print("🔄 Дерево сброшено к начальному состоянию")
 
-    def sort_and_pair_grandchildren(self, show: bool = None) -> List[Dict[str, Any]]:
+    def sort_and_pair_grandchildren(self, show: bool = None) -> np.ndarray:
         """
         Сортирует 8 внуков по углу от корня и группирует в пары.
         
@@ -355,11 +371,15 @@ class SporeTree:
         Проверяет что в каждой паре (0,1), (2,3), (4,5), (6,7) внуки от разных родителей.
         Если проверка не прошла - останавливает программу с четким сообщением об ошибке.
         
+        Сортировка идёт по индексам (angular_order): arctan2 по массиву позиций,
+        argsort, roll к первому внуку родителя 0. Результат — перестановка
+        self.grandchild_order; self.sorted_grandchildren — те же словари в этом порядке.
+        
         Args:
             show: включать ли отладочную информацию. Если None, использует config.show_debug
             
         Returns:
-            List отсортированных внуков
+            np.ndarray (8,): индексы self.grandchildren в порядке пар
             
         Raises:
             RuntimeError: если внуки не созданы
@@ -374,92 +394,58 @@ class SporeTree:
         if show:
             print(f"🔄 Сортировка {len(self.grandchildren)} внуков по углу от корня...")
         
-        def get_angle_from_root(gc):
-            """Вычисляет угол от корня до внука."""
-            dx = gc['position'][0] - self.root['position'][0]
-            dy = gc['position'][1] - self.root['position'][1] 
-            return np.arctan2(dy, dx)
+        positions = np.array([gc['position'] for gc in self.grandchildren], dtype=np.float64)
+        parents = np.array([gc['parent_idx'] for gc in self.grandchildren])
         
-        # 1. Сортируем по углу (против часовой стрелки)
-        sorted_gc = sorted(self.grandchildren, key=get_angle_from_root, reverse=True)
-        
-        if show:
-            print("🔍 Углы внуков после первичной сортировки:")
-            for i, gc in enumerate(sorted_gc):
-                angle_deg = get_angle_from_root(gc) * 180 / np.pi
-                print(f"  {i}: {gc['name']} (родитель {gc['parent_idx']}) под углом {angle_deg:.1f}°")
-        
-        # 2. Находим первого внука от родителя 0
-        roll_offset = 0
-        for i, gc in enumerate(sorted_gc):
-            if gc['parent_idx'] == 0:
-                roll_offset = i
-                if show:
-                    print(f"🎯 Найден внук родителя 0 на позиции {i}, roll_offset = {roll_offset}")
-                break
-        
-        # 3. Делаем roll чтобы внук родителя 0 стал первым
-        sorted_gc = np.roll(sorted_gc, -roll_offset).tolist()
-        if show:
-            print(f"🔄 Применен roll на {-roll_offset}")
-        
-        # 4. Проверяем критерий: 1-й внук от другого родителя?
-        if len(sorted_gc) >= 2 and sorted_gc[1]['parent_idx'] == 0:
-            # Если 1-й тоже от родителя 0, сдвигаем на 1
-            sorted_gc = np.roll(sorted_gc, 1).tolist()
-            if show:
-                print("🔄 Применен дополнительный roll +1")
+        # 1-4. Сортировка по углу, roll к внуку родителя 0, roll +1 при одинаковых родителях первой пары
+        order = angular_order(positions, self.root['position'], parents, anchor_parent=0)
         
         # 5. ⚠️ КРИТИЧЕСКАЯ ПРОВЕРКА ВСЕХ ПАР - ЖЕСТКИЙ АССЕРТ!
+        assert len(order) >= 8, (
+            f"\n❌ КРИТИЧЕСКАЯ ОШИБКА: Недостаточно внуков для 4 пар!\n"
+            f"Требуется 8 внуков, но есть только {len(order)}."
+        )
+        valid = pair_validity(parents, order[:8])
+        
         if show:
             print(f"\n🧐 КРИТИЧЕСКАЯ ПРОВЕРКА ПАР:")
-        
-        for pair_idx in range(4):
-            idx1 = pair_idx * 2      # 0, 2, 4, 6
-            idx2 = pair_idx * 2 + 1  # 1, 3, 5, 7
-            
-            if idx1 < len(sorted_gc) and idx2 < len(sorted_gc):
-                parent1 = sorted_gc[idx1]['parent_idx']
-                parent2 = sorted_gc[idx2]['parent_idx']
-                
-                if show:
-                    different = parent1 != parent2
-                    status = "✅" if different else "❌"
-                    print(f"  Пара {pair_idx} (внуки {idx1}-{idx2}): родители {parent1}-{parent2} {status}")
-                
-                # 🚨 ЖЕСТКИЙ АССЕРТ - остановка программы!
-                assert parent1 != parent2, (
-                    f"\n❌ КРИТИЧЕСКАЯ ОШИБКА АЛГОРИТМА СОРТИРОВКИ!\n"
-                    f"Пара {pair_idx} содержит внуков от одинакового родителя {parent1}!\n"
-                    f"Внук {idx1}: {sorted_gc[idx1]['name']} (родитель {parent1})\n"
-                    f"Внук {idx2}: {sorted_gc[idx2]['name']} (родитель {parent2})\n"
-                    f"Алгоритм сортировки требует исправления!"
-                )
-            else:
-                # Недостаточно внуков - тоже критическая ошибка
-                assert False, (
-                    f"\n❌ КРИТИЧЕСКАЯ ОШИБКА: Недостаточно внуков для пары {pair_idx}!\n"
-                    f"Требуются индексы {idx1} и {idx2}, но есть только {len(sorted_gc)} внуков."
-                )
+            for pair_idx, ok in enumerate(valid):
+                idx1, idx2 = order[2 * pair_idx], order[2 * pair_idx + 1]
+                print(f"  Пара {pair_idx} (внуки {2 * pair_idx}-{2 * pair_idx + 1}): "
+                      f"родители {parents[idx1]}-{parents[idx2]} {'✅' if ok else '❌'}")
+        
+        if not valid.all():
+            # 🚨 ЖЕСТКИЙ АССЕРТ - остановка программы!
+            pair_idx = int(np.flatnonzero(~valid)[0])
+            gc1 = self.grandchildren[order[2 * pair_idx]]
+            gc2 = self.grandchildren[order[2 * pair_idx + 1]]
+            raise AssertionError(
+                f"\n❌ КРИТИЧЕСКАЯ ОШИБКА АЛГОРИТМА СОРТИРОВКИ!\n"
+                f"Пара {pair_idx} содержит внуков от одинакового родителя {gc1['parent_idx']}!\n"
+                f"Внук {2 * pair_idx}: {gc1['name']} (родитель {gc1['parent_idx']})\n"
+                f"Внук {2 * pair_idx + 1}: {gc2['name']} (родитель {gc2['parent_idx']})\n"
+                f"Алгоритм сортировки требует исправления!"
+            )
         
         # 6. Если все проверки прошли - сохраняем результат
-        self.sorted_grandchildren = sorted_gc
+        self.grandchild_order = order
+        self.sorted_grandchildren = [self.grandchildren[i] for i in order]
         self._grandchildren_sorted = True
         
         if show:
             print(f"\n✅ ВСЕ ПАРЫ КОРРЕКТНЫ! Сортировка завершена.")
             print(f"   📋 Итоговый порядок внуков:")
-            for i, gc in enumerate(sorted_gc):
+            for i, gc in enumerate(self.sorted_grandchildren):
                 print(f"     {i}: {gc['name']} от родителя {gc['parent_idx']}")
         
-        return sorted_gc
+        return order
     
 
     def calculate_mean_points(self, show: bool = None) -> np.ndarray:
         """
         Вычисляет средние точки для 4 пар отсортированных внуков.
         
-        Пары: (0,1), (2,3), (4,5), (6,7) по индексам в sorted_grandchildren.
+        Пары: (0,1), (2,3), (4,5), (6,7) по индексам перестановки grandchild_order.
         Требует предварительного вызова sort_and_pair_grandchildren().
         
         Args:
@@ -477,37 +463,19 @@ class SporeTree:
         if not self._grandchildren_sorted:
             raise RuntimeError("Сначала нужно отсортировать внуков через sort_and_pair_grandchildren()")
         
-        if show:
-            print(f"📊 Вычисление средних точек для {len(self.sorted_grandchildren)} отсортированных внуков...")
-        
         # Проверяем что у нас ровно 8 внуков
-        assert len(self.sorted_grandchildren) == 8, (
-            f"Ожидается 8 внуков, получено {len(self.sorted_grandchildren)}"
+        assert len(self.grandchild_order) == 8, (
+            f"Ожидается 8 внуков, получено {len(self.grandchild_order)}"
         )
         
-        means = np.zeros((4, 2))
+        positions = np.array([gc['position'] for gc in self.grandchildren], dtype=np.float64)
+        means = pair_means(positions, self.grandchild_order)
         
-        for pair_idx in range(4):
-            # Прямые индексы пары: (0,1), (2,3), (4,5), (6,7)
-            idx1 = pair_idx * 2
-            idx2 = pair_idx * 2 + 1
-            
-            # Берем внуков из отсортированного списка
-            gc1 = self.sorted_grandchildren[idx1]
-            gc2 = self.sorted_grandchildren[idx2]
-            
-            # Вычисляем среднюю точку пары
-            pos1 = gc1['position']
-            pos2 = gc2['position']
-            mean_point = (pos1 + pos2) / 2
-            means[pair_idx] = mean_point
-            
-            if show:
-                distance = np.linalg.norm(pos1 - pos2)
-                print(f"  📏 Пара {pair_idx} (внуки {idx1}-{idx2}):")
-                print(f"     {gc1['name']} (родитель {gc1['parent_idx']}) → {pos1}")
-                print(f"     {gc2['name']} (родитель {gc2['parent_idx']}) → {pos2}")
-                print(f"     Расстояние: {distance:.6f}, Средняя точка: {mean_point}")
+        if show:
+            print(f"📊 Средние точки для {len(self.grandchild_order)} отсортированных внуков:")
+            first, second = positions[self.grandchild_order[0::2]], positions[self.grandchild_order[1::2]]
+            for pair_idx, distance in enumerate(np.linalg.norm(first - second, axis=1)):
+                print(f"  📏 Пара {pair_idx}: расстояние {distance:.6f}, средняя точка {means[pair_idx]}")
         
         # Сохраняем результат в объекте
         self.mean_points = means
@@ -569,67 +537,57 @@ class SporeTree:
     def update_positions(self, dt_children: np.ndarray, dt_grandchildren: np.ndarray, 
                                         recompute_means: bool = True, show: bool = False):
         """
-        🚀 ОПТИМИЗИРОВАННАЯ JIT версия update_positions() 
+        🚀 Пакетная версия update_positions(): один вызов ядра на уровень.
         
-        Основана на результатах бенчмарка: JIT одиночные вызовы быстрее batch в 2x!
-        Убираем все лишние операции и проверки.
+        Дети и внуки считаются двумя вызовами batch_step вместо 12 одиночных
+        step (одиночный вызов дороже пакетного даже для 4 состояний).
         """
         # МИНИМАЛЬНЫЕ проверки (только критические)
         assert self._grandchildren_sorted, "Дерево должно быть отсортировано"
 
         # ═══════════════════════════════════════════════════════════════════
-        # ЭТАП 1: 🔥 БЫСТРОЕ ОБНОВЛЕНИЕ ДЕТЕЙ (4 JIT вызова)
+        # ЭТАП 1: 🔥 ДЕТИ — один пакетный шаг
         # ═══════════════════════════════════════════════════════════════════
         
-        root_pos = self.root['position']  # Кешируем обращение
-        
-        # Обновляем детей напрямую без промежуточных массивов
-        for i in range(4):  # Развернутый цикл быстрее enumerate
-            child = self.children[i]
-            dt_sign = 1 if child['dt'] > 0 else -1  # Быстрее np.sign()
-            signed_dt = dt_children[i] * dt_sign
-            
-            # Прямое обновление без копирований
-            child['dt'] = signed_dt
-            child['position'] = self.pendulum.step(root_pos, child['control'], signed_dt)
+        children = self.children
+        child_dts = np.array([dt_children[i] if children[i]['dt'] > 0 else -dt_children[i]
+                              for i in range(4)], dtype=np.float64)
+        child_positions = self.pendulum.batch_step(
+            np.repeat(np.atleast_2d(self.root['position']), 4, axis=0),
+            np.array([child['control'] for child in children], dtype=np.float64),
+            child_dts
+        )
+        for i, child in enumerate(children):
+            child['dt'] = float(child_dts[i])
+            child['position'] = child_positions[i]
 
         # ═══════════════════════════════════════════════════════════════════
-        # ЭТАП 2: 🔥 БЫСТРОЕ ОБНОВЛЕНИЕ ВНУКОВ (8 JIT вызовов)
+        # ЭТАП 2: 🔥 ВНУКИ — один пакетный шаг (по global_idx)
         # ═══════════════════════════════════════════════════════════════════
         
-        # Предвычисляем позиции детей для быстрого доступа
-        child_positions = [child['position'] for child in self.children]
-        
-        # Обновляем внуков напрямую по global_idx
-        for gc in self.grandchildren:
-            j = gc['global_idx']  # 0-7
-            parent_pos = child_positions[gc['parent_idx']]  # Быстрый доступ
-            
-            dt_sign = 1 if gc['dt'] > 0 else -1  # Быстрее np.sign()
-            signed_dt = dt_grandchildren[j] * dt_sign
-            
-            # Прямое обновление
-            gc['dt'] = signed_dt
-            gc['dt_abs'] = abs(signed_dt)  # Inline abs быстрее np.abs
-            gc['position'] = self.pendulum.step(parent_pos, gc['control'], signed_dt)
+        grandchildren = self.grandchildren
+        gc_dts = np.array([dt_grandchildren[gc['global_idx']] if gc['dt'] > 0 else -dt_grandchildren[gc['global_idx']]
+                           for gc in grandchildren], dtype=np.float64)
+        gc_positions = self.pendulum.batch_step(
+            child_positions[[gc['parent_idx'] for gc in grandchildren]],
+            np.array([gc['control'] for gc in grandchildren], dtype=np.float64),
+            gc_dts
+        )
+        for k, gc in enumerate(grandchildren):
+            gc['dt'] = float(gc_dts[k])
+            gc['dt_abs'] = abs(gc['dt'])
+            gc['position'] = gc_positions[k]
 
         # ═══════════════════════════════════════════════════════════════════
         # ЭТАП 3: БЫСТРЫЙ ПЕРЕСЧЕТ СРЕДНИХ ТОЧЕК (если нужно)
         # ═══════════════════════════════════════════════════════════════════
         
         if recompute_means:
-            # Inline вычисление вместо вызова метода (убираем overhead)
-            self.mean_points = np.zeros((4, 2))
-            
-            sorted_gc = self.sorted_grandchildren
-            for pair_idx in range(4):
-                idx1, idx2 = pair_idx * 2, pair_idx * 2 + 1
-                pos1 = sorted_gc[idx1]['position']
-                pos2 = sorted_gc[idx2]['position']
-                self.mean_points[pair_idx] = (pos1 + pos2) * 0.5  # * 0.5 быстрее / 2
+            # Средние точки пар прямо из массива позиций по перестановке
+            self.mean_points = pair_means(gc_positions, self.grandchild_order)
             
         if show:
-            print("🔄 JIT update: 4 детей + 8 внуков за 12 оптимизированных вызовов")
+            print("🔄 Batch update: 4 детей + 8 внуков за 2 пакетных вызова")
 
 
     def mean_points(self, show: bool = None) -> np.ndarray:
@@ -639,13 +597,8 @@ class SporeTree:
         if self.mean_points is None:
             self.mean_points = np.zeros((4, 2))
         
-        sorted_gc = self.sorted_grandchildren  # Один доступ к атрибуту
-        
-        # Развернутый цикл для максимальной скорости
-        self.mean_points[0] = (sorted_gc[0]['position'] + sorted_gc[1]['position']) * 0.5
-        self.mean_points[1] = (sorted_gc[2]['position'] + sorted_gc[3]['position']) * 0.5
-        self.mean_points[2] = (sorted_gc[4]['position'] + sorted_gc[5]['position']) * 0.5
-        self.mean_points[3] = (sorted_gc[6]['position'] + sorted_gc[7]['position']) * 0.5
+        positions = np.array([gc['position'] for gc in self.grandchildren], dtype=np.float64)
+        pair_means(positions, self.grandchild_order, out=self.mean_points)
         
         return self.mean_points
 
@@ -705,22 +658,22 @@ class SporeTree:
             traceback.print_exc()
             return ""
     
+    @traced('SporeTree.merge_close_grandchildren')
     def merge_close_grandchildren(self, distance_threshold=1e-4):
         """
         Объединяет внуков, находящихся ближе трешхолда.
         
+        Все попарные расстояния считаются одним векторным расчётом, кластеры
+        собираются union-find'ом: цепочки и тройки близких внуков объединяются
+        в одного (позиция — среднее, dt — среднее |dt|, control/цвет/родитель —
+        от внука с меньшим индексом).
+        
         Args:
             distance_threshold: максимальная дистанция для объединения
             
         Returns:
             dict: информация об объединениях
         """
-        # 🔧 СОХРАНЯЕМ ОРИГИНАЛЬНЫХ ВНУКОВ ДЛЯ ОТЛАДКИ
-        if not hasattr(self, '_original_grandchildren'):
-            import copy
-            self._original_grandchildren = copy.deepcopy(self.grandchildren)
-            print(f"💾 Сохранены оригинальные внуки для отладки: {len(self._original_grandchildren)}")
-        
         if not self._grandchildren_created:
             return {'merged_pairs': [], 'error': 'Внуки не созданы'}
             
@@ -733,73 +686,70 @@ class SporeTree:
                 'remaining_grandchildren': len(self.grandchildren),
                 'error': 'Внуки уже были объединены'
             }
-            
-        merged_pairs = []
-        grandchildren_to_remove = set()
         
-        # Проверяем все пары внуков
-        for i in range(len(self.grandchildren)):
-            if i in grandchildren_to_remove:
+        grandchildren = self.grandchildren
+        positions = np.array([gc['position'] for gc in grandchildren], dtype=np.float64).reshape(-1, 2)
+        labels, pairs, distances = cluster_close_points(positions, distance_threshold)
+        
+        if len(pairs) == 0:
+            return {'merged_pairs': [], 'total_merged': 0, 'remaining_grandchildren': len(grandchildren)}
+        
+        # 🔧 Оригинальные внуки для отладки (tree_debug): поверхностные копии словарей —
+        # позиции при обновлении заменяются, а не меняются на месте
+        if not hasattr(self, '_original_grandchildren'):
+            self._original_grandchildren = [dict(gc) for gc in grandchildren]
+        
+        # Максимальная дистанция внутри каждого кластера (для отчёта)
+        cluster_distance = {}
+        for (i, _), distance in zip(pairs, distances):
+            root = int(labels[i])
+            cluster_distance[root] = max(cluster_distance.get(root, 0.0), float(distance))
+        
+        merged_pairs = []
+        new_grandchildren = []
+        for idx, gc in enumerate(grandchildren):
+            root = int(labels[idx])
+            if root != idx:
+                continue  # входит в кластер с меньшим представителем
+            if root not in cluster_distance:
+                new_grandchildren.append(gc)
                 continue
-                
-            for j in range(i + 1, len(self.grandchildren)):
-                if j in grandchildren_to_remove:
-                    continue
-                    
-                gc_i = self.grandchildren[i]
-                gc_j = self.grandchildren[j]
-                
-                # Вычисляем дистанцию
-                pos_i = np.array(gc_i['position'])
-                pos_j = np.array(gc_j['position'])
-                distance = np.linalg.norm(pos_i - pos_j)
-                
-                if distance < distance_threshold:
-                    # Объединяем: создаем новую точку в середине
-                    merged_position = (pos_i + pos_j) / 2
-                    merged_dt = (abs(gc_i['dt']) + abs(gc_j['dt'])) / 2
-                    
-                    # Сохраняем информацию об исходных внуках для наследования линков
-                    merged_gc = {
-                        'position': merged_position,
-                        'dt': merged_dt,
-                        'control': gc_i['control'],  # Берем control от первого
-                        'color': gc_i.get('color', 'default'),  # Исходный цвет первой споры
-                        'parent_idx': gc_i['parent_idx'],
-                        'global_idx': gc_i['global_idx'],
-                        'merged_from': [gc_i['global_idx'], gc_j['global_idx']],  # НОВОЕ: список исходных внуков
-                        'original_positions': [pos_i.copy(), pos_j.copy()],  # НОВОЕ: исходные позиции
-                        'original_dts': [gc_i['dt'], gc_j['dt']]  # НОВОЕ: исходные dt
-                    }
-                    
-                    # Заменяем первого внука объединенным
-                    self.grandchildren[i] = merged_gc
-                    
-                    # Помечаем второго для удаления
-                    grandchildren_to_remove.add(j)
-                    
-                    merged_pairs.append({
-                        'merged_idx': i,
-                        'removed_idx': j,
-                        'distance': distance,
-                        'merged_position': merged_position,
-                        'original_indices': [gc_i['global_idx'], gc_j['global_idx']]
-                    })
-                    
-                    print(f"🔗 Объединены внуки {gc_i['global_idx']} и {gc_j['global_idx']}")
-                    print(f"   📏 Дистанция: {distance:.6e} < {distance_threshold:.6e}")
-                    print(f"   📍 Новая позиция: ({merged_position[0]:.4f}, {merged_position[1]:.4f})")
-                    break  # Один внук может объединиться только с одним другим
-        
-        # Удаляем помеченные внуки (в обратном порядке индексов)
-        for idx in sorted(grandchildren_to_remove, reverse=True):
-            self.grandchildren.pop(idx)
-        
-        # Обновляем флаг, если были изменения
-        if merged_pairs:
-            self._grandchildren_modified = True
-            print(f"✅ Объединено {len(merged_pairs)} пар внуков")
-            print(f"📊 Внуков осталось: {len(self.grandchildren)} из {len(self.grandchildren) + len(grandchildren_to_remove)}")
+            
+            members = np.flatnonzero(labels == root)
+            merged_position = positions[members].mean(axis=0)
+            merged_dt = float(np.mean([abs(grandchildren[m]['dt']) for m in members]))
+            original_indices = [grandchildren[m]['global_idx'] for m in members]
+            
+            # Сохраняем информацию об исходных внуках для наследования линков
+            merged_gc = {
+                'position': merged_position,
+                'dt': merged_dt,
+                'control': gc['control'],  # Берем control от первого
+                'color': gc.get('color', 'default'),  # Исходный цвет первой споры
+                'parent_idx': gc['parent_idx'],
+                'global_idx': gc['global_idx'],
+                'merged_from': original_indices,  # список исходных внуков
+                'original_positions': [positions[m].copy() for m in members],  # исходные позиции
+                'original_dts': [grandchildren[m]['dt'] for m in members]  # исходные dt
+            }
+            merged_pairs.append({
+                'merged_idx': len(new_grandchildren),
+                'removed_idx': [int(m) for m in members[1:]],
+                'distance': cluster_distance[root],
+                'merged_position': merged_position,
+                'original_indices': original_indices
+            })
+            new_grandchildren.append(merged_gc)
+            
+            print(f"🔗 Объединены внуки {original_indices}")
+            print(f"   📏 Дистанция: {cluster_distance[root]:.6e} < {distance_threshold:.6e}")
+            print(f"   📍 Новая позиция: ({merged_position[0]:.4f}, {merged_position[1]:.4f})")
+        
+        total_before = len(grandchildren)
+        self.grandchildren = new_grandchildren
+        self._grandchildren_modified = True
+        print(f"✅ Объединено {len(merged_pairs)} групп внуков")
+        print(f"📊 Внуков осталось: {len(self.grandchildren)} из {total_before}")
         
         return {
             'merged_pairs': merged_pairs,
@@ -3,7 +3,7 @@
 Разделяет медленное создание структуры и быстрый пересчет позиций.
 """
 import numpy as np
-from pendulum import OptimizationPendulum
+from .angular_pairing import angular_order, pair_validity
 
 
 def create_tree_topology(initial_position, pendulum, config):
@@ -12,7 +12,7 @@ def create_tree_topology(initial_position, pendulum, config):
     
     Args:
         initial_position: np.array([theta, theta_dot])
-        pendulum: OptimizationPendulum
+        pendulum: маятник с step() и get_control_bounds()
         config: dict - конфигурация
     
     Returns:
@@ -76,14 +76,24 @@ def create_tree_topology(initial_position, pendulum, config):
 
 
 
+def _step_all(pendulum, states, controls, dts):
+    """Шаг для массива состояний: пакетно, если маятник это умеет."""
+    if hasattr(pendulum, 'batch_step'):
+        return pendulum.batch_step(states, controls, dts)
+    return np.array([pendulum.step(s, u, dt) for s, u, dt in zip(states, controls, dts)])
+
+
 def calculate_grandchildren_positions(topology, dt_vector, pendulum, config):
     """
     Быстро пересчитывает позиции 8 внуков с ПРАВИЛЬНОЙ сортировкой.
     
+    Сортировки детей и внуков — перестановки индексов (argsort по arctan2),
+    без пересборки списков словарей.
+    
     Args:
         topology: топология от create_tree_topology()
         dt_vector: np.array(12) - [4 dt детей + 8 dt внуков]
-        pendulum: OptimizationPendulum  
+        pendulum: маятник с step() (и, если есть, batch_step())
         config: dict конфигурация
     
     Returns:
@@ -94,137 +104,46 @@ def calculate_grandchildren_positions(topology, dt_vector, pendulum, config):
     if show:
         print(f"🌱 Пересчет позиций внуков с правильной сортировкой")
     
+    dt_vector = np.asarray(dt_vector, dtype=np.float64)
     dt_children = dt_vector[0:4]
     dt_grandchildren = dt_vector[4:12]
-    initial_pos = topology['initial_position']
+    initial_pos = np.asarray(topology['initial_position'], dtype=np.float64)
+    child_configs = topology['child_configs']
     
     # Шаг 1: Вычисляем позиции 4 детей
-    children_with_positions = []
-    for i, child_config in enumerate(topology['child_configs']):
-        control = child_config['control']
-        dt_signed = dt_children[i] * child_config['dt_sign']
-        
-        child_pos = pendulum.step(initial_pos, control, dt_signed)
-        
-        # Создаем структуру как в оригинале
-        child = {
-            'position': child_pos,
-            'id': f"child_{i}",
-            'name': child_config['name'],
-            'color': child_config['color'],
-            'control': control,
-            'dt': dt_signed,
-            'dt_abs': abs(dt_signed)
-        }
-        children_with_positions.append(child)
-        
-        if show:
-            print(f"  🍄 Ребенок {i}: {child_config['name']}, u={control:+.1f}, dt={dt_signed:+.3f} → {child_pos}")
-    
-    # Шаг 2: Сортируем детей по углу (как в оригинале)
-    def get_angle_child(child):
-        dx = child['position'][0] - initial_pos[0] 
-        dy = child['position'][1] - initial_pos[1]
-        return np.arctan2(dy, dx)
+    child_controls = np.array([c['control'] for c in child_configs], dtype=np.float64)
+    child_dts = dt_children * np.array([c['dt_sign'] for c in child_configs], dtype=np.float64)
+    child_positions = _step_all(pendulum, np.repeat(initial_pos[None, :], 4, axis=0), child_controls, child_dts)
     
-    children_sorted = sorted(children_with_positions, key=get_angle_child)
-    
-    # Переназначаем ID по порядку
-    for i, child in enumerate(children_sorted):
-        child['id'] = f"child_{i}"
+    # Шаг 2: Сортируем детей по углу (как в оригинале) — перестановка индексов
+    child_angles = np.arctan2(child_positions[:, 1] - initial_pos[1], child_positions[:, 0] - initial_pos[0])
+    child_order = np.argsort(child_angles, kind='stable')
     
     if show:
         print("\n🔄 Дети после сортировки по углу:")
-        for i, child in enumerate(children_sorted):
-            angle = get_angle_child(child) * 180 / np.pi
-            print(f"  {i}: {child['name']} под углом {angle:.1f}°")
-    
-    # Шаг 3: Создаем внуков
-    grandchildren_list = []
-    gc_idx = 0
-    
-    for parent_idx, parent in enumerate(children_sorted):
-        reversed_control = -parent['control']
-        
-        if show:
-            print(f"\n👶 От родителя {parent_idx} ({parent['name']}):")
-        
-        # 2 внука от каждого родителя
-        for local_idx in range(2):
-            dt_sign = 1 if local_idx == 0 else -1
-            dt_signed = dt_grandchildren[gc_idx] * dt_sign
-            
-            grandchild_pos = pendulum.step(parent['position'], reversed_control, dt_signed)
-            
-            # Структура для сортировки
-            grandchild = {
-                'position': grandchild_pos,
-                'parent_idx': parent_idx,
-                'local_idx': local_idx,
-                'global_idx': gc_idx,
-                'name': f"gc_{parent_idx}_{['forward', 'backward'][local_idx]}",
-                'control': reversed_control,
-                'dt': dt_signed
-            }
-            grandchildren_list.append(grandchild)
-            
-            if show:
-                direction = "forward" if dt_sign > 0 else "backward"
-                print(f"    🌱 {local_idx}: u={reversed_control:+.1f}, dt={dt_signed:+.4f} ({direction}) → {grandchild_pos}")
-            
-            gc_idx += 1
+        for i, c in enumerate(child_order):
+            print(f"  {i}: {child_configs[c]['name']} под углом {child_angles[c] * 180 / np.pi:.1f}°")
     
-    # Шаг 4: Сортируем внуков по углу от корня
-    def get_angle_from_root(gc):
-        dx = gc['position'][0] - initial_pos[0]
-        dy = gc['position'][1] - initial_pos[1] 
-        return np.arctan2(dy, dx)
+    # Шаг 3: Внуки — по 2 от каждого отсортированного родителя, ОБРАТНОЕ управление, +dt / -dt
+    parent_idx = np.repeat(np.arange(4), 2)
+    parents = child_order[parent_idx]
+    gc_dts = dt_grandchildren * np.tile([1.0, -1.0], 4)
+    gc_positions = _step_all(pendulum, child_positions[parents], -child_controls[parents], gc_dts)
     
-    # Сортируем по углу (против часовой стрелки)
-    sorted_gc = sorted(grandchildren_list, key=get_angle_from_root, reverse=True)
+    # Шаги 4-5: Сортировка по углу от корня (против часовой стрелки) и roll +1,
+    # если первые два внука от одного родителя
+    order = angular_order(gc_positions, initial_pos, parent_idx, anchor_parent=None)
     
-    if show:
-        print("\n🔍 Внуки после сортировки по углу:")
-        for i, gc in enumerate(sorted_gc):
-            angle_deg = get_angle_from_root(gc) * 180 / np.pi
-            print(f"  {i}: {gc['name']} (родитель {gc['parent_idx']}) под углом {angle_deg:.1f}°")
-    
-    # Шаг 5: КРИТИЧЕСКИЙ АЛГОРИТМ - гарантируем что пары от разных родителей
-    # Проверяем первые два внука
-    if len(sorted_gc) >= 2:
-        first_parent = sorted_gc[0]['parent_idx']
-        second_parent = sorted_gc[1]['parent_idx']
-        
-        if show:
-            print(f"\n🎯 Проверка первой пары:")
-            print(f"  Внук 0: родитель {first_parent}")
-            print(f"  Внук 1: родитель {second_parent}")
-        
-        if first_parent == second_parent:
-            # Внуки 0 и 1 от одного родителя - делаем roll на 1
-            sorted_gc = np.roll(sorted_gc, 1).tolist()
-            if show:
-                print("🔄 ПРИМЕНЕН ROLL +1 - первые два внука были от одного родителя")
-                print(f"  Новая первая пара: внук 0 (родитель {sorted_gc[0]['parent_idx']}) и внук 1 (родитель {sorted_gc[1]['parent_idx']})")
-        else:
-            if show:
-                print("✅ Первые два внука уже от разных родителей - roll не нужен")
-    
-    # Шаг 6: Извлекаем позиции в правильном порядке
-    sorted_positions = np.array([gc['position'] for gc in sorted_gc])
+    # Шаг 6: Позиции в правильном порядке
+    sorted_positions = gc_positions[order]
     
     if show:
-        print(f"\n✅ ФИНАЛЬНЫЙ ПОРЯДОК ВНУКОВ:")
-        for i, gc in enumerate(sorted_gc):
-            print(f"  {i}: {gc['name']} от родителя {gc['parent_idx']}")
-        
+        print(f"\n✅ ФИНАЛЬНЫЙ ПОРЯДОК ВНУКОВ (индексы): {order.tolist()}")
         print(f"\n📋 ПРОВЕРКА ПАР:")
-        for pair_idx in range(4):
-            idx1, idx2 = pair_idx * 2, pair_idx * 2 + 1
-            parent1 = sorted_gc[idx1]['parent_idx']
-            parent2 = sorted_gc[idx2]['parent_idx']
-            different = parent1 != parent2
-            print(f"  Пара {pair_idx} (внуки {idx1}-{idx2}): родители {parent1}-{parent2} {'✅' if different else '❌'}")
+        for pair_idx, ok in enumerate(pair_validity(parent_idx, order)):
+            idx1, idx2 = order[2 * pair_idx], order[2 * pair_idx + 1]
+            print(f"  Пара {pair_idx} (внуки {2 * pair_idx}-{2 * pair_idx + 1}): "
+                  f"родители {parent_idx[idx1]}-{parent_idx[idx2]} {'✅' if ok else '❌'}")
     
     return sorted_positions
 
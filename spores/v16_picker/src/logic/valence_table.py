@@ -0,0 +1,221 @@
+"""
+Пакетный расчёт валентности всех спор графа.
+
+Граф задаётся массивами рёбер (родитель, ребёнок, dt, управление).
+Каждое ребро даёт два полуребра: от родителя (forward, +|dt|) и от
+ребёнка (backward, -|dt|), управление одно и то же. Слоты детей — это
+полурёбра узла, слоты внуков — композиции двух полурёбер с чередованием
+управления. Всё считается несколькими векторными операциями, результат —
+компактные таблицы (N, 12): занятость, суммарный dt, сосед.
+
+Порядок слотов совпадает с SporeValence:
+- 0..3:  forward_max, forward_min, backward_max, backward_min;
+- 4..11: (первое направление, первое управление, второе направление)
+         в порядке SporeValence._create_grandchildren_slots.
+
+При нескольких кандидатах слот занимает первый в порядке обхода
+ValenceManager (сначала исходящие рёбра, затем входящие), поэтому
+результат совпадает с поузловым анализом.
+"""
+
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+from .valence import SporeValence
+
+CHILD_SLOTS = 4
+GRANDCHILD_SLOTS = 8
+N_SLOTS = CHILD_SLOTS + GRANDCHILD_SLOTS
+
+
+def _first_per_key(keys: np.ndarray) -> np.ndarray:
+    """Индексы первых вхождений каждого ключа (в порядке массива)."""
+    if len(keys) == 0:
+        return np.empty(0, dtype=np.int64)
+    order = np.argsort(keys, kind='stable')
+    _, first = np.unique(keys[order], return_index=True)
+    return order[first]
+
+
+class ValenceTable:
+    """
+    Валентность всех спор графа в массивах.
+
+    Attributes:
+        node_ids: ID спор (строки) в порядке строк таблиц
+        occupied: (N, 12) bool — занят ли слот
+        dt: (N, 12) суммарный dt слота (NaN — свободен или dt неизвестен)
+        dt_steps: (N, 12, 2) dt по шагам (для детей второй шаг NaN)
+        neighbor: (N, 12) индекс соседа в node_ids (-1 — свободен)
+    """
+
+    def __init__(self, node_ids: Sequence[str], occupied: np.ndarray, dt: np.ndarray,
+                 dt_steps: np.ndarray, neighbor: np.ndarray):
+        self.node_ids = list(node_ids)
+        self.index: Dict[str, int] = {spore_id: i for i, spore_id in enumerate(self.node_ids)}
+        self.occupied = occupied
+        self.dt = dt
+        self.dt_steps = dt_steps
+        self.neighbor = neighbor
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def __contains__(self, spore_id) -> bool:
+        return spore_id in self.index
+
+    # ------------------------------------------------------------------
+    # Сводные счётчики
+    # ------------------------------------------------------------------
+    def occupied_children(self) -> np.ndarray:
+        return self.occupied[:, :CHILD_SLOTS].sum(axis=1)
+
+    def occupied_grandchildren(self) -> np.ndarray:
+        return self.occupied[:, CHILD_SLOTS:].sum(axis=1)
+
+    def occupied_counts(self) -> np.ndarray:
+        return self.occupied.sum(axis=1)
+
+    # ------------------------------------------------------------------
+    # Частичное обновление
+    # ------------------------------------------------------------------
+    def update_rows(self, other: 'ValenceTable', node_ids: Iterable[str]) -> None:
+        """
+        Переносит строки node_ids из таблицы other (посчитанной по подграфу).
+
+        Новые узлы other добавляются в конец; индексы соседей переводятся
+        в нумерацию этой таблицы.
+        """
+        new_ids = [spore_id for spore_id in other.node_ids if spore_id not in self.index]
+        if new_ids:
+            n_new = len(new_ids)
+            self.occupied = np.concatenate((self.occupied, np.zeros((n_new, N_SLOTS), dtype=bool)))
+            self.dt = np.concatenate((self.dt, np.full((n_new, N_SLOTS), np.nan)))
+            self.dt_steps = np.concatenate((self.dt_steps, np.full((n_new, N_SLOTS, 2), np.nan)))
+            self.neighbor = np.concatenate((self.neighbor, np.full((n_new, N_SLOTS), -1, dtype=np.int64)))
+            for spore_id in new_ids:
+                self.index[spore_id] = len(self.node_ids)
+                self.node_ids.append(spore_id)
+
+        node_ids = list(node_ids)
+        if not node_ids:
+            return
+        remap = np.array([self.index[spore_id] for spore_id in other.node_ids], dtype=np.int64)
+        src = np.array([other.index[spore_id] for spore_id in node_ids], dtype=np.int64)
+        dst = remap[src]
+        self.occupied[dst] = other.occupied[src]
+        self.dt[dst] = other.dt[src]
+        self.dt_steps[dst] = other.dt_steps[src]
+        neighbor = other.neighbor[src]
+        self.neighbor[dst] = np.where(neighbor >= 0, remap[neighbor], -1)
+
+    # ------------------------------------------------------------------
+    # Ленивые объекты
+    # ------------------------------------------------------------------
+    def materialize(self, spore_id: str) -> Optional[SporeValence]:
+        """SporeValence одной споры из строки таблицы (None, если споры нет)."""
+        row = self.index.get(spore_id)
+        if row is None:
+            return None
+
+        valence = SporeValence(spore_id=spore_id)
+        slots = valence.children_slots + valence.grandchildren_slots
+        for col in np.flatnonzero(self.occupied[row]):
+            slot = slots[col]
+            first, second = (None if np.isnan(v) else float(v) for v in self.dt_steps[row, col])
+            slot.occupied = True
+            slot.neighbor_id = self.node_ids[self.neighbor[row, col]]
+            slot.dt_value = None if np.isnan(self.dt[row, col]) else float(self.dt[row, col])
+            if col < CHILD_SLOTS:
+                slot.dt_sequence = [first] if first is not None else None
+            else:
+                slot.dt_sequence = [first, second]
+            slot.is_fixed = True  # Существующие связи зафиксированы
+        return valence
+
+
+def build_valence_table(node_ids: Sequence[str],
+                        edge_parent: np.ndarray,
+                        edge_child: np.ndarray,
+                        edge_dt: np.ndarray,
+                        edge_control: np.ndarray,
+                        out_rank: Optional[np.ndarray] = None,
+                        in_rank: Optional[np.ndarray] = None) -> ValenceTable:
+    """
+    Валентность всех узлов по массивам рёбер.
+
+    Args:
+        node_ids: ID узлов; рёбра ссылаются на позиции в этом списке
+        edge_parent, edge_child: (E,) индексы концов ребра
+        edge_dt: (E,) dt ребра (знак игнорируется, NaN — неизвестен)
+        edge_control: (E,) управление (NaN или 0 — тип не определён)
+        out_rank: (E,) порядок ребра среди исходящих родителя (по умолчанию — порядок массива)
+        in_rank: (E,) порядок ребра среди входящих ребёнка (по умолчанию — порядок массива)
+
+    Returns:
+        ValenceTable
+    """
+    n = len(node_ids)
+    edge_parent = np.asarray(edge_parent, dtype=np.int64)
+    edge_child = np.asarray(edge_child, dtype=np.int64)
+    edge_dt = np.abs(np.asarray(edge_dt, dtype=np.float64))
+    edge_control = np.asarray(edge_control, dtype=np.float64)
+    n_edges = len(edge_parent)
+    if out_rank is None:
+        out_rank = np.arange(n_edges)
+    if in_rank is None:
+        in_rank = np.arange(n_edges)
+    out_degree = np.bincount(edge_parent, minlength=n)
+
+    # Полурёбра: исходящие (forward) раньше входящих (backward) у каждого узла
+    src = np.concatenate((edge_parent, edge_child))
+    dst = np.concatenate((edge_child, edge_parent))
+    backward = np.concatenate((np.zeros(n_edges, dtype=np.int64), np.ones(n_edges, dtype=np.int64)))
+    dt = np.concatenate((edge_dt, -edge_dt))
+    control = np.concatenate((edge_control, edge_control))
+    rank = np.concatenate((out_rank, out_degree[edge_child] + in_rank))
+
+    order = np.lexsort((rank, src))
+    src, dst, backward, dt, control = src[order], dst[order], backward[order], dt[order], control[order]
+    is_min = (control < 0).astype(np.int64)
+    typed = (control != 0) & ~np.isnan(control)  # тип управления определён
+
+    degree = np.bincount(src, minlength=n)
+    start = np.cumsum(degree) - degree
+
+    occupied = np.zeros((n, N_SLOTS), dtype=bool)
+    total_dt = np.full((n, N_SLOTS), np.nan)
+    dt_steps = np.full((n, N_SLOTS, 2), np.nan)
+    neighbor = np.full((n, N_SLOTS), -1, dtype=np.int64)
+
+    # Дети: слот = направление времени × тип управления (неопределённое считается max)
+    child_slot = 2 * backward + is_min
+    won = _first_per_key(src * N_SLOTS + child_slot)
+    rows, cols = src[won], child_slot[won]
+    occupied[rows, cols] = True
+    neighbor[rows, cols] = dst[won]
+    total_dt[rows, cols] = dt[won]
+    dt_steps[rows, cols, 0] = dt[won]
+
+    # Внуки: полуребро s→m, затем все полурёбра m→t (развёртка по CSR)
+    first = np.flatnonzero(dst != src)
+    counts = degree[dst[first]]
+    first = np.repeat(first, counts)
+    second = start[dst[first]] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    keep = (dst[second] != src[first]) & (dst[second] != dst[first])
+    keep &= typed[first] & typed[second] & (is_min[first] != is_min[second])
+    first, second = first[keep], second[keep]
+
+    grandchild_slot = CHILD_SLOTS + 4 * backward[first] + 2 * is_min[first] + backward[second]
+    won = _first_per_key(src[first] * N_SLOTS + grandchild_slot)
+    first, second = first[won], second[won]
+    rows, cols = src[first], grandchild_slot[won]
+    occupied[rows, cols] = True
+    neighbor[rows, cols] = dst[second]
+    steps = np.column_stack((dt[first], dt[second]))
+    dt_steps[rows, cols] = steps
+    total_dt[rows, cols] = np.where(np.isnan(steps).all(axis=1), np.nan, np.nansum(steps, axis=1))
+
+    return ValenceTable(node_ids, occupied, total_dt, dt_steps, neighbor)
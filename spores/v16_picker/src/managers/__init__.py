@@ -1,7 +1,14 @@
 """
 Менеджеры для управления различными аспектами системы спор.
+
+BufferMergeManager реэкспортируется лениво: импорт пакета не должен
+тянуть за собой экспорт и отладочные картинки.
 """
 
-from .buffer_merge_manager import BufferMergeManager
+from ..utils.lazy_import import lazy_exports
 
 __all__ = ['BufferMergeManager']
+
+__getattr__ = lazy_exports(__name__, {
+    'BufferMergeManager': '.buffer_merge_manager',
+})
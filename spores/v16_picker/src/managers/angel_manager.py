@@ -1,6 +1,6 @@
-from ursina import destroy
 from ..visual.link import Link
 from ..visual.pillar import Pillar
+from ..visual.entity_pool import entity_pool
 import numpy as np
 from typing import Optional, List, Dict
 
@@ -37,20 +37,20 @@ class AngelManager:
         self.pillars_visible: bool = config.get('angel', {}).get('show_pillars', False)
 
     def clear_all(self) -> None:
-        """Удаляет все сущности, управляемые этим менеджером."""
+        """Удаляет все сущности, управляемые этим менеджером (возвращает их в пул)."""
         self.clear_ghosts()
         for e in self.angels + self.pillars + self.links:
             if hasattr(e, 'is_ghost') and e.is_ghost:
                 continue
-            destroy(e)
+            entity_pool.release(e, self.zoom_manager)
         self.angels, self.pillars, self.links = [], [], []
 
     def clear_ghosts(self) -> None:
         """Удаляет все призрачные сущности."""
         if self.ghost_link_angel:
-            # destroy(self.ghost_link_angel.parent_spore) # Родитель - реальный ангел, его удалять не нужно
-            destroy(self.ghost_link_angel.child_spore) # Удаляем ангела-потомка
-            destroy(self.ghost_link_angel)
+            # Родитель - реальный ангел, его удалять не нужно
+            entity_pool.release(self.ghost_link_angel.child_spore, self.zoom_manager) # Удаляем ангела-потомка
+            entity_pool.release(self.ghost_link_angel, self.zoom_manager)
             self.ghost_link_angel = None
 
     def on_spore_created(self, spore: Spore) -> None:
@@ -73,7 +73,8 @@ class AngelManager:
         # Создаем столб, если включено в конфиге
         if angel_config.get('show_pillars', True):
             pillar_width = angel_config['pillar_width']
-            pillar = Pillar(
+            pillar = entity_pool.acquire(
+                Pillar,
                 model='cube',
                 color=self.color_manager.get_color('angel', 'pillar'),
             )
@@ -83,6 +84,7 @@ class AngelManager:
             self.pillars.append(pillar)
             if self.zoom_manager:
                 self.zoom_manager.register_object(pillar, f"pillar_{spore.id}")
+                pillar._zoom_manager_key = f"pillar_{spore.id}"
 
         # Создаем ангела, если включено в конфиге
         angel = None
@@ -97,6 +99,7 @@ class AngelManager:
             self.angels.append(angel)
             if self.zoom_manager:
                 self.zoom_manager.register_object(angel, f"angel_{spore.id}")
+                angel._zoom_manager_key = f"angel_{spore.id}"
 
         # Создание связи, если включено и ангелы существуют
         if angel and angel_config.get('show_links', True):
@@ -106,7 +109,7 @@ class AngelManager:
                     last_non_goal_angel = a
                     break
             if not angel.is_goal and last_non_goal_angel and self.zoom_manager:
-                new_link = Link(parent_spore=last_non_goal_angel, child_spore=angel, color_manager=self.color_manager, zoom_manager=self.zoom_manager, config=self.config, link_type='angel', id_manager=self.id_manager)
+                new_link = entity_pool.acquire(Link, parent_spore=last_non_goal_angel, child_spore=angel, color_manager=self.color_manager, zoom_manager=self.zoom_manager, config=self.config, link_type='angel', id_manager=self.id_manager)
                 new_link.color = self.color_manager.get_color('angel', 'link')
                 new_link.enabled = self.angels_visible  # Устанавливаем видимость согласно флагу
                 self.links.append(new_link)
@@ -131,13 +134,15 @@ class AngelManager:
             child_angel = ghost_spore_child.clone()
             child_angel.color = self.color_manager.get_color('angel', 'ghost')
             self.zoom_manager.register_object(child_angel, "ghost_link_angel_child")
+            child_angel._zoom_manager_key = "ghost_link_angel_child"
 
             # Создаем связь
-            self.ghost_link_angel = Link(parent_spore=parent_angel, child_spore=child_angel, color_manager=self.color_manager, zoom_manager=self.zoom_manager, config=self.config, link_type='angel', id_manager=self.id_manager)
+            self.ghost_link_angel = entity_pool.acquire(Link, parent_spore=parent_angel, child_spore=child_angel, color_manager=self.color_manager, zoom_manager=self.zoom_manager, config=self.config, link_type='angel', id_manager=self.id_manager)
             self.ghost_link_angel.color = self.color_manager.get_color('angel', 'ghost_link')
             self.ghost_link_angel.enabled = self.angels_visible  # Устанавливаем видимость согласно флагу
             child_angel.enabled = self.angels_visible  # И для ангела-ребенка тоже
             self.zoom_manager.register_object(self.ghost_link_angel, "ghost_link_angel")
+            self.ghost_link_angel._zoom_manager_key = "ghost_link_angel"
         
         # Обновляем позицию ангела-ребенка
         child_angel = self.ghost_link_angel.child_spore
@@ -5,11 +5,33 @@ BufferMergeManager - компонент для мерджа спор по кла
 import numpy as np
 from typing import Dict, List, Optional, Tuple, Set
 import json
-import csv
 from datetime import datetime
-import matplotlib.pyplot as plt
 import os
+import re
+import threading
 from ..core.spore_graph import SporeGraph
+from ..core.graph_snapshot import GraphSnapshot, _color_to_rgb
+from ..visual.entity_pool import entity_pool
+from ..utils.lazy_import import lazy_module
+from ..utils.tracer import traced
+from ..utils.debug_output import get_logger
+
+# matplotlib нужен только для отладочных картинок — грузим при первом рисовании
+plt = lazy_module('matplotlib.pyplot')
+
+# Вывод мерджа: заголовки этапов — info, поэлементные подробности — debug
+_log = get_logger('merge')
+
+# dt и управление буферной связи в source_info
+_DT_PATTERN = re.compile(r'dt=([+-]?\d+\.?\d*)')
+_CONTROL_PATTERN = re.compile(r'u=([+-]?\d+\.?\d*)')
+
+# Знак управления -> (цвет линка, тип ребра реального графа)
+_REAL_LINK_STYLES = {
+    1: ('ghost_max', 'real_max'),         # Положительное управление = красный
+    -1: ('ghost_min', 'real_min'),        # Отрицательное управление = синий
+    0: ('link_default', 'real_default'),  # Нулевое управление = дефолтный цвет
+}
 
 
 class BufferMergeManager:
@@ -55,11 +77,26 @@ class BufferMergeManager:
             'processing_order': []
         }
 
-        print(f"🔄 BufferMergeManager создан (трешхолд: {distance_threshold})")
+        _log.info(lambda: f"🔄 BufferMergeManager создан (трешхолд: {distance_threshold})")
 
         # Счетчик материализаций для уникальных ключей ZoomManager
         self._materialization_counter = 0
 
+        # Экспорт реального графа: снимок .npz пишется всегда,
+        # JSON и разреженный CSV — только если включены явно
+        self.export_dir = "buffer"
+        self.export_json_on_materialize = False
+        self.export_sparse_csv_on_materialize = False
+        self.last_real_graph_snapshot: Optional[GraphSnapshot] = None
+
+        # Картинка и снимок после материализации: строятся по GraphSnapshot
+        # и при async_materialize_output пишутся в фоновом потоке
+        self.save_real_graph_image = True
+        self.export_snapshot_on_materialize = True
+        self.async_materialize_output = True
+        self._output_thread: Optional[threading.Thread] = None
+
+    @traced('BufferMergeManager.merge_ghost_tree')
     def merge_ghost_tree(self, tree_logic, save_image: bool = True) -> Dict:
         """
         Основной метод: мерджит призрачное дерево в буферный граф.
@@ -71,12 +108,12 @@ class BufferMergeManager:
         Returns:
             dict: статистика мерджа
         """
-        print("\n🔄 НАЧАЛО МЕРДЖА ПРИЗРАЧНОГО ДЕРЕВА")
+        _log.info("\n🔄 НАЧАЛО МЕРДЖА ПРИЗРАЧНОГО ДЕРЕВА")
         
         # 🔍 ДИАГНОСТИКА: Проверяем состояние буфера до очистки
         if hasattr(self, 'buffer_positions') and self.buffer_positions:
-            print(f"⚠️ ВНИМАНИЕ: В буфере найдены старые данные ({len(self.buffer_positions)} позиций)")
-            print(f"   Будет выполнена полная очистка...")
+            _log.warning(f"⚠️ ВНИМАНИЕ: В буфере найдены старые данные ({len(self.buffer_positions)} позиций)")
+            _log.info("   Будет выполнена полная очистка...")
 
         # Очищаем предыдущие результаты
         self._reset()
@@ -105,10 +142,10 @@ class BufferMergeManager:
             self._process_links(tree_logic)
 
             # ДОБАВИТЬ ПОСЛЕ СОЗДАНИЯ СВЯЗЕЙ:
-            print(f"\n🔍 DEBUG: Связи в буфере после мерджа:")
-            print(f"   📊 Всего буферных связей: {len(self.buffer_links)}")
+            _log.debug("\n🔍 DEBUG: Связи в буфере после мерджа:")
+            _log.info(lambda: f"   📊 Всего буферных связей: {len(self.buffer_links)}")
             for i, link in enumerate(self.buffer_links[:5]):  # Показать первые 5
-                print(f"   {i+1}. {link['parent_id']} → {link['child_id']} ({link['link_type']})")
+                _log.debug(lambda: f"   {i+1}. {link['parent_id']} → {link['child_id']} ({link['link_type']})")
 
             # 5. Сохраняем результат
             if save_image:
@@ -126,14 +163,14 @@ class BufferMergeManager:
             return self._get_success_result()
 
         except Exception as e:
-            print(f"❌ Ошибка мерджа: {e}")
+            _log.error(f"❌ Ошибка мерджа: {e}")
             import traceback
             traceback.print_exc()
             return self._get_error_result(str(e))
 
     def _reset(self):
         """Очищает состояние для нового мерджа."""
-        print(f"🧹 Очистка буферного графа перед новым мерджем...")
+        _log.info("🧹 Очистка буферного графа перед новым мерджем...")
         
         # Очищаем основные структуры
         self.buffer_graph.clear()
@@ -147,7 +184,7 @@ class BufferMergeManager:
             old_count = len(self.buffer_positions)
             self.buffer_positions.clear()
             if old_count > 0:
-                print(f"   🗑️ Удалено {old_count} старых позиций из буфера")
+                _log.info(lambda: f"   🗑️ Удалено {old_count} старых позиций из буфера")
         else:
             self.buffer_positions = {}
         
@@ -161,21 +198,21 @@ class BufferMergeManager:
             'merged_links': 0
         }
         
-        print(f"   ✅ Буферный граф полностью очищен")
+        _log.info("   ✅ Буферный граф полностью очищен")
 
     def _validate_tree_logic(self, tree_logic) -> bool:
         """Проверяет что tree_logic готов к обработке."""
         if not tree_logic:
-            print("❌ tree_logic is None")
+            _log.error("❌ tree_logic is None")
             return False
 
         if not hasattr(tree_logic, 'root') or not tree_logic.root:
-            print("❌ Корень дерева не найден")
+            _log.error("❌ Корень дерева не найден")
             return False
 
         if (not hasattr(tree_logic, '_children_created') or
                 not tree_logic._children_created):
-            print("❌ Дети дерева не созданы")
+            _log.error("❌ Дети дерева не созданы")
             return False
 
         return True
@@ -184,55 +221,55 @@ class BufferMergeManager:
         """
         ДИАГНОСТИЧЕСКИЙ МЕТОД: Исследует доступные источники информации о связях.
         """
-        print("\n🔍 ИССЛЕДОВАНИЕ ИСТОЧНИКОВ СВЯЗЕЙ:")
+        _log.debug("\n🔍 ИССЛЕДОВАНИЕ ИСТОЧНИКОВ СВЯЗЕЙ:")
 
         # 1. Исследуем tree_logic
-        print("\n📊 1. TREE_LOGIC:")
-        print(f"   📍 Корень: {tree_logic.root}")
+        _log.debug("\n📊 1. TREE_LOGIC:")
+        _log.debug(lambda: f"   📍 Корень: {tree_logic.root}")
         
         if hasattr(tree_logic, 'children') and tree_logic.children:
-            print(f"   👶 Детей: {len(tree_logic.children)}")
+            _log.debug(lambda: f"   👶 Детей: {len(tree_logic.children)}")
             for i, child in enumerate(tree_logic.children[:2]):  # Показываем первых 2
-                print(f"      Ребенок {i}: pos={child.get('position', 'нет')}, "
+                _log.debug(lambda: f"      Ребенок {i}: pos={child.get('position', 'нет')}, "
                       f"dt={child.get('dt', 'нет')}, "
                       f"control={child.get('control', 'нет')}")
         
         if hasattr(tree_logic, 'grandchildren') and tree_logic.grandchildren:
-            print(f"   👶👶 Внуков: {len(tree_logic.grandchildren)}")
+            _log.debug(lambda: f"   👶👶 Внуков: {len(tree_logic.grandchildren)}")
             for i, grandchild in enumerate(tree_logic.grandchildren[:2]):  # Показываем первых 2
-                print(f"      Внук {i}: pos={grandchild.get('position', 'нет')}, "
+                _log.debug(lambda: f"      Внук {i}: pos={grandchild.get('position', 'нет')}, "
                       f"dt={grandchild.get('dt', 'нет')}, control={grandchild.get('control', 'нет')}, "
                       f"parent_idx={grandchild.get('parent_idx', 'нет')}")
         
         # 2. Исследуем prediction_manager
         if manual_spore_manager and hasattr(manual_spore_manager, 'prediction_manager'):
             prediction_manager = manual_spore_manager.prediction_manager
-            print(f"\n📊 2. PREDICTION_MANAGER:")
+            _log.debug("\n📊 2. PREDICTION_MANAGER:")
             
             if hasattr(prediction_manager, 'ghost_graph'):
                 ghost_graph = prediction_manager.ghost_graph
-                print(f"   👻 Ghost graph: {len(ghost_graph.nodes)} узлов, {len(ghost_graph.edges)} связей")
+                _log.debug(lambda: f"   👻 Ghost graph: {len(ghost_graph.nodes)} узлов, {len(ghost_graph.edges)} связей")
                 
                 # Показываем несколько связей
                 edge_count = 0
                 for edge_key, edge_info in ghost_graph.edges.items():
                     if edge_count < 3:  # Показываем первые 3
-                        print(f"      Связь {edge_count}: {edge_key} -> type={edge_info.link_type}")
+                        _log.debug(lambda: f"      Связь {edge_count}: {edge_key} -> type={edge_info.link_type}")
                         edge_count += 1
             
             if hasattr(prediction_manager, 'prediction_links'):
                 links = prediction_manager.prediction_links
-                print(f"   🔗 Prediction links: {len(links)} линков")
+                _log.debug(lambda: f"   🔗 Prediction links: {len(links)} линков")
                 
                 # Показываем несколько линков
                 for i, link in enumerate(links[:3]):  # Показываем первые 3
                     parent_id = getattr(link.parent_spore, 'id', 'нет') if hasattr(link, 'parent_spore') else 'нет'
                     child_id = getattr(link.child_spore, 'id', 'нет') if hasattr(link, 'child_spore') else 'нет'
                     color = getattr(link, 'current_color', 'нет') if hasattr(link, 'current_color') else 'нет'
-                    print(f"      Линк {i}: {parent_id} -> {child_id}, цвет={color}")
+                    _log.debug(lambda: f"      Линк {i}: {parent_id} -> {child_id}, цвет={color}")
         
         # 3. Рекомендация
-        print(f"\n💡 РЕКОМЕНДАЦИИ:")
+        _log.debug("\n💡 РЕКОМЕНДАЦИИ:")
         
         has_tree_structure = (hasattr(tree_logic, 'children') and tree_logic.children and 
                              hasattr(tree_logic, 'grandchildren') and tree_logic.grandchildren)
@@ -242,19 +279,19 @@ class BufferMergeManager:
                                hasattr(manual_spore_manager.prediction_manager, 'prediction_links'))
         
         if has_tree_structure:
-            print(f"   ✅ tree_logic содержит четкую структуру parent-child")
-            print(f"   💡 Рекомендация: использовать tree_logic как основной источник")
+            _log.debug("   ✅ tree_logic содержит четкую структуру parent-child")
+            _log.debug("   💡 Рекомендация: использовать tree_logic как основной источник")
         
         if has_prediction_links:
-            print(f"   ✅ prediction_manager содержит готовые связи с цветами/направлениями")  
-            print(f"   💡 Рекомендация: использовать prediction_manager для типов связей")
+            _log.debug("   ✅ prediction_manager содержит готовые связи с цветами/направлениями")  
+            _log.debug("   💡 Рекомендация: использовать prediction_manager для типов связей")
         
         if has_tree_structure and has_prediction_links:
-            print(f"   🎯 ЛУЧШИЙ ПЛАН: Структура из tree_logic + цвета/типы из prediction_manager")
+            _log.debug("   🎯 ЛУЧШИЙ ПЛАН: Структура из tree_logic + цвета/типы из prediction_manager")
 
     def _process_root(self, tree_logic):
         """Обрабатывает корень дерева."""
-        print("\n📍 ОБРАБОТКА КОРНЯ")
+        _log.info("\n📍 ОБРАБОТКА КОРНЯ")
 
         root_data = tree_logic.root
         root_position = np.array(root_data['position'])
@@ -271,23 +308,23 @@ class BufferMergeManager:
         self.stats['added_to_buffer'] += 1
         self.stats['processing_order'].append(f"root({ghost_id}→{buffer_id})")
 
-        print(f"   ✅ Корень добавлен: {ghost_id} → {buffer_id}")
-        print(f"   📍 Позиция: ({root_position[0]:.4f}, {root_position[1]:.4f})")
+        _log.info(lambda: f"   ✅ Корень добавлен: {ghost_id} → {buffer_id}")
+        _log.info(lambda: f"   📍 Позиция: ({root_position[0]:.4f}, {root_position[1]:.4f})")
 
     def _process_children(self, tree_logic):
         """Обрабатывает детей дерева."""
-        print("\n👶 ОБРАБОТКА ДЕТЕЙ")
+        _log.info("\n👶 ОБРАБОТКА ДЕТЕЙ")
 
         if not hasattr(tree_logic, 'children') or not tree_logic.children:
-            print("   ⏭️ Дети отсутствуют")
+            _log.info("   ⏭️ Дети отсутствуют")
             return
 
         for i, child_data in enumerate(tree_logic.children):
             child_position = np.array(child_data['position'])
             ghost_id = f"ghost_child_{i}"
 
-            print(f"\n   🔍 Ребенок {i}: {ghost_id}")
-            print(f"      📍 Позиция: ({child_position[0]:.4f}, {child_position[1]:.4f})")
+            _log.debug(lambda: f"\n   🔍 Ребенок {i}: {ghost_id}")
+            _log.debug(lambda: f"      📍 Позиция: ({child_position[0]:.4f}, {child_position[1]:.4f})")
 
             # Ищем ближайшую спору в буферном графе
             closest_buffer_id, min_distance = self._find_closest_in_buffer(child_position)
@@ -311,21 +348,21 @@ class BufferMergeManager:
 
     def _process_grandchildren(self, tree_logic):
         """Обрабатывает внуков дерева."""
-        print("\n👶👶 ОБРАБОТКА ВНУКОВ")
+        _log.info("\n👶👶 ОБРАБОТКА ВНУКОВ")
 
         if (not hasattr(tree_logic, '_grandchildren_created') or
                 not tree_logic._grandchildren_created or
                 not hasattr(tree_logic, 'grandchildren') or
                 not tree_logic.grandchildren):
-            print("   ⏭️ Внуки отсутствуют")
+            _log.info("   ⏭️ Внуки отсутствуют")
             return
 
         for i, grandchild_data in enumerate(tree_logic.grandchildren):
             grandchild_position = np.array(grandchild_data['position'])
             ghost_id = f"ghost_grandchild_{i}"
 
-            print(f"\n   🔍 Внук {i}: {ghost_id}")
-            print(f"      📍 Позиция: ({grandchild_position[0]:.4f}, "
+            _log.debug(lambda: f"\n   🔍 Внук {i}: {ghost_id}")
+            _log.debug(lambda: f"      📍 Позиция: ({grandchild_position[0]:.4f}, "
                   f"{grandchild_position[1]:.4f})")
 
             # Ищем ближайшую спору в буферном графе
@@ -351,7 +388,7 @@ class BufferMergeManager:
 
     def _process_links(self, tree_logic):
         """Обрабатывает связи между спорами дерева."""
-        print(f"\n🔗 ОБРАБОТКА СВЯЗЕЙ")
+        _log.info("\n🔗 ОБРАБОТКА СВЯЗЕЙ")
         
         # 1. Создаем связи корень ↔ дети
         self._create_root_child_links(tree_logic)
@@ -367,7 +404,7 @@ class BufferMergeManager:
         if not hasattr(tree_logic, 'children') or not tree_logic.children:
             return
             
-        print(f"\n   🔗 СВЯЗИ КОРЕНЬ ↔ ДЕТИ:")
+        _log.info("\n   🔗 СВЯЗИ КОРЕНЬ ↔ ДЕТИ:")
         root_buffer_id = "buffer_root"
         
         for i, child_data in enumerate(tree_logic.children):
@@ -375,7 +412,7 @@ class BufferMergeManager:
             child_buffer_id = self.ghost_to_buffer.get(child_ghost_id)
             
             if not child_buffer_id:
-                print(f"      ❌ Не найден buffer_id для {child_ghost_id}")
+                _log.error(lambda: f"      ❌ Не найден buffer_id для {child_ghost_id}")
                 continue
                 
             # Определяем тип связи по control
@@ -409,39 +446,39 @@ class BufferMergeManager:
                 arrow_display = f"{child_id} ← {parent_id}"
                 direction_info = "backward"
 
-            print(f"      ✅ Связь {i}: {arrow_display} "
+            _log.debug(lambda: f"      ✅ Связь {i}: {arrow_display} "
                   f"({link_type}, dt={child_data['dt']:+.3f}, u={child_data['control']:+.1f}, {direction_info})")
         
         # Краткий вывод связей
-        print(f"   🔗 СВЯЗИ КОРЕНЬ ↔ ДЕТИ:")
+        _log.info("   🔗 СВЯЗИ КОРЕНЬ ↔ ДЕТИ:")
         for i, child_data in enumerate(tree_logic.children):
             child_ghost_id = f"ghost_child_{i}"
             child_buffer_id = self.ghost_to_buffer.get(child_ghost_id)
             
             if child_data['dt'] > 0:  # forward: корень → ребенок  
-                print(f"      ✅ buffer_root → {child_buffer_id} ({self._get_link_type(child_data)})")
+                _log.debug(lambda: f"      ✅ buffer_root → {child_buffer_id} ({self._get_link_type(child_data)})")
             else:  # backward: ребенок → корень
-                print(f"      ✅ {child_buffer_id} → buffer_root ({self._get_link_type(child_data)})")
+                _log.debug(lambda: f"      ✅ {child_buffer_id} → buffer_root ({self._get_link_type(child_data)})")
 
     def _create_child_grandchild_links(self, tree_logic):
         """Создает связи между детьми и внуками.""" 
         if not hasattr(tree_logic, 'grandchildren') or not tree_logic.grandchildren:
             return
             
-        print(f"\n   🔗 СВЯЗИ ДЕТИ ↔ ВНУКИ:")
+        _log.info("\n   🔗 СВЯЗИ ДЕТИ ↔ ВНУКИ:")
         
         for i, grandchild_data in enumerate(tree_logic.grandchildren):
             grandchild_ghost_id = f"ghost_grandchild_{i}"
             grandchild_buffer_id = self.ghost_to_buffer.get(grandchild_ghost_id)
             
             if not grandchild_buffer_id:
-                print(f"      ❌ Не найден buffer_id для {grandchild_ghost_id}")
+                _log.error(lambda: f"      ❌ Не найден buffer_id для {grandchild_ghost_id}")
                 continue
                 
             # Получаем parent_idx - номер ребенка-родителя
             parent_idx = grandchild_data.get('parent_idx')
             if parent_idx is None:
-                print(f"      ❌ Нет parent_idx для внука {i}")
+                _log.error(lambda: f"      ❌ Нет parent_idx для внука {i}")
                 continue
                 
             # Находим buffer_id родителя-ребенка
@@ -449,7 +486,7 @@ class BufferMergeManager:
             parent_buffer_id = self.ghost_to_ghosts.get(parent_ghost_id) if False else self.ghost_to_buffer.get(parent_ghost_id)
             
             if not parent_buffer_id:
-                print(f"      ❌ Не найден buffer_id для родителя {parent_ghost_id}")
+                _log.error(lambda: f"      ❌ Не найден buffer_id для родителя {parent_ghost_id}")
                 continue
             
             # Определяем тип связи по control
@@ -469,7 +506,7 @@ class BufferMergeManager:
             existing_link = self._find_existing_link(parent_id, child_id, link_type)
             if existing_link:
                 direction_symbol = "→" if dt > 0 else "←"
-                print(f"      🔗 Связь уже существует: {parent_id} {direction_symbol} {child_id} ({link_type})")
+                _log.debug(lambda: f"      🔗 Связь уже существует: {parent_id} {direction_symbol} {child_id} ({link_type})")
                 self.stats['merged_links'] += 1
                 continue
             
@@ -491,7 +528,7 @@ class BufferMergeManager:
                 arrow_display = f"{child_id} ← {parent_id}" 
                 direction_info = "backward"
 
-            print(f"      ✅ Связь {i}: {arrow_display} "
+            _log.debug(lambda: f"      ✅ Связь {i}: {arrow_display} "
                   f"({link_type}, dt={grandchild_data['dt']:+.3f}, u={grandchild_data['control']:+.1f}, {direction_info})")
 
     def _get_link_type(self, spore_data):
@@ -509,9 +546,9 @@ class BufferMergeManager:
 
     def _print_links_stats(self):
         """Выводит статистику связей."""
-        print(f"\n📊 СТАТИСТИКА СВЯЗЕЙ:")
-        print(f"   🔗 Всего связей создано: {len(self.buffer_links)}")
-        print(f"   🔗 Объединено дублирующихся: {self.stats['merged_links']}")
+        _log.info("\n📊 СТАТИСТИКА СВЯЗЕЙ:")
+        _log.info(lambda: f"   🔗 Всего связей создано: {len(self.buffer_links)}")
+        _log.info(lambda: f"   🔗 Объединено дублирующихся: {self.stats['merged_links']}")
         
         # Группируем по типам
         link_types = {}
@@ -519,12 +556,12 @@ class BufferMergeManager:
             link_type = link['link_type']
             link_types[link_type] = link_types.get(link_type, 0) + 1
         
-        print(f"   🎨 По типам: {link_types}")
+        _log.info(lambda: f"   🎨 По типам: {link_types}")
         
         # Показываем несколько примеров связей
-        print(f"\n📝 ПРИМЕРЫ СВЯЗЕЙ:")
+        _log.info("\n📝 ПРИМЕРЫ СВЯЗЕЙ:")
         for i, link in enumerate(self.buffer_links[:4]):  # Показываем первые 4
-            print(f"   {i+1}. {link['parent_id']} → {link['child_id']} ({link['link_type']})")
+            _log.debug(lambda: f"   {i+1}. {link['parent_id']} → {link['child_id']} ({link['link_type']})")
 
     def _find_closest_in_buffer(self, position: np.ndarray) -> Tuple[Optional[str], float]:
         """
@@ -563,15 +600,15 @@ class BufferMergeManager:
             self.buffer_to_ghosts[buffer_id] = []
         self.buffer_to_ghosts[buffer_id].append(ghost_id)
 
-        print(f"      ✅ Добавлен в буфер: {ghost_id} → {buffer_id}")
+        _log.info(lambda: f"      ✅ Добавлен в буфер: {ghost_id} → {buffer_id}")
         
         # 🔍 ОТЛАДКА: Проверяем что позиция и dt действительно сохранены
         if buffer_id in self.buffer_positions:
             saved_pos = self.buffer_positions[buffer_id]
-            print(f"         📍 Позиция сохранена: ({saved_pos[0]:.4f}, {saved_pos[1]:.4f})")
+            _log.info(lambda: f"         📍 Позиция сохранена: ({saved_pos[0]:.4f}, {saved_pos[1]:.4f})")
         if buffer_id in self.buffer_spore_dt:
             saved_dt = self.buffer_spore_dt[buffer_id]
-            print(f"         ⏱️ DT сохранен: {saved_dt:+.6f}")
+            _log.info(lambda: f"         ⏱️ DT сохранен: {saved_dt:+.6f}")
 
     def _merge_to_existing(self, ghost_id: str, buffer_id: str, distance: float):
         """Объединяет призрачную спору с существующей в буфере."""
@@ -581,8 +618,8 @@ class BufferMergeManager:
             self.buffer_to_ghosts[buffer_id] = []
         self.buffer_to_ghosts[buffer_id].append(ghost_id)
 
-        print(f"      🔗 Объединен с существующим: {ghost_id} → {buffer_id}")
-        print(f"      📏 Расстояние: {distance:.2e} < "
+        _log.info(lambda: f"      🔗 Объединен с существующим: {ghost_id} → {buffer_id}")
+        _log.info(lambda: f"      📏 Расстояние: {distance:.2e} < "
               f"{self.distance_threshold:.2e}")
 
     def _save_buffer_image(self) -> str:
@@ -623,11 +660,11 @@ class BufferMergeManager:
             plt.savefig(save_path, dpi=150, bbox_inches='tight')
             plt.close()
 
-            print(f"\n📊 Картинка буферного графа сохранена: {save_path}")
+            _log.info(lambda: f"\n📊 Картинка буферного графа сохранена: {save_path}")
             return save_path
 
         except Exception as e:
-            print(f"❌ Ошибка сохранения картинки: {e}")
+            _log.error(f"❌ Ошибка сохранения картинки: {e}")
             import traceback
             traceback.print_exc()
             return ""
@@ -668,7 +705,7 @@ class BufferMergeManager:
             'buffer_min': 'blue'      # u_min - синий
         }
 
-        print(f"🎨 ОТЛАДКА ВИЗУАЛИЗАЦИИ: Рисование {len(getattr(self, 'buffer_links', []))} связей")
+        _log.debug(lambda: f"🎨 ОТЛАДКА ВИЗУАЛИЗАЦИИ: Рисование {len(getattr(self, 'buffer_links', []))} связей")
 
         for i, link in enumerate(getattr(self, 'buffer_links', [])):
             parent_id = link['parent_id']
@@ -680,25 +717,25 @@ class BufferMergeManager:
             child_pos = self.buffer_positions.get(child_id)
 
             if parent_pos is None or child_pos is None:
-                print(f"   ❌ Связь {i}: позиции не найдены ({parent_id}, {child_id})")
+                _log.error(lambda: f"   ❌ Связь {i}: позиции не найдены ({parent_id}, {child_id})")
                 continue
 
             # ОТЛАДКА: выводим что именно рисуем
-            print(f"   🎨 Связь {i}: {parent_id} → {child_id}")
-            print(f"      📍 Начало ({parent_id}): ({parent_pos[0]:.4f}, {parent_pos[1]:.4f})")  
-            print(f"      📍 Конец ({child_id}):  ({child_pos[0]:.4f}, {child_pos[1]:.4f})")
-            print(f"      🎨 Цвет: {link_colors.get(link_type, 'gray')} ({link_type})")
+            _log.debug(lambda: f"   🎨 Связь {i}: {parent_id} → {child_id}")
+            _log.debug(lambda: f"      📍 Начало ({parent_id}): ({parent_pos[0]:.4f}, {parent_pos[1]:.4f})")  
+            _log.debug(lambda: f"      📍 Конец ({child_id}):  ({child_pos[0]:.4f}, {child_pos[1]:.4f})")
+            _log.debug(lambda: f"      🎨 Цвет: {link_colors.get(link_type, 'gray')} ({link_type})")
             
             # Проверяем соответствие ID и позиций
             actual_parent_pos = self.buffer_positions.get(parent_id)
             actual_child_pos = self.buffer_positions.get(child_id)
-            print(f"      🔍 Проверка: parent_pos == actual_parent_pos: {np.allclose(parent_pos, actual_parent_pos)}")
-            print(f"      🔍 Проверка: child_pos == actual_child_pos: {np.allclose(child_pos, actual_child_pos)}")
+            _log.debug(lambda: f"      🔍 Проверка: parent_pos == actual_parent_pos: {np.allclose(parent_pos, actual_parent_pos)}")
+            _log.debug(lambda: f"      🔍 Проверка: child_pos == actual_child_pos: {np.allclose(child_pos, actual_child_pos)}")
             
             # Анализируем source_info для понимания направления
             if 'source_info' in link:
                 source_info = link['source_info']
-                print(f"      📋 Source info: {source_info}")
+                _log.debug(lambda: f"      📋 Source info: {source_info}")
                 
                 # Извлекаем dt из source_info
                 import re
@@ -706,14 +743,14 @@ class BufferMergeManager:
                 if dt_match:
                     dt_value = float(dt_match.group(1))
                     expected_direction = "forward" if dt_value > 0 else "backward"
-                    print(f"      📐 DT: {dt_value:.3f} → ожидаемое направление: {expected_direction}")
+                    _log.debug(lambda: f"      📐 DT: {dt_value:.3f} → ожидаемое направление: {expected_direction}")
 
             # JSON уже содержит правильное направление в parent_id и child_id
             # Просто рисуем стрелку от parent_id к child_id как указано в JSON
             dx = child_pos[0] - parent_pos[0]
             dy = child_pos[1] - parent_pos[1]
             
-            print(f"      🎯 Направление из JSON: {parent_id} → {child_id}")
+            _log.debug(lambda: f"      🎯 Направление из JSON: {parent_id} → {child_id}")
 
             # Расчет с уменьшением длины стрелки на 20%
             length = np.sqrt(dx * dx + dy * dy)
@@ -729,13 +766,13 @@ class BufferMergeManager:
                 arrow_dx = dx * reduction_factor
                 arrow_dy = dy * reduction_factor
                 
-                print(f"      🔧 Расчет с уменьшением на 30%:")
-                print(f"         Parent: ({parent_pos[0]:.4f}, {parent_pos[1]:.4f})")
-                print(f"         Child:  ({child_pos[0]:.4f}, {child_pos[1]:.4f})")
-                print(f"         Start:  ({start_x:.4f}, {start_y:.4f})")
-                print(f"         Оригинальная длина: {length:.4f}")
-                print(f"         Новая длина: {length * reduction_factor:.4f}")
-                print(f"         Arrow:  dx={arrow_dx:.4f}, dy={arrow_dy:.4f}")
+                _log.debug("      🔧 Расчет с уменьшением на 30%:")
+                _log.debug(lambda: f"         Parent: ({parent_pos[0]:.4f}, {parent_pos[1]:.4f})")
+                _log.debug(lambda: f"         Child:  ({child_pos[0]:.4f}, {child_pos[1]:.4f})")
+                _log.debug(lambda: f"         Start:  ({start_x:.4f}, {start_y:.4f})")
+                _log.debug(lambda: f"         Оригинальная длина: {length:.4f}")
+                _log.debug(lambda: f"         Новая длина: {length * reduction_factor:.4f}")
+                _log.debug(lambda: f"         Arrow:  dx={arrow_dx:.4f}, dy={arrow_dy:.4f}")
 
                 # Настраиваем ширину стрелки в зависимости от длины
                 # Минимальная ширина 0.5, максимальная 3.0
@@ -752,21 +789,21 @@ class BufferMergeManager:
                     fc=color, ec=color, alpha=0.7, linewidth=arrow_width
                 )
                 
-                print(f"      ✅ Стрелка нарисована: {start_x:.4f},{start_y:.4f} → {start_x+arrow_dx:.4f},{start_y+arrow_dy:.4f}")
-                print(f"      📐 Вектор: dx={dx:.4f}, dy={dy:.4f}, длина={length:.4f}")
-                print(f"      📐 Arrow vector: dx={arrow_dx:.4f}, dy={arrow_dy:.4f}")
+                _log.debug(lambda: f"      ✅ Стрелка нарисована: {start_x:.4f},{start_y:.4f} → {start_x+arrow_dx:.4f},{start_y+arrow_dy:.4f}")
+                _log.debug(lambda: f"      📐 Вектор: dx={dx:.4f}, dy={dy:.4f}, длина={length:.4f}")
+                _log.debug(lambda: f"      📐 Arrow vector: dx={arrow_dx:.4f}, dy={arrow_dy:.4f}")
                 
                 # Проверяем правильность направления стрелки
                 end_x = start_x + arrow_dx
                 end_y = start_y + arrow_dy
-                print(f"      🎯 Проверка направления:")
-                print(f"         Начало стрелки: ({start_x:.4f}, {start_y:.4f})")
-                print(f"         Конец стрелки:  ({end_x:.4f}, {end_y:.4f})")
-                print(f"         JSON направление: {parent_id} → {child_id}")
-                print(f"         Arrow вектор: dx={arrow_dx:.4f}, dy={arrow_dy:.4f}")
+                _log.debug("      🎯 Проверка направления:")
+                _log.debug(lambda: f"         Начало стрелки: ({start_x:.4f}, {start_y:.4f})")
+                _log.debug(lambda: f"         Конец стрелки:  ({end_x:.4f}, {end_y:.4f})")
+                _log.debug(lambda: f"         JSON направление: {parent_id} → {child_id}")
+                _log.debug(lambda: f"         Arrow вектор: dx={arrow_dx:.4f}, dy={arrow_dy:.4f}")
 
             else:
-                print(f"   ⚠️ Связь {i}: нулевая длина!")
+                _log.warning(lambda: f"   ⚠️ Связь {i}: нулевая длина!")
 
     def _add_legend(self, ax):
         """Добавляет легенду к графику."""
@@ -832,14 +869,14 @@ class BufferMergeManager:
             with open(save_path, 'w', encoding='utf-8') as f:
                 json.dump(export_data, f, indent=2, ensure_ascii=False)
             
-            print(f"\n💾 Буферный граф экспортирован: {save_path}")
-            print(f"   📊 Спор: {len(export_data['spores'])}")
-            print(f"   🔗 Связей: {len(export_data['links'])}")
+            _log.info(lambda: f"\n💾 Буферный граф экспортирован: {save_path}")
+            _log.info(lambda: f"   📊 Спор: {len(export_data['spores'])}")
+            _log.info(lambda: f"   🔗 Связей: {len(export_data['links'])}")
             
             return save_path
             
         except Exception as e:
-            print(f"❌ Ошибка экспорта буферного графа: {e}")
+            _log.error(f"❌ Ошибка экспорта буферного графа: {e}")
             import traceback
             traceback.print_exc()
             return ""
@@ -881,29 +918,29 @@ class BufferMergeManager:
 
     def _print_final_stats(self):
         """Выводит итоговую статистику мерджа."""
-        print("\n📊 ИТОГОВАЯ СТАТИСТИКА МЕРДЖА:")
-        print(f"   🔢 Всего обработано спор: {self.stats['total_processed']}")
-        print(f"   ➕ Добавлено в буфер: {self.stats['added_to_buffer']}")
-        print(f"   🔗 Объединено с существующими: {self.stats['merged_to_existing']}")
+        _log.info("\n📊 ИТОГОВАЯ СТАТИСТИКА МЕРДЖА:")
+        _log.info(lambda: f"   🔢 Всего обработано спор: {self.stats['total_processed']}")
+        _log.info(lambda: f"   ➕ Добавлено в буфер: {self.stats['added_to_buffer']}")
+        _log.info(lambda: f"   🔗 Объединено с существующими: {self.stats['merged_to_existing']}")
         compression_ratio = (self.stats['merged_to_existing'] /
                                 max(self.stats['total_processed'], 1))
-        print(f"   📉 Коэффициент сжатия: {compression_ratio:.1%}")
-        print(f"   🔗 Связей создано: {len(getattr(self, 'buffer_links', []))}")
+        _log.info(lambda: f"   📉 Коэффициент сжатия: {compression_ratio:.1%}")
+        _log.info(lambda: f"   🔗 Связей создано: {len(getattr(self, 'buffer_links', []))}")
         if self.stats.get('merged_links', 0) > 0:
-            print(f"   🔗 Связей объединено: {self.stats['merged_links']}")
+            _log.info(lambda: f"   🔗 Связей объединено: {self.stats['merged_links']}")
 
         # Информация о сохраненных файлах
         if 'image_path' in self.stats:
-            print(f"   🖼️ Визуализация: {self.stats['image_path']}")
+            _log.info(lambda: f"   🖼️ Визуализация: {self.stats['image_path']}")
         if 'export_path' in self.stats:
-            print(f"   💾 JSON экспорт: {self.stats['export_path']}")
+            _log.info(lambda: f"   💾 JSON экспорт: {self.stats['export_path']}")
 
-        print("\n🗺️ КАРТА СООТВЕТСТВИЙ:")
+        _log.info("\n🗺️ КАРТА СООТВЕТСТВИЙ:")
         for buffer_id, ghost_list in self.buffer_to_ghosts.items():
             if len(ghost_list) > 1:
-                print(f"   🔗 {buffer_id} ← {ghost_list}")
+                _log.debug(lambda: f"   🔗 {buffer_id} ← {ghost_list}")
             else:
-                print(f"   📍 {buffer_id} ← {ghost_list[0]}")
+                _log.debug(lambda: f"   📍 {buffer_id} ← {ghost_list[0]}")
 
     def _get_success_result(self) -> Dict:
         """Возвращает результат успешного мерджа."""
@@ -931,9 +968,16 @@ class BufferMergeManager:
         return (self.ghost_to_buffer.copy(),
                 self.buffer_to_ghosts.copy())
 
+    @traced('BufferMergeManager.materialize_buffer_to_real')
     def materialize_buffer_to_real(self, spore_manager, zoom_manager, color_manager, pendulum, config) -> Dict:
         """
         Материализует буферный граф в реальные споры и связи.
+
+        Споры и связи создаются одним пакетом: оптимальные шаги считаются
+        одним векторным проходом, граф публикуется одной новой версией,
+        трансформация применяется только к новым объектам. Картинка и
+        снимок реального графа строятся по GraphSnapshot и при
+        async_materialize_output пишутся в фоновом потоке.
         
         Args:
             spore_manager: SporeManager для создания реальных спор и связей
@@ -943,9 +987,10 @@ class BufferMergeManager:
             config: конфиг для настроек спор
             
         Returns:
-            dict: результат материализации
+            dict: результат материализации; 'spores' — buffer_id -> спора,
+            'links' — (parent_buffer_id, child_buffer_id) -> линк
         """
-        print(f"\n🎨 МАТЕРИАЛИЗАЦИЯ БУФЕРНОГО ГРАФА В РЕАЛЬНЫЙ")
+        _log.info("\n🎨 МАТЕРИАЛИЗАЦИЯ БУФЕРНОГО ГРАФА В РЕАЛЬНЫЙ")
         
         if not self.buffer_positions:
             return self._get_error_result("Буферный граф пуст - нечего материализовать")
@@ -960,97 +1005,96 @@ class BufferMergeManager:
             
             # 📊 ДИАГНОСТИКА: Показываем количество целевых спор ДО материализации
             existing_goals = [s for s in spore_manager.objects if hasattr(s, 'is_goal') and s.is_goal]
-            print(f"   📊 Целевых спор до материализации: {len(existing_goals)}")
+            _log.info(lambda: f"   📊 Целевых спор до материализации: {len(existing_goals)}")
             
             # Увеличиваем счетчик материализаций для уникальных ключей
             self._materialization_counter += 1
-            print(f"🎨 Материализация #{self._materialization_counter}")
+            _log.info(lambda: f"🎨 Материализация #{self._materialization_counter}")
+
+            # Фоновый вывод прошлой материализации пишет те же файлы
+            self.wait_for_output()
             
             # 1. Создаем реальные споры
             real_spores_map = self._create_real_spores(
                 spore_manager, zoom_manager, color_manager, pendulum, config, materialize_stats)
             
             # 2. Создаем реальные связи
-            self._create_real_links(spore_manager, real_spores_map, materialize_stats, zoom_manager, config)
-            
-            # 3. Создаем визуализацию реального графа  
-            visualization_path = self._create_real_graph_visualization(spore_manager)
-            if visualization_path:
-                materialize_stats['visualization_path'] = visualization_path
+            real_links = self._create_real_links(spore_manager, real_spores_map, materialize_stats, zoom_manager, config)
+            real_links_map = {}
+            for key, visual_link in real_links:
+                real_links_map.setdefault(key, visual_link)
+
+            # 3. Одна новая версия графа на всю материализацию
+            if hasattr(spore_manager, 'mark_graph_changed'):
+                spore_manager.mark_graph_changed()
+
+            # 4. Регистрируем и трансформируем только новые объекты
+            new_objects = {obj._zoom_manager_key: obj for obj in real_spores_map.values()}
+            new_objects.update((visual_link._zoom_manager_key, visual_link) for _, visual_link in real_links)
+            zoom_manager.register_objects(new_objects)
+
+            # 5. Картинка и снимок реального графа
+            self._start_materialize_output(spore_manager, materialize_stats)
             
-            # 4. Выводим статистику
+            # 6. Выводим статистику
             self._print_materialize_stats(materialize_stats)
-            
-            # 5. Обновляем трансформации
-            zoom_manager.update_transform()
-            
-            # 6. 🆕 ЭКСПОРТ РЕАЛЬНОГО ГРАФА В JSON (после создания спор и связей)
-            real_graph_export_path = self._export_real_graph_json(spore_manager)
-            if real_graph_export_path:
-                materialize_stats['real_graph_export_path'] = real_graph_export_path
-                print(f"   💾 Реальный граф экспортирован: {real_graph_export_path}")
 
             # 7. Добавляем материализованные споры в историю групп ManualSporeManager
             if hasattr(self, '_manual_spore_manager_ref') and self._manual_spore_manager_ref:
-                print(f"\n📚 ДОБАВЛЕНИЕ В ИСТОРИЮ ГРУПП:")
+                _log.info("\n📚 ДОБАВЛЕНИЕ В ИСТОРИЮ ГРУПП:")
                 
-                # Собираем все созданные споры
                 materialized_spores = list(real_spores_map.values())
-                materialized_links = []
-                
-                # Собираем все созданные связи
-                for link in self.buffer_links:
-                    parent_buffer_id = link['parent_id']
-                    child_buffer_id = link['child_id']
-                    
-                    # Ищем соответствующую связь в SporeManager
-                    for visual_link in spore_manager.links:
-                        if (hasattr(visual_link, '_zoom_manager_key') and 
-                            f"{parent_buffer_id}_to_{child_buffer_id}_m{self._materialization_counter}" in visual_link._zoom_manager_key):
-                            materialized_links.append(visual_link)
-                            break
+                materialized_links = [visual_link for _, visual_link in real_links]
                 
                 # Добавляем в историю групп как одну группу
                 if materialized_spores:
                     self._manual_spore_manager_ref.spore_groups_history.append(materialized_spores)
                     self._manual_spore_manager_ref.group_links_history.append(materialized_links)
                     
-                    print(f"   ✅ Добавлено в историю: {len(materialized_spores)} спор, {len(materialized_links)} связей")
-                    print(f"   📖 Всего групп в истории: {len(self._manual_spore_manager_ref.spore_groups_history)}")
+                    _log.info(lambda: f"   ✅ Добавлено в историю: {len(materialized_spores)} спор, {len(materialized_links)} связей")
+                    _log.info(lambda: f"   📖 Всего групп в истории: {len(self._manual_spore_manager_ref.spore_groups_history)}")
                 else:
-                    print(f"   ⚠️ Нет спор для добавления в историю")
+                    _log.warning(f"   ⚠️ Нет спор для добавления в историю")
             else:
-                print(f"   ⚠️ ManualSporeManager reference не найден - споры не будут доступны для удаления через Z")
+                _log.warning(f"   ⚠️ ManualSporeManager reference не найден - споры не будут доступны для удаления через Z")
             
             # 8. Очищаем буферный граф после успешной материализации
             clear_result = self.clear_buffer_graph()
             if clear_result['success']:
-                print(f"   🧹 Буферный граф очищен: {clear_result['cleared_spores']} спор")
+                _log.info(lambda: f"   🧹 Буферный граф очищен: {clear_result['cleared_spores']} спор")
             
             # 📊 ДИАГНОСТИКА: Показываем количество целевых спор ПОСЛЕ материализации  
             final_goals = [s for s in spore_manager.objects if hasattr(s, 'is_goal') and s.is_goal]
-            print(f"   📊 Целевых спор после материализации: {len(final_goals)}")
+            _log.info(lambda: f"   📊 Целевых спор после материализации: {len(final_goals)}")
             if len(final_goals) > 1:
-                print(f"   ⚠️ ВНИМАНИЕ: Обнаружено {len(final_goals)} целевых спор - должна быть только 1!")
+                _log.warning(f"   ⚠️ ВНИМАНИЕ: Обнаружено {len(final_goals)} целевых спор - должна быть только 1!")
                 for i, goal in enumerate(final_goals):
                     pos = goal.calc_2d_pos() if hasattr(goal, 'calc_2d_pos') else 'unknown'
-                    print(f"      Goal #{i+1}: ID={getattr(goal, 'id', 'unknown')}, pos={pos}")
+                    _log.debug(lambda: f"      Goal #{i+1}: ID={getattr(goal, 'id', 'unknown')}, pos={pos}")
             
             return {
                 'success': True,
-                'stats': materialize_stats
+                'stats': materialize_stats,
+                'spores': real_spores_map,
+                'links': real_links_map
             }
             
         except Exception as e:
             error_msg = f"Ошибка материализации: {e}"
-            print(f"❌ {error_msg}")
+            _log.error(f"❌ {error_msg}")
             import traceback
             traceback.print_exc()
             return self._get_error_result(error_msg)
 
     def _create_real_spores(self, spore_manager, zoom_manager, color_manager, pendulum, config, stats) -> Dict[str, any]:
-        """Создает реальные споры из буферного графа."""
-        print(f"\n   🌟 СОЗДАНИЕ РЕАЛЬНЫХ СПОР:")
+        """
+        Создает реальные споры из буферного графа.
+
+        ID и оптимальные шаги назначаются одним пакетом
+        (SporeManager.add_spores_bulk); в ZoomManager споры регистрируются
+        вместе со связями в materialize_buffer_to_real.
+        """
+        _log.info("\n   🌟 СОЗДАНИЕ РЕАЛЬНЫХ СПОР:")
         
         # Импортируем Spore
         from ..core.spore import Spore
@@ -1058,28 +1102,29 @@ class BufferMergeManager:
         real_spores_map = {}  # buffer_id -> real_spore
         spore_config = config.get('spore', {})
         goal_position = spore_config.get('goal_position', [0, 0])
+
+        # 🔧 ИСПРАВЛЕНИЕ: Только ОДНА спора должна быть целевой - корень дерева
+        has_goal = any(getattr(spore, 'is_goal', False) for spore in spore_manager.objects)
         
         for buffer_id, position in self.buffer_positions.items():
             try:
                 # Позиция в 3D (Y=0)
                 position_3d = (float(position[0]), 0, float(position[1]))
                 
-                # Определяем является ли спора целевой
-                # 🔧 ИСПРАВЛЕНИЕ: Только ОДНА спора должна быть целевой - корень дерева
-                is_goal = (buffer_id == "buffer_root" and 
-                           not any(spore.is_goal for spore in spore_manager.objects if hasattr(spore, 'is_goal')))
+                is_goal = buffer_id == "buffer_root" and not has_goal
 
                 # 📊 ОТЛАДКА: Показываем информацию о целевых спорах
                 if is_goal:
-                    print(f"      🎯 Создается ЦЕЛЕВАЯ спора: {buffer_id}")
+                    _log.debug(lambda: f"      🎯 Создается ЦЕЛЕВАЯ спора: {buffer_id}")
                 else:
-                    print(f"      🔸 Создается обычная спора: {buffer_id}")
+                    _log.debug(lambda: f"      🔸 Создается обычная спора: {buffer_id}")
                 
                 # Получаем правильное dt из буферного графа
                 spore_dt = self.buffer_spore_dt.get(buffer_id, spore_config.get('dt', 0.05))
                 
-                # Создаем реальную спору
-                real_spore = Spore(
+                # Создаем реальную спору (ID присвоит SporeManager через IDManager)
+                real_spore = entity_pool.acquire(
+                    Spore,
                     pendulum=pendulum,
                     dt=spore_dt,
                     scale=spore_config.get('scale', 0.1),
@@ -1090,65 +1135,56 @@ class BufferMergeManager:
                     id_manager=getattr(spore_manager, 'id_manager', None),
                     config=spore_config
                 )
-                
-                # НЕ устанавливаем ID здесь - пусть SporeManager сделает это через IDManager
-                # real_spore.id будет автоматически установлен в add_spore_manual
-
-                # Добавляем в SporeManager (ID будет присвоен автоматически)
-                spore_manager.add_spore_manual(real_spore)
-
-                # Теперь real_spore.id содержит числовой ID от IDManager
-                print(f"      ✅ Создана спора с ID: {real_spore.id}")
 
-                # Регистрируем в ZoomManager с уникальным ключом
-                zoom_key = f"real_{buffer_id}_m{self._materialization_counter}"
-                zoom_manager.register_object(real_spore, zoom_key)
-                real_spore._zoom_manager_key = zoom_key  # Сохраняем для удаления
-                
-                # Сохраняем в карте
+                # Уникальный ключ ZoomManager (нужен и для удаления)
+                real_spore._zoom_manager_key = f"real_{buffer_id}_m{self._materialization_counter}"
                 real_spores_map[buffer_id] = real_spore
-                stats['spores_created'] += 1
-                
-                # Информация об объединенных спорах
-                ghost_count = len(self.buffer_to_ghosts.get(buffer_id, []))
-                merge_info = f" (объединяет {ghost_count})" if ghost_count > 1 else ""
-                
-                print(f"      ✅ {buffer_id} → real_spore{merge_info}")
                 
             except Exception as e:
                 error_msg = f"Ошибка создания споры {buffer_id}: {e}"
-                print(f"      ❌ {error_msg}")
+                _log.error(lambda: f"      ❌ {error_msg}")
                 stats['errors'].append(error_msg)
+
+        # Добавляем в SporeManager одним пакетом (граф публикуется после связей)
+        spore_manager.add_spores_bulk(list(real_spores_map.values()), notify=False)
+        stats['spores_created'] += len(real_spores_map)
+
+        for buffer_id, real_spore in real_spores_map.items():
+            # Информация об объединенных спорах
+            ghost_count = len(self.buffer_to_ghosts.get(buffer_id, []))
+            merge_info = f" (объединяет {ghost_count})" if ghost_count > 1 else ""
+            _log.debug(lambda: f"      ✅ {buffer_id} → real_spore {real_spore.id}{merge_info}")
         
         return real_spores_map
 
-    def _create_real_links(self, spore_manager, real_spores_map, stats, zoom_manager, config):
-        """Создает реальные связи из буферных связей."""
-        
-        # ДОБАВИТЬ В НАЧАЛЕ МЕТОДА:
-        print(f"\n🔗 DEBUG: Начало создания связей")
-        print(f"   📊 Буферных связей для создания: {len(self.buffer_links)}")
-        print(f"   📊 Реальных спор в карте: {len(real_spores_map)}")
+    def _create_real_links(self, spore_manager, real_spores_map, stats, zoom_manager,
+                           config) -> List[Tuple[Tuple[str, str], object]]:
+        """
+        Создает реальные связи из буферных связей.
+
+        Returns:
+            [((parent_buffer_id, child_buffer_id), link)] в порядке буферных связей
+        """
+        _log.info(lambda: f"   📊 Буферных связей для создания: {len(self.buffer_links)}")
+        _log.info(lambda: f"   📊 Реальных спор в карте: {len(real_spores_map)}")
         
         for i, link in enumerate(self.buffer_links):
-            print(f"   {i+1}. Связь: {link['parent_id']} → {link['child_id']} (тип: {link['link_type']})")
+            _log.debug(lambda: f"   {i+1}. Связь: {link['parent_id']} → {link['child_id']} (тип: {link['link_type']})")
         
-        print(f"\n   🔗 СОЗДАНИЕ РЕАЛЬНЫХ СВЯЗЕЙ:")
+        _log.info("\n   🔗 СОЗДАНИЕ РЕАЛЬНЫХ СВЯЗЕЙ:")
         
         # Импортируем Link
         from ..visual.link import Link
-        
-        # Цвета для разных типов связей  
-        link_colors = {
-            'buffer_max': 'ghost_max',    # Красный для u_max
-            'buffer_min': 'ghost_min'     # Синий для u_min
-        }
-        
+
+        # Визуальные номера спор (индекс в objects + 1) — один проход вместо objects.index на связь
+        visual_numbers = {id(spore): i for i, spore in enumerate(spore_manager.objects, start=1)}
+
+        created_links = []
+        link_types = []
         for link in self.buffer_links:
             try:
                 parent_buffer_id = link['parent_id']
                 child_buffer_id = link['child_id']
-                link_type = link['link_type']
                 
                 # Получаем реальные споры
                 parent_spore = real_spores_map.get(parent_buffer_id)
@@ -1156,35 +1192,31 @@ class BufferMergeManager:
                 
                 if not parent_spore or not child_spore:
                     error_msg = f"Не найдены споры для связи {parent_buffer_id} → {child_buffer_id}"
-                    print(f"      ❌ {error_msg}")
+                    _log.error(lambda: f"      ❌ {error_msg}")
                     stats['errors'].append(error_msg)
                     continue
-                
-                # Определяем базовый цвет связи по типу (будет переопределен управлением ниже)
-                color_key = link_colors.get(link_type, 'link_default')
 
-                # Извлекаем dt из source_info
-                dt_value = 0.05  # По умолчанию
-                if 'source_info' in link:
-                    import re
-                    dt_match = re.search(r'dt=([+-]?\d+\.?\d*)', link['source_info'])
-                    if dt_match:
-                        dt_value = float(dt_match.group(1))
-                
+                # dt и управление из source_info
+                source_info = link.get('source_info', '')
+                dt_match = _DT_PATTERN.search(source_info)
+                dt_value = float(dt_match.group(1)) if dt_match else 0.05
+                control_match = _CONTROL_PATTERN.search(source_info)
+                control_value = float(control_match.group(1)) if control_match else 0.0
+
                 # 🔧 ИСПРАВЛЕНИЕ: Используем визуальные номера вместо внутренних spore_id
-                # Находим индексы спор в spore_manager.objects и используем их как визуальные номера
-                try:
-                    parent_index = spore_manager.objects.index(parent_spore) + 1  # +1 для визуального номера
-                    child_index = spore_manager.objects.index(child_spore) + 1    # +1 для визуального номера
+                parent_index = visual_numbers.get(id(parent_spore))
+                child_index = visual_numbers.get(id(child_spore))
+                if parent_index is not None and child_index is not None:
                     readable_link_id = f"link_{parent_index}_to_{child_index}"
-                except ValueError:
+                else:
                     # Fallback к spore_id если споры не найдены в objects
                     parent_spore_id = getattr(parent_spore, 'spore_id', 'unknown')
                     child_spore_id = getattr(child_spore, 'spore_id', 'unknown')
                     readable_link_id = f"link_{parent_spore_id}_to_{child_spore_id}"
                 
                 # Создаем визуальную связь с читаемым ID
-                visual_link = Link(
+                visual_link = entity_pool.acquire(
+                    Link,
                     parent_spore=parent_spore,
                     child_spore=child_spore,
                     zoom_manager=zoom_manager,
@@ -1193,94 +1225,137 @@ class BufferMergeManager:
                     link_id=readable_link_id  # Передаем наш читаемый ID
                 )
                 
-                # Сохраняем dt в линке для PickerManager
+                # Сохраняем dt и управление в линке для PickerManager
                 visual_link.dt_value = dt_value
-                
-                # ИСПРАВЛЕННОЕ: Извлекаем control_value из source_info
-                control_value = 0.0  # По умолчанию
-                if 'source_info' in link:
-                    import re
-                    control_match = re.search(r'u=([+-]?\d+\.?\d*)', link['source_info'])
-                    if control_match:
-                        control_value = float(control_match.group(1))
-
-                # Сохраняем control_value в линке для PickerManager  
                 visual_link.control_value = control_value
 
-                # ИСПРАВЛЕННОЕ: Определяем цвет на основе знака управления
-                if control_value > 0:
-                    color_key = 'ghost_max'  # Положительное управление = красный
-                    link_type_corrected = 'real_max'
-                elif control_value < 0:
-                    color_key = 'ghost_min'  # Отрицательное управление = синий
-                    link_type_corrected = 'real_min'
-                else:
-                    color_key = 'link_default'  # Нулевое управление = дефолтный цвет
-                    link_type_corrected = 'real_default'
-
-                print(f"      🎨 Управление: {control_value:+.2f} → цвет: {color_key}")
-
-                # Устанавливаем цвет на основе управления
+                # Цвет и тип ребра по знаку управления
+                color_key, link_type_corrected = _REAL_LINK_STYLES[int(np.sign(control_value))]
+                _log.debug(lambda: f"      🎨 Управление: {control_value:+.2f} → цвет: {color_key}")
                 visual_link.color = spore_manager.color_manager.get_color('link', color_key)
                 
-                # НЕ устанавливаем visual_link.id вручную - он уже установлен в конструкторе Link
-                # через id_manager.get_next_link_id()
-                print(f"      🔗 Создан линк: {visual_link.link_id} (dt={dt_value})")
-                
-                # Добавляем в SporeManager (правильная последовательность)
-                spore_manager.links.append(visual_link)
-                
-                # Регистрируем в ZoomManager с уникальным ключом
-                link_id = f"real_link_{parent_buffer_id}_to_{child_buffer_id}_m{self._materialization_counter}"
-                zoom_manager.register_object(visual_link, link_id)
-                visual_link._zoom_manager_key = link_id  # Сохраняем для удаления
-                
-                # Добавляем связь в граф с исправленным типом
-                spore_manager.graph.add_edge(
-                    parent_spore=parent_spore,
-                    child_spore=child_spore,
-                    link_type=link_type_corrected,  # Используем тип на основе реального управления
-                    link_object=visual_link
-                )
-                
-                stats['links_created'] += 1
-                
-                print(f"      ✅ {parent_buffer_id} → {child_buffer_id} ({link_type})")
+                # Уникальный ключ ZoomManager (нужен и для удаления)
+                visual_link._zoom_manager_key = \
+                    f"real_link_{parent_buffer_id}_to_{child_buffer_id}_m{self._materialization_counter}"
+
+                created_links.append(((parent_buffer_id, child_buffer_id), visual_link))
+                link_types.append(link_type_corrected)
+                _log.debug(lambda: f"      ✅ {visual_link.link_id}: {parent_buffer_id} → {child_buffer_id} (dt={dt_value})")
                 
             except Exception as e:
                 error_msg = f"Ошибка создания связи {link.get('source_info', 'unknown')}: {e}"
-                print(f"      ❌ {error_msg}")
+                _log.error(lambda: f"      ❌ {error_msg}")
                 stats['errors'].append(error_msg)
 
+        # Добавляем в SporeManager и граф одним пакетом (версию публикует вызывающий)
+        spore_manager.add_links_bulk([visual_link for _, visual_link in created_links], link_types, notify=False)
+        stats['links_created'] += len(created_links)
+        return created_links
+
+    # ------------------------------------------------------------------
+    # Картинка и снимок реального графа
+    # ------------------------------------------------------------------
+    def wait_for_output(self, timeout: Optional[float] = None) -> bool:
+        """
+        Ждёт завершения фонового вывода материализации.
+
+        Returns:
+            True, если фоновой записи нет (или она завершилась за timeout)
+        """
+        thread = self._output_thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        if thread.is_alive():
+            return False
+        self._output_thread = None
+        return True
+
+    def _start_materialize_output(self, spore_manager, stats) -> None:
+        """
+        Картинка (save_real_graph_image) и снимок (export_snapshot_on_materialize)
+        реального графа после материализации.
+
+        Снимок строится здесь, в основном потоке; дальше работа идёт только
+        с его массивами, поэтому при async_materialize_output рисование и
+        запись файлов уходят в фоновый поток. Пути в stats — куда файлы
+        будут записаны.
+        """
+        if not (self.save_real_graph_image or self.export_snapshot_on_materialize):
+            return
+
+        snapshot = spore_manager.get_graph_snapshot()
+        self.last_real_graph_snapshot = snapshot
+        palette = self._real_link_palette(spore_manager.color_manager)
+        extra_statistics = None
+        if self.export_json_on_materialize:
+            extra_statistics = {'id_manager_stats': spore_manager.get_id_stats()}
+
+        image_path = snapshot_path = None
+        if self.save_real_graph_image:
+            image_path = stats['visualization_path'] = os.path.join(self.export_dir, "real_graph_result.png")
+        if self.export_snapshot_on_materialize:
+            snapshot_path = stats['real_graph_export_path'] = os.path.join(self.export_dir, "real_graph_latest.npz")
+
+        def write_output():
+            if image_path:
+                self._draw_real_graph(snapshot, palette, image_path)
+            if snapshot_path:
+                self._save_real_graph_snapshot(snapshot, snapshot_path, extra_statistics)
+
+        if self.async_materialize_output:
+            self._output_thread = threading.Thread(target=write_output, name='materialize-output', daemon=True)
+            self._output_thread.start()
+        else:
+            write_output()
+
+    def _real_link_palette(self, color_manager) -> Dict[int, Tuple[float, float, float]]:
+        """RGB связей по знаку управления (+1 / -1 / 0), как у реальных линков."""
+        palette = {}
+        for sign, (color_key, _) in _REAL_LINK_STYLES.items():
+            color_obj = color_manager.get_color('link', color_key) if color_manager else None
+            palette[sign] = _color_to_rgb(color_obj)
+        return palette
+
     def _create_real_graph_visualization(self, spore_manager) -> str:
-        """Создает визуализацию реального графа."""
+        """Создает визуализацию реального графа (синхронно, по текущему снимку)."""
+        self.wait_for_output()
+        snapshot = spore_manager.get_graph_snapshot()
+        palette = self._real_link_palette(getattr(spore_manager, 'color_manager', None))
+        return self._draw_real_graph(snapshot, palette, os.path.join(self.export_dir, "real_graph_result.png"))
+
+    def _draw_real_graph(self, snapshot: GraphSnapshot, palette: Dict[int, Tuple[float, float, float]],
+                         save_path: str) -> str:
+        """
+        Рисует реальный граф по снимку в save_path.
+
+        Используется Figure без pyplot: функция не трогает сущности и
+        глобальное состояние matplotlib, поэтому безопасна в фоновом потоке.
+        """
         try:
-            print(f"\n   🖼️ СОЗДАНИЕ ВИЗУАЛИЗАЦИИ РЕАЛЬНОГО ГРАФА:")
-            
-            # Создаем директорию если нужно
-            buffer_dir = "buffer"
-            if not os.path.exists(buffer_dir):
-                os.makedirs(buffer_dir)
-            
-            save_path = os.path.join(buffer_dir, "real_graph_result.png")
-            
-            # Создаем график
-            fig, ax = plt.subplots(1, 1, figsize=(14, 12))
-            
-            # Собираем данные о реальных спорах
-            real_spores = spore_manager.objects
-            real_links = spore_manager.links
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+            _log.info("\n   🖼️ СОЗДАНИЕ ВИЗУАЛИЗАЦИИ РЕАЛЬНОГО ГРАФА:")
+
+            directory = os.path.dirname(save_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            fig = Figure(figsize=(14, 12))
+            FigureCanvasAgg(fig)
+            ax = fig.add_subplot(1, 1, 1)
             
             # 1. Рисуем связи первыми
-            self._draw_real_links(ax, real_links, spore_manager)
+            self._draw_real_links(ax, snapshot, palette)
             
             # 2. Рисуем споры поверх
-            self._draw_real_spores(ax, real_spores)
+            self._draw_real_spores(ax, snapshot)
             
             # 3. Настройки графика
             ax.set_title(f"Реальный граф после материализации\n"
-                        f"Споры: {len(real_spores)}, "
-                        f"Связи: {len(real_links)}")
+                        f"Споры: {snapshot.num_nodes}, "
+                        f"Связи: {snapshot.num_edges}")
             ax.set_xlabel("X")
             ax.set_ylabel("Y") 
             ax.grid(True, alpha=0.3)
@@ -1289,129 +1364,57 @@ class BufferMergeManager:
             # 4. Легенда для реального графа
             self._add_real_graph_legend(ax)
             
-            plt.tight_layout()
-            plt.savefig(save_path, dpi=150, bbox_inches='tight')
-            plt.close()
+            fig.tight_layout()
+            fig.savefig(save_path, dpi=150, bbox_inches='tight')
             
-            print(f"      ✅ Визуализация реального графа: {save_path}")
+            _log.info(lambda: f"      ✅ Визуализация реального графа: {save_path}")
             return save_path
             
         except Exception as e:
-            print(f"      ❌ Ошибка визуализации: {e}")
+            _log.error(f"      ❌ Ошибка визуализации: {e}")
             return ""
 
-    def _draw_real_spores(self, ax, real_spores):
+    def _draw_real_spores(self, ax, snapshot: GraphSnapshot):
         """Рисует реальные споры (исключая целевую спору)."""
-        for spore in real_spores:
-            # Пропускаем целевую спору
-            if getattr(spore, 'is_goal', False):
-                continue
-                
-            if hasattr(spore, 'calc_2d_pos'):
-                pos = spore.calc_2d_pos()
-                
-                # Цвет: зеленый для реальных спор
-                color = 'lightgreen'
-                edge_color = 'darkgreen'
-                
-                # Размер для обычных спор
-                marker_size = 80
-                
-                ax.scatter(pos[0], pos[1], s=marker_size, c=color,
-                          alpha=0.8, edgecolors=edge_color, linewidth=2)
-                
-                # Подпись: простые номера для читаемости
-                # Используем индекс в списке + 1 для нумерации от 1
-                spore_index = next((i for i, s in enumerate(real_spores) if s is spore), 0)
-                label = str(spore_index + 1)
+        visible = np.flatnonzero(~snapshot.is_goal)
+        if len(visible) == 0:
+            return
+
+        # Зеленый для реальных спор
+        positions = snapshot.positions[visible]
+        ax.scatter(positions[:, 0], positions[:, 1], s=80, c='lightgreen',
+                   alpha=0.8, edgecolors='darkgreen', linewidth=2)
 
-                ax.annotate(label, (pos[0], pos[1]),
-                           xytext=(5, 5), textcoords='offset points',
-                           fontsize=10, ha='left', weight='bold')
+        # Подпись: визуальный номер (индекс + 1)
+        for index, pos in zip(visible, positions):
+            ax.annotate(str(index + 1), (pos[0], pos[1]),
+                       xytext=(5, 5), textcoords='offset points',
+                       fontsize=10, ha='left', weight='bold')
 
-    def _draw_real_links(self, ax, real_links, spore_manager):
+    def _draw_real_links(self, ax, snapshot: GraphSnapshot, palette: Dict[int, Tuple[float, float, float]]):
         """Рисует реальные связи (исключая связи с целевой спорой)."""
-        # spore_manager передается как параметр
-        # Цвета для разных типов связей
-        link_colors = {
-            'real_max': 'red',      # u_max - красный
-            'real_min': 'blue'      # u_min - синий  
-        }
-        
-        for link in real_links:
-            try:
-                # Пропускаем связи, где одна из спор является целевой
-                if (getattr(link.parent_spore, 'is_goal', False) or 
-                    getattr(link.child_spore, 'is_goal', False)):
-                    continue
-                    
-                # Получаем позиции спор
-                parent_pos = link.parent_spore.calc_2d_pos() if hasattr(link.parent_spore, 'calc_2d_pos') else None
-                child_pos = link.child_spore.calc_2d_pos() if hasattr(link.child_spore, 'calc_2d_pos') else None
-                
-                if parent_pos is None or child_pos is None:
-                    continue
-                
-                # Пытаемся определить цвет напрямую по управлению, чтобы избежать ошибок сопоставления
-                color = None
-                try:
-                    control_value = getattr(link, 'control_value', None)
-                    if control_value is not None:
-                        if control_value > 0:
-                            color = spore_manager.color_manager.get_color('link', 'ghost_max')
-                        elif control_value < 0:
-                            color = spore_manager.color_manager.get_color('link', 'ghost_min')
-                        else:
-                            color = spore_manager.color_manager.get_color('link', 'link_default')
-                except Exception:
-                    color = None
-
-                # Если не удалось определить по управлению, пробуем через тип ребра в графе
-                if color is None:
-                    link_type = 'real_max'  # По умолчанию
-                    try:
-                        parent_id = link.parent_spore.id if hasattr(link.parent_spore, 'id') else None
-                        child_id = link.child_spore.id if hasattr(link.child_spore, 'id') else None
-                        if parent_id and child_id and hasattr(spore_manager, 'graph'):
-                            edge_info = spore_manager.graph.get_edge_info(parent_id, child_id)
-                            if not edge_info:
-                                edge_info = spore_manager.graph.get_edge_info(child_id, parent_id)
-                            if edge_info and hasattr(edge_info, 'link_type'):
-                                link_type = edge_info.link_type
-                    except Exception as e:
-                        print(f"   ⚠️ Не удалось определить тип связи: {e}")
-                        link_type = 'real_max'
-                    color = link_colors.get(link_type, 'gray')
-                
-                # Рисуем стрелку с правильным направлением (как в буферном графе)
-                dx = child_pos[0] - parent_pos[0]
-                dy = child_pos[1] - parent_pos[1]
-                
-                # Расчет с уменьшением длины стрелки на 30%
-                length = np.sqrt(dx*dx + dy*dy)
-                if length > 0:
-                    # Уменьшаем длину стрелки на 30% (оставляем 70%)
-                    reduction_factor = 0.7
-                    
-                    # Начало стрелки остается в parent_pos
-                    start_x = parent_pos[0]
-                    start_y = parent_pos[1]
-                    
-                    # Вектор стрелки уменьшен на 30%
-                    arrow_dx = dx * reduction_factor
-                    arrow_dy = dy * reduction_factor
-                    
-                    # Настраиваем размеры стрелки
-                    arrow_width = max(0.5, min(3.0, length * 0.1))
-                    head_width = max(0.004, min(0.012, length * 0.05))
-                    head_length = max(0.004, min(0.012, length * 0.05))
-                    
-                    ax.arrow(start_x, start_y, arrow_dx, arrow_dy,
-                            head_width=head_width, head_length=head_length,
-                            fc=color, ec=color, alpha=0.7, linewidth=arrow_width)
-                            
-            except Exception as e:
-                print(f"Ошибка отрисовки связи: {e}")
+        for parent, child, control in zip(snapshot.edge_parent, snapshot.edge_child, snapshot.edge_control):
+            # Пропускаем связи, где одна из спор является целевой
+            if snapshot.is_goal[parent] or snapshot.is_goal[child]:
+                continue
+
+            parent_pos = snapshot.positions[parent]
+            dx, dy = snapshot.positions[child] - parent_pos
+            length = np.sqrt(dx*dx + dy*dy)
+            if length == 0:
+                continue
+
+            color = palette[int(np.sign(control))]
+
+            # Уменьшаем длину стрелки на 30% (оставляем 70%), начало — в родителе
+            reduction_factor = 0.7
+            arrow_width = max(0.5, min(3.0, length * 0.1))
+            head_width = max(0.004, min(0.012, length * 0.05))
+            head_length = max(0.004, min(0.012, length * 0.05))
+
+            ax.arrow(parent_pos[0], parent_pos[1], dx * reduction_factor, dy * reduction_factor,
+                    head_width=head_width, head_length=head_length,
+                    fc=color, ec=color, alpha=0.7, linewidth=arrow_width)
 
     def _add_real_graph_legend(self, ax):
         """Добавляет легенду для реального графа."""
@@ -1429,192 +1432,55 @@ class BufferMergeManager:
         
         ax.legend(handles=legend_elements, loc='upper right', fontsize=9)
 
-    def _export_real_graph_json(self, spore_manager) -> str:
-        """Экспортирует реальный граф в JSON с правильными номерами спор и линков."""
+    def _save_real_graph_snapshot(self, snapshot: GraphSnapshot, save_path: str,
+                                  extra_statistics: Optional[Dict] = None) -> str:
+        """
+        Сохраняет колоночный снимок реального графа (buffer/real_graph_latest.npz).
+
+        JSON и CSV пишутся дополнительно только если включены флаги
+        export_json_on_materialize / export_sparse_csv_on_materialize.
+        """
         try:
-            import json
-            import os
-            from datetime import datetime
-            
-            # Создаем директорию если нужно
-            buffer_dir = "buffer"
-            if not os.path.exists(buffer_dir):
-                os.makedirs(buffer_dir)
-            
-            save_path = os.path.join(buffer_dir, "real_graph_latest.json")
-            
-            # 📊 СОБИРАЕМ ДАННЫЕ О СПОРАХ с простыми номерами
-            spores_data = []
-            spore_id_to_index = {}
-            
-            for i, spore in enumerate(spore_manager.objects):
-                # Получаем позицию споры
-                if hasattr(spore, 'calc_2d_pos'):
-                    pos_2d = spore.calc_2d_pos()
-                    position = [float(pos_2d[0]), float(pos_2d[1])]
-                else:
-                    position = [0.0, 0.0]
-                
-                # Определяем тип споры
-                spore_type = "goal" if getattr(spore, 'is_goal', False) else "normal"
-                
-                spore_data = {
-                    'index': i,  # Визуальный порядковый номер (0, 1, 2...)
-                    'spore_id': str(spore.id) if hasattr(spore, 'id') else f"spore_{i}",
-                    'position': position,
-                    'type': spore_type,
-                    'is_goal': getattr(spore, 'is_goal', False),
-                    'is_alive': spore.is_alive() if hasattr(spore, 'is_alive') else True,
-                    'dt': getattr(spore.logic, 'optimal_dt', 0.0) if hasattr(spore, 'logic') else 0.0,
-                    'cost': getattr(spore.logic, 'cost', 0.0) if hasattr(spore, 'logic') else 0.0,
-                    'in_links': [],
-                    'out_links': []
-                }
-                spores_data.append(spore_data)
-                spore_id_to_index[spore_data['spore_id']] = i
-            
-            # 🔗 СОБИРАЕМ ДАННЫЕ О СВЯЗЯХ с порядковыми номерами
-            links_data = []
-            
-            # ДОБАВИТЬ ПЕРЕД all_links_info = spore_manager.list_all_links():
-            print(f"\n🔍 DEBUG: Экспорт реального графа")
-            print(f"   📊 spore_manager.links: {len(spore_manager.links)}")
-            print(f"   📊 spore_manager.graph.edges: {len(spore_manager.graph.edges)}")
-            
-            # 🔍 ДИАГНОСТИКА: Показываем что есть в SporeManager
-            print(f"🔍 DEBUG: SporeManager содержит {len(spore_manager.links)} линков")
-            print(f"🔍 DEBUG: График содержит {len(spore_manager.graph.edges)} связей")
-            
-            # Используем новые методы поиска линков для получения правильных номеров
-            all_links_info = spore_manager.list_all_links()
-            print(f"🔍 DEBUG: list_all_links() вернул {len(all_links_info)} связей")
-            
-            for i, link_info in enumerate(all_links_info):
-                print(f"🔍 DEBUG: Link {i}: found={link_info.get('found', 'missing')}, number={link_info.get('number', 'missing')}")
-                if not link_info['found']:
-                    print(f"   ⚠️ Пропускаем link {i} - found=False")
-                    continue
-                
-                # 🔧 ИСПРАВЛЕНИЕ: Используем реальный индекс в массиве, а не номер из link_id
-                # Индекс i уже соответствует позиции в all_links_info, которая создается из spore_manager.links
-                if 0 <= i < len(spore_manager.links):
-                    link_obj = spore_manager.links[i]
-                    print(f"🔍 DEBUG: Используем прямой доступ links[{i}] для номера {link_info['number']}")
-                else:
-                    link_obj = None
-                    print(f"❌ Индекс {i} вне диапазона (всего links: {len(spore_manager.links)})")
-                
-                if not link_obj:
-                    print(f"   ❌ Пропускаем link {link_info['number']} - объект не найден")
-                    continue
-                
-                # Получаем ID спор из информации о линке
-                parent_id = link_info['parent_spore_id']
-                child_id = link_info['child_spore_id']
-                
-                # Получаем дополнительные данные из объекта линка
-                control_value = getattr(link_obj, 'control_value', 0.0)
-                dt_value = getattr(link_obj, 'dt_value', 0.0)
-                
-                # 🔧 ИСПРАВЛЕНИЕ: Конвертируем Color в список [r, g, b]
-                color_obj = getattr(link_obj, 'color', None)
-                if color_obj and hasattr(color_obj, 'r') and hasattr(color_obj, 'g') and hasattr(color_obj, 'b'):
-                    color = [float(color_obj.r), float(color_obj.g), float(color_obj.b)]
-                else:
-                    color = [1.0, 1.0, 0.0]  # желтый по умолчанию
-                
-                link_data = {
-                    'link_number': link_info['number'],  # Порядковый номер линка
-                    'link_id': link_info['id'],  # Полный ID линка
-                    'parent_spore_id': parent_id,  # ID родительской споры
-                    'child_spore_id': child_id,  # ID дочерней споры
-                    'control': float(control_value),
-                    'dt': abs(float(dt_value)),
-                    'dt_sign': 1 if dt_value >= 0 else -1,
-                    'raw_dt': float(dt_value),
-                    'direction': 'forward' if dt_value >= 0 else 'backward',
-                    'color': color  # RGB цвет
-                }
-                links_data.append(link_data)
-                
-                # 🔧 ИСПРАВЛЕНИЕ: Используем визуальные номера напрямую как индексы
-                # parent_id и child_id теперь содержат визуальные номера (1, 2, 3...)
-                # Преобразуем их в индексы массива (0, 1, 2...)
-                parent_idx = parent_id - 1 if isinstance(parent_id, int) and parent_id > 0 else None
-                child_idx = child_id - 1 if isinstance(child_id, int) and child_id > 0 else None
-                
-                # Проверяем границы массива
-                if parent_idx is not None and 0 <= parent_idx < len(spores_data):
-                    spores_data[parent_idx]['out_links'].append({
-                        'to_spore_id': child_id,
-                        'link_number': link_info['number'],
-                        'control': float(control_value),
-                        'dt': abs(float(dt_value)),
-                        'dt_sign': 1 if dt_value >= 0 else -1
-                    })
-                    
-                if child_idx is not None and 0 <= child_idx < len(spores_data):
-                    spores_data[child_idx]['in_links'].append({
-                        'from_spore_id': parent_id,
-                        'link_number': link_info['number'],
-                        'control': float(control_value),
-                        'dt': abs(float(dt_value)),
-                        'dt_sign': 1 if dt_value >= 0 else -1
-                    })
-            
-            # Сортируем линки по номеру для консистентности
-            links_data.sort(key=lambda x: x['link_number'])
-            
-            # 🔍 ДИАГНОСТИКА: Показываем что будет в JSON
-            print(f"🔍 DEBUG: JSON будет содержать {len(links_data)} связей")
-            for link_data in links_data[:3]:  # Показываем первые 3
-                print(f"   • Связь {link_data['link_number']}: {link_data['parent_spore_id']} → {link_data['child_spore_id']}")
-            
-            # 🔍 ДИАГНОСТИКА: Проверяем заполнение in_links и out_links
-            total_in_links = sum(len(spore['in_links']) for spore in spores_data)
-            total_out_links = sum(len(spore['out_links']) for spore in spores_data)
-            print(f"🔍 DEBUG: Заполнено входящих связей: {total_in_links}")
-            print(f"🔍 DEBUG: Заполнено исходящих связей: {total_out_links}")
-            
-            # Показываем примеры связей для первых спор
-            for i, spore_data in enumerate(spores_data[:3]):
-                if spore_data['in_links'] or spore_data['out_links']:
-                    print(f"   📍 Спора {i+1}: входящих={len(spore_data['in_links'])}, исходящих={len(spore_data['out_links'])}")
-            
-            # 📝 ФОРМИРУЕМ ИТОГОВУЮ СТРУКТУРУ JSON
-            export_data = {
-                'metadata': {
-                    'export_time': datetime.now().isoformat(),
-                    'version': 'RealGraphExporter_v2.0',
-                    'description': 'Реальный граф спор с правильными номерами линков для анализа пикером'
-                },
-                'statistics': {
-                    'total_spores': len(spores_data),
-                    'total_links': len(links_data),
-                    'goal_spores': len([s for s in spores_data if s['type'] == 'goal']),
-                    'id_manager_stats': spore_manager.get_id_stats()
-                },
-                'spores': spores_data,
-                'links': links_data
-            }
-            
-            # Сохраняем в JSON
-            with open(save_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
-            
-            print(f"\n💾 Реальный граф экспортирован: {save_path}")
-            print(f"   📊 Спор: {len(spores_data)}, Связей: {len(links_data)}")
-            print(f"   🔢 Использованы правильные номера линков")
-            
-            # 📊 Автоматическая генерация CSV матрицы связей
-            csv_path = self._generate_csv_matrix_from_json(export_data, buffer_dir)
-            if csv_path:
-                print(f"   📋 CSV матрица связей: {csv_path}")
-            
+            snapshot.save(save_path)
+            _log.info(lambda: f"💾 Снимок реального графа: {save_path} "
+                  f"(спор: {snapshot.num_nodes}, связей: {snapshot.num_edges})")
+
+            if self.export_sparse_csv_on_materialize:
+                csv_path = snapshot.export_sparse_csv(os.path.join(self.export_dir, "spores_links_sparse.csv"))
+                _log.info(lambda: f"   📋 Разреженный CSV связей: {csv_path}")
+
+            if self.export_json_on_materialize:
+                self._export_real_graph_json(snapshot, extra_statistics)
+
             return save_path
-            
+
+        except Exception as e:
+            _log.error(f"❌ Ошибка экспорта снимка реального графа: {e}")
+            import traceback
+            traceback.print_exc()
+            return ""
+
+    def _export_real_graph_json(self, snapshot: GraphSnapshot, extra_statistics: Optional[Dict] = None) -> str:
+        """
+        Экспортирует реальный граф в JSON (и плотную CSV матрицу) по явному запросу.
+
+        Args:
+            snapshot: Снимок реального графа
+            extra_statistics: Дополнительная статистика (например, id_manager_stats)
+        """
+        try:
+            save_path = snapshot.save_json(
+                os.path.join(self.export_dir, "real_graph_latest.json"),
+                extra_statistics=extra_statistics)
+            _log.info(lambda: f"💾 Реальный граф экспортирован в JSON: {save_path}")
+
+            csv_path = snapshot.export_matrix_csv(os.path.join(self.export_dir, "spores_links_matrix.csv"))
+            _log.info(lambda: f"   📋 CSV матрица связей: {csv_path}")
+
+            return save_path
+
         except Exception as e:
-            print(f"❌ Ошибка экспорта реального графа: {e}")
+            _log.error(f"❌ Ошибка экспорта реального графа: {e}")
             import traceback
             traceback.print_exc()
             return ""
@@ -1687,7 +1553,7 @@ class BufferMergeManager:
         # Сортируем для консистентности
         graph_data['links'].sort(key=lambda x: x['link_number'])
         
-        print(f"📊 Экспорт завершен: {len(graph_data['spores'])} спор, {len(graph_data['links'])} линков")
+        _log.info(lambda: f"📊 Экспорт завершен: {len(graph_data['spores'])} спор, {len(graph_data['links'])} линков")
         return graph_data
 
     def save_graph_json(self, spore_manager, filename: str = None) -> str:
@@ -1720,24 +1586,24 @@ class BufferMergeManager:
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(graph_data, f, indent=2, ensure_ascii=False)
         
-        print(f"💾 Граф сохранен в: {filepath}")
+        _log.info(lambda: f"💾 Граф сохранен в: {filepath}")
         return filepath
 
     def _print_materialize_stats(self, stats):
         """Выводит статистику материализации."""
-        print(f"\n📊 СТАТИСТИКА МАТЕРИАЛИЗАЦИИ:")
-        print(f"   🌟 Создано спор: {stats['spores_created']}")
-        print(f"   🔗 Создано связей: {stats['links_created']}")
+        _log.info("\n📊 СТАТИСТИКА МАТЕРИАЛИЗАЦИИ:")
+        _log.info(lambda: f"   🌟 Создано спор: {stats['spores_created']}")
+        _log.info(lambda: f"   🔗 Создано связей: {stats['links_created']}")
         
         if stats['errors']:
-            print(f"   ❌ Ошибок: {len(stats['errors'])}")
+            _log.error(f"   ❌ Ошибок: {len(stats['errors'])}")
             for error in stats['errors'][:3]:  # Показываем первые 3
-                print(f"      • {error}")
+                _log.debug(lambda: f"      • {error}")
         else:
-            print(f"   ✅ Ошибок нет")
+            _log.info("   ✅ Ошибок нет")
             
         if 'visualization_path' in stats:
-            print(f"   🖼️ Визуализация: {stats['visualization_path']}")
+            _log.info(lambda: f"   🖼️ Визуализация: {stats['visualization_path']}")
 
     def clear_buffer_graph(self) -> Dict:
         """
@@ -1746,7 +1612,7 @@ class BufferMergeManager:
         Returns:
             dict: результат очистки
         """
-        print(f"\n🧹 ОЧИСТКА БУФЕРНОГО ГРАФА")
+        _log.info("\n🧹 ОЧИСТКА БУФЕРНОГО ГРАФА")
         
         try:
             cleared_spores = len(getattr(self, 'buffer_positions', {}))
@@ -1769,7 +1635,7 @@ class BufferMergeManager:
                 'processing_order': []
             }
             
-            print(f"   ✅ Очищено: {cleared_spores} спор, {cleared_links} связей")
+            _log.info(lambda: f"   ✅ Очищено: {cleared_spores} спор, {cleared_links} связей")
             
             return {
                 'success': True,
@@ -1779,17 +1645,17 @@ class BufferMergeManager:
             
         except Exception as e:
             error_msg = f"Ошибка очистки буферного графа: {e}"
-            print(f"   ❌ {error_msg}")
+            _log.error(f"   ❌ {error_msg}")
             return self._get_error_result(error_msg)
 
     def create_debug_diagram(self):
         """Создает упрощенную схему направлений для проверки."""
         if not hasattr(self, 'buffer_links'):
-            print("❌ Нет связей для отладки")
+            _log.error("❌ Нет связей для отладки")
             return
             
-        print(f"\n📋 СХЕМА НАПРАВЛЕНИЙ СВЯЗЕЙ:")
-        print(f"="*50)
+        _log.debug("\n📋 СХЕМА НАПРАВЛЕНИЙ СВЯЗЕЙ:")
+        _log.debug("=" * 50)
         
         for i, link in enumerate(self.buffer_links):
             parent_id = link['parent_id']
@@ -1803,132 +1669,16 @@ class BufferMergeManager:
             # Символ для типа связи
             symbol = '🔴' if link_type == 'buffer_max' else '🔵'
             
-            print(f"{i+1:2d}. {parent_short} ──{symbol}──> {child_short}")
+            _log.debug(lambda: f"{i+1:2d}. {parent_short} ──{symbol}──> {child_short}")
             
             # Дополнительная информация если есть
             if 'source_info' in link:
                 source = link['source_info']
-                print(f"     ({source})")
+                _log.debug(lambda: f"     ({source})")
         
-        print(f"="*50)
-        print(f"🔴 = buffer_max (u=+2.0)   🔵 = buffer_min (u=-2.0)")
+        _log.debug("=" * 50)
+        _log.debug("🔴 = buffer_max (u=+2.0)   🔵 = buffer_min (u=-2.0)")
 
     def has_buffer_data(self) -> bool:
         """Проверяет есть ли данные в буферном графе."""
         return bool(getattr(self, 'buffer_positions', {}))
-
-    def _generate_csv_matrix_from_json(self, export_data: dict, buffer_dir: str) -> str:
-        """
-        Генерирует CSV матрицу связей из JSON данных.
-        Автоматически вызывается при экспорте JSON.
-        
-        Args:
-            export_data: Данные экспорта JSON
-            buffer_dir: Директория для сохранения
-            
-        Returns:
-            str: Путь к сохраненному CSV файлу или пустая строка при ошибке
-        """
-        try:
-            spores = export_data.get('spores', [])
-            links = export_data.get('links', [])
-            
-            if not spores:
-                print("⚠️ Нет данных о спорах для CSV матрицы")
-                return ""
-            
-            print(f"📊 Генерация CSV матрицы: {len(spores)} спор, {len(links)} связей")
-            
-            # Получаем все индексы спор и сортируем
-            spore_indices = sorted([spore['index'] for spore in spores])
-            
-            # Создаем словарь связей: (row_index, col_index) -> link_info
-            links_dict = {}
-            
-            for link in links:
-                parent_spore_id = link.get('parent_spore_id')
-                child_spore_id = link.get('child_spore_id')
-                
-                # Находим индексы по spore_id
-                parent_index = None
-                child_index = None
-                
-                for spore in spores:
-                    if spore['spore_id'] == parent_spore_id:
-                        parent_index = spore['index']
-                    if spore['spore_id'] == child_spore_id:
-                        child_index = spore['index']
-                
-                if parent_index is not None and child_index is not None:
-                    control = link.get('control', 0)
-                    dt = link.get('dt', 0)
-                    dt_sign = link.get('dt_sign', 1)
-                    
-                    # Вычисляем итоговое время
-                    dt_value = dt * dt_sign
-                    
-                    # Определяем базовые значения
-                    control_str = f"+{control}" if control >= 0 else str(control)
-                    
-                    if dt_value > 0:
-                        # Прямая связь - транспонируем (child в строки, parent в столбцы)
-                        dt_str = f"+{dt_value}"
-                        link_text = f"{control_str} {dt_str}"
-                        links_dict[(child_index, parent_index)] = link_text
-                        
-                        # Добавляем дублированную связь с обратным направлением
-                        reverse_dt_str = f"{-dt_value:+.3f}"
-                        reverse_link_text = f"{control_str} {reverse_dt_str}"
-                        links_dict[(parent_index, child_index)] = reverse_link_text
-                        
-                    else:
-                        # Обратная связь - транспонируем (child в строки, parent в столбцы)
-                        inverted_dt_value = -dt_value  # Делаем время положительным
-                        dt_str = f"+{inverted_dt_value}"
-                        link_text = f"{control_str} {dt_str}"
-                        links_dict[(child_index, parent_index)] = link_text
-                        
-                        # Добавляем дублированную связь
-                        original_dt_str = f"{dt_value:+.3f}"
-                        reverse_link_text = f"{control_str} {original_dt_str}"
-                        links_dict[(parent_index, child_index)] = reverse_link_text
-            
-            # Создаем заголовки (индексы + 1 для отображения)
-            headers = [''] + [str(idx + 1) for idx in spore_indices]
-            
-            # Создаем матрицу
-            matrix = []
-            for row_idx in spore_indices:
-                row = [str(row_idx + 1)]  # Первый столбец - индекс строки
-                
-                for col_idx in spore_indices:
-                    # Проверяем есть ли связь
-                    link_text = links_dict.get((row_idx, col_idx), '')
-                    row.append(link_text)
-                
-                matrix.append(row)
-            
-            # Сохраняем CSV файл
-            csv_path = os.path.join(buffer_dir, "spores_links_matrix.csv")
-            
-            with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Записываем заголовки
-                writer.writerow(headers)
-                
-                # Записываем строки матрицы
-                writer.writerows(matrix)
-            
-            # Подсчитываем статистику
-            total_links = sum(1 for row in matrix for cell in row[1:] if cell.strip())
-            
-            print(f"📊 CSV: {len(matrix)} x {len(headers)}, связей: {total_links}")
-            
-            return csv_path
-            
-        except Exception as e:
-            print(f"❌ Ошибка генерации CSV матрицы: {e}")
-            import traceback
-            traceback.print_exc()
-            return ""
\ No newline at end of file
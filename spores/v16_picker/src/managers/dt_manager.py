@@ -1,5 +1,11 @@
 # 🔧 ИСПРАВЛЕННЫЙ DTManager с правильным reset
 
+from typing import Optional
+
+from ..utils.debug_output import get_logger
+
+_log = get_logger('dt')
+
 class DTManager:
     """
     Менеджер для интерактивного управления временным шагом (dt).
@@ -28,9 +34,21 @@ class DTManager:
         
         # Система подписок на изменения dt
         self._subscribers = []
+        # Подписчики, которых можно вызвать позже — когда dt перестанет меняться
+        self._deferred_subscribers = set()
+
+        # Слияние уведомлений: изменения dt за кадр распространяются один раз (on_frame),
+        # отложенные подписчики ждут deferred_idle_frames кадров без изменений
+        dt_cfg = config.get('dt_manager', {}) if isinstance(config, dict) else {}
+        self.coalesce_notifications = bool(dt_cfg.get('coalesce_notifications', True))
+        self.deferred_idle_frames = int(dt_cfg.get('deferred_idle_frames', 3))
+        self._pending_propagation = False
+        self._pending_deferred = False
+        self._idle_frames = 0
+        self.notify_stats = {'changes': 0, 'propagations': 0, 'deferred_runs': 0}
         
-        print(f"   ✓ DTManager создан (начальный dt: {self.current_dt})")
-        print(f"   📋 Оригинальный dt сохранен: {self.original_dt}")
+        _log.info(lambda: f"   ✓ DTManager создан (начальный dt: {self.current_dt})")
+        _log.info(lambda: f"   📋 Оригинальный dt сохранен: {self.original_dt}")
 
     def increase_dt(self) -> float:
         """Увеличивает dt мультипликативно."""
@@ -39,10 +57,10 @@ class DTManager:
         
         if self.current_dt != old:
             self._update_config()
-            print(f"   🔼 dt увеличен: {old:.4f} → {self.current_dt:.4f} (×1.1)")
+            _log.info(lambda: f"   🔼 dt увеличен: {old:.4f} → {self.current_dt:.4f} (×1.1)")
             self._notify_dt_changed()  # ← ОБЯЗАТЕЛЬНО
         else:
-            print(f"   ⚠️ dt уже максимальный: {self.current_dt:.4f}")
+            _log.warning(f"   ⚠️ dt уже максимальный: {self.current_dt:.4f}")
             
         return self.current_dt
 
@@ -53,10 +71,10 @@ class DTManager:
         
         if self.current_dt != old:
             self._update_config()
-            print(f"   🔽 dt уменьшен: {old:.4f} → {self.current_dt:.4f} (÷1.1)")
+            _log.info(lambda: f"   🔽 dt уменьшен: {old:.4f} → {self.current_dt:.4f} (÷1.1)")
             self._notify_dt_changed()  # ← ОБЯЗАТЕЛЬНО
         else:
-            print(f"   ⚠️ dt уже минимальный: {self.current_dt:.4f}")
+            _log.warning(f"   ⚠️ dt уже минимальный: {self.current_dt:.4f}")
             
         return self.current_dt
 
@@ -71,7 +89,7 @@ class DTManager:
         self.current_dt = self.original_dt  # 🆕 Используем сохраненное значение!
         
         self._update_config()
-        print(f"   🔄 dt сброшен: {old_dt:.4f} → {self.current_dt:.4f} (оригинал: {self.original_dt})")
+        _log.info(lambda: f"   🔄 dt сброшен: {old_dt:.4f} → {self.current_dt:.4f} (оригинал: {self.original_dt})")
         self._notify_dt_changed()
         
         return self.current_dt
@@ -95,7 +113,7 @@ class DTManager:
         
         if self.current_dt != old_dt:
             self._update_config()
-            print(f"   ⚙️ dt установлен: {old_dt:.4f} → {self.current_dt:.4f}")
+            _log.info(lambda: f"   ⚙️ dt установлен: {old_dt:.4f} → {self.current_dt:.4f}")
             self._notify_dt_changed()
             
         return self.current_dt
@@ -111,42 +129,103 @@ class DTManager:
         return float(self.current_dt * self.link_length_per_dt)
 
     def _notify_dt_changed(self) -> None:
-        """Колбэк при изменении dt — обновляем длины всех линков и уведомляем подписчиков."""
+        """
+        Отмечает изменение dt. При coalesce_notifications распространение
+        откладывается до on_frame(), поэтому серия нажатий за кадр даёт одно
+        обновление линков и подписчиков с последним значением dt.
+        """
+        self.notify_stats['changes'] += 1
+        if not self.coalesce_notifications:
+            self._propagate_dt_change()
+            self._run_deferred_subscribers()
+            return
+        self._pending_propagation = True
+        self._pending_deferred = True
+        self._idle_frames = 0
+
+    def on_frame(self) -> None:
+        """Вызывается каждый кадр (UpdateManager.update_all): выполняет отложенные уведомления."""
+        if self._pending_propagation:
+            self._pending_propagation = False
+            self._propagate_dt_change()
+            return
+        if self._pending_deferred:
+            self._idle_frames += 1
+            if self._idle_frames >= self.deferred_idle_frames:
+                self._run_deferred_subscribers()
+
+    def flush_pending_changes(self) -> None:
+        """Немедленно выполняет все ожидающие уведомления (для скриптов без главного цикла)."""
+        if self._pending_propagation:
+            self._pending_propagation = False
+            self._propagate_dt_change()
+        if self._pending_deferred:
+            self._run_deferred_subscribers()
+
+    def has_pending_changes(self) -> bool:
+        """Есть ли изменения dt, ещё не доставленные подписчикам."""
+        return self._pending_propagation or self._pending_deferred
+
+    def _propagate_dt_change(self) -> None:
+        """Обновляем длины всех линков и уведомляем немедленных подписчиков."""
+        self.notify_stats['propagations'] += 1
         try:
             if getattr(self, 'spore_manager', None):
-                print(f"[DT] applying max_length to SporeManager.links (max_len={self.get_max_link_length():.6f})")
+                _log.debug(lambda: f"[DT] applying max_length to SporeManager.links (max_len={self.get_max_link_length():.6f})")
                 self.spore_manager.update_links_max_length(self.get_max_link_length())
         except Exception as e:
-            print(f"[DTManager] Ошибка при обновлении длин линков: {e}")
+            _log.error(f"[DTManager] Ошибка при обновлении длин линков: {e}")
         
-        # Уведомляем всех подписчиков
-        self._notify_subscribers()
+        # Уведомляем немедленных подписчиков
+        self._notify_subscribers(deferred=False)
+
+    def _run_deferred_subscribers(self) -> None:
+        """Уведомляет отложенных подписчиков (dt уже не меняется)."""
+        self._pending_deferred = False
+        if self._deferred_subscribers:
+            self.notify_stats['deferred_runs'] += 1
+            self._notify_subscribers(deferred=True)
+
+    def subscribe_on_change(self, callback, deferred: Optional[bool] = None) -> None:
+        """
+        Подписывает колбэк на изменения dt. Колбэк вызывается без аргументов
+        и читает актуальное значение через get_dt().
 
-    def subscribe_on_change(self, callback) -> None:
-        """Подписывает колбэк на изменения dt."""
+        Args:
+            callback: Функция без аргументов.
+            deferred: True — дорогой подписчик (пересборка дерева и т.п.), вызывается,
+                      когда dt не меняется deferred_idle_frames кадров подряд.
+                      None при повторной подписке сохраняет прежний режим.
+        """
         if callback not in self._subscribers:
             self._subscribers.append(callback)
-            print(f"   📧 Подписчик добавлен в DTManager (всего: {len(self._subscribers)})")
+            _log.info(lambda: f"   📧 Подписчик добавлен в DTManager (всего: {len(self._subscribers)})")
+        if deferred is not None:
+            if deferred:
+                self._deferred_subscribers.add(callback)
+            else:
+                self._deferred_subscribers.discard(callback)
 
     def unsubscribe_on_change(self, callback) -> None:
         """Отписывает колбэк от изменений dt."""
         if callback in self._subscribers:
             self._subscribers.remove(callback)
-            print(f"   📧 Подписчик удален из DTManager (осталось: {len(self._subscribers)})")
+            self._deferred_subscribers.discard(callback)
+            _log.info(lambda: f"   📧 Подписчик удален из DTManager (осталось: {len(self._subscribers)})")
 
-    def _notify_subscribers(self) -> None:
-        """Уведомляет всех подписчиков об изменении dt."""
-        n = len(getattr(self, "_subscribers", []))
-        print(f"[DT] notifying {n} subscriber(s)  [DT id={id(self)}]")
-        for i, cb in enumerate(self._subscribers):
-            print(f"[DT] -> subscriber[{i}] {getattr(cb, '__name__', str(cb))}")
+    def _notify_subscribers(self, deferred: bool = False) -> None:
+        """Уведомляет немедленных (или отложенных) подписчиков об изменении dt."""
+        callbacks = [cb for cb in self._subscribers if (cb in self._deferred_subscribers) == deferred]
+        _log.debug(lambda: f"[DT] notifying {len(callbacks)} {'deferred ' if deferred else ''}subscriber(s)  [DT id={id(self)}]")
+        for i, cb in enumerate(callbacks):
+            _log.debug(lambda: f"[DT] -> subscriber[{i}] {getattr(cb, '__name__', str(cb))}")
             cb()
 
     def debug_subscribers(self) -> None:
         """Выводит список всех подписчиков для отладки."""
-        print(f"[DT] subscribers dump (id={id(self)}):")
+        _log.info(lambda: f"[DT] subscribers dump (id={id(self)}):")
         for i, cb in enumerate(self._subscribers):
-            print(f"   [{i}] {getattr(cb, '__name__', str(cb))}")
+            _log.info(lambda: f"   [{i}] {getattr(cb, '__name__', str(cb))}")
 
     def get_stats(self) -> dict:
         """Возвращает статистику dt менеджера."""
@@ -168,21 +247,21 @@ class DTManager:
         """Выводит подробную статистику dt."""
         stats = self.get_stats()
         
-        print(f"\n⏱️ СТАТИСТИКА DT:")
-        print(f"   📊 Текущий dt: {stats['current_dt']:.4f}")
-        print(f"   📋 Оригинальный dt: {stats['original_dt']:.4f}")
-        print(f"   📈 Изменение: ×{stats['multiplier_from_original']:.2f}")
-        print(f"   ⬇️ Минимум: {stats['min_dt']:.4f} {'(достигнут)' if stats['at_min'] else ''}")
-        print(f"   ⬆️ Максимум: {stats['max_dt']:.4f} {'(достигнут)' if stats['at_max'] else ''}")
-        print(f"   🔧 Множитель: ×÷{stats['dt_multiplier']}")
-        print("========================")
+        _log.info("\n⏱️ СТАТИСТИКА DT:")
+        _log.info(lambda: f"   📊 Текущий dt: {stats['current_dt']:.4f}")
+        _log.info(lambda: f"   📋 Оригинальный dt: {stats['original_dt']:.4f}")
+        _log.info(lambda: f"   📈 Изменение: ×{stats['multiplier_from_original']:.2f}")
+        _log.info(lambda: f"   ⬇️ Минимум: {stats['min_dt']:.4f} {'(достигнут)' if stats['at_min'] else ''}")
+        _log.info(lambda: f"   ⬆️ Максимум: {stats['max_dt']:.4f} {'(достигнут)' if stats['at_max'] else ''}")
+        _log.info(lambda: f"   🔧 Множитель: ×÷{stats['dt_multiplier']}")
+        _log.info("========================")
 
     # 🆕 ДОПОЛНИТЕЛЬНЫЙ МЕТОД для отладки
     def debug_values(self) -> None:
         """Выводит все значения для отладки."""
-        print(f"\n🐛 ОТЛАДКА DTManager:")
-        print(f"   original_dt (сохранен при __init__): {self.original_dt}")
-        print(f"   current_dt: {self.current_dt}")
-        print(f"   config['pendulum']['dt']: {self.config.get('pendulum', {}).get('dt', 'НЕТ')}")
-        print(f"   Одинаковы ли current и config: {self.current_dt == self.config.get('pendulum', {}).get('dt', -1)}")
-        print("========================")
\ No newline at end of file
+        _log.info("\n🐛 ОТЛАДКА DTManager:")
+        _log.info(lambda: f"   original_dt (сохранен при __init__): {self.original_dt}")
+        _log.info(lambda: f"   current_dt: {self.current_dt}")
+        _log.info(lambda: f"   config['pendulum']['dt']: {self.config.get('pendulum', {}).get('dt', 'НЕТ')}")
+        _log.info(lambda: f"   Одинаковы ли current и config: {self.current_dt == self.config.get('pendulum', {}).get('dt', -1)}")
+        _log.info("========================")
\ No newline at end of file
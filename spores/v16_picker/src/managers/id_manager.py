@@ -86,6 +86,14 @@ class IDManager:
     def reset_link_counter(self):
         """Сбрасывает только счетчик линков (частичная очистка)."""
         self._link_counter = 0
+
+    def skip_spore_ids_up_to(self, max_id: int) -> None:
+        """Следующий ID споры будет больше max_id (восстановление из журнала)."""
+        self._spore_counter = max(self._spore_counter, int(max_id))
+
+    def skip_link_ids_up_to(self, max_id: int) -> None:
+        """Следующий ID линка будет больше max_id (восстановление из журнала)."""
+        self._link_counter = max(self._link_counter, int(max_id))
     
     def get_stats(self) -> Dict[str, Any]:
         """
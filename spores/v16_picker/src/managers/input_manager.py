@@ -13,7 +13,6 @@ from ..managers.spore_manager import SporeManager
 from ..managers.spawn_area_manager import SpawnAreaManager
 from ..managers.param_manager import ParamManager
 from ..visual.ui_setup import UI_setup
-from ..logic.tree import run_area_optimization
 from .buffer_merge_manager import BufferMergeManager
 
 # Forward declaration для ManualSporeManager
@@ -27,6 +26,7 @@ if TYPE_CHECKING:
     from ..managers.picker_manager import PickerManager
     
 from ..utils.debug_output import always_print
+from ..utils.tracer import span
 
 
 class InputManager:
@@ -71,6 +71,10 @@ class InputManager:
         # 🔍 Флаг для включения детальной отладки призрачного дерева
         self.debug_ghost_tree = False
 
+        # Anytime-оптимизация превью дерева (B): несколько итераций решателя каждый кадр
+        self.anytime_optimizer = None
+        self.anytime_optimization_enabled = bool(self._anytime_config().get('enabled', False))
+
         # Настройки для генерации спор по клавише 'f'
         self.f_key_down_time: float = 0
         self.long_press_threshold: float = 0.4
@@ -82,7 +86,8 @@ class InputManager:
 
         # Подписка на изменения dt (чтобы призраки и линки всегда реагировали)
         if self.dt_manager and hasattr(self.dt_manager, "subscribe_on_change"):
-            self.dt_manager.subscribe_on_change(self._on_dt_changed)
+            # Пересборка призрачного дерева дорогая — выполняется, когда dt перестал меняться
+            self.dt_manager.subscribe_on_change(self._on_dt_changed, deferred=True)
             print("[IM] subscribed to DTManager.on_change")
 
         # 🆕 v16: Командная система
@@ -194,6 +199,12 @@ class InputManager:
                 'category': 'optimize',
                 'enabled': lambda: self.manual_spore_manager is not None
             },
+            'b': {
+                'description': 'anytime optimize',
+                'handler': self._handle_toggle_anytime_optimization,
+                'category': 'optimize',
+                'enabled': lambda: self.manual_spore_manager is not None and self.dt_manager is not None
+            },
             
             # === TREE ===  
             'k': {
@@ -411,6 +422,11 @@ class InputManager:
                         print(f"   ✅ Создано {len(created_spores)} спор (1 родитель + 2 ребёнка + 2 линка)")
                         
             self.previous_mouse_left = current_mouse_left
+
+        # Anytime-оптимизация: ограниченное число итераций на текущем корне превью
+        if self.anytime_optimization_enabled:
+            with span('AnytimeAreaOptimizer.step'):
+                self._update_anytime_optimization()
         
         # Логика для непрерывной генерации спор при удержании 'f'
         if held_keys['f']:  # type: ignore
@@ -526,6 +542,10 @@ class InputManager:
             
             standard_dt_vector = np.concatenate([dt_children, dt_grandchildren])
             self.manual_spore_manager.ghost_tree_dt_vector = standard_dt_vector
+
+            # Сбрасываем baseline: отложенный _on_dt_changed придёт после сброса
+            # и не должен повторно масштабировать уже стандартный вектор
+            self.manual_spore_manager.ghost_dt_baseline = current_dt
             
             # Обновляем предсказания
             if hasattr(self.manual_spore_manager, 'prediction_manager'):
@@ -746,7 +766,7 @@ class InputManager:
             from ..logic.tree.pairs.find_optimal_pairs import find_optimal_pairs
             
             # Загружаем конфигурацию спаривания
-            from ..logic.tree.tree_area_bridge import _load_pairing_config
+            from ..logic.tree.tree_area_bridge import _load_pairing_config, run_area_optimization
             pairing_config = _load_pairing_config()
             
             # Получаем текущий dt из системы
@@ -866,6 +886,53 @@ class InputManager:
             import traceback
             traceback.print_exc()
 
+    def _anytime_config(self) -> dict:
+        """Секция tree.area_optimization.anytime из конфига ManualSporeManager."""
+        deps = getattr(self.manual_spore_manager, 'deps', None)
+        config = getattr(deps, 'config', None) or {}
+        return config.get('tree', {}).get('area_optimization', {}).get('anytime', {})
+
+    def _handle_toggle_anytime_optimization(self):
+        """Обработчик переключения anytime-оптимизации превью дерева (B)."""
+        self.anytime_optimization_enabled = not self.anytime_optimization_enabled
+        if self.anytime_optimizer is not None:
+            self.anytime_optimizer.reset()
+        state = "включена" if self.anytime_optimization_enabled else "выключена"
+        print(f"[IM][B] ⏱️ Anytime-оптимизация дерева {state}")
+        if self.anytime_optimization_enabled and not self._is_tree_mode():
+            print("   💡 Подсказка: работает в режиме деревьев глубины 2 (K, 8)")
+
+    def _update_anytime_optimization(self):
+        """
+        Один кадр anytime-оптимизации: итерации решателя с тёплым стартом на
+        позиции курсора; призрачное дерево обновляется, только если целевая
+        функция улучшилась относительно показанного вектора.
+        """
+        msm = self.manual_spore_manager
+        if (msm is None or self.dt_manager is None or not self._is_tree_mode()
+                or msm.tree_depth != 2 or not msm.preview_manager.preview_enabled):
+            return
+        mouse_pos = msm.get_mouse_world_position()
+        if mouse_pos is None:
+            return
+
+        try:
+            if self.anytime_optimizer is None:
+                from ..logic.tree.area_opt.anytime_area_optimizer import AnytimeAreaOptimizer
+                self.anytime_optimizer = AnytimeAreaOptimizer.from_config(msm.deps.pendulum, msm.deps.config)
+
+            dt = self.dt_manager.get_dt()
+            dt_vector = self.anytime_optimizer.step(np.array([mouse_pos[0], mouse_pos[1]]), dt,
+                                                    shown_dt_vector=msm.ghost_tree_dt_vector)
+            if dt_vector is not None:
+                msm.ghost_tree_dt_vector = dt_vector
+                msm.ghost_dt_baseline = dt
+        except Exception as e:
+            print(f"❌ [IM][B] Ошибка anytime-оптимизации: {e}, режим выключен")
+            self.anytime_optimization_enabled = False
+            if self.anytime_optimizer is not None:
+                self.anytime_optimizer.reset()
+
     # Методы движения камеры удалены - обрабатываются в first person controller
 
     def _handle_toggle_cursor(self):
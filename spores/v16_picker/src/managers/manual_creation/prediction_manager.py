@@ -1,10 +1,9 @@
 from typing import Optional, List
 import numpy as np
-from ursina import destroy
-
 from .shared_dependencies import SharedDependencies
 from ...visual.prediction_visualizer import PredictionVisualizer
 from ...visual.link import Link
+from ...visual.entity_pool import entity_pool
 from ...core.spore_graph import SporeGraph
 
 # Флаг для управления частыми логами PredictionManager
@@ -145,7 +144,8 @@ class PredictionManager:
                         parent_spore = prediction_viz.ghost_spore
                         child_spore = preview_spore
 
-                    prediction_link = Link(
+                    prediction_link = entity_pool.acquire(
+                        Link,
                         parent_spore=parent_spore,
                         child_spore=child_spore,
                         color_manager=self.deps.color_manager,
@@ -529,7 +529,8 @@ class PredictionManager:
     def _create_ghost_link(self, parent_spore, child_spore, link_suffix, color_name):
         """Создает призрачный линк между двумя спорами."""
         try:
-            ghost_link = Link(
+            ghost_link = entity_pool.acquire(
+                Link,
                 parent_spore=parent_spore,
                 child_spore=child_spore,
                 color_manager=self.deps.color_manager,
@@ -586,27 +587,8 @@ class PredictionManager:
             viz.destroy()
         self.prediction_visualizers.clear()
 
-        # Очищаем линки предсказаний
-        for i, link in enumerate(self.prediction_links):
-            # Используем сохраненный ключ если есть
-            if hasattr(link, '_zoom_manager_key'):
-                try:
-                    self.deps.zoom_manager.unregister_object(link._zoom_manager_key)
-                except:
-                    pass
-            else:
-                # Fallback - используем сохраненный ключ линка если есть
-                link_key = getattr(link, '_zoom_manager_key', None)
-                if link_key:
-                    try:
-                        self.deps.zoom_manager.unregister_object(link_key)
-                    except:
-                        pass
-
-            try:
-                destroy(link)
-            except:
-                pass
+        # Линки предсказаний возвращаются в пул (снимаются с регистрации в zoom_manager)
+        entity_pool.release_all(self.prediction_links, self.deps.zoom_manager)
         self.prediction_links.clear()
 
         if DEBUG_PM_SPAM: print("[PM] clear_predictions: done")
@@ -346,6 +346,9 @@ class ManualSporeManager:
                 except Exception as e:
                     print(f"   ❌ Ошибка удаления линка {i+1}: {e}")
 
+            if deleted_links and hasattr(self.spore_manager, 'mark_graph_changed'):
+                self.spore_manager.mark_graph_changed()
+
             # 3. УДАЛЯЕМ СПОРЫ
             deleted_spores = 0
             for i, spore in enumerate(last_spores):
@@ -403,13 +406,8 @@ class ManualSporeManager:
                             if self.spore_manager.graph.remove_edge(parent.id, spore.id):
                                 removed_edges += 1
                                 
-                        # Удаляем спору из графа
-                        if spore.id in self.spore_manager.graph.nodes:
-                            del self.spore_manager.graph.nodes[spore.id]
-                            if spore.id in self.spore_manager.graph.outgoing:
-                                del self.spore_manager.graph.outgoing[spore.id]
-                            if spore.id in self.spore_manager.graph.incoming:
-                                del self.spore_manager.graph.incoming[spore.id]
+                        # Удаляем спору из графа (с отметкой версии для кешей)
+                        self.spore_manager.graph.remove_spore(spore.id)
                 
                 print(f"   🗑️ Удалено из графа: {removed_edges} связей")
             else:
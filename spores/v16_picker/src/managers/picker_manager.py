@@ -14,10 +14,12 @@ Picker Manager - Отслеживание близких спор к точке
 
 import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
-import os
 from ..managers.zoom_manager import ZoomManager
 from ..managers.spore_manager import SporeManager
 from ..core.spore import Spore
+from ..utils.debug_output import get_logger
+
+_log = get_logger('picker')
 
 
 class PickerManager:
@@ -53,21 +55,23 @@ class PickerManager:
         # Список близких спор
         self.close_spores: List[Dict[str, Any]] = []
         self._neighbor_cache: Dict[str, Dict[int, List[Dict[str, Any]]]] = {}
+        # Позиции спор и dt/управление линков, по которым построена запись кеша соседей
+        self._neighbor_cache_values: Dict[str, Tuple] = {}
 
         # Предыдущие координаты look_point для проверки изменений
         self.last_look_point: Optional[Tuple[float, float]] = None
         
-        # 🆕 Кеширование JSON данных
-        self._cached_graph_data: Dict[str, Any] = {}
-        self._last_json_modified_time: float = 0
-        self._json_path: str = os.path.join("buffer", "real_graph_latest.json")
-        
-        print("🎯 PickerManager с поддержкой JSON инициализирован")
+        # Версия снимка графа SporeManager, по которой построены кеши соседей
+        self._graph_version: int = getattr(spore_manager, 'graph_version', 0)
+        # Версия SporeGraph, которой соответствует _neighbor_cache
+        self._neighbor_graph_version: int = getattr(getattr(spore_manager, 'graph', None), 'version', 0)
+        self._neighbor_objects_count: int = len(getattr(spore_manager, 'objects', ()))
         
-        # Подписка на изменения look_point
+        # Подписка на изменения look_point и графа
         self._subscribe_to_look_point_changes()
+        self._subscribe_to_graph_changes()
         
-        print(f"🎯 PickerManager инициализирован "
+        _log.info(lambda: f"🎯 PickerManager инициализирован "
               f"(threshold: {distance_threshold}, verbose: {verbose_output})")
 
     def _subscribe_to_look_point_changes(self) -> None:
@@ -75,9 +79,46 @@ class PickerManager:
         if hasattr(self.zoom_manager, 'subscribe_look_point_change'):
             self.zoom_manager.subscribe_look_point_change(
                 self._on_look_point_changed)
-            print("🎯 PickerManager подписан на изменения look_point")
+            _log.info("🎯 PickerManager подписан на изменения look_point")
+        else:
+            _log.warning("⚠️ ZoomManager не поддерживает подписку на look_point")
+
+    def _subscribe_to_graph_changes(self) -> None:
+        """Подписывается на новые версии графа в SporeManager."""
+        if hasattr(self.spore_manager, 'subscribe_graph_change'):
+            self.spore_manager.subscribe_graph_change(self._on_graph_changed)
+        else:
+            _log.warning("⚠️ SporeManager не поддерживает подписку на изменения графа")
+
+    def _on_graph_changed(self, version: int) -> None:
+        """Колбэк новой версии графа: сбрасывает устаревшие записи кеша соседей."""
+        self._graph_version = version
+        self._revalidate_neighbor_cache()
+
+    def _revalidate_neighbor_cache(self) -> None:
+        """
+        Удаляет из кеша соседей только споры в пределах двух шагов от
+        изменённых узлов SporeGraph. При удалении спор (сдвигаются
+        визуальные ID) или неполном журнале кеш сбрасывается целиком.
+        """
+        graph = getattr(self.spore_manager, 'graph', None)
+        if graph is None or not hasattr(graph, 'affected_since'):
+            self._neighbor_cache = {}
+            return
+
+        objects_count = len(getattr(self.spore_manager, 'objects', ()))
+        removed_objects = objects_count < self._neighbor_objects_count
+        self._neighbor_objects_count = objects_count
+        if graph.version == self._neighbor_graph_version and not removed_objects:
+            return
+
+        affected = graph.affected_since(self._neighbor_graph_version, hops=2)
+        if removed_objects or affected is None or any(spore_id not in graph.nodes for spore_id in affected):
+            self._neighbor_cache = {}
         else:
-            print("⚠️ ZoomManager не поддерживает подписку на look_point")
+            for spore_id in affected:
+                self._neighbor_cache.pop(spore_id, None)
+        self._neighbor_graph_version = graph.version
 
     def _get_corrected_look_point(self) -> Tuple[float, float]:
         """
@@ -157,9 +198,6 @@ class PickerManager:
             
             # Обновляем предыдущие координаты
             self.last_look_point = current_look_point
-            
-            # 🆕 Принудительная проверка обновлений JSON перед анализом
-            self._force_json_reload_if_needed()
 
             # Вызываем обновление только при реальном изменении
             self._update_close_spores(corrected_x, corrected_z)
@@ -206,27 +244,37 @@ class PickerManager:
                 continue
         
         # ВЫВОДИМ ТОЛЬКО САМУЮ БЛИЗКУЮ СПОРУ
+        # Соседи берутся из кеша, если граф вокруг споры не менялся, а позиции
+        # спор и dt линков на путях снимка те же (они меняются без новой версии графа)
+        self._revalidate_neighbor_cache()
         neighbor_cache: Dict[str, Dict[int, List[Dict[str, Any]]]] = {}
+        neighbor_cache_values: Dict[str, Tuple] = {}
         for spore_info in new_close_spores:
-            spore_neighbors: Dict[int, List[Dict[str, Any]]] = {}
+            spore_id = spore_info['id']
+            spore_neighbors: Dict[int, List[Dict[str, Any]]] = self._neighbor_cache.get(spore_id, {})
             try:
-                spore_neighbors = self._collect_neighbors_snapshot(spore_info['id'])
+                values = self._neighbor_snapshot_values(spore_neighbors) if spore_id in self._neighbor_cache else None
+                if values is None or values != self._neighbor_cache_values.get(spore_id):
+                    spore_neighbors = self._collect_neighbors_snapshot(spore_id)
+                    values = self._neighbor_snapshot_values(spore_neighbors)
+                neighbor_cache_values[spore_id] = values
             except Exception as error:
                 if self.verbose_output:
-                    print(f"[PickerManager] failed to collect neighbors for {spore_info['id']}: {error}")
-            neighbor_cache[spore_info['id']] = spore_neighbors
+                    _log.error(f"[PickerManager] failed to collect neighbors for {spore_id}: {error}")
+            neighbor_cache[spore_id] = spore_neighbors
             spore_info['neighbors'] = spore_neighbors
 
         self._neighbor_cache = neighbor_cache
+        self._neighbor_cache_values = neighbor_cache_values
 
         if self.verbose_output:
-            print(f"\n🎯 LOOK_POINT: ({look_point_x:.4f}, {look_point_z:.4f})")
+            _log.info(lambda: f"\n🎯 LOOK_POINT: ({look_point_x:.4f}, {look_point_z:.4f})")
             
             # Объединяем все споры и сортируем по дистанции
             all_spores = new_close_spores + far_spores
             all_spores.sort(key=lambda spore: spore['distance'])
             
-            print(f"   📊 Всего спор в графе: {len(all_spores)}")
+            _log.info(lambda: f"   📊 Всего спор в графе: {len(all_spores)}")
             
             # Показываем только самую близкую спору
             if all_spores:
@@ -239,13 +287,13 @@ class PickerManager:
                 # Получаем визуальный ID для самой близкой споры
                 visual_id = self._get_visual_spore_id(closest_spore['spore'])
                 
-                print(f"   🎯 САМАЯ БЛИЗКАЯ СПОРА: {marker} {visual_id}: "
+                _log.info(lambda: f"   🎯 САМАЯ БЛИЗКАЯ СПОРА: {marker} {visual_id}: "
                       f"({pos[0]:.4f}, {pos[1]:.4f}), dist={dist:.4f}")
                 
-                # Выводим соседей самой близкой споры (по JSON)
+                # Выводим соседей самой близкой споры (по снимку графа)
                 self._analyze_spore_neighbors(closest_spore)
             else:
-                print("   📭 Спор в графе нет")
+                _log.info("   📭 Спор в графе нет")
 
         # Обновляем список близких спор
         self.close_spores = new_close_spores
@@ -340,17 +388,17 @@ class PickerManager:
         # Получаем визуальный ID (как на картинке) - индекс в списке + 1
         visual_id = self._get_visual_spore_id(spore)
         
-        print(f"\n🔗 СОСЕДИ СПОРЫ {visual_id}:")
+        _log.info(lambda: f"\n🔗 СОСЕДИ СПОРЫ {visual_id}:")
         
         # 🔍 ОТЛАДОЧНАЯ ВЕРИФИКАЦИЯ ИСПРАВЛЕНИЙ
-        print(f"🔧 ВЕРИФИКАЦИЯ ИСПРАВЛЕНИЙ:")
+        _log.info("🔧 ВЕРИФИКАЦИЯ ИСПРАВЛЕНИЙ:")
 
         # Проверяем материализованные связи
         materialized_links = [link for link in self.spore_manager.links if hasattr(link, 'control_value')]
         buffer_links = [link for link in self.spore_manager.links if hasattr(link, 'dt_value')]
 
-        print(f"   📊 Связей с control_value: {len(materialized_links)}")
-        print(f"   📊 Связей с dt_value: {len(buffer_links)}")
+        _log.info(lambda: f"   📊 Связей с control_value: {len(materialized_links)}")
+        _log.info(lambda: f"   📊 Связей с dt_value: {len(buffer_links)}")
 
         # Показываем статистику по знакам управления
         if materialized_links:
@@ -358,35 +406,35 @@ class PickerManager:
             negative_controls = [link for link in materialized_links if link.control_value < 0]
             zero_controls = [link for link in materialized_links if link.control_value == 0]
             
-            print(f"   ✅ Связей с управлением +: {len(positive_controls)}")
-            print(f"   ✅ Связей с управлением -: {len(negative_controls)}") 
-            print(f"   ✅ Связей с управлением 0: {len(zero_controls)}")
+            _log.info(lambda: f"   ✅ Связей с управлением +: {len(positive_controls)}")
+            _log.info(lambda: f"   ✅ Связей с управлением -: {len(negative_controls)}") 
+            _log.info(lambda: f"   ✅ Связей с управлением 0: {len(zero_controls)}")
             
             # Показываем несколько примеров
-            print(f"   📝 ПРИМЕРЫ ИСПРАВЛЕННЫХ СВЯЗЕЙ:")
+            _log.info("   📝 ПРИМЕРЫ ИСПРАВЛЕННЫХ СВЯЗЕЙ:")
             for i, link in enumerate(materialized_links[:3]):  # Первые 3
                 dt_val = getattr(link, 'dt_value', 'N/A')
                 control_val = link.control_value
-                print(f"      {i+1}. Управление: {control_val:+.1f}, dt: {dt_val}")
+                _log.info(lambda: f"      {i+1}. Управление: {control_val:+.1f}, dt: {dt_val}")
         else:
-            print(f"   ⚠️ НЕТ СВЯЗЕЙ С control_value - исправление не сработало!")
+            _log.warning(f"   ⚠️ НЕТ СВЯЗЕЙ С control_value - исправление не сработало!")
         
         # Получаем соседей на расстоянии 1 (прямые связи)
         neighbors_1 = self._get_neighbors_at_distance(graph_spore_id, 1)
         if neighbors_1:
-            print("   📍 Маршруты длиной 1:")
+            _log.info("   📍 Маршруты длиной 1:")
             for neighbor_info in neighbors_1:
                 self._print_neighbor_info(neighbor_info, 1)
         
         # Получаем соседей на расстоянии 2 (через промежуточную спору)
         neighbors_2 = self._get_neighbors_at_distance(graph_spore_id, 2)
         if neighbors_2:
-            print("   📍 Маршруты длиной 2:")
+            _log.info("   📍 Маршруты длиной 2:")
             for neighbor_info in neighbors_2:
                 self._print_neighbor_info(neighbor_info, 2)
         
         if not neighbors_1 and not neighbors_2:
-            print("   📭 Нет соседей в графе")
+            _log.info("   📭 Нет соседей в графе")
 
     def _get_neighbors_at_distance(self, spore_id: str, distance: int) -> List[Dict[str, Any]]:
         """
@@ -492,6 +540,31 @@ class PickerManager:
 
         return snapshot
 
+    def _neighbor_snapshot_values(self, snapshot: Dict[int, List[Dict[str, Any]]]) -> Tuple:
+        """
+        Позиции спор и dt/управление линков на путях снимка соседей.
+
+        Структуру снимка сторожит версия SporeGraph, а эти значения меняются
+        без новой версии — по ним проверяется, что запись кеша не устарела.
+        """
+        graph = self.spore_manager.graph
+        values: List[Any] = []
+        for neighbors in snapshot.values():
+            for neighbor in neighbors:
+                path = neighbor.get('raw_path', [])
+                for node_id in path:
+                    try:
+                        pos = graph.nodes[node_id].calc_2d_pos()
+                        values.append((float(pos[0]), float(pos[1])))
+                    except Exception:
+                        values.append(None)
+                for parent_id, child_id in zip(path, path[1:]):
+                    edge = graph.edges.get((parent_id, child_id)) or graph.edges.get((child_id, parent_id))
+                    link = getattr(edge, 'link_object', None)
+                    values.append((self._to_serializable_number(getattr(link, 'dt_value', None)),
+                                   self._to_serializable_number(getattr(link, 'control_value', None))))
+        return tuple(values)
+
     def _serialize_neighbor_info(
             self,
             distance: int,
@@ -704,16 +777,16 @@ class PickerManager:
             neighbors_snapshot: Optional[Dict[int, List[Dict[str, Any]]]]
     ) -> None:
         """Print cached neighbors grouped by graph distance."""
-        print(f"\n🧭 СОСЕДИ СПОРЫ {visual_id}:")
+        _log.info(lambda: f"\n🧭 СОСЕДИ СПОРЫ {visual_id}:")
 
         if not neighbors_snapshot:
-            print('   • Соседи не найдены.')
+            _log.info('   • Соседи не найдены.')
             return
 
         for distance in sorted(neighbors_snapshot.keys()):
             neighbors = neighbors_snapshot.get(distance, [])
             header = 'На расстоянии 1' if distance == 1 else f'На расстоянии {distance}'
-            print(f"   • {header} ({len(neighbors)}):")
+            _log.info(lambda: f"   • {header} ({len(neighbors)}):")
 
             for neighbor in neighbors:
                 target_visual = neighbor.get('visual_id') or neighbor.get('target_id') or '?'
@@ -755,8 +828,8 @@ class PickerManager:
                     if intermediate:
                         extra = f', через {intermediate}'
 
-                print(
-                    f"      🎯 Спора {target_visual} {pos_str} | dt: {dt_str} | "
+                _log.info(
+                    lambda: f"      🎯 Спора {target_visual} {pos_str} | dt: {dt_str} | "
                     f"u: {control_str} | путь: {path_str} | шаги: {steps_str} | итог: {time_summary}{extra}"
                 )
 
@@ -837,7 +910,7 @@ class PickerManager:
         
         if distance == 1:
             # Маршрут длиной 1: Спора -> Линк -> Спора
-            print(f"      🎯 Спора: {visual_target_id} {pos_str} {time_arrow}")
+            _log.info(lambda: f"      🎯 Спора: {visual_target_id} {pos_str} {time_arrow}")
             
             # Выводим информацию о связи
             for i, edge_info in enumerate(neighbor_info['edges']):
@@ -883,10 +956,10 @@ class PickerManager:
                                           else "обратное время" if time_direction == 'backward'
                                           else "неизвестно")
                             
-                        print(f"         🔗 Линк: управление={control}, время={dt_str} "
+                        _log.info(lambda: f"         🔗 Линк: управление={control}, время={dt_str} "
                               f"({direction_text}, источник dt: {dt_source}, источник control: {control_source})")
                     except Exception as e:
-                        print(f"         🔗 Линк: ошибка получения данных - {e}")
+                        _log.error(f"         🔗 Линк: ошибка получения данных - {e}")
         
         elif distance == 2:
             # Маршрут длиной 2: Линк -> Линк -> Спора
@@ -896,7 +969,7 @@ class PickerManager:
                           else "🔄" if time_direction == 'mixed'
                           else "❓")
             
-            print(f"      🎯 Спора: {visual_target_id} {pos_str} {time_arrow}")
+            _log.info(lambda: f"      🎯 Спора: {visual_target_id} {pos_str} {time_arrow}")
             
             # Анализируем временные направления каждой связи
             route_analysis = []
@@ -924,7 +997,7 @@ class PickerManager:
                 route_direction = "🔄"
                 route_description = f"смешанное время ({', '.join(route_analysis)})"
 
-            print(f"         📍 Маршрут длиной 2 {route_direction} ({route_description})")
+            _log.info(lambda: f"         📍 Маршрут длиной 2 {route_direction} ({route_description})")
             
             # Выводим информацию о первой связи
             if len(neighbor_info['edges']) > 0:
@@ -978,15 +1051,15 @@ class PickerManager:
                                 time_direction = "нулевое время"
                                 dt_str = "0.000"
 
-                            print(f"         🔗 Линк 1: управление={control_str}, время={dt_str} "
+                            _log.info(lambda: f"         🔗 Линк 1: управление={control_str}, время={dt_str} "
                                   f"({time_direction}, источник dt: {dt_source}, источник control: {control_source})")
                         else:
                             # Резервная логика для случаев без данных
                             dt_str = f"+{dt}" if dt != 'N/A' and dt >= 0 else str(dt)
-                            print(f"         🔗 Линк 1: управление={control}, время={dt_str} "
+                            _log.info(lambda: f"         🔗 Линк 1: управление={control}, время={dt_str} "
                                   f"(источник dt: {dt_source}, источник control: {control_source})")
                     except Exception as e:
-                        print(f"         🔗 Линк 1: ошибка получения данных - {e}")
+                        _log.error(f"         🔗 Линк 1: ошибка получения данных - {e}")
             
             # Выводим информацию о второй связи
             if len(neighbor_info['edges']) > 1:
@@ -1040,15 +1113,15 @@ class PickerManager:
                                 time_direction = "нулевое время"
                                 dt_str = "0.000"
 
-                            print(f"         🔗 Линк 2: управление={control_str}, время={dt_str} "
+                            _log.info(lambda: f"         🔗 Линк 2: управление={control_str}, время={dt_str} "
                                   f"({time_direction}, источник dt: {dt_source}, источник control: {control_source})")
                         else:
                             # Резервная логика для случаев без данных
                             dt_str = f"+{dt}" if dt != 'N/A' and dt >= 0 else str(dt)
-                            print(f"         🔗 Линк 2: управление={control}, время={dt_str} "
+                            _log.info(lambda: f"         🔗 Линк 2: управление={control}, время={dt_str} "
                                   f"(источник dt: {dt_source}, источник control: {control_source})")
                     except Exception as e:
-                        print(f"         🔗 Линк 2: ошибка получения данных - {e}")
+                        _log.error(f"         🔗 Линк 2: ошибка получения данных - {e}")
 
     def get_close_spores(self) -> List[Dict[str, Any]]:
         """
@@ -1076,7 +1149,7 @@ class PickerManager:
             threshold: Новый порог расстояния
         """
         self.distance_threshold = threshold
-        print(f"🎯 Порог расстояния изменен на {threshold}")
+        _log.info(lambda: f"🎯 Порог расстояния изменен на {threshold}")
 
         # Принудительно обновляем список с новым порогом
         corrected_x, corrected_z = self._get_corrected_look_point()
@@ -1086,7 +1159,7 @@ class PickerManager:
         """Принудительно обновляет список близких спор."""
         corrected_x, corrected_z = self._get_corrected_look_point()
         self._update_close_spores(corrected_x, corrected_z)
-        print("🎯 Принудительное обновление близких спор выполнено")
+        _log.info("🎯 Принудительное обновление близких спор выполнено")
 
     def force_update_without_check(self) -> None:
         """Принудительно обновляет список близких спор без проверки."""
@@ -1097,7 +1170,7 @@ class PickerManager:
         
         # Вызываем обновление
         self._update_close_spores(corrected_x, corrected_z)
-        print("🎯 Принудительное обновление без проверки изменений выполнено")
+        _log.info("🎯 Принудительное обновление без проверки изменений выполнено")
 
     def get_last_look_point(self) -> Optional[Tuple[float, float]]:
         """
@@ -1175,24 +1248,24 @@ class PickerManager:
         all_spores = close_spores + far_spores
         all_spores.sort(key=lambda spore: spore['distance'])
         
-        print("\n🎯 СВОДКА ПО СПОРАМ:")
-        print(f"   📍 Близкие споры (< {self.distance_threshold}): "
+        _log.info("\n🎯 СВОДКА ПО СПОРАМ:")
+        _log.info(lambda: f"   📍 Близкие споры (< {self.distance_threshold}): "
               f"{len(close_spores)}")
-        print(f"   📏 Не близкие споры (≥ {self.distance_threshold}): "
+        _log.info(lambda: f"   📏 Не близкие споры (≥ {self.distance_threshold}): "
               f"{len(far_spores)}")
-        print(f"   📊 Всего спор в графе: {len(all_spores)}")
+        _log.info(lambda: f"   📊 Всего спор в графе: {len(all_spores)}")
         
         if all_spores:
-            print("\n   📍 ВСЕ СПОРЫ (отсортированы по дистанции):")
+            _log.info("\n   📍 ВСЕ СПОРЫ (отсортированы по дистанции):")
             for i, spore_info in enumerate(all_spores, 1):
                 pos = spore_info['position']
                 dist = spore_info['distance']
                 is_close = dist < self.distance_threshold
                 marker = "📍" if is_close else "📏"
-                print(f"      {i:2d}. {marker} {spore_info['id']}: "
+                _log.info(lambda: f"      {i:2d}. {marker} {spore_info['id']}: "
                       f"({pos[0]:.4f}, {pos[1]:.4f}), dist={dist:.4f}")
         else:
-            print("\n   📭 Спор в графе нет")
+            _log.info("\n   📭 Спор в графе нет")
 
     def set_verbose_output(self, verbose: bool) -> None:
         """
@@ -1203,69 +1276,21 @@ class PickerManager:
         """
         self.verbose_output = verbose
         status = 'включен' if verbose else 'отключен'
-        print(f"🎯 Подробный вывод {status}")
+        _log.info(lambda: f"🎯 Подробный вывод {status}")
 
     def toggle_verbose_output(self) -> None:
         """Переключает режим подробного вывода."""
         self.verbose_output = not self.verbose_output
         status = 'включен' if self.verbose_output else 'отключен'
-        print(f"🎯 Подробный вывод {status}")
-
-    def _force_json_reload_if_needed(self):
-        """Принудительно проверяет и перезагружает JSON если нужно."""
-        try:
-            if os.path.exists(self._json_path):
-                current_size = os.path.getsize(self._json_path)
-                current_mtime = os.path.getmtime(self._json_path)
-                
-                # Проверяем не только время, но и размер (на случай быстрых обновлений)
-                if current_mtime != self._last_json_modified_time:
-                    print(f"🔄 Обнаружено обновление JSON, перезагружаем...")
-                    self._cached_graph_data.clear()
-        except Exception as e:
-            print(f"⚠️ Ошибка проверки JSON: {e}")
-
-    def _load_real_graph_json(self) -> dict:
-        """Загружает данные реального графа из JSON с кешированием."""
-        try:
-            import json
-            
-            if not os.path.exists(self._json_path):
-                if self._cached_graph_data:
-                    print(f"⚠️ JSON файл исчез, используем кеш")
-                    return self._cached_graph_data
-                print(f"⚠️ JSON файл реального графа не найден: {self._json_path}")
-                return {}
-            
-            # Проверяем время модификации файла
-            current_modified_time = os.path.getmtime(self._json_path)
-            
-            if (current_modified_time != self._last_json_modified_time or 
-                not self._cached_graph_data):
-                
-                # Загружаем новые данные
-                with open(self._json_path, 'r', encoding='utf-8') as f:
-                    self._cached_graph_data = json.load(f)
-                
-                self._last_json_modified_time = current_modified_time
-                
-                spore_count = len(self._cached_graph_data.get('spores', []))
-                link_count = len(self._cached_graph_data.get('links', []))
-                print(f"🔄 JSON обновлен: {spore_count} спор, {link_count} связей")
-            
-            return self._cached_graph_data
-            
-        except Exception as e:
-            print(f"❌ Ошибка загрузки JSON: {e}")
-            return self._cached_graph_data if self._cached_graph_data else {}
+        _log.info(lambda: f"🎯 Подробный вывод {status}")
 
     def _analyze_spore_neighbors(self, spore_info: Dict[str, Any]) -> None:
-        """Анализирует соседей споры на основе данных из JSON."""
+        """Анализирует соседей споры по снимку графа из SporeManager."""
         
-        # Загружаем данные из JSON
-        graph_data = self._load_real_graph_json()
-        if not graph_data:
-            print("❌ Нет данных графа для анализа")
+        # Снимок в памяти: пересобирается только при смене версии графа
+        snapshot = self.spore_manager.get_graph_snapshot()
+        if snapshot.num_nodes == 0:
+            _log.error("❌ Нет данных графа для анализа")
             return
         
         target_spore = spore_info['spore']
@@ -1281,110 +1306,44 @@ class PickerManager:
 
         self._print_neighbor_cache_summary(target_visual_id, neighbors_snapshot)
 
-        json_spore_id = getattr(target_spore, 'spore_id', None)
-        target_spore_data = None
-
-        if json_spore_id is not None:
-            for spore_data in graph_data.get('spores', []):
-                if spore_data.get('spore_id') == json_spore_id:
-                    target_spore_data = spore_data
-                    break
+        # Индекс узла в снимке совпадает с визуальным номером - 1
+        try:
+            target_index = int(target_visual_id) - 1
+        except ValueError:
+            target_index = -1
 
-        if not target_spore_data:
-            idx_guess = None
-            if json_spore_id is None:
-                try:
-                    idx_guess = int(target_visual_id) - 1
-                except ValueError:
-                    idx_guess = None
-            if idx_guess is not None:
-                spores_list = graph_data.get('spores', [])
-                if 0 <= idx_guess < len(spores_list):
-                    target_spore_data = spores_list[idx_guess]
-
-        if not target_spore_data:
-            msg = f"❌ Спора {target_visual_id} не найдена в JSON данных"
-            if json_spore_id is not None:
-                msg += f" (ожидаемый spore_id={json_spore_id})"
-            print(msg)
+        if not 0 <= target_index < snapshot.num_nodes:
+            _log.error(f"❌ Спора {target_visual_id} не найдена в снимке графа")
             return
 
-        print(f"\n🔗 СОСЕДИ СПОРЫ {target_visual_id} (из JSON):")
-        
-        # 🔧 ОТЛАДОЧНАЯ ИНФОРМАЦИЯ О JSON
-        metadata = graph_data.get('metadata', {})
-        export_time = metadata.get('export_time', 'неизвестно')
-        print(f"📋 JSON экспорт от: {export_time}")
+        _log.info(lambda: f"\n🔗 СОСЕДИ СПОРЫ {target_visual_id} (версия графа {snapshot.version}):")
         
-        # Анализируем исходящие связи (out_links) - куда можем попасть
-        out_links = target_spore_data.get('out_links', [])
-        if out_links:
-            print(f"   📍 ИСХОДЯЩИЕ СВЯЗИ (куда можем попасть):")
-            for i, link_data in enumerate(out_links):
-                # 🔧 ИСПРАВЛЕНИЕ: out_links теперь содержит словари с полной информацией
-                to_spore_id = link_data.get('to_spore_id')
-                
-                # Используем данные прямо из link_data вместо поиска в links
-                control = link_data.get('control', 0)
-                dt = link_data.get('dt', 0)
-                dt_sign = link_data.get('dt_sign', 1)
-                
-                if to_spore_id:
-                    # 🔧 ИСПРАВЛЕНИЕ: to_spore_id уже является визуальным номером
-                    target_visual_id_out = to_spore_id
-                    
-                    # 🔧 ИСПРАВЛЕНИЕ: Исходящая связь - всегда прямое время (положительное)
-                    time_direction = "прямое время"
-                    time_symbol = "⏩"
-                    dt_str = f"+{dt}"  # Всегда положительное время
-                    
-                    control_str = f"+{control}" if control > 0 else str(control)
-                    link_type = "max" if control > 0 else "min"  # Простое определение типа
-                    
-                    print(f"      🎯 Спора {target_visual_id_out}: {link_type}, управление={control_str}, время={dt_str} ({time_direction}) {time_symbol}")
-                else:
-                    print(f"      🎯 Спора 0: (детали связи не найдены)")
+        # Анализируем исходящие связи - куда можем попасть
+        out_edges = np.flatnonzero(snapshot.edge_parent == target_index)
+        if len(out_edges):
+            _log.info("   📍 ИСХОДЯЩИЕ СВЯЗИ (куда можем попасть):")
+            for k in out_edges:
+                to_visual_id = int(snapshot.edge_child[k]) + 1
+                control = float(snapshot.edge_control[k])
+                dt = abs(float(snapshot.edge_dt[k]))
+
+                # Исходящая связь - всегда прямое время (положительное)
+                control_str = f"+{control}" if control > 0 else str(control)
+                link_type = "max" if control > 0 else "min"  # Простое определение типа
+
+                _log.info(lambda: f"      🎯 Спора {to_visual_id}: {link_type}, управление={control_str}, время=+{dt} (прямое время) ⏩")
         
-        # Анализируем входящие связи (in_links) - откуда можем прийти
-        in_links = target_spore_data.get('in_links', [])
-        if in_links:
-            print(f"   📍 ВХОДЯЩИЕ СВЯЗИ (откуда можем прийти):")
-            for i, link_data in enumerate(in_links):
-                # 🔧 ИСПРАВЛЕНИЕ: in_links теперь содержит словари с полной информацией
-                from_spore_id = link_data.get('from_spore_id')
-                
-                # Используем данные прямо из link_data вместо поиска в links
-                control = link_data.get('control', 0)
-                dt = link_data.get('dt', 0)
-                dt_sign = link_data.get('dt_sign', 1)
-                
-                if from_spore_id:
-                    # 🔧 ИСПРАВЛЕНИЕ: from_spore_id уже является визуальным номером
-                    source_visual_id = from_spore_id
-                    
-                    # 🔧 ИСПРАВЛЕНИЕ: Входящая связь - всегда обратное время (отрицательное)
-                    time_direction = "обратное время"
-                    time_symbol = "⏪"
-                    dt_str = f"-{dt}"  # Всегда отрицательное время
-                    
-                    control_str = f"+{control}" if control > 0 else str(control)
-                    link_type = "max" if control > 0 else "min"  # Простое определение типа
-                    
-                    print(f"      🎯 Спора {source_visual_id}: {link_type}, управление={control_str}, время={dt_str} ({time_direction}) {time_symbol}")
-                else:
-                    print(f"      🎯 Спора 0: (детали связи не найдены)")
-
-    def _find_link_details(self, parent_spore_id: str, child_spore_id: str, graph_data: dict) -> dict:
-        """Находит детальную информацию о связи в массиве links."""
-        for link_data in graph_data.get('links', []):
-            if (link_data.get('parent_spore_id') == parent_spore_id and 
-                link_data.get('child_spore_id') == child_spore_id):
-                return link_data
-        return {}
-
-    def _find_visual_id_by_spore_id(self, spore_id: str, graph_data: dict) -> int:
-        """Находит визуальный ID споры по её spore_id в JSON данных."""
-        for spore_data in graph_data.get('spores', []):
-            if spore_data['spore_id'] == spore_id:
-                return spore_data['index'] + 1
-        return 0
+        # Анализируем входящие связи - откуда можем прийти
+        in_edges = np.flatnonzero(snapshot.edge_child == target_index)
+        if len(in_edges):
+            _log.info("   📍 ВХОДЯЩИЕ СВЯЗИ (откуда можем прийти):")
+            for k in in_edges:
+                from_visual_id = int(snapshot.edge_parent[k]) + 1
+                control = float(snapshot.edge_control[k])
+                dt = abs(float(snapshot.edge_dt[k]))
+
+                # Входящая связь - всегда обратное время (отрицательное)
+                control_str = f"+{control}" if control > 0 else str(control)
+                link_type = "max" if control > 0 else "min"  # Простое определение типа
+
+                _log.info(lambda: f"      🎯 Спора {from_visual_id}: {link_type}, управление={control_str}, время=-{dt} (обратное время) ⏪")
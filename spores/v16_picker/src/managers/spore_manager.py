@@ -1,13 +1,17 @@
 from ursina import destroy
+import os
 import numpy as np
-from typing import List, Optional, Dict, Any, TYPE_CHECKING
+from typing import Callable, List, Optional, Dict, Any, TYPE_CHECKING
 
 from ..core.spore import Spore
 from ..core.spore_graph import SporeGraph
+from ..core.graph_snapshot import GraphSnapshot
+from ..core.graph_journal import GraphJournal, load_graph_journal
 from ..logic.pendulum import PendulumSystem
 from ..visual.link import Link
 from ..managers.color_manager import ColorManager
 from ..visual.prediction_visualizer import PredictionVisualizer
+from ..visual.entity_pool import entity_pool
 from .zoom_manager import ZoomManager
 from ..logic.optimizer import SporeOptimizer
 from .param_manager import ParamManager
@@ -52,9 +56,23 @@ class SporeManager:
         # Граф связей (централизованное хранилище структуры)
         self.graph = SporeGraph(graph_type='real')
         print("   ✓ SporeGraph инициализирован (real)")
+
+        # Версионированный снимок графа в памяти (для PickerManager и др.)
+        self.graph_version: int = 0
+        self._graph_snapshot: Optional[GraphSnapshot] = None
+        self.graph_change_subscribers: List[Callable[[int], None]] = []
         
         # Инициализируем ID Manager
         self.id_manager = IDManager()
+
+        # Журнал изменений реального графа (core/graph_journal.py):
+        # journal_graph — логический граф прошлой сессии при resume,
+        # сущности для него строит restore_from_journal()
+        self.graph_journal: Optional[GraphJournal] = None
+        self.journal_graph: Optional[SporeGraph] = None
+        journal_config = self.config.get('graph_journal', {})
+        if journal_config.get('enabled', False):
+            self._open_graph_journal(journal_config)
         
         # Система кандидатских спор
         self.candidate_spores: List[Spore] = []  # Споры-кандидаты (белые прозрачные)
@@ -63,15 +81,11 @@ class SporeManager:
 
     def clear(self) -> None:
         """Удаляет все споры, связи и другие объекты со сцены."""
-        for spore in self.objects:
-            destroy(spore)
-        for link in self.links:
-            # Удаляем из zoom_manager перед удалением объекта
-            if hasattr(link, '_zoom_manager_key'):
-                self.zoom_manager.unregister_object(link._zoom_manager_key)
-            destroy(link)
+        # Споры и связи возвращаются в пул (снимаются с регистрации в zoom_manager)
+        entity_pool.release_all(self.objects, self.zoom_manager)
+        entity_pool.release_all(self.links, self.zoom_manager)
         if self.ghost_link:
-            destroy(self.ghost_link)
+            entity_pool.release(self.ghost_link, self.zoom_manager)
         for visualizer in self.prediction_visualizers:
             visualizer.destroy()
 
@@ -94,6 +108,8 @@ class SporeManager:
         if self.angel_manager:
             self.angel_manager.clear_all()
 
+        self.mark_graph_changed()
+
     def clear_all_manual(self) -> None:
         """Полная очистка для v13_manual - удаляет все объекты КРОМЕ целевой споры."""
         
@@ -151,9 +167,8 @@ class SporeManager:
                         except Exception as e:
                             print(f"   ⚠️ Ошибка удаления из ZoomManager: {e}")
                     
-                    # Безопасное уничтожение
-                    if hasattr(spore, 'destroy'):
-                        spore.destroy()
+                    # Возвращаем в пул (не пуловые сущности пул уничтожает)
+                    entity_pool.release(spore)
                     
                     spores_to_remove.append(spore)
                     
@@ -200,9 +215,8 @@ class SporeManager:
                         except Exception as e:
                             print(f"   ⚠️ Ошибка удаления связи из ZoomManager: {e}")
                     
-                    # Безопасное уничтожение
-                    if hasattr(link, 'destroy'):
-                        link.destroy()
+                    # Возвращаем в пул (не пуловые сущности пул уничтожает)
+                    entity_pool.release(link)
                         
                     links_to_remove.append(link)
                     
@@ -227,8 +241,7 @@ class SporeManager:
                     self.ghost_link.visible = False
                 if hasattr(self.ghost_link, 'parent') and self.ghost_link.parent is not None:
                     self.ghost_link.parent = None
-                if hasattr(self.ghost_link, 'destroy'):
-                    self.ghost_link.destroy()
+                entity_pool.release(self.ghost_link, self.zoom_manager)
                 print("   ✓ Удалена призрачная связь")
             except Exception as e:
                 print(f"   ⚠️ Ошибка удаления ghost_link: {e}")
@@ -305,6 +318,7 @@ class SporeManager:
         except Exception as e:
             print(f"   ⚠️ Ошибка финальной очистки: {e}")
         
+        self.mark_graph_changed()
         print("🧹 Полная очистка завершена (целевые споры сохранены)")
 
     def add_spore(self, spore: Spore) -> None:
@@ -328,21 +342,22 @@ class SporeManager:
         else:
             spore_type = "🔸 ОБЫЧНАЯ"
             
-        debug_print(f"➕ {spore_type} спора {spore.id} добавлена:")
-        debug_print(f"   📍 Позиция: {spore.calc_2d_pos()}")
-        debug_print(f"   💰 Cost: {spore.logic.cost:.6f}")
-        debug_print(f"   🎮 Управление: {optimal_control}")
-        debug_print(f"   ⏱️  dt: {optimal_dt:.6f}")
+        debug_print(lambda: f"➕ {spore_type} спора {spore.id} добавлена:")
+        debug_print(lambda: f"   📍 Позиция: {spore.calc_2d_pos()}")
+        debug_print(lambda: f"   💰 Cost: {spore.logic.cost:.6f}")
+        debug_print(lambda: f"   🎮 Управление: {optimal_control}")
+        debug_print(lambda: f"   ⏱️  dt: {optimal_dt:.6f}")
         
         # Проверяем смерть споры (если optimal_dt = 0), но не для целевых спор
         if not (hasattr(spore, 'is_goal') and spore.is_goal):
             # spore.check_death()
             if not spore.is_alive():
-                debug_print(f"🪦 Спора {spore.id} объявлена мертвой (dt = {optimal_dt}) - цвет изменен на серый")
+                debug_print(lambda: f"🪦 Спора {spore.id} объявлена мертвой (dt = {optimal_dt}) - цвет изменен на серый")
         
         # Не добавляем призрачные споры в основной список - они постоянные
         if not getattr(spore, 'is_ghost', False):
             self.objects.append(spore)
+            self.mark_graph_changed()
 
         if self.angel_manager:
             self.angel_manager.on_spore_created(spore)
@@ -374,21 +389,22 @@ class SporeManager:
         else:
             spore_type = "🔸 ОБЫЧНАЯ"
             
-        debug_print(f"➕ {spore_type} спора {spore.id} добавлена (v13_manual):")
-        debug_print(f"   📍 Позиция: {spore.calc_2d_pos()}")
-        debug_print(f"   💰 Cost: {spore.logic.cost:.6f}")
-        debug_print(f"   🎮 Управление: {optimal_control}")
-        debug_print(f"   ⏱️  dt: {optimal_dt:.6f}")
+        debug_print(lambda: f"➕ {spore_type} спора {spore.id} добавлена (v13_manual):")
+        debug_print(lambda: f"   📍 Позиция: {spore.calc_2d_pos()}")
+        debug_print(lambda: f"   💰 Cost: {spore.logic.cost:.6f}")
+        debug_print(lambda: f"   🎮 Управление: {optimal_control}")
+        debug_print(lambda: f"   ⏱️  dt: {optimal_dt:.6f}")
         
         # Проверяем смерть споры (если optimal_dt = 0), но не для целевых спор
         if not (hasattr(spore, 'is_goal') and spore.is_goal):
             # spore.check_death()
             if not spore.is_alive():
-                debug_print(f"🪦 Спора {spore.id} объявлена мертвой (dt = {optimal_dt}) - цвет изменен на серый")
+                debug_print(lambda: f"🪦 Спора {spore.id} объявлена мертвой (dt = {optimal_dt}) - цвет изменен на серый")
         
         # Не добавляем призрачные споры в основной список - они постоянные
         if not getattr(spore, 'is_ghost', False):
             self.objects.append(spore)
+            self.mark_graph_changed()
 
         # 🔧 КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Добавляем спору в граф
         # add_spore_manual должен работать так же как add_spore, но без оптимизации и призраков
@@ -422,6 +438,47 @@ class SporeManager:
         # - self.sample_ghost_spores()
         # - self.update_ghost_link()
 
+    def add_spores_bulk(self, spores: List[Spore], notify: bool = True) -> None:
+        """
+        Пакетный аналог add_spore_manual (материализация буфера).
+
+        Оптимальные шаги считаются одним векторным проходом
+        (SporeOptimizer.find_optimal_steps_batch), поспоровой печати нет,
+        подписчики графа уведомляются один раз (если notify).
+        """
+        if not spores:
+            return
+
+        controls, dts = self.optimizer.find_optimal_steps_batch(spores)
+        for spore, control, dt in zip(spores, controls, dts):
+            if not isinstance(spore.id, int):
+                spore.id = self.id_manager.get_next_spore_id()
+            spore.logic.optimal_control = np.array([control])
+            spore.logic.optimal_dt = float(dt)
+            if not getattr(spore, 'is_ghost', False):
+                self.objects.append(spore)
+            self.graph.add_spore(spore)
+
+        debug_print(lambda: f"➕ Добавлено спор пакетом: {len(spores)} (граф: {len(self.graph.nodes)} узлов)")
+        if notify:
+            self.mark_graph_changed()
+
+    def add_links_bulk(self, links: List[Link], link_types: List[str], notify: bool = True) -> None:
+        """
+        Добавляет готовые линки в links и рёбра в граф одним пакетом.
+
+        Args:
+            links: Линки (parent_spore/child_spore уже в графе)
+            link_types: Тип ребра для каждого линка
+            notify: Уведомить подписчиков графа (один раз на пакет)
+        """
+        for link, link_type in zip(links, link_types):
+            self.links.append(link)
+            self.graph.add_edge(parent_spore=link.parent_spore, child_spore=link.child_spore,
+                                link_type=link_type, link_object=link)
+        if notify and links:
+            self.mark_graph_changed()
+
     def generate_new_spore(self) -> Optional[Spore]:
         """Создает новую спору на основе последней с проверкой пересечения траекторий."""
         if not self.objects:
@@ -429,10 +486,10 @@ class SporeManager:
 
         parent_spore = self.objects[-1]
         
-        evolution_print(f"\n🚀 НАЧАЛО ГЕНЕРАЦИИ НОВОЙ СПОРЫ:")
-        evolution_print(f"   👨‍👩‍👧‍👦 Родительская спора: {parent_spore.id}")
-        evolution_print(f"   📍 Родительская позиция: {parent_spore.calc_2d_pos()}")
-        evolution_print(f"   💰 Родительская стоимость: {parent_spore.logic.cost:.6f}")
+        evolution_print("\n🚀 НАЧАЛО ГЕНЕРАЦИИ НОВОЙ СПОРЫ:")
+        evolution_print(lambda: f"   👨‍👩‍👧‍👦 Родительская спора: {parent_spore.id}")
+        evolution_print(lambda: f"   📍 Родительская позиция: {parent_spore.calc_2d_pos()}")
+        evolution_print(lambda: f"   💰 Родительская стоимость: {parent_spore.logic.cost:.6f}")
         
         # Проверяем, может ли родительская спора продолжать эволюцию
         debug_output = self.config.get('trajectory_optimization', {}).get('debug_output', False)
@@ -445,20 +502,20 @@ class SporeManager:
             else:
                 reason = "❓ неизвестная причина"
                 
-            evolution_print(f"   ❌ ОСТАНОВКА: Родительская спора не может создавать детей - {reason}")
+            evolution_print(lambda: f"   ❌ ОСТАНОВКА: Родительская спора не может создавать детей - {reason}")
             if debug_output:
                 if not parent_spore.is_alive():
-                    trajectory_print(f"💀 Спора {parent_spore.id} мертва и не может создавать детей")
+                    trajectory_print(lambda: f"💀 Спора {parent_spore.id} мертва и не может создавать детей")
                 elif parent_spore.evolution_completed:
-                    trajectory_print(f"🏁 Спора {parent_spore.id} завершила эволюцию и не может создавать детей")
+                    trajectory_print(lambda: f"🏁 Спора {parent_spore.id} завершила эволюцию и не может создавать детей")
             return None
             
-        evolution_print(f"   ✅ Родительская спора может эволюционировать")
-        evolution_print(f"   🎮 Использует управление: {parent_spore.logic.optimal_control}")
-        evolution_print(f"   ⏱️  Использует dt: {parent_spore.logic.optimal_dt}")
+        evolution_print("   ✅ Родительская спора может эволюционировать")
+        evolution_print(lambda: f"   🎮 Использует управление: {parent_spore.logic.optimal_control}")
+        evolution_print(lambda: f"   ⏱️  Использует dt: {parent_spore.logic.optimal_dt}")
             
         # ИСПРАВЛЕНИЕ: Сначала создаем новую спору (позволяем реально дойти до позиции)
-        evolution_print(f"   🏗️  СОЗДАНИЕ новой споры...")
+        evolution_print("   🏗️  СОЗДАНИЕ новой споры...")
 
 
         # 🆕 Получаем актуальный dt
@@ -470,79 +527,81 @@ class SporeManager:
         new_spore = parent_spore.step(control=parent_spore.logic.optimal_control, dt=current_dt)
         new_position_2d = new_spore.calc_2d_pos()
         
-        evolution_print(f"   ✅ Новая спора создана:")
-        evolution_print(f"      📍 Новая позиция: {new_position_2d}")
-        evolution_print(f"      💰 Новая стоимость: {new_spore.logic.cost:.6f}")
-        evolution_print(f"      📉 Изменение стоимости: {parent_spore.logic.cost - new_spore.logic.cost:.6f}")
+        evolution_print("   ✅ Новая спора создана:")
+        evolution_print(lambda: f"      📍 Новая позиция: {new_position_2d}")
+        evolution_print(lambda: f"      💰 Новая стоимость: {new_spore.logic.cost:.6f}")
+        evolution_print(lambda: f"      📉 Изменение стоимости: {parent_spore.logic.cost - new_spore.logic.cost:.6f}")
         
         # Теперь проверяем, есть ли рядом с НОВОЙ СПОРОЙ другие существующие споры
         tolerance = self.config.get('trajectory_optimization', {}).get('trajectory_merge_tolerance', 0.05)
-        trajectory_print(f"   🔍 ПРОВЕРКА близости (tolerance: {tolerance})...")
+        trajectory_print(lambda: f"   🔍 ПРОВЕРКА близости (tolerance: {tolerance})...")
         
         existing_spore = self.find_nearby_spore(new_position_2d, tolerance, exclude_spore=parent_spore)
         
         # Отладочная информация (опциональная)
         if debug_output:
-            trajectory_print(f"🔍 Проверка траектории после создания:")
-            trajectory_print(f"   Родитель {parent_spore.id}: {parent_spore.calc_2d_pos()}")
-            trajectory_print(f"   Новая спора позиция: {new_position_2d}")
-            trajectory_print(f"   Tolerance: {tolerance}")
-            trajectory_print(f"   Управление: {parent_spore.logic.optimal_control}")
-            trajectory_print(f"   dt: {parent_spore.logic.optimal_dt}")
+            trajectory_print("🔍 Проверка траектории после создания:")
+            trajectory_print(lambda: f"   Родитель {parent_spore.id}: {parent_spore.calc_2d_pos()}")
+            trajectory_print(lambda: f"   Новая спора позиция: {new_position_2d}")
+            trajectory_print(lambda: f"   Tolerance: {tolerance}")
+            trajectory_print(lambda: f"   Управление: {parent_spore.logic.optimal_control}")
+            trajectory_print(lambda: f"   dt: {parent_spore.logic.optimal_dt}")
             if existing_spore:
-                trajectory_print(f"   Найдена близкая спора {existing_spore.id} в позиции: {existing_spore.calc_2d_pos()}")
+                trajectory_print(lambda: f"   Найдена близкая спора {existing_spore.id} в позиции: {existing_spore.calc_2d_pos()}")
                 distance = np.linalg.norm(new_position_2d - existing_spore.calc_2d_pos())
-                trajectory_print(f"   Расстояние до неё: {distance:.4f}")
+                trajectory_print(lambda: f"   Расстояние до неё: {distance:.4f}")
             else:
-                trajectory_print(f"   Ближайших спор не найдено")
+                trajectory_print("   Ближайших спор не найдено")
         
         if existing_spore is not None:
             # Найдена близкая спора - удаляем новую спору и создаем связь к существующей
             distance = np.linalg.norm(new_position_2d - existing_spore.calc_2d_pos())
-            trajectory_print(f"   🎯 НАЙДЕНА близкая спора {existing_spore.id}:")
-            trajectory_print(f"      📍 Позиция близкой: {existing_spore.calc_2d_pos()}")
-            trajectory_print(f"      📏 Расстояние: {distance:.6f}")
-            trajectory_print(f"      💰 Стоимость близкой: {existing_spore.logic.cost:.6f}")
+            trajectory_print(lambda: f"   🎯 НАЙДЕНА близкая спора {existing_spore.id}:")
+            trajectory_print(lambda: f"      📍 Позиция близкой: {existing_spore.calc_2d_pos()}")
+            trajectory_print(lambda: f"      📏 Расстояние: {distance:.6f}")
+            trajectory_print(lambda: f"      💰 Стоимость близкой: {existing_spore.logic.cost:.6f}")
             
-            trajectory_print(f"   ♻️  УДАЛЕНИЕ только что созданной споры...")
-            destroy(new_spore)  # Удаляем только что созданную спору
+            trajectory_print("   ♻️  УДАЛЕНИЕ только что созданной споры...")
+            entity_pool.release(new_spore)  # Возвращаем только что созданную спору в пул
             
-            trajectory_print(f"   🔗 СОЗДАНИЕ связи объединения...")
+            trajectory_print("   🔗 СОЗДАНИЕ связи объединения...")
             self.create_link_to_existing(parent_spore, existing_spore)
             
             # Завершаем эволюцию родительской споры после объединения
-            trajectory_print(f"   🏁 ЗАВЕРШЕНИЕ эволюции родительской споры...")
+            trajectory_print("   🏁 ЗАВЕРШЕНИЕ эволюции родительской споры...")
             parent_spore.mark_evolution_completed()
             
-            trajectory_print(f"✅ ОБЪЕДИНЕНИЕ ЗАВЕРШЕНО:")
-            trajectory_print(f"   🔄 Траектория: спора {parent_spore.id} → спора {existing_spore.id}")
-            trajectory_print(f"   🏁 Спора {parent_spore.id} завершила эволюцию")
-            trajectory_print(f"   ♻️  Новая спора удалена\n")
+            trajectory_print("✅ ОБЪЕДИНЕНИЕ ЗАВЕРШЕНО:")
+            trajectory_print(lambda: f"   🔄 Траектория: спора {parent_spore.id} → спора {existing_spore.id}")
+            trajectory_print(lambda: f"   🏁 Спора {parent_spore.id} завершила эволюцию")
+            trajectory_print("   ♻️  Новая спора удалена\n")
             
             if debug_output:
-                trajectory_print(f"🔄 Траектория объединена: спора {parent_spore.id} → существующая спора {existing_spore.id}")
-                trajectory_print(f"🏁 Спора {parent_spore.id} завершила эволюцию (объединение)")
-                trajectory_print(f"♻️  Новая спора удалена, так как рядом есть существующая")
+                trajectory_print(lambda: f"🔄 Траектория объединена: спора {parent_spore.id} → существующая спора {existing_spore.id}")
+                trajectory_print(lambda: f"🏁 Спора {parent_spore.id} завершила эволюцию (объединение)")
+                trajectory_print("♻️  Новая спора удалена, так как рядом есть существующая")
             return existing_spore
         
         # Близкая спора не найдена - добавляем новую спору как обычно
-        evolution_print(f"   ✅ Близких спор не найдено - добавляем новую спору")
-        evolution_print(f"   ➕ ДОБАВЛЕНИЕ в систему...")
+        evolution_print("   ✅ Близких спор не найдено - добавляем новую спору")
+        evolution_print("   ➕ ДОБАВЛЕНИЕ в систему...")
         # ID будет присвоен в add_spore
         
         self.add_spore(new_spore)
         spore_key = self.zoom_manager.get_unique_spore_id()
         self.zoom_manager.register_object(new_spore, spore_key)
+        new_spore._zoom_manager_key = spore_key  # Сохраняем для удаления
 
         # Create a link if enabled in config
         if self.config.get('link', {}).get('show', True):
-            debug_print(f"   🔗 СОЗДАНИЕ обычной связи: {parent_spore.id} → {new_spore.id}")
-            new_link = Link(parent_spore,
-                            new_spore,
-                            color_manager=self.color_manager,
-                            zoom_manager=self.zoom_manager,
-                            id_manager=self.id_manager,
-                            config=self.config)
+            debug_print(lambda: f"   🔗 СОЗДАНИЕ обычной связи: {parent_spore.id} → {new_spore.id}")
+            new_link = entity_pool.acquire(Link,
+                                           parent_spore,
+                                           new_spore,
+                                           color_manager=self.color_manager,
+                                           zoom_manager=self.zoom_manager,
+                                           id_manager=self.id_manager,
+                                           config=self.config)
             
             # Сохраняем информацию об управлении и dt, которые привели к созданию дочерней споры
             new_link.control_value = parent_spore.logic.optimal_control
@@ -557,6 +616,7 @@ class SporeManager:
                 link_type='default',
                 link_object=new_link
             )
+            self.mark_graph_changed()
             
             link_id = self.zoom_manager.get_unique_link_id()
             self.zoom_manager.register_object(new_link, link_id)
@@ -568,28 +628,29 @@ class SporeManager:
         # будут в согласованном состоянии.
         self.zoom_manager.update_transform()
 
-        evolution_print(f"✅ НОВАЯ СПОРА СОЗДАНА:")
-        evolution_print(f"   🆔 ID: {new_spore.id}")
-        evolution_print(f"   📍 Финальная позиция: {new_spore.calc_2d_pos()}")
-        evolution_print(f"   💰 Финальная стоимость: {new_spore.logic.cost:.6f}")
-        evolution_print(f"   🔗 Связей в системе: {len(self.links)}")
-        evolution_print(f"   🔸 Спор в системе: {len(self.objects)}\n")
+        evolution_print("✅ НОВАЯ СПОРА СОЗДАНА:")
+        evolution_print(lambda: f"   🆔 ID: {new_spore.id}")
+        evolution_print(lambda: f"   📍 Финальная позиция: {new_spore.calc_2d_pos()}")
+        evolution_print(lambda: f"   💰 Финальная стоимость: {new_spore.logic.cost:.6f}")
+        evolution_print(lambda: f"   🔗 Связей в системе: {len(self.links)}")
+        evolution_print(lambda: f"   🔸 Спор в системе: {len(self.objects)}\n")
 
         return new_spore
 
     def generate_random_spore_in_spawn_area(self) -> Optional[Spore]:
         """Создает случайную спору в случайной позиции внутри spawn area."""
+        new_spores = self.generate_random_spores_in_spawn_area(1)
+        return new_spores[0] if new_spores else None
+
+    def generate_random_spores_in_spawn_area(self, count: int) -> List[Spore]:
+        """Создает count случайных спор; позиции берутся одним вызовом sample_uniform."""
         if not self.spawn_area:
             always_print("⚠️ Spawn area не задан, невозможно создать случайную спору")
-            return None
-        
-        # Получаем случайную 2D позицию внутри spawn area
-        random_position_2d = self.spawn_area.sample_random_point()
+            return []
         
-        # Конвертируем в 3D позицию (Y=0 для плоскости XZ)
-        random_position_3d = (random_position_2d[0], 0.0, random_position_2d[1])
+        # Все 2D позиции внутри spawn area сразу
+        random_positions_2d = self.spawn_area.sample_uniform(count)
         
-        # Создаем новую спору в случайной позиции
         # Получаем параметры цели от любой существующей споры или используем defaults
         goal_position = None
         if self.objects:
@@ -598,26 +659,32 @@ class SporeManager:
             # Если нет спор, используем значения из конфига
             goal_position = self.config.get('spore', {}).get('goal_position', [3.14159, 0])
         
-        # Создаем новую спору
-        new_spore = Spore(
-            pendulum=self.pendulum,
-            dt=self.config.get('pendulum', {}).get('dt', 0.1),
-            goal_position=goal_position,
-            scale=self.config.get('spore', {}).get('scale', 0.05),
-            position=random_position_3d,
-            color_manager=self.color_manager,
-            id_manager=self.id_manager,
-            config=self.config.get('spore', {})
-        )
-        
-        # Добавляем спору в менеджер
-        self.add_spore(new_spore)
-        random_spore_key = self.zoom_manager.get_unique_spore_id()
-        self.zoom_manager.register_object(new_spore, random_spore_key)
-        
-        always_print(f"🎲 Создана случайная спора {new_spore.id} в позиции {random_position_2d}")
+        new_spores = []
+        for random_position_2d in random_positions_2d:
+            # Конвертируем в 3D позицию (Y=0 для плоскости XZ)
+            random_position_3d = (random_position_2d[0], 0.0, random_position_2d[1])
+            
+            # Создаем новую спору
+            new_spore = Spore(
+                pendulum=self.pendulum,
+                dt=self.config.get('pendulum', {}).get('dt', 0.1),
+                goal_position=goal_position,
+                scale=self.config.get('spore', {}).get('scale', 0.05),
+                position=random_position_3d,
+                color_manager=self.color_manager,
+                id_manager=self.id_manager,
+                config=self.config.get('spore', {})
+            )
+            
+            # Добавляем спору в менеджер
+            self.add_spore(new_spore)
+            random_spore_key = self.zoom_manager.get_unique_spore_id()
+            self.zoom_manager.register_object(new_spore, random_spore_key)
+            new_spores.append(new_spore)
+            
+            always_print(f"🎲 Создана случайная спора {new_spore.id} в позиции {random_position_2d}")
         
-        return new_spore
+        return new_spores
     
     def generate_candidate_spores(self) -> None:
         """Генерирует кандидатские споры с помощью дисков Пуассона."""
@@ -672,7 +739,7 @@ class SporeManager:
                 self.zoom_manager.register_object(candidate, candidate.id)
             
             self.candidate_count = len(self.candidate_spores)
-            candidate_print(f"🎯 Создано {self.candidate_count} кандидатов с радиусом {self.min_radius}")
+            candidate_print(lambda: f"🎯 Создано {self.candidate_count} кандидатов с радиусом {self.min_radius}")
             
         except Exception as e:
             always_print(f"❌ Ошибка при создании кандидатов: {e}")
@@ -683,22 +750,22 @@ class SporeManager:
             always_print("⚠️ Нет доступных кандидатов")
             return None
         
-        candidate_print(f"\n🎲 АКТИВАЦИЯ СЛУЧАЙНОГО КАНДИДАТА:")
-        candidate_print(f"   📊 Доступно кандидатов: {len(self.candidate_spores)}")
+        candidate_print("\n🎲 АКТИВАЦИЯ СЛУЧАЙНОГО КАНДИДАТА:")
+        candidate_print(lambda: f"   📊 Доступно кандидатов: {len(self.candidate_spores)}")
         
         # Выбираем случайного кандидата
         import random
         selected_candidate = random.choice(self.candidate_spores)
         
-        candidate_print(f"   🎯 Выбран кандидат: {selected_candidate.id}")
-        candidate_print(f"   📍 Позиция кандидата: {selected_candidate.calc_2d_pos()}")
-        candidate_print(f"   💰 Стоимость кандидата: {selected_candidate.logic.cost:.6f}")
+        candidate_print(lambda: f"   🎯 Выбран кандидат: {selected_candidate.id}")
+        candidate_print(lambda: f"   📍 Позиция кандидата: {selected_candidate.calc_2d_pos()}")
+        candidate_print(lambda: f"   💰 Стоимость кандидата: {selected_candidate.logic.cost:.6f}")
         
         # Сохраняем позицию и цель до удаления
         candidate_position = selected_candidate.real_position.copy()
         candidate_goal = selected_candidate.goal_position
         
-        candidate_print(f"   🗑️  УДАЛЕНИЕ кандидата из системы...")
+        candidate_print("   🗑️  УДАЛЕНИЕ кандидата из системы...")
         
         # Удаляем кандидата из zoom_manager ПЕРЕД удалением объекта
         if hasattr(selected_candidate, 'id'):
@@ -712,9 +779,9 @@ class SporeManager:
         
         # Обновляем счетчик
         self.candidate_count = len(self.candidate_spores)
-        candidate_print(f"   📉 Осталось кандидатов: {self.candidate_count}")
+        candidate_print(lambda: f"   📉 Осталось кандидатов: {self.candidate_count}")
         
-        candidate_print(f"   🏗️  СОЗДАНИЕ активной споры на том же месте...")
+        candidate_print("   🏗️  СОЗДАНИЕ активной споры на том же месте...")
         
         # Создаем новую активную спору в той же позиции
         new_spore = Spore(
@@ -728,21 +795,21 @@ class SporeManager:
             config=self.config.get('spore', {})
         )
         
-        candidate_print(f"   ➕ ДОБАВЛЕНИЕ активной споры в систему...")
+        candidate_print("   ➕ ДОБАВЛЕНИЕ активной споры в систему...")
         
         # Добавляем новую спору через стандартную систему
         self.add_spore(new_spore)
         activated_spore_key = self.zoom_manager.get_unique_spore_id()
         self.zoom_manager.register_object(new_spore, activated_spore_key)
         
-        candidate_print(f"✅ КАНДИДАТ АКТИВИРОВАН:")
-        candidate_print(f"   🆔 Новый ID: {new_spore.id}")
-        candidate_print(f"   📍 Позиция: {candidate_position}")
-        candidate_print(f"   💰 Стоимость: {new_spore.logic.cost:.6f}")
-        candidate_print(f"   🎮 Управление: {new_spore.logic.optimal_control}")
-        candidate_print(f"   ⏱️  dt: {new_spore.logic.optimal_dt}")
-        candidate_print(f"   💚 Жива: {new_spore.is_alive()}")
-        candidate_print(f"   🚀 Может эволюционировать: {new_spore.can_evolve()}\n")
+        candidate_print("✅ КАНДИДАТ АКТИВИРОВАН:")
+        candidate_print(lambda: f"   🆔 Новый ID: {new_spore.id}")
+        candidate_print(lambda: f"   📍 Позиция: {candidate_position}")
+        candidate_print(lambda: f"   💰 Стоимость: {new_spore.logic.cost:.6f}")
+        candidate_print(lambda: f"   🎮 Управление: {new_spore.logic.optimal_control}")
+        candidate_print(lambda: f"   ⏱️  dt: {new_spore.logic.optimal_dt}")
+        candidate_print(lambda: f"   💚 Жива: {new_spore.is_alive()}")
+        candidate_print(lambda: f"   🚀 Может эволюционировать: {new_spore.can_evolve()}\n")
         
         return new_spore
 
@@ -772,7 +839,7 @@ class SporeManager:
             remaining = len(self.candidate_spores)
             
             always_print(f"🔄 ОБРАБАТЫВАЕМ КАНДИДАТА {processed_count}/{total_candidates} (осталось: {remaining})")
-            evolution_print(f"   📊 Детали: активируем кандидата для развития")
+            evolution_print("   📊 Детали: активируем кандидата для развития")
             
             # Активируем первого доступного кандидата
             activated_spore = self.activate_random_candidate()
@@ -780,35 +847,35 @@ class SporeManager:
                 always_print("❌ Не удалось активировать кандидата")
                 break
             
-            evolution_print(f"✅ Кандидат активирован как спора {activated_spore.id}")
-            evolution_print(f"   📍 Стартовая позиция: {activated_spore.calc_2d_pos()}")
-            evolution_print(f"   💰 Стартовая стоимость: {activated_spore.logic.cost:.6f}")
+            evolution_print(lambda: f"✅ Кандидат активирован как спора {activated_spore.id}")
+            evolution_print(lambda: f"   📍 Стартовая позиция: {activated_spore.calc_2d_pos()}")
+            evolution_print(lambda: f"   💰 Стартовая стоимость: {activated_spore.logic.cost:.6f}")
             
             # Развиваем спору до конца
             evolution_step = 0
             max_steps = 100  # Защита от бесконечного цикла
             
-            evolution_print(f"   🧬 НАЧИНАЕМ ЭВОЛЮЦИЮ...")
+            evolution_print("   🧬 НАЧИНАЕМ ЭВОЛЮЦИЮ...")
             
             while activated_spore.can_evolve() and evolution_step < max_steps:
                 evolution_step += 1
-                evolution_print(f"      📈 Шаг эволюции {evolution_step}:")
-                evolution_print(f"         📍 Текущая позиция: {activated_spore.calc_2d_pos()}")
-                evolution_print(f"         💰 Текущая стоимость: {activated_spore.logic.cost:.6f}")
-                evolution_print(f"         💚 Жива: {activated_spore.is_alive()}")
-                evolution_print(f"         🏁 Эволюция завершена: {activated_spore.evolution_completed}")
+                evolution_print(lambda: f"      📈 Шаг эволюции {evolution_step}:")
+                evolution_print(lambda: f"         📍 Текущая позиция: {activated_spore.calc_2d_pos()}")
+                evolution_print(lambda: f"         💰 Текущая стоимость: {activated_spore.logic.cost:.6f}")
+                evolution_print(lambda: f"         💚 Жива: {activated_spore.is_alive()}")
+                evolution_print(lambda: f"         🏁 Эволюция завершена: {activated_spore.evolution_completed}")
                 
                 # Создаем следующую спору
                 result = self.generate_new_spore()
                 
                 if result is None:
-                    evolution_print(f"         🛑 generate_new_spore вернул None - остановка")
+                    evolution_print("         🛑 generate_new_spore вернул None - остановка")
                     break
                 elif result == activated_spore:
-                    evolution_print(f"         🔄 Спора осталась той же - продолжаем")
+                    evolution_print("         🔄 Спора осталась той же - продолжаем")
                     continue
                 else:
-                    evolution_print(f"         ➡️  Создана новая спора {result.id}")
+                    evolution_print(lambda: f"         ➡️  Создана новая спора {result.id}")
                     activated_spore = result  # Переходим к новой споре
             
             # Причина завершения эволюции
@@ -822,11 +889,11 @@ class SporeManager:
             else:
                 reason = "❓ неизвестная причина"
             
-            evolution_print(f"   🎯 ЭВОЛЮЦИЯ ЗАВЕРШЕНА после {evolution_step} шагов:")
-            evolution_print(f"      🔍 Причина: {reason}")
-            evolution_print(f"      📍 Финальная позиция: {activated_spore.calc_2d_pos()}")
-            evolution_print(f"      💰 Финальная стоимость: {activated_spore.logic.cost:.6f}")
-            evolution_print(f"      💚 Финальное состояние: {'жива' if activated_spore.is_alive() else 'мертва'}")
+            evolution_print(lambda: f"   🎯 ЭВОЛЮЦИЯ ЗАВЕРШЕНА после {evolution_step} шагов:")
+            evolution_print(lambda: f"      🔍 Причина: {reason}")
+            evolution_print(lambda: f"      📍 Финальная позиция: {activated_spore.calc_2d_pos()}")
+            evolution_print(lambda: f"      💰 Финальная стоимость: {activated_spore.logic.cost:.6f}")
+            evolution_print(lambda: f"      💚 Финальное состояние: {'жива' if activated_spore.is_alive() else 'мертва'}")
             
             # Показываем прогресс завершения кандидата
             always_print(f"✅ КАНДИДАТ {processed_count}/{total_candidates} ЗАВЕРШЕН ({reason})")
@@ -844,7 +911,7 @@ class SporeManager:
         self.min_radius = max(0.05, self.min_radius * multiplier)  # Минимум 0.05
         
         if abs(self.min_radius - old_radius) > 0.001:  # Перегенерируем при любом значимом изменении
-            candidate_print(f"🔧 Радиус изменен: {old_radius:.3f} → {self.min_radius:.3f} (×{multiplier:.2f})")
+            candidate_print(lambda: f"🔧 Радиус изменен: {old_radius:.3f} → {self.min_radius:.3f} (×{multiplier:.2f})")
             self.generate_candidate_spores()
     
     def find_nearby_spore(self, position_2d: np.ndarray, tolerance: float = 0.1, exclude_spore: Optional[Spore] = None) -> Optional[Spore]:
@@ -888,27 +955,28 @@ class SporeManager:
             from_spore: Родительская спора (та, которая создала новую)
             to_spore: Целевая спора (существующая)
         """
-        trajectory_print(f"   🔗 ДЕТАЛИ СОЗДАНИЯ СВЯЗИ ОБЪЕДИНЕНИЯ:")
-        trajectory_print(f"      🏁 ОТ: спора {from_spore.id} (родительская)")
-        trajectory_print(f"         📍 Позиция: {from_spore.calc_2d_pos()}")
-        trajectory_print(f"         💰 Стоимость: {from_spore.logic.cost:.6f}")
-        trajectory_print(f"         💚 Жива: {from_spore.is_alive()}")
-        trajectory_print(f"      🎯 К: спора {to_spore.id} (существующая)")
-        trajectory_print(f"         📍 Позиция: {to_spore.calc_2d_pos()}")
-        trajectory_print(f"         💰 Стоимость: {to_spore.logic.cost:.6f}")
-        trajectory_print(f"         💚 Жива: {to_spore.is_alive()}")
+        trajectory_print("   🔗 ДЕТАЛИ СОЗДАНИЯ СВЯЗИ ОБЪЕДИНЕНИЯ:")
+        trajectory_print(lambda: f"      🏁 ОТ: спора {from_spore.id} (родительская)")
+        trajectory_print(lambda: f"         📍 Позиция: {from_spore.calc_2d_pos()}")
+        trajectory_print(lambda: f"         💰 Стоимость: {from_spore.logic.cost:.6f}")
+        trajectory_print(lambda: f"         💚 Жива: {from_spore.is_alive()}")
+        trajectory_print(lambda: f"      🎯 К: спора {to_spore.id} (существующая)")
+        trajectory_print(lambda: f"         📍 Позиция: {to_spore.calc_2d_pos()}")
+        trajectory_print(lambda: f"         💰 Стоимость: {to_spore.logic.cost:.6f}")
+        trajectory_print(lambda: f"         💚 Жива: {to_spore.is_alive()}")
         
         if self.config.get('link', {}).get('show', True):
             # ИСПРАВЛЕНИЕ: Стрелка должна показывать что from_spore "приходит" к to_spore
             # Логика: траектория от родительской споры ведет к существующей споре
-            trajectory_print(f"      🏹 Направление стрелки: {from_spore.id} → {to_spore.id}")
+            trajectory_print(lambda: f"      🏹 Направление стрелки: {from_spore.id} → {to_spore.id}")
             
-            new_link = Link(from_spore,  # parent_spore (откуда приходит траектория)
-                           to_spore,     # existing_spore (куда приходит траектория)
-                           color_manager=self.color_manager,
-                           zoom_manager=self.zoom_manager,
-                           id_manager=self.id_manager,
-                           config=self.config)
+            new_link = entity_pool.acquire(Link,
+                                           from_spore,  # parent_spore (откуда приходит траектория)
+                                           to_spore,     # existing_spore (куда приходит траектория)
+                                           color_manager=self.color_manager,
+                                           zoom_manager=self.zoom_manager,
+                                           id_manager=self.id_manager,
+                                           config=self.config)
             
             # Сохраняем информацию об управлении и dt, которые привели к созданию связи
             new_link.control_value = from_spore.logic.optimal_control
@@ -917,7 +985,7 @@ class SporeManager:
             # Выделяем особым цветом связи между существующими спорами
             link_color = self.color_manager.get_color('link', 'default')
             new_link.color = link_color
-            trajectory_print(f"      🎨 Цвет связи: {link_color} (связь объединения)")
+            trajectory_print(lambda: f"      🎨 Цвет связи: {link_color} (связь объединения)")
             
             self.links.append(new_link)
             
@@ -928,20 +996,21 @@ class SporeManager:
                 link_type='default',
                 link_object=new_link
             )
+            self.mark_graph_changed()
             
             link_id = self.zoom_manager.get_unique_link_id()
             self.zoom_manager.register_object(new_link, link_id)
             new_link._zoom_manager_key = link_id  # Сохраняем для удаления
             
-            trajectory_print(f"      🔧 Обновление геометрии и трансформации...")
+            trajectory_print("      🔧 Обновление геометрии и трансформации...")
             # Обновляем геометрию и трансформацию
             new_link.update_geometry()
             self.zoom_manager.update_transform()
             
-            trajectory_print(f"   ✅ СВЯЗЬ СОЗДАНА: спора {from_spore.id} → спора {to_spore.id} (направление объединения)")
-            trajectory_print(f"      🔗 Всего связей в системе: {len(self.links)}")
+            trajectory_print(lambda: f"   ✅ СВЯЗЬ СОЗДАНА: спора {from_spore.id} → спора {to_spore.id} (направление объединения)")
+            trajectory_print(lambda: f"      🔗 Всего связей в системе: {len(self.links)}")
         else:
-            trajectory_print(f"      ❌ Создание связей отключено в конфигурации")
+            trajectory_print("      ❌ Создание связей отключено в конфигурации")
 
     def get_last_active_spore(self) -> Optional[Spore]:
         """Получить последнюю спору, способную к эволюции (не goal, не завершенная)"""
@@ -972,14 +1041,15 @@ class SporeManager:
         
         # Создаем или обновляем связь к оптимальной призрачной споре
         if not self.ghost_link:
-            self.ghost_link = Link(last_spore, self.optimal_ghost_spore, 
-                                   color_manager=self.color_manager, 
-                                   zoom_manager=self.zoom_manager,
-                                   id_manager=self.id_manager,
-                                   config=self.config)
+            self.ghost_link = entity_pool.acquire(Link, last_spore, self.optimal_ghost_spore,
+                                                  color_manager=self.color_manager,
+                                                  zoom_manager=self.zoom_manager,
+                                                  id_manager=self.id_manager,
+                                                  config=self.config)
             self.ghost_link.color = self.color_manager.get_color('link', 'ghost')
             ghost_link_key = self.zoom_manager.get_unique_link_id()
             self.zoom_manager.register_object(self.ghost_link, ghost_link_key)
+            self.ghost_link._zoom_manager_key = ghost_link_key
         else:
             # Обновляем связь если она уже существует
             self.ghost_link.parent_spore = last_spore
@@ -1010,7 +1080,8 @@ class SporeManager:
         if not last_spore:
             return
 
-        # Перед созданием новых очищаем старые
+        # Перед созданием новых очищаем старые (их сущности уходят в entity_pool
+        # и переиспользуются новыми визуализаторами)
         for visualizer in self.prediction_visualizers:
             visualizer.destroy()
         self.prediction_visualizers = []
@@ -1089,28 +1160,217 @@ class SporeManager:
         try:
             if spore in self.objects:
                 self.objects.remove(spore)
+                self.mark_graph_changed()
                 
                 # Получаем информацию о споре для логирования
                 spore_id = getattr(spore, 'id', 'unknown')
                 spore_pos = spore.calc_2d_pos() if hasattr(spore, 'calc_2d_pos') else 'unknown'
                 
-                debug_print(f"   ➖ Спора {spore_id} удалена из SporeManager")
-                debug_print(f"      📍 Позиция: {spore_pos}")
-                debug_print(f"      📊 Спор осталось: {len(self.objects)}")
+                debug_print(lambda: f"   ➖ Спора {spore_id} удалена из SporeManager")
+                debug_print(lambda: f"      📍 Позиция: {spore_pos}")
+                debug_print(lambda: f"      📊 Спор осталось: {len(self.objects)}")
                 
                 return True
             else:
-                debug_print(f"   ⚠️ Спора не найдена в SporeManager.objects")
+                debug_print("   ⚠️ Спора не найдена в SporeManager.objects")
                 return False
                 
         except Exception as e:
-            debug_print(f"   ❌ Ошибка удаления споры из SporeManager: {e}")
+            debug_print(lambda: f"   ❌ Ошибка удаления споры из SporeManager: {e}")
             return False
 
     def get_id_stats(self) -> dict:
         """Возвращает статистику по выданным ID."""
         return self.id_manager.get_stats()
 
+    def subscribe_graph_change(self, callback: Callable[[int], None]) -> None:
+        """
+        Подписывается на изменения реального графа.
+
+        Args:
+            callback: Функция, вызываемая с новой версией графа после
+                      каждого изменения спор или связей
+        """
+        if callback not in self.graph_change_subscribers:
+            self.graph_change_subscribers.append(callback)
+
+    def unsubscribe_graph_change(self, callback: Callable[[int], None]) -> None:
+        """Отписывается от изменений реального графа."""
+        if callback in self.graph_change_subscribers:
+            self.graph_change_subscribers.remove(callback)
+
+    def mark_graph_changed(self) -> None:
+        """
+        Увеличивает версию графа и уведомляет подписчиков.
+
+        Вызывается после каждого изменения objects/links (в том числе
+        извне — BufferMergeManager, ManualSporeManager). Сам снимок
+        строится лениво в get_graph_snapshot().
+        """
+        self.graph_version += 1
+        if self.graph_journal is not None:
+            self.graph_journal.flush()
+        for callback in self.graph_change_subscribers:
+            try:
+                callback(self.graph_version)
+            except Exception as e:
+                print(f"⚠️ Ошибка в подписчике графа: {e}")
+
+    def get_graph_snapshot(self) -> GraphSnapshot:
+        """
+        Возвращает колоночный снимок реального графа текущей версии.
+
+        Снимок пересобирается (O(N + L), без файлового ввода-вывода)
+        только если версия графа изменилась с момента прошлой сборки.
+        """
+        if self._graph_snapshot is None or self._graph_snapshot.version != self.graph_version:
+            self._graph_snapshot = GraphSnapshot.from_spore_manager(self, version=self.graph_version)
+        return self._graph_snapshot
+
+    # ------------------------------------------------------------------
+    # Журнал графа
+    # ------------------------------------------------------------------
+    def _open_graph_journal(self, journal_config: Dict[str, Any]) -> None:
+        """
+        Открывает журнал графа по секции config['graph_journal'].
+
+        При resume журнал прошлой сессии сначала читается (без Ursina)
+        в self.journal_graph и затем продолжается; иначе прежний журнал
+        откладывается в *.prev и начинается новый.
+        """
+        path = journal_config.get('path', 'buffer/real_graph.journal')
+        resume = journal_config.get('resume', False)
+        try:
+            if resume and os.path.exists(path):
+                self.journal_graph = load_graph_journal(path)
+                print(f"   📖 Журнал графа: {len(self.journal_graph.nodes)} спор, "
+                      f"{len(self.journal_graph.edges)} связей (restore_from_journal)")
+            self.graph_journal = GraphJournal(path, checkpoint_every=journal_config.get('checkpoint_every', 2000),
+                                              resume=resume)
+            self.graph_journal.attach(self.graph)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Журнал графа отключён: {e}")
+            self.graph_journal = None
+            self.journal_graph = None
+
+    def restore_from_journal(self, journal_graph: Optional[SporeGraph] = None) -> Dict[str, int]:
+        """
+        Строит споры и линки сцены по логическому графу из журнала.
+
+        Споры получают прежние spore_id, целевые споры журнала
+        отображаются на уже существующую цель. Оптимальные шаги берутся
+        из журнала (недостающие считаются одним пакетом). На время
+        восстановления запись в журнал приостановлена — эти изменения
+        в нём уже есть.
+
+        Args:
+            journal_graph: Граф из load_graph_journal (по умолчанию self.journal_graph)
+
+        Returns:
+            {'spores': создано спор, 'links': создано линков}
+        """
+        journal_graph = journal_graph if journal_graph is not None else self.journal_graph
+        if journal_graph is None:
+            return {'spores': 0, 'links': 0}
+
+        spore_config = self.config.get('spore', {})
+        goal_position = spore_config.get('goal_position', [0, 0])
+        goal = next((spore for spore in self.objects if getattr(spore, 'is_goal', False)), None)
+
+        if self.graph_journal is not None:
+            self.graph_journal.pause()
+        try:
+            restored: Dict[str, Spore] = {}
+            new_spores: List[Spore] = []
+            for spore_id, node in journal_graph.nodes.items():
+                if node.is_goal and goal is not None:
+                    restored[spore_id] = goal
+                    continue
+                if spore_id in self.graph.nodes:
+                    restored[spore_id] = self.graph.nodes[spore_id]
+                    continue
+
+                x, y = node.position
+                dt = node.optimal_dt if np.isfinite(node.optimal_dt) else spore_config.get('dt', 0.05)
+                spore = entity_pool.acquire(
+                    Spore,
+                    pendulum=self.pendulum,
+                    dt=dt,
+                    scale=spore_config.get('scale', 0.1),
+                    position=(float(x), 0, float(y)),
+                    goal_position=goal_position,
+                    is_goal=node.is_goal,
+                    color_manager=self.color_manager,
+                    id_manager=self.id_manager,
+                    spore_id=int(spore_id) if spore_id.isdigit() else spore_id,
+                    config=spore_config
+                )
+                spore.id = self.id_manager.get_next_spore_id()
+                spore.logic.optimal_dt = node.optimal_dt
+                spore.logic.optimal_control = np.array([node.optimal_control])
+                spore._zoom_manager_key = f"journal_spore_{spore_id}"
+                restored[spore_id] = spore
+                new_spores.append(spore)
+
+            # Шаги, которых нет в журнале, — одним векторным проходом
+            missing = [spore for spore in new_spores if not np.isfinite(spore.logic.optimal_dt)
+                       or not np.all(np.isfinite(spore.logic.optimal_control))]
+            if missing:
+                controls, dts = self.optimizer.find_optimal_steps_batch(missing)
+                for spore, control, dt in zip(missing, controls, dts):
+                    spore.logic.optimal_control = np.array([control])
+                    spore.logic.optimal_dt = float(dt)
+
+            for spore in new_spores:
+                self.objects.append(spore)
+                self.graph.add_spore(spore)
+
+            # Новые spore_id (и ниже link_id) не должны совпасть с восстановленными
+            numeric_ids = [int(spore_id) for spore_id in journal_graph.nodes if spore_id.isdigit()]
+            if numeric_ids:
+                self.id_manager.skip_spore_ids_up_to(max(numeric_ids))
+
+            links, link_types = [], []
+            for (parent_id, child_id), edge_info in journal_graph.edges.items():
+                parent, child = restored.get(parent_id), restored.get(child_id)
+                if parent is None or child is None or parent is child:
+                    continue
+                journal_link = edge_info.link_object
+                link = entity_pool.acquire(
+                    Link,
+                    parent_spore=parent,
+                    child_spore=child,
+                    zoom_manager=self.zoom_manager,
+                    color_manager=self.color_manager,
+                    config=self.config,
+                    id_manager=self.id_manager,
+                    link_id=(int(journal_link.link_id) if journal_link.link_id.isdigit()
+                             else journal_link.link_id or None)
+                )
+                link.dt_value = journal_link.dt_value
+                link.control_value = journal_link.control_value
+                sign = int(np.sign(link.control_value)) if np.isfinite(link.control_value) else 0
+                link.color = self.color_manager.get_color('link', {1: 'ghost_max', -1: 'ghost_min'}.get(sign, 'default'))
+                link._zoom_manager_key = f"journal_link_{parent_id}_to_{child_id}"
+                links.append(link)
+                link_types.append(edge_info.link_type)
+            self.add_links_bulk(links, link_types, notify=False)
+            numeric_link_ids = [int(edge_info.link_object.link_id) for edge_info in journal_graph.edges.values()
+                                if edge_info.link_object.link_id.isdigit()]
+            if numeric_link_ids:
+                self.id_manager.skip_link_ids_up_to(max(numeric_link_ids))
+
+            self.zoom_manager.register_objects({obj._zoom_manager_key: obj for obj in new_spores + links})
+        finally:
+            if self.graph_journal is not None:
+                self.graph_journal.resume()
+
+        if journal_graph is self.journal_graph:
+            self.journal_graph = None
+        self.mark_graph_changed()
+        print(f"📖 Восстановлено из журнала: {len(new_spores)} спор, {len(links)} связей")
+        return {'spores': len(new_spores), 'links': len(links)}
+
     def get_graph_stats(self) -> None:
         """Выводит статистику графа связей"""
         if self.graph:
@@ -1122,6 +1382,7 @@ class SporeManager:
         """Очищает граф связей"""
         if self.graph:
             self.graph.clear()
+            self.mark_graph_changed()
             print("🧹 Граф связей очищен")
 
     def find_link_by_id(self, link_id: str) -> Optional[Any]:
@@ -1203,6 +1464,8 @@ class SporeManager:
             Список словарей с информацией о каждом линке
         """
         links_info = []
+        # Визуальные номера спор: один проход вместо objects.index() на каждый линк
+        visual_numbers = {id(spore): i + 1 for i, spore in enumerate(self.objects)}
         for i, link in enumerate(self.links):
             # Используем новую систему link_id
             if hasattr(link, 'link_id') and link.link_id:
@@ -1212,10 +1475,9 @@ class SporeManager:
                 
                 # 🔧 ИСПРАВЛЕНИЕ: Используем визуальные номера (индексы + 1) вместо spore_id
                 # Это обеспечит соответствие с номерами на графике
-                try:
-                    parent_id = self.objects.index(link.parent_spore) + 1 if link.parent_spore else 0
-                    child_id = self.objects.index(link.child_spore) + 1 if link.child_spore else 0
-                except ValueError:
+                parent_id = visual_numbers.get(id(link.parent_spore)) if link.parent_spore else 0
+                child_id = visual_numbers.get(id(link.child_spore)) if link.child_spore else 0
+                if parent_id is None or child_id is None:
                     # Fallback к spore_id если споры не найдены в objects
                     parent_id = getattr(link.parent_spore, 'spore_id', 'unknown') if link.parent_spore else 'unknown'
                     child_id = getattr(link.child_spore, 'spore_id', 'unknown') if link.child_spore else 'unknown'
@@ -8,11 +8,13 @@ from ..managers.zoom_manager import ZoomManager
 from ..managers.param_manager import ParamManager
 from ..visual.ui_setup import UI_setup
 from ..managers.input_manager import InputManager
+from ..utils.tracer import get_tracer, span
 
 # Forward declaration для ManualSporeManager (избегаем циклических импортов)
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from ..managers.manual_spore_manager import ManualSporeManager
+    from ..managers.dt_manager import DTManager
 
 class UpdateManager:
     """
@@ -25,7 +27,8 @@ class UpdateManager:
                  param_manager: Optional[ParamManager] = None, 
                  ui_setup: Optional[UI_setup] = None, 
                  input_manager: Optional[InputManager] = None,
-                 manual_spore_manager: Optional["ManualSporeManager"] = None):
+                 manual_spore_manager: Optional["ManualSporeManager"] = None,
+                 dt_manager: Optional["DTManager"] = None):
         
         self.scene_setup: Optional[SceneSetup] = scene_setup
         self.zoom_manager: Optional[ZoomManager] = zoom_manager
@@ -33,26 +36,45 @@ class UpdateManager:
         self.ui_setup: Optional[UI_setup] = ui_setup
         self.input_manager: Optional[InputManager] = input_manager
         self.manual_spore_manager: Optional["ManualSporeManager"] = manual_spore_manager
+        self.dt_manager: Optional["DTManager"] = dt_manager
     
     def update_all(self) -> None:
         """
         Основной метод, который должен вызываться каждый кадр из главного цикла.
+        Каждый вызов оборачивается в участок трассировщика (src/utils/tracer.py),
+        кадр целиком агрегируется в tracer.frames.
         """
+        tracer = get_tracer()
+        tracer.begin_frame()
+
         if self.input_manager:
-            self.input_manager.update()
+            with span('InputManager.update'):
+                self.input_manager.update()
+
+        # Изменения dt за прошедший кадр доставляются подписчикам один раз
+        if self.dt_manager:
+            with span('DTManager.on_frame'):
+                self.dt_manager.on_frame()
 
         if self.scene_setup:
-            self.scene_setup.update(time.dt)
+            with span('SceneSetup.update'):
+                self.scene_setup.update(time.dt)
         
         if self.zoom_manager:
-            self.zoom_manager.identify_invariant_point()  # Для зума и UI
+            with span('ZoomManager.identify_invariant_point'):
+                self.zoom_manager.identify_invariant_point()  # Для зума и UI
         
         # v13_manual: обновляем позицию курсора для превью споры
         if self.manual_spore_manager:
-            self.manual_spore_manager.update_cursor_position()  # Через PreviewManager
+            with span('ManualSporeManager.update_cursor_position'):
+                self.manual_spore_manager.update_cursor_position()  # Через PreviewManager
         
         if self.param_manager:
-            self.param_manager.update()
+            with span('ParamManager.update'):
+                self.param_manager.update()
             
         if self.ui_setup:
-            self.ui_setup.update() 
\ No newline at end of file
+            with span('UI_setup.update'):
+                self.ui_setup.update()
+
+        tracer.end_frame()
\ No newline at end of file
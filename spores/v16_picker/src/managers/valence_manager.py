@@ -4,11 +4,17 @@ Valence Manager - Менеджер для анализа валентности
 
 Управляет анализом и отслеживанием валентных состояний всех спор в графе.
 Определяет занятые и свободные валентные места на основе соседей 1 и 2 порядка.
+
+Валентность всего графа считается пакетно (logic.valence_table) по массивам
+рёбер; объекты SporeValence создаются лениво при запросе конкретной споры.
+После изменений графа пересчитываются только споры в пределах двух шагов
+от изменённых узлов (по версии и журналу SporeGraph).
 """
 
-from typing import Dict, Optional, List, Any
+from typing import Dict, Iterable, Optional, List, Any
 import numpy as np
 from ..logic.valence import SporeValence
+from ..logic.valence_table import ValenceTable, build_valence_table
 
 
 class ValenceManager:
@@ -22,7 +28,8 @@ class ValenceManager:
 
     Attributes:
         spore_manager: Ссылка на SporeManager для доступа к графу
-        valence_cache: Кеш валентности спор
+        valence_cache: Кеш валентности спор (материализованные SporeValence)
+        valence_table: Таблица (N, 12) валентности всего графа или None
     """
 
     def __init__(self, spore_manager):
@@ -34,6 +41,9 @@ class ValenceManager:
         """
         self.spore_manager = spore_manager
         self.valence_cache: Dict[int, SporeValence] = {}
+        self.valence_table: Optional[ValenceTable] = None
+        # Версия SporeGraph, которой соответствуют кеш и таблица
+        self._graph_version: int = getattr(spore_manager.graph, 'version', 0)
 
         print("✅ ValenceManager инициализирован")
 
@@ -76,10 +86,18 @@ class ValenceManager:
         Returns:
             SporeValence с информацией о валентности или None при ошибке
         """
-        # Проверяем кеш
+        # Проверяем кеш (после изменений графа — только затронутые споры)
+        if use_cache:
+            self.refresh_from_graph()
         if use_cache and spore_id in self.valence_cache:
             return self.valence_cache[spore_id]
 
+        # Ленивая материализация из таблицы всего графа
+        if use_cache and self.valence_table is not None and spore_id in self.valence_table:
+            valence = self.valence_table.materialize(spore_id)
+            self.valence_cache[spore_id] = valence
+            return valence
+
         # Проверяем что спора существует в графе
         if spore_id not in self.spore_manager.graph.nodes:
             print(f"❌ Спора {spore_id} не найдена в графе")
@@ -436,6 +454,7 @@ class ValenceManager:
     def clear_cache(self) -> None:
         """Очищает кеш валентности"""
         self.valence_cache.clear()
+        self.valence_table = None
         print("🧹 Кеш валентности очищен")
 
     def get_valence_info(self, spore_id: str) -> Optional[SporeValence]:
@@ -452,21 +471,129 @@ class ValenceManager:
         """
         return self.analyze_spore_valence(spore_id, use_cache=True)
 
+    def _graph_edge_arrays(self, spore_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Массивы рёбер графа для build_valence_table.
+
+        Рёбра перечисляются в том же порядке, в котором их обходит поузловой
+        анализ (исходящие и входящие множества графа), чтобы при конфликте
+        слот занимал тот же сосед.
+
+        Args:
+            spore_ids: Только рёбра, инцидентные этим спорам (подграф для
+                       частичного пересчёта); None — весь граф
+        """
+        graph = self.spore_manager.graph
+        if spore_ids is None:
+            sources = list(graph.nodes.keys())
+        else:
+            sources = [spore_id for spore_id in spore_ids if spore_id in graph.nodes]
+        node_ids = list(sources)
+        index = {spore_id: i for i, spore_id in enumerate(node_ids)}
+
+        def node_index(spore_id: str) -> int:
+            if spore_id not in index:
+                index[spore_id] = len(node_ids)
+                node_ids.append(spore_id)
+            return index[spore_id]
+
+        parents, children, dts, controls, out_rank = [], [], [], [], []
+        edge_index: Dict[tuple, int] = {}
+
+        def add_edge(parent_id: str, child_id: str, rank: int) -> int:
+            edge_info = graph.get_edge_info(parent_id, child_id)
+            dt = self._convert_to_float(self._extract_dt_from_edge(edge_info))
+            control = self._convert_to_float(self._extract_control_from_edge(edge_info))
+
+            edge = edge_index[(parent_id, child_id)] = len(parents)
+            parents.append(node_index(parent_id))
+            children.append(node_index(child_id))
+            dts.append(np.nan if dt is None else dt)
+            controls.append(np.nan if control is None else control)
+            out_rank.append(rank)
+            return edge
+
+        for spore_id in sources:
+            rank = 0
+            for child_id in graph.outgoing.get(spore_id, ()):
+                if child_id not in graph.nodes:
+                    continue
+                add_edge(spore_id, child_id, rank)
+                rank += 1
+
+        in_rank: List[int] = [0] * len(parents)
+        for spore_id in sources:
+            rank = 0
+            for parent_id in graph.incoming.get(spore_id, ()):
+                if parent_id not in graph.nodes:
+                    continue
+                edge = edge_index.get((parent_id, spore_id))
+                if edge is None:
+                    # Родитель вне подграфа: его порядок исходящих не важен
+                    edge = add_edge(parent_id, spore_id, 0)
+                    in_rank.append(0)
+                in_rank[edge] = rank
+                rank += 1
+
+        return {
+            'node_ids': node_ids,
+            'edge_parent': np.array(parents, dtype=np.int64),
+            'edge_child': np.array(children, dtype=np.int64),
+            'edge_dt': np.array(dts, dtype=np.float64),
+            'edge_control': np.array(controls, dtype=np.float64),
+            'out_rank': np.array(out_rank, dtype=np.int64),
+            'in_rank': np.array(in_rank, dtype=np.int64),
+        }
+
     def update_from_graph(self) -> None:
         """
         Обновляет кеш валентности для всех спор в графе.
 
-        Пересчитывает валентность для всех спор.
+        Пересчитывает таблицу валентности всего графа одним пакетным
+        проходом; SporeValence отдельных спор создаются по запросу.
         """
         print("🔄 Обновление валентности из графа...")
 
         self.clear_cache()
+        self.valence_table = build_valence_table(**self._graph_edge_arrays())
+        self._graph_version = getattr(self.spore_manager.graph, 'version', 0)
 
-        # Анализируем все споры в графе
-        for spore_id in self.spore_manager.graph.nodes.keys():
-            self.analyze_spore_valence(spore_id, use_cache=False)
+        print(f"✅ Валентность обновлена для {len(self.valence_table)} спор")
 
-        print(f"✅ Валентность обновлена для {len(self.valence_cache)} спор")
+    def refresh_from_graph(self) -> int:
+        """
+        Приводит кеш и таблицу к текущей версии графа.
+
+        Пересчитываются только споры в пределах двух шагов от узлов,
+        изменённых после прошлого обновления (валентность зависит от путей
+        длины 1-2). Если журнал графа не покрывает нужную версию или споры
+        удалялись, таблица пересчитывается целиком.
+
+        Returns:
+            Количество пересчитанных спор
+        """
+        graph = self.spore_manager.graph
+        version = getattr(graph, 'version', None)
+        if version is None or version == self._graph_version:
+            return 0
+
+        affected = graph.affected_since(self._graph_version, hops=2)
+        if affected is None or any(spore_id not in graph.nodes for spore_id in affected):
+            if self.valence_table is not None:
+                self.update_from_graph()
+            else:
+                self.valence_cache.clear()
+                self._graph_version = version
+            return len(graph.nodes)
+
+        for spore_id in affected:
+            self.valence_cache.pop(spore_id, None)
+        if self.valence_table is not None:
+            # Подграф: затронутые споры и их соседи со всеми их рёбрами
+            subgraph = graph.neighborhood(affected, hops=1)
+            self.valence_table.update_rows(build_valence_table(**self._graph_edge_arrays(subgraph)), affected)
+        self._graph_version = version
+        return len(affected)
 
     def print_valence_report(self, spore_id: str) -> None:
         """
@@ -497,33 +624,36 @@ class ValenceManager:
         Returns:
             Словарь {spore_id: SporeValence}
         """
-        if not self.valence_cache:
+        if self.valence_table is None:
             self.update_from_graph()
+        else:
+            self.refresh_from_graph()
 
-        return self.valence_cache.copy()
+        return {spore_id: self.analyze_spore_valence(spore_id)
+                for spore_id in self.valence_table.node_ids}
 
     def print_graph_valence_summary(self) -> None:
         """Выводит сводку по валентности всего графа"""
         print("\n📊 СВОДКА ВАЛЕНТНОСТИ ГРАФА:")
 
-        all_valences = self.get_all_valences()
+        if self.valence_table is None:
+            self.update_from_graph()
+        else:
+            self.refresh_from_graph()
+        table = self.valence_table
 
-        if not all_valences:
+        if len(table) == 0:
             print("   📭 Граф пуст")
             return
 
-        # Собираем статистику
-        total_spores = len(all_valences)
-        total_occupied_children = 0
-        total_occupied_grandchildren = 0
-        total_free_children = 0
-        total_free_grandchildren = 0
-
-        for valence in all_valences.values():
-            total_occupied_children += valence.count_occupied_children()
-            total_occupied_grandchildren += valence.count_occupied_grandchildren()
-            total_free_children += valence.count_free_children()
-            total_free_grandchildren += valence.count_free_grandchildren()
+        # Собираем статистику прямо по таблице (N, 12)
+        total_spores = len(table)
+        occupied_children = table.occupied_children()
+        occupied_grandchildren = table.occupied_grandchildren()
+        total_occupied_children = int(occupied_children.sum())
+        total_occupied_grandchildren = int(occupied_grandchildren.sum())
+        total_free_children = 4 * total_spores - total_occupied_children
+        total_free_grandchildren = 8 * total_spores - total_occupied_grandchildren
 
         print(f"   🌟 Всего спор: {total_spores}")
         print(f"\n   👶 ДЕТИ:")
@@ -534,22 +664,19 @@ class ValenceManager:
         print(f"      Свободно слотов: {total_free_grandchildren}")
 
         # Находим споры с интересной валентностью
-        fully_occupied = [vid for vid, v in all_valences.items()
-                         if len(v.get_free_slots()) == 0]
-        fully_free = [vid for vid, v in all_valences.items()
-                     if len(v.get_occupied_slots()) == 0]
-        partially_occupied = [vid for vid, v in all_valences.items()
-                             if 0 < len(v.get_occupied_slots()) < v.total_slots]
+        occupied = table.occupied_counts()
+        n_slots = table.occupied.shape[1]
+        fully_occupied = np.flatnonzero(occupied == n_slots)
+        fully_free = np.flatnonzero(occupied == 0)
+        partially_occupied = np.flatnonzero((occupied > 0) & (occupied < n_slots))
 
         print(f"\n   🎯 КАТЕГОРИИ СПОР:")
         print(f"      Полностью заняты (8/8): {len(fully_occupied)}")
         print(f"      Полностью свободны (0/8): {len(fully_free)}")
         print(f"      Частично заняты: {len(partially_occupied)}")
 
-        if partially_occupied:
+        if len(partially_occupied):
             print(f"\n   🔍 ЧАСТИЧНО ЗАНЯТЫЕ СПОРЫ (интересны для роста дерева):")
-            for spore_id in partially_occupied[:5]:  # Показываем первые 5
-                v = all_valences[spore_id]
-                occupied = len(v.get_occupied_slots())
-                visual_id = self._get_visual_spore_id(spore_id)
-                print(f"      Спора {visual_id}: {occupied}/8 слотов занято")
\ No newline at end of file
+            for row in partially_occupied[:5]:  # Показываем первые 5
+                visual_id = self._get_visual_spore_id(table.node_ids[row])
+                print(f"      Спора {visual_id}: {occupied[row]}/8 слотов занято")
@@ -68,7 +68,20 @@ class ZoomManager:
             if not is_ghost:
                 # Для обычных объектов показываем полную информацию
                 self.print_quick_info(name, obj)
-    
+
+    def register_objects(self, objects: Dict[str, Scalable]) -> None:
+        """
+        Пакетная регистрация (материализация буфера): трансформация
+        применяется только к новым объектам, вместо print_quick_info
+        по каждому объекту — одна сводная строка.
+        """
+        for name, obj in objects.items():
+            self.objects[name] = obj
+            obj.apply_transform(self.a_transformation, self.b_translation, spores_scale=self.spores_scale)
+
+        if self.auto_print_enabled and objects:
+            print(f"🔍 Зарегистрировано объектов: {len(objects)} (всего {len(self.objects)})")
+
     def print_quick_info(self, name: str, obj: Scalable) -> None:
         """
         Показывает краткую информацию о добавленном объекте.
@@ -4,71 +4,312 @@
 
 Позволяет централизованно управлять различными типами отладочного вывода
 через конфигурацию без изменения кода.
+
+Вывод идёт через категории (get_logger('merge'), get_logger('dt') ...):
+- уровень каждой категории задаётся в config['debug']['log_levels'];
+  выключенная категория отбрасывает сообщение до форматирования;
+- сообщение можно передать функцией без аргументов — она вызывается,
+  только если сообщение действительно будет выведено:
+      _log.debug(lambda: f"позиция: {pos}")
+- число сообщений категории в секунду ограничено (log_rate_limit),
+  подавленные сообщения подсчитываются;
+- запись в консоль выполняет фоновый поток через кольцевой буфер
+  (log_async), поэтому вывод не блокирует кадр.
 """
 
+import atexit
+import sys
+import threading
+import time
+from collections import deque
 from typing import Dict, Optional, Any
 
 
+# Уровни вывода
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING, 'error': ERROR, 'off': OFF}
+
+
+def parse_level(value: Any, default: int = INFO) -> int:
+    """Переводит 'info' / 20 / True / False в числовой уровень."""
+    if isinstance(value, bool):
+        return INFO if value else OFF
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        return LEVELS.get(value.strip().lower(), default)
+    return default
+
+
+class LogWriter:
+    """
+    Вывод в консоль через кольцевой буфер.
+
+    В асинхронном режиме write() только кладёт строку в буфер, а в stdout
+    её пишет фоновый поток. При переполнении теряются самые старые строки
+    (их число печатается при следующей записи).
+    """
+
+    def __init__(self, capacity: int = 10_000):
+        self._buffer: deque = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._busy = False
+        self.dropped = 0
+        self.written = 0
+
+    @property
+    def is_async(self) -> bool:
+        return self._thread is not None
+
+    def set_capacity(self, capacity: int) -> None:
+        with self._cond:
+            self._buffer = deque(self._buffer, maxlen=max(1, int(capacity)))
+
+    def start(self) -> None:
+        """Запускает фоновый поток записи (один раз)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def write(self, text: str) -> None:
+        if self._thread is None:
+            sys.stdout.write(text)
+            self.written += 1
+            return
+        with self._cond:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(text)
+            self._cond.notify()
+
+    def flush(self, timeout: float = 2.0) -> None:
+        """Ждёт, пока фоновый поток допишет буфер."""
+        if self._thread is None:
+            sys.stdout.flush()
+            return
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._buffer or self._busy) and time.monotonic() < deadline:
+                self._cond.wait(0.05)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._buffer:
+                    self._cond.wait()
+                batch = list(self._buffer)
+                self._buffer.clear()
+                dropped, self.dropped = self.dropped, 0
+                self._busy = True
+            try:
+                if dropped:
+                    sys.stdout.write(f"   … буфер вывода переполнен, пропущено строк: {dropped}\n")
+                sys.stdout.write(''.join(batch))
+                sys.stdout.flush()
+                self.written += len(batch)
+            except (OSError, ValueError):
+                pass
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+
+class CategoryLogger:
+    """Вывод одной категории с уровнем и ограничением частоты."""
+
+    __slots__ = ('name', 'level', 'rate_limit', '_tokens', '_last', 'suppressed', '_writer')
+
+    def __init__(self, name: str, writer: LogWriter, level: int = INFO, rate_limit: float = 0.0):
+        """
+        Args:
+            name: Имя категории.
+            writer: Куда писать готовые строки.
+            level: Минимальный выводимый уровень.
+            rate_limit: Сообщений в секунду (0 — без ограничения); ошибки не ограничиваются.
+        """
+        self.name = name
+        self.level = level
+        self.rate_limit = rate_limit
+        self._tokens = rate_limit
+        self._last = time.monotonic()
+        self.suppressed = 0
+        self._writer = writer
+
+    def is_enabled(self, level: int = INFO) -> bool:
+        """Будет ли выведено сообщение уровня level (для дорогих отладочных блоков)."""
+        return level >= self.level
+
+    def log(self, level: int, *parts, sep: Optional[str] = ' ', end: Optional[str] = '\n', **_) -> None:
+        """Аналог print с уровнем; единственный аргумент-функция вызывается лениво."""
+        if level < self.level:
+            return
+        if self.rate_limit and level < ERROR and not self._take_token():
+            self.suppressed += 1
+            return
+
+        if len(parts) == 1 and callable(parts[0]):
+            parts = (parts[0](),)
+        text = (' ' if sep is None else sep).join(map(str, parts)) + ('\n' if end is None else end)
+        if self.suppressed:
+            text = f"   … [{self.name}] подавлено сообщений: {self.suppressed}\n" + text
+            self.suppressed = 0
+        self._writer.write(text)
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._last) * self.rate_limit)
+        self._last = now
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    def debug(self, *parts, **kwargs) -> None:
+        self.log(DEBUG, *parts, **kwargs)
+
+    def info(self, *parts, **kwargs) -> None:
+        self.log(INFO, *parts, **kwargs)
+
+    def warning(self, *parts, **kwargs) -> None:
+        self.log(WARNING, *parts, **kwargs)
+
+    def error(self, *parts, **kwargs) -> None:
+        self.log(ERROR, *parts, **kwargs)
+
+
+# Общий писатель и реестр категорий (категории создаются при импорте модулей,
+# уровни проставляются позже в configure_logging)
+_writer = LogWriter()
+_loggers: Dict[str, CategoryLogger] = {}
+_logging_config: Dict[str, Any] = {}
+
+
+def _category_level(name: str, default: int = INFO) -> int:
+    levels = _logging_config.get('log_levels', {})
+    return parse_level(levels.get(name, levels.get('default', default)), default)
+
+
+def get_logger(name: str) -> CategoryLogger:
+    """Возвращает логгер категории name (один объект на категорию)."""
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = CategoryLogger(name, _writer, level=_category_level(name),
+                                rate_limit=float(_logging_config.get('log_rate_limit', 0.0)))
+        _loggers[name] = logger
+    return logger
+
+
+def configure_logging(config: Optional[Dict] = None) -> None:
+    """
+    Применяет секцию debug конфига ко всем категориям:
+        "log_levels": {"default": "info", "merge": "info", "scalable": "off"},
+        "log_rate_limit": 200,       # сообщений/с на категорию, 0 — без ограничения
+        "log_async": true,           # писать в консоль из фонового потока
+        "log_buffer_size": 10000     # ёмкость кольцевого буфера
+    """
+    global _logging_config
+    _logging_config = dict((config or {}).get('debug', {}))
+
+    rate_limit = float(_logging_config.get('log_rate_limit', 0.0))
+    for name, logger in _loggers.items():
+        logger.level = _category_level(name)
+        logger.rate_limit = rate_limit
+        logger._tokens = rate_limit
+
+    _writer.set_capacity(_logging_config.get('log_buffer_size', 10_000))
+    if _logging_config.get('log_async', False):
+        _writer.start()
+
+
+def flush_output(timeout: float = 2.0) -> None:
+    """Дожидается вывода всех буферизованных сообщений."""
+    _writer.flush(timeout)
+
+
 class DebugOutput:
     """Централизованное управление отладочным выводом."""
-    
+
     def __init__(self, config: Optional[Dict] = None):
         """
         Инициализирует систему отладочного вывода.
-        
+
         Args:
             config: Словарь конфигурации с секцией 'debug'
         """
         self.config = config if config is not None else {}
         debug_config = self.config.get('debug', {})
-        
+
         # Флаги для различных типов отладки
         self.verbose_output = debug_config.get('enable_verbose_output', False)
         self.detailed_evolution = debug_config.get('enable_detailed_evolution', False)
         self.candidate_logging = debug_config.get('enable_candidate_logging', False)
         self.trajectory_logging = debug_config.get('enable_trajectory_logging', False)
-        
+
         # Совместимость со старым флагом trajectory_optimization.debug_output
         old_debug = self.config.get('trajectory_optimization', {}).get('debug_output', False)
         if old_debug:
             self.trajectory_logging = True
-    
+
+        # Категории: флаг enable_* задаёт уровень, log_levels может его переопределить
+        levels = debug_config.get('log_levels', {})
+        rate_limit = float(debug_config.get('log_rate_limit', 0.0))
+
+        def category(name: str, enabled: bool) -> CategoryLogger:
+            level = parse_level(levels.get(name, enabled))
+            return CategoryLogger(name, _writer, level=level, rate_limit=rate_limit)
+
+        self.verbose_log = category('verbose', self.verbose_output)
+        self.evolution_log = category('evolution', self.detailed_evolution)
+        self.candidate_log = category('candidate', self.candidate_logging)
+        self.trajectory_log = category('trajectory', self.trajectory_logging)
+        self.verbose_output = self.verbose_log.is_enabled()
+        self.detailed_evolution = self.evolution_log.is_enabled()
+        self.candidate_logging = self.candidate_log.is_enabled()
+        self.trajectory_logging = self.trajectory_log.is_enabled()
+
     def print_verbose(self, *args, **kwargs) -> None:
         """Выводит общие отладочные сообщения."""
-        if self.verbose_output:
-            print(*args, **kwargs)
-    
+        self.verbose_log.info(*args, **kwargs)
+
     def print_evolution(self, *args, **kwargs) -> None:
         """Выводит детальную информацию об эволюции спор."""
-        if self.detailed_evolution:
-            print(*args, **kwargs)
-    
+        self.evolution_log.info(*args, **kwargs)
+
     def print_candidate(self, *args, **kwargs) -> None:
         """Выводит информацию о кандидатских спорах."""
-        if self.candidate_logging:
-            print(*args, **kwargs)
-    
+        self.candidate_log.info(*args, **kwargs)
+
     def print_trajectory(self, *args, **kwargs) -> None:
         """Выводит информацию о траекториях и оптимизации."""
-        if self.trajectory_logging:
-            print(*args, **kwargs)
-    
+        self.trajectory_log.info(*args, **kwargs)
+
     def print_always(self, *args, **kwargs) -> None:
         """Выводит важные сообщения всегда (ошибки, предупреждения)."""
-        print(*args, **kwargs)
-    
+        if len(args) == 1 and callable(args[0]):
+            args = (args[0](),)
+        sep, end = kwargs.get('sep', ' '), kwargs.get('end', '\n')
+        _writer.write((' ' if sep is None else sep).join(map(str, args)) + ('\n' if end is None else end))
+
     def is_verbose_enabled(self) -> bool:
         """Проверяет включен ли общий отладочный вывод."""
         return self.verbose_output
-    
+
     def is_evolution_enabled(self) -> bool:
         """Проверяет включен ли отладочный вывод эволюции."""
         return self.detailed_evolution
-    
+
     def is_candidate_enabled(self) -> bool:
         """Проверяет включен ли отладочный вывод кандидатов."""
         return self.candidate_logging
-    
+
     def is_trajectory_enabled(self) -> bool:
         """Проверяет включен ли отладочный вывод траекторий."""
         return self.trajectory_logging
@@ -79,8 +320,9 @@ _debug_output: Optional[DebugOutput] = None
 
 
 def init_debug_output(config: Optional[Dict] = None) -> None:
-    """Инициализирует глобальный экземпляр отладочного вывода."""
+    """Инициализирует глобальный экземпляр отладочного вывода и категории логгеров."""
     global _debug_output
+    configure_logging(config)
     _debug_output = DebugOutput(config)
 
 
@@ -116,4 +358,4 @@ def trajectory_print(*args, **kwargs) -> None:
 
 def always_print(*args, **kwargs) -> None:
     """Важные сообщения (всегда)."""
-    get_debug_output().print_always(*args, **kwargs) 
\ No newline at end of file
+    get_debug_output().print_always(*args, **kwargs)
@@ -0,0 +1,301 @@
+"""
+Горячая перезагрузка логических модулей внутри запущенного демо.
+
+Изменённые модули из src/logic (маятник, дерево, пары, area_opt, ядра)
+перезагружаются в том же процессе, сцена, граф и кэши сохраняются:
+- классы и функции модуля остаются теми же объектами, им подменяются
+  методы / __code__, поэтому существующие экземпляры (PendulumSystem,
+  SporeTree ...) и ссылки вида `from .pendulum import PendulumSystem`
+  сразу видят новый код;
+- остальные объекты (numba-ядра, константы) перепривязываются во всех
+  загруженных модулях src.*;
+- приватные кэши модуля (имена с '_' со значением dict/list/set) и имена
+  из __hot_reload_keep__ сохраняются; остальное, в том числе приватные
+  константы вроде _DENSE_LIMIT, берёт новое значение.
+
+Модули, владеющие живыми Ursina-сущностями (visual, managers, core.spore ...),
+так не перезагрузить — для них watcher перезапускает процесс целиком.
+
+Модуль намеренно не импортирует ничего из проекта: его использует и
+watcher.py, который запускается отдельным скриптом.
+"""
+
+import importlib
+import os
+import sys
+import threading
+import time
+import types
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Пакеты, которые можно перезагружать на лету
+HOT_RELOAD_PACKAGES = ('src.logic',)
+# Код выхода демо, по которому watcher перезапускает процесс
+RESTART_EXIT_CODE = 3
+
+
+def module_name_for_path(path: str, project_root: str) -> Optional[str]:
+    """'.../v16_picker/src/logic/pendulum.py' -> 'src.logic.pendulum'."""
+    path = os.path.abspath(path)
+    root = os.path.abspath(project_root)
+    if not path.endswith('.py') or not path.startswith(root + os.sep):
+        return None
+    parts = os.path.relpath(path, root)[:-3].split(os.sep)
+    if parts[-1] == '__init__':
+        parts = parts[:-1]
+    return '.'.join(parts) if parts else None
+
+
+def is_hot_reloadable(path: str, project_root: str,
+                      packages: Iterable[str] = HOT_RELOAD_PACKAGES) -> bool:
+    """Можно ли перезагрузить файл на лету (логический модуль без Ursina)."""
+    name = module_name_for_path(path, project_root)
+    if name is None or not any(name == p or name.startswith(p + '.') for p in packages):
+        return False
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return 'ursina' not in f.read()
+    except OSError:
+        return False
+
+
+class HotReloader:
+    """
+    Следит за src/ и перезагружает изменённые логические модули.
+
+    poll() вызывается из главного потока каждый кадр; наблюдатель watchdog
+    только складывает пути изменённых файлов.
+    """
+
+    def __init__(self, project_root: str, packages: Iterable[str] = HOT_RELOAD_PACKAGES,
+                 on_restart_required: Optional[Callable[[List[str]], None]] = None,
+                 debounce: float = 0.2):
+        """
+        Args:
+            project_root: Корень проекта (папка с src/).
+            packages: Перезагружаемые пакеты.
+            on_restart_required: Вызывается с путями, если изменился модуль
+                                 с Ursina-сущностями (по умолчанию — только сообщение).
+            debounce: Сколько секунд ждать тишины после последнего изменения.
+        """
+        self.project_root = os.path.abspath(project_root)
+        self.packages = tuple(packages)
+        self.on_restart_required = on_restart_required
+        self.debounce = debounce
+
+        self._pending: Set[str] = set()
+        self._last_event = 0.0
+        self._lock = threading.Lock()
+        self._observer = None
+        self.history: List[Dict] = []
+
+    # ------------------------------------------------------------------
+    # Наблюдение
+    # ------------------------------------------------------------------
+    def start(self) -> bool:
+        """Запускает наблюдатель watchdog за src/. Возвращает False, если watchdog недоступен."""
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            print("⚠️ watchdog не установлен — горячая перезагрузка отключена")
+            return False
+
+        reloader = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_modified(self, event):
+                if not event.is_directory:
+                    reloader.notify_changed(event.src_path)
+
+            on_created = on_modified
+
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), os.path.join(self.project_root, 'src'), recursive=True)
+        self._observer.daemon = True
+        self._observer.start()
+        print(f"♻️ Горячая перезагрузка включена: {', '.join(self.packages)}")
+        return True
+
+    def stop(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+    def notify_changed(self, path: str) -> None:
+        """Регистрирует изменённый файл (можно вызывать из любого потока)."""
+        if path.endswith('.py'):
+            with self._lock:
+                self._pending.add(os.path.abspath(path))
+                self._last_event = time.monotonic()
+
+    def poll(self) -> Optional[Dict]:
+        """Перезагружает накопившиеся изменения. Вызывать из главного потока."""
+        if not self._pending or time.monotonic() - self._last_event < self.debounce:
+            return None
+        with self._lock:
+            paths, self._pending = sorted(self._pending), set()
+
+        hot = [p for p in paths if is_hot_reloadable(p, self.project_root, self.packages)]
+        cold = [p for p in paths if p not in hot]
+        if cold:
+            print(f"🔁 Изменены модули со сценой ({', '.join(os.path.basename(p) for p in cold)}) — нужен перезапуск")
+            if self.on_restart_required:
+                self.on_restart_required(cold)
+            return None
+
+        names = [name for name in (module_name_for_path(p, self.project_root) for p in hot)
+                 if name in sys.modules]
+        return self.reload_modules(names) if names else None
+
+    # ------------------------------------------------------------------
+    # Перезагрузка
+    # ------------------------------------------------------------------
+    def reload_modules(self, names: List[str]) -> Dict:
+        """
+        Перезагружает модули names в порядке зависимостей.
+
+        Returns:
+            dict: {'reloaded': [...], 'error': str | None, 'seconds': float}
+        """
+        start = time.perf_counter()
+        report = {'reloaded': [], 'error': None, 'seconds': 0.0}
+        # id(старый объект) -> (старый, новый); старый держим, чтобы id не переиспользовался
+        replaced: Dict[int, Tuple[object, object]] = {}
+
+        for name in self._dependency_order(names):
+            module = sys.modules.get(name)
+            if module is None:
+                continue
+            old_globals = dict(module.__dict__)
+            try:
+                importlib.reload(module)
+            except Exception as e:
+                # Оставляем старый код работать
+                module.__dict__.clear()
+                module.__dict__.update(old_globals)
+                report['error'] = f"{name}: {type(e).__name__}: {e}"
+                print(f"❌ Горячая перезагрузка {name} не удалась: {type(e).__name__}: {e}")
+                break
+            self._merge_globals(module, old_globals, replaced)
+            report['reloaded'].append(name)
+
+        if replaced:
+            self._rebind(replaced)
+
+        report['seconds'] = time.perf_counter() - start
+        self.history.append(report)
+        if report['reloaded']:
+            print(f"♻️ Перезагружено за {report['seconds'] * 1000:.0f} мс: {', '.join(report['reloaded'])}")
+        return report
+
+    def _dependency_order(self, names: List[str]) -> List[str]:
+        """Сначала модули, от которых зависят остальные из списка."""
+        wanted = set(names)
+        order: List[str] = []
+        visiting: Set[str] = set()
+
+        def visit(name: str):
+            if name in order or name in visiting:
+                return
+            visiting.add(name)
+            module = sys.modules.get(name)
+            for value in (vars(module).values() if module else ()):
+                dep = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, '__module__', None)
+                if isinstance(dep, str) and dep in wanted and dep != name:
+                    visit(dep)
+            order.append(name)
+
+        for name in names:
+            visit(name)
+        return order
+
+    def _merge_globals(self, module: types.ModuleType, old_globals: Dict,
+                       replaced: Dict[int, Tuple[object, object]]) -> None:
+        """Сохраняет идентичность классов/функций модуля, его приватные кэши и __hot_reload_keep__."""
+        namespace = module.__dict__
+        keep = set(namespace.get('__hot_reload_keep__', ()))
+        for attr, old in old_globals.items():
+            if attr not in namespace or attr.startswith('__'):
+                continue
+            new = namespace[attr]
+            if new is old:
+                continue
+
+            defined_here = getattr(old, '__module__', None) == module.__name__
+            if defined_here and isinstance(old, type) and isinstance(new, type):
+                self._patch_class(old, new, replaced)
+                namespace[attr] = old
+            elif defined_here and isinstance(old, types.FunctionType) and isinstance(new, types.FunctionType) \
+                    and self._patch_function(old, new):
+                namespace[attr] = old
+            elif attr in keep or (attr.startswith('_') and isinstance(old, (dict, list, set))):
+                # Кэши модуля переживают перезагрузку, приватные константы — нет
+                namespace[attr] = old
+            else:
+                replaced[id(old)] = (old, new)
+
+    def _patch_class(self, old: type, new: type, replaced: Dict[int, Tuple[object, object]]) -> None:
+        for attr, value in list(new.__dict__.items()):
+            if attr in ('__dict__', '__weakref__'):
+                continue
+            current = old.__dict__.get(attr)
+            if isinstance(current, types.FunctionType) and isinstance(value, types.FunctionType) \
+                    and self._patch_function(current, value):
+                continue
+            try:
+                setattr(old, attr, value)
+            except (AttributeError, TypeError):
+                pass
+        for attr in [a for a in list(old.__dict__) if a not in new.__dict__ and not a.startswith('__')]:
+            try:
+                delattr(old, attr)
+            except (AttributeError, TypeError):
+                pass
+        replaced[id(new)] = (new, old)
+
+    @staticmethod
+    def _patch_function(old: types.FunctionType, new: types.FunctionType) -> bool:
+        """Подменяет код функции на месте; для обёрток (@traced и т.п.) — код обёрнутой функции."""
+        old_inner = getattr(old, '__wrapped__', None)
+        new_inner = getattr(new, '__wrapped__', None)
+        if isinstance(old_inner, types.FunctionType) and isinstance(new_inner, types.FunctionType):
+            return HotReloader._patch_function(old_inner, new_inner)
+        if len(old.__code__.co_freevars) != len(new.__code__.co_freevars):
+            return False
+        old.__code__ = new.__code__
+        old.__defaults__ = new.__defaults__
+        old.__kwdefaults__ = new.__kwdefaults__
+        old.__doc__ = new.__doc__
+        return True
+
+    def _rebind(self, replaced: Dict[int, Tuple[object, object]]) -> None:
+        """Заменяет ссылки на старые объекты в глобалах и атрибутах классов модулей проекта."""
+        roots = {'src'} | {package.split('.')[0] for package in self.packages}
+        for name, module in list(sys.modules.items()):
+            if name.split('.')[0] not in roots or module is None:
+                continue
+            namespace = module.__dict__
+            for attr, value in list(namespace.items()):
+                pair = replaced.get(id(value))
+                if pair is not None and pair[0] is value:
+                    namespace[attr] = pair[1]
+                elif isinstance(value, type) and getattr(value, '__module__', None) == name:
+                    self._rebind_class(value, replaced)
+
+    @staticmethod
+    def _rebind_class(cls: type, replaced: Dict[int, Tuple[object, object]]) -> None:
+        for attr, value in list(cls.__dict__.items()):
+            inner = value.__func__ if isinstance(value, (staticmethod, classmethod)) else value
+            pair = replaced.get(id(inner))
+            if pair is None or pair[0] is not inner:
+                continue
+            new = pair[1]
+            if isinstance(value, staticmethod):
+                new = staticmethod(new)
+            elif isinstance(value, classmethod):
+                new = classmethod(new)
+            try:
+                setattr(cls, attr, new)
+            except (AttributeError, TypeError):
+                pass
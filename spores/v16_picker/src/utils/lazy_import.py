@@ -0,0 +1,69 @@
+"""
+Ленивые импорты для тяжёлых зависимостей (matplotlib, scipy.optimize, pandas).
+
+- lazy_module('matplotlib.pyplot') — прокси модуля, реальный импорт
+  происходит при первом обращении к атрибуту;
+- lazy_exports(__name__, {...}) — __getattr__ для пакета, который
+  импортирует реэкспортируемые имена только по требованию.
+"""
+
+import importlib
+from types import ModuleType
+from typing import Any, Callable, Dict
+
+
+class LazyModule(ModuleType):
+    """Прокси модуля, импортирующий его при первом обращении к атрибуту."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_target'] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__['_lazy_target']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_lazy_target'] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'загружен' if self.__dict__['_lazy_target'] is not None else 'не загружен'
+        return f"<LazyModule {self.__name__} ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    """
+    Возвращает прокси модуля name.
+
+    Args:
+        name: Абсолютное имя модуля, например 'matplotlib.pyplot'.
+    """
+    return LazyModule(name)
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Callable[[str], Any]:
+    """
+    Строит __getattr__ пакета для ленивых реэкспортов (PEP 562).
+
+    Args:
+        package: __name__ пакета (для относительных импортов).
+        exports: Имя атрибута -> модуль (относительный или абсолютный).
+
+    Returns:
+        Функция __getattr__; загруженное значение кэшируется в пакете.
+    """
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    return __getattr__
@@ -1,114 +1,269 @@
 import numpy as np
-import itertools
-from typing import List, Tuple
+from numba import njit
+from typing import Optional, Union
+
+
+# ──────────────────────────────────────────────────────────────────────
+# JIT-ядро для 2D: окрестность 5×5 ячеек развёрнута в явные циклы
+# ──────────────────────────────────────────────────────────────────────
+@njit(cache=True)
+def _bridson_kernel_2d(rng, min_r, k, cell_size, grid_size):
+    """
+    Сэмплирование дисков Пуассона в единичном круге.
+
+    rng       : np.random.Generator
+    """
+    max_points = grid_size * grid_size
+    grid = np.full(max_points, -1, dtype=np.int64)
+    px = np.empty(max_points, dtype=np.float64)
+    pz = np.empty(max_points, dtype=np.float64)
+    active = np.empty(max_points, dtype=np.int64)
+    min_r2 = min_r * min_r
+    inv_cell = 1.0 / cell_size
+
+    # --- Шаг 1: первая точка внутри круга ---
+    while True:
+        x0 = rng.uniform(-1.0, 1.0)
+        z0 = rng.uniform(-1.0, 1.0)
+        if x0 * x0 + z0 * z0 <= 1.0:
+            break
+
+    gx0 = min(int((x0 + 1.0) * inv_cell), grid_size - 1)
+    gz0 = min(int((z0 + 1.0) * inv_cell), grid_size - 1)
+    px[0] = x0
+    pz[0] = z0
+    grid[gz0 * grid_size + gx0] = 0
+    active[0] = 0
+    n_points = 1
+    n_active = 1
+
+    # --- Шаг 2: основной цикл ---
+    while n_active > 0:
+        a_idx = rng.integers(0, n_active)
+        bx = px[active[a_idx]]
+        bz = pz[active[a_idx]]
+
+        # k кандидатов в кольце [r, 2r] генерируются одним пакетом
+        radii = rng.uniform(min_r, 2.0 * min_r, k)
+        angles = rng.uniform(0.0, 2.0 * np.pi, k)
+
+        found = False
+        for j in range(k):
+            cx = bx + radii[j] * np.cos(angles[j])
+            cz = bz + radii[j] * np.sin(angles[j])
+            if cx * cx + cz * cz > 1.0:
+                continue
+
+            gx = min(int((cx + 1.0) * inv_cell), grid_size - 1)
+            gz = min(int((cz + 1.0) * inv_cell), grid_size - 1)
+
+            valid = True
+            for iz in range(max(gz - 2, 0), min(gz + 3, grid_size)):
+                row = iz * grid_size
+                for ix in range(max(gx - 2, 0), min(gx + 3, grid_size)):
+                    idx = grid[row + ix]
+                    if idx != -1:
+                        dx = cx - px[idx]
+                        dz = cz - pz[idx]
+                        if dx * dx + dz * dz < min_r2:
+                            valid = False
+                            break
+                if not valid:
+                    break
+
+            if valid:
+                px[n_points] = cx
+                pz[n_points] = cz
+                grid[gz * grid_size + gx] = n_points
+                active[n_active] = n_points
+                n_points += 1
+                n_active += 1
+                found = True
+                break
+
+        # Если кандидат не найден, деактивируем точку (swap-remove)
+        if not found:
+            n_active -= 1
+            active[a_idx] = active[n_active]
+
+    out = np.empty((n_points, 2), dtype=np.float64)
+    out[:, 0] = px[:n_points]
+    out[:, 1] = pz[:n_points]
+    return out
+
+
+# ──────────────────────────────────────────────────────────────────────
+# JIT-ядро для n-D: алгоритм Бридсона на плоской целочисленной сетке
+# ──────────────────────────────────────────────────────────────────────
+@njit(cache=True)
+def _bridson_kernel(rng, min_r, n_dim, k, cell_size, grid_size, strides, offsets):
+    """
+    Сэмплирование дисков Пуассона в единичной n-мерной гиперсфере.
+
+    rng       : np.random.Generator
+    strides   : (n_dim,) шаги плоского индекса сетки
+    offsets   : (M, n_dim) смещения соседних ячеек
+    """
+    n_cells = 1
+    for _ in range(n_dim):
+        n_cells *= grid_size
+    grid = np.full(n_cells, -1, dtype=np.int64)
+
+    # Каждая ячейка содержит не более одной точки
+    points = np.empty((n_cells, n_dim), dtype=np.float64)
+    active = np.empty(n_cells, dtype=np.int64)
+    n_points = 0
+    n_active = 0
+    min_r2 = min_r * min_r
+
+    coords = np.empty(n_dim, dtype=np.int64)
+    cand = np.empty(n_dim, dtype=np.float64)
+
+    # --- Шаг 1: первая точка внутри сферы ---
+    while True:
+        p0 = rng.uniform(-1.0, 1.0, n_dim)
+        if np.sum(p0 * p0) <= 1.0:
+            break
+
+    flat = 0
+    for d in range(n_dim):
+        c = int((p0[d] + 1.0) / cell_size)
+        if c >= grid_size:
+            c = grid_size - 1
+        flat += c * strides[d]
+    points[0] = p0
+    grid[flat] = 0
+    active[0] = 0
+    n_points = 1
+    n_active = 1
+
+    # --- Шаг 2: основной цикл ---
+    while n_active > 0:
+        a_idx = rng.integers(0, n_active)
+        base = points[active[a_idx]]
+
+        # k кандидатов генерируются одним пакетом
+        radii = rng.uniform(min_r, 2.0 * min_r, k)
+        dirs = rng.standard_normal((k, n_dim))
+
+        found = False
+        for j in range(k):
+            norm = 0.0
+            for d in range(n_dim):
+                norm += dirs[j, d] * dirs[j, d]
+            norm = np.sqrt(norm)
+            if norm == 0.0:
+                continue
+
+            r2 = 0.0
+            for d in range(n_dim):
+                cand[d] = base[d] + radii[j] * dirs[j, d] / norm
+                r2 += cand[d] * cand[d]
+            if r2 > 1.0:
+                continue
+
+            for d in range(n_dim):
+                c = int((cand[d] + 1.0) / cell_size)
+                if c >= grid_size:
+                    c = grid_size - 1
+                coords[d] = c
+
+            valid = True
+            for m in range(offsets.shape[0]):
+                nb_flat = 0
+                inside = True
+                for d in range(n_dim):
+                    c = coords[d] + offsets[m, d]
+                    if c < 0 or c >= grid_size:
+                        inside = False
+                        break
+                    nb_flat += c * strides[d]
+                if not inside:
+                    continue
+                idx = grid[nb_flat]
+                if idx == -1:
+                    continue
+                dist2 = 0.0
+                for d in range(n_dim):
+                    diff = cand[d] - points[idx, d]
+                    dist2 += diff * diff
+                if dist2 < min_r2:
+                    valid = False
+                    break
+
+            if valid:
+                flat = 0
+                for d in range(n_dim):
+                    flat += coords[d] * strides[d]
+                points[n_points] = cand
+                grid[flat] = n_points
+                active[n_active] = n_points
+                n_points += 1
+                n_active += 1
+                found = True
+                break
+
+        # Если кандидат не найден, деактивируем точку (swap-remove)
+        if not found:
+            n_active -= 1
+            active[a_idx] = active[n_active]
+
+    return points[:n_points].copy()
+
 
 class PoissonDiskSampler:
     """
     Реализация алгоритма Бридсона для сэмплирования дисков Пуассона.
     Генерирует точки, минимальное расстояние между которыми не меньше заданного,
     внутри n-мерной единичной гиперсферы (с центром в нуле и радиусом 1).
+
+    Основной цикл скомпилирован numba (отдельное ядро для 2D и общее для n-D):
+    фоновая сетка хранится плоским целочисленным массивом, k кандидатов
+    вокруг активной точки генерируются одним пакетом.
     """
-    def __init__(self, min_radius: float, n_dim: int, k: int = 30):
+    def __init__(self, min_radius: float, n_dim: int, k: int = 30,
+                 seed: Optional[Union[int, np.random.Generator]] = None):
         """
         :param min_radius: float, минимальное расстояние между точками. Должно быть в (0, 2].
         :param n_dim: int, размерность пространства.
         :param k: int, количество попыток найти точку-кандидата вокруг активной точки.
+        :param seed: int или np.random.Generator для воспроизводимости (None — случайно).
         """
-        self.min_r: float = min_radius
-        self.n_dim: int = n_dim
-        self.k: int = k
-        
+        self.min_r: float = float(min_radius)
+        self.n_dim: int = int(n_dim)
+        self.k: int = int(k)
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+
         # Размер ячейки фоновой сетки. В каждой ячейке может быть не более одной точки.
         self.cell_size: float = self.min_r / np.sqrt(self.n_dim)
-        
+
         # Размер сетки. Домен [-1, 1], поэтому его размер 2.
         self.grid_size: int = int(np.ceil(2.0 / self.cell_size))
-        
-        # Инициализируем сетку. -1 означает, что ячейка пуста.
-        self.grid: np.ndarray = -np.ones((self.grid_size,) * self.n_dim, dtype=int)
-        
-        self.points: List[np.ndarray] = []
-        self.active_list: List[int] = []
-
-    def _is_in_bounds(self, p: np.ndarray) -> bool:
-        """Проверяет, находится ли точка внутри единичной гиперсферы."""
-        return bool(np.linalg.norm(p) <= 1.0)
-
-    def _get_grid_coords(self, p: np.ndarray) -> Tuple[int, ...]:
-        """Получает целочисленные координаты ячейки сетки для точки p."""
-        # Сдвигаем домен с [-1, 1] на [0, 2] и делим на размер ячейки
-        return tuple(((p + 1.0) / self.cell_size).astype(int))
+
+        # Плоский индекс: coords · strides
+        self.strides: np.ndarray = self.grid_size ** np.arange(self.n_dim - 1, -1, -1, dtype=np.int64)
+
+        # Соседи в радиусе min_r лежат не дальше ceil(√n) ячеек
+        reach = int(np.ceil(np.sqrt(self.n_dim)))
+        axis = np.arange(-reach, reach + 1, dtype=np.int64)
+        self.offsets: np.ndarray = np.stack(
+            np.meshgrid(*([axis] * self.n_dim), indexing='ij'), axis=-1
+        ).reshape(-1, self.n_dim)
+
+        self.points: np.ndarray = np.empty((0, self.n_dim))
 
     def sample(self) -> np.ndarray:
         """
         Выполняет сэмплирование.
-        :return: np.array, массив сгенерированных точек.
+        :return: np.array, массив сгенерированных точек формы (N, n_dim).
         """
-        # --- Шаг 1: Инициализация ---
-        # Создаем первую точку случайным образом внутри сферы.
-        while True:
-            p0 = np.random.uniform(-1, 1, self.n_dim)
-            if self._is_in_bounds(p0):
-                break
-        
-        self._add_point(p0)
-
-        # --- Шаг 2: Основной цикл ---
-        while self.active_list:
-            # Выбираем случайную активную точку
-            idx = np.random.randint(len(self.active_list))
-            p_active_idx = self.active_list[idx]
-            p_active = self.points[p_active_idx]
-            
-            found_candidate = False
-            for _ in range(self.k):
-                # Генерируем кандидата в кольце вокруг активной точки
-                p_cand = self._generate_candidate(p_active)
-
-                # Проверяем, подходит ли кандидат
-                if self._is_in_bounds(p_cand) and self._is_valid(p_cand):
-                    self._add_point(p_cand)
-                    found_candidate = True
-                    break
-            
-            # Если не нашли подходящего кандидата, деактивируем точку
-            if not found_candidate:
-                self.active_list.pop(idx)
-
-        return np.array(self.points) if self.points else np.array([]).reshape(0, self.n_dim)
-
-    def _add_point(self, p: np.ndarray) -> None:
-        """Добавляет точку в результирующий список, активный список и на сетку."""
-        point_idx = len(self.points)
-        self.points.append(p)
-        self.active_list.append(point_idx)
-        grid_coords = self._get_grid_coords(p)
-        self.grid[grid_coords] = point_idx
-
-    def _generate_candidate(self, p: np.ndarray) -> np.ndarray:
-        """Генерирует случайную точку-кандидата вокруг точки p."""
-        # Случайный радиус в диапазоне [r, 2r]
-        r = np.random.uniform(self.min_r, 2 * self.min_r)
-        # Случайное направление (единичный вектор)
-        v = np.random.randn(self.n_dim)
-        v /= np.linalg.norm(v)
-        return p + r * v
-
-    def _is_valid(self, p_cand: np.ndarray) -> bool:
-        """Проверяет, не находится ли кандидат слишком близко к существующим точкам."""
-        grid_coords = self._get_grid_coords(p_cand)
-        
-        # Определяем область поиска в сетке (гиперкуб со стороной 5 ячеек)
-        search_min = np.maximum(0, np.array(grid_coords) - 2)
-        search_max = np.minimum(self.grid_size - 1, np.array(grid_coords) + 2)
-
-        # Создаем итератор по всем соседним ячейкам в n-мерном пространстве
-        ranges = [range(s_min, s_max + 1) for s_min, s_max in zip(search_min, search_max)]
-        for neighbor_coords in itertools.product(*ranges):
-            point_idx = self.grid[neighbor_coords]
-            if point_idx != -1: # Если в ячейке есть точка
-                dist = np.linalg.norm(p_cand - self.points[int(point_idx)])
-                if dist < self.min_r:
-                    return False # Нашли слишком близкого соседа
-        
-        return True 
\ No newline at end of file
+        if self.n_dim == 2:
+            self.points = _bridson_kernel_2d(
+                self.rng, self.min_r, self.k, self.cell_size, self.grid_size
+            )
+        else:
+            self.points = _bridson_kernel(
+                self.rng, self.min_r, self.n_dim, self.k,
+                self.cell_size, self.grid_size, self.strides, self.offsets
+            )
+        return self.points
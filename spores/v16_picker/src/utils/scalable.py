@@ -1,24 +1,57 @@
-from ursina import Entity
+from ursina import Entity, scene
 import numpy as np
 from typing import Any
 
+from .debug_output import get_logger, DEBUG
+
+_log = get_logger('scalable')
+
 class Scalable(Entity):
+    # Поля, установка которых дорогая (загрузка ресурса) — при reinit только если сменились
+    _HEAVY_FIELDS = ('model', 'shader', 'texture')
+    # Значения по умолчанию для полей, которые reinit сбрасывает, если их не передали
+    _REINIT_DEFAULTS = {'position': (0, 0, 0), 'rotation': (0, 0, 0), 'scale': (1, 1, 1), 'visible': True}
+
     def __init__(self, *args: Any, **kwargs: Any):
         super().__init__(*args, **kwargs)
 
+        self._heavy_values = {key: kwargs[key] for key in self._HEAVY_FIELDS if key in kwargs}
         self.real_position: np.ndarray = np.array(self.position)
         self.real_scale: np.ndarray = np.array(self.scale)
 
+    def reinit(self, **kwargs: Any) -> None:
+        """
+        Повторная инициализация сущности из пула (visual/entity_pool.py).
+
+        Модель, шейдер и текстура ставятся, только если отличаются от
+        текущих; остальные поля — как в Entity.__init__.
+        """
+        for key in self._HEAVY_FIELDS:
+            if key in kwargs:
+                value = kwargs.pop(key)
+                if self._heavy_values.get(key) != value:
+                    setattr(self, key, value)
+                    self._heavy_values[key] = value
+
+        kwargs.setdefault('parent', scene)  # Очистка могла отвязать сущность от сцены
+        for key, value in self._REINIT_DEFAULTS.items():
+            kwargs.setdefault(key, value)
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+        self.real_position = np.array(self.position)
+        self.real_scale = np.array(self.scale)
+
     def apply_transform(self, a: float, b: np.ndarray, **kwargs: Any) -> None:
-        # 🔍 ОТЛАДКА ТРАНСФОРМАЦИИ
-        if hasattr(self, 'id') and self.id and 'tree_spore' in str(self.id):
-            print(f"🔧 ТРАНСФОРМАЦИЯ для {self.id}:")
-            print(f"   real_position: {self.real_position}")
-            print(f"   a (масштаб): {a}")
-            print(f"   b (смещение): {b}")
-            old_pos = self.position.copy() if hasattr(self.position, 'copy') else self.position
-            self.position = self.real_position * a + b
-            print(f"   позиция: {old_pos} → {self.position}")
+        # 🔍 ОТЛАДКА ТРАНСФОРМАЦИИ (категория 'scalable', по умолчанию выключена)
+        if _log.is_enabled(DEBUG) and getattr(self, 'id', None) and 'tree_spore' in str(self.id):
+            old_pos = self.position
+            new_pos = self.real_position * a + b
+            _log.debug(lambda: f"🔧 ТРАНСФОРМАЦИЯ для {self.id}:\n"
+                               f"   real_position: {self.real_position}\n"
+                               f"   a (масштаб): {a}\n"
+                               f"   b (смещение): {b}\n"
+                               f"   позиция: {old_pos} → {new_pos}")
         
         self.position = self.real_position * a + b
         self.scale = self.real_scale * a
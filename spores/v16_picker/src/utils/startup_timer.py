@@ -0,0 +1,181 @@
+"""
+Замер времени запуска демо: стоимость импорта модулей и время до первого кадра.
+
+Использование в скрипте запуска:
+    startup_timer = StartupTimer(t0=time.perf_counter())   # как можно раньше
+    startup_timer.install_import_hook()
+    ... импорты и создание менеджеров, startup_timer.mark('managers') ...
+    def update():
+        ...
+        startup_timer.on_frame()   # на первом кадре печатает отчёт
+
+Отчёт сохраняется в JSON; при повторном запуске печатается разница
+с предыдущим запуском, чтобы регрессии времени старта были видны сразу.
+"""
+
+import builtins
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class StartupTimer:
+    """Таймер этапов запуска с перехватом импортов."""
+
+    def __init__(self, t0: Optional[float] = None, report_path: str = os.path.join("buffer", "startup_timing.json"),
+                 top_n: int = 15, enabled: bool = True):
+        """
+        Args:
+            t0: Момент старта (time.perf_counter()); по умолчанию — сейчас.
+            report_path: Куда сохранять отчёт (None — не сохранять).
+            top_n: Сколько самых дорогих модулей показывать.
+            enabled: False — таймер ничего не перехватывает и не печатает.
+        """
+        self.t0: float = time.perf_counter() if t0 is None else t0
+        self.report_path: Optional[str] = report_path
+        self.top_n: int = top_n
+        self.enabled: bool = enabled
+
+        # (этап, секунды от t0)
+        self.stages: List[Tuple[str, float]] = []
+        # модуль -> (суммарное время, собственное время), секунды
+        self.imports: Dict[str, Tuple[float, float]] = {}
+        self.first_frame_time: Optional[float] = None
+
+        self._original_import = None
+        self._stack: List[float] = []
+        self._thread_id: int = threading.get_ident()
+
+    # ------------------------------------------------------------------
+    # Этапы
+    # ------------------------------------------------------------------
+    def mark(self, stage: str) -> None:
+        """Отмечает завершение этапа запуска."""
+        if self.enabled:
+            self.stages.append((stage, time.perf_counter() - self.t0))
+
+    def on_frame(self) -> None:
+        """Вызывается каждый кадр; на первом кадре фиксирует время и печатает отчёт."""
+        if self.first_frame_time is not None or not self.enabled:
+            return
+        self.first_frame_time = time.perf_counter() - self.t0
+        self.uninstall_import_hook()
+        self.print_report()
+        if self.report_path:
+            self.save_report(self.report_path)
+
+    # ------------------------------------------------------------------
+    # Перехват импортов
+    # ------------------------------------------------------------------
+    def install_import_hook(self) -> None:
+        """Оборачивает builtins.__import__ для замера новых импортов в главном потоке."""
+        if not self.enabled or self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall_import_hook(self) -> None:
+        """Возвращает исходный __import__."""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        if threading.get_ident() != self._thread_id:
+            return original(name, globals, locals, fromlist, level)
+
+        # Быстрый путь: модуль уже загружен и ничего не импортируется из него
+        if level == 0 and not fromlist and name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        modules_before = len(sys.modules)
+        start = time.perf_counter()
+        self._stack.append(0.0)
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            if len(sys.modules) > modules_before:
+                key = self._resolve_name(name, globals, level)
+                total, own = self.imports.get(key, (0.0, 0.0))
+                self.imports[key] = (total + elapsed, own + elapsed - children)
+
+    @staticmethod
+    def _resolve_name(name: str, globals, level: int) -> str:
+        if level == 0:
+            return name
+        package = (globals or {}).get('__package__') or (globals or {}).get('__name__', '')
+        try:
+            return importlib.util.resolve_name('.' * level + name, package)
+        except (ImportError, ValueError):
+            return '.' * level + name
+
+    # ------------------------------------------------------------------
+    # Отчёт
+    # ------------------------------------------------------------------
+    def get_report(self) -> Dict:
+        """Отчёт в виде словаря (секунды)."""
+        top = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)
+        return {
+            'stages': {stage: round(t, 4) for stage, t in self.stages},
+            'first_frame': None if self.first_frame_time is None else round(self.first_frame_time, 4),
+            'imports': {name: {'total': round(total, 4), 'self': round(own, 4)}
+                        for name, (total, own) in top[:self.top_n]},
+            'heavy_modules_loaded': [m for m in ('matplotlib', 'pandas', 'scipy.optimize', 'sympy')
+                                     if m in sys.modules],
+        }
+
+    def print_report(self) -> None:
+        """Печатает этапы, самые дорогие импорты и разницу с прошлым запуском."""
+        report = self.get_report()
+        previous = self._load_previous()
+
+        print("\n⏱️ ВРЕМЯ ЗАПУСКА:")
+        for stage, t in report['stages'].items():
+            print(f"   {stage:<24} {t * 1000:8.0f} мс{self._delta(previous, 'stages', stage, t)}")
+        if report['first_frame'] is not None:
+            print(f"   {'первый кадр':<24} {report['first_frame'] * 1000:8.0f} мс"
+                  f"{self._delta(previous, None, 'first_frame', report['first_frame'])}")
+
+        if report['imports']:
+            print(f"   📦 Самые дорогие импорты (всего / собственное):")
+            for name, cost in report['imports'].items():
+                print(f"      {name:<48} {cost['total'] * 1000:7.0f} / {cost['self'] * 1000:5.0f} мс")
+        if report['heavy_modules_loaded']:
+            print(f"   ⚠️ Загружены при старте: {', '.join(report['heavy_modules_loaded'])}")
+
+    def save_report(self, path: str) -> str:
+        """Сохраняет отчёт в JSON."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.get_report(), f, indent=2, ensure_ascii=False)
+        return path
+
+    def _load_previous(self) -> Optional[Dict]:
+        if not self.report_path or not os.path.exists(self.report_path):
+            return None
+        try:
+            with open(self.report_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _delta(previous: Optional[Dict], section: Optional[str], key: str, value: float) -> str:
+        if not previous:
+            return ""
+        source = previous.get(section, {}) if section else previous
+        old = source.get(key) if isinstance(source, dict) else None
+        if old is None:
+            return ""
+        return f"  ({(value - old) * 1000:+.0f} мс к прошлому запуску)"
@@ -0,0 +1,316 @@
+"""
+Трассировщик вложенных участков кода (span'ов) для горячих путей.
+
+Обобщение StageProfiler: участки могут быть вложенными, замеряются
+контекстным менеджером или декоратором, агрегируются по кадрам
+(UpdateManager.update_all) и экспортируются в Chrome trace-event JSON
+(открывается в chrome://tracing или https://ui.perfetto.dev).
+
+Использование:
+    from src.utils.tracer import span, traced, get_tracer
+
+    @traced()                          # имя = модуль.функция
+    def find_optimal_pairs(tree): ...
+
+    with span('pairs.stage_3', pairs=len(pairs)):
+        ...
+
+    tracer = get_tracer()
+    tracer.enable()
+    ...
+    tracer.print_summary()
+    tracer.export_chrome_trace('buffer/trace.json')
+
+В выключенном режиме span() возвращает общий пустой контекст, а обёртка
+@traced сразу вызывает функцию — инструментацию можно держать в коде постоянно.
+
+Стек участков у каждого потока свой. Участки фоновых потоков (решатель
+anytime-оптимизации, вывод материализации) попадают в общую статистику и
+в Chrome trace отдельной дорожкой, но не в агрегаты кадров главного потока.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+class _NullSpan:
+    """Пустой span для выключенного трассировщика."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Активный участок: время начала и суммарное время вложенных участков."""
+    __slots__ = ('tracer', 'name', 'args', 'start', 'child_ns', 'duration')
+
+    def __init__(self, tracer: 'Tracer', name: str, args: Optional[Dict[str, Any]]):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+        self.child_ns = 0
+        self.duration = 0
+
+    def __enter__(self):
+        self.tracer._stack().append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = self.duration = time.perf_counter_ns() - self.start
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if stack:
+            stack[-1].child_ns += duration
+        if exc_type is not None:
+            self.args = dict(self.args or {}, error=exc_type.__name__)
+        self.tracer._record(self.name, self.start, duration, duration - self.child_ns, self.args)
+        return False
+
+
+class Tracer:
+    """Трассировщик с агрегацией по кадрам и экспортом в Chrome trace."""
+
+    def __init__(self, enabled: bool = False, max_events: int = 200_000,
+                 frame_history: int = 300, slow_frame_ms: Optional[float] = None):
+        """
+        Args:
+            enabled: Включён ли сбор.
+            max_events: Сколько последних событий хранить для экспорта (кольцевой буфер).
+            frame_history: Сколько последних кадров хранить в агрегированном виде.
+            slow_frame_ms: Порог медленного кадра; такие кадры печатаются с разбивкой.
+        """
+        self.enabled: bool = enabled
+        self.slow_frame_ms: Optional[float] = slow_frame_ms
+
+        # (имя, начало нс, длительность нс, id потока, args)
+        self.events: Deque[Tuple[str, int, int, int, Optional[Dict]]] = deque(maxlen=max_events)
+        # Кадры: {'index', 'duration_ms', 'spans': {имя: [вызовы, всего мс, собственное мс]}}
+        self.frames: Deque[Dict] = deque(maxlen=frame_history)
+        # Агрегат за всё время: имя -> [вызовы, всего нс, собственное нс, максимум нс]
+        self.totals: Dict[str, List[int]] = {}
+
+        self.t0_ns: int = time.perf_counter_ns()
+        self.frame_index: int = 0
+        self._frame_span: Optional[_Span] = None
+        self._frame_spans: Optional[Dict[str, List[int]]] = None
+        # Поток, открывший кадр: участки фоновых потоков идут параллельно кадрам и в них не входят
+        self._frame_thread: Optional[int] = None
+        self._totals_lock = threading.Lock()
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Управление
+    # ------------------------------------------------------------------
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def clear(self) -> None:
+        """Сбрасывает собранные события и статистику."""
+        self.events.clear()
+        self.frames.clear()
+        with self._totals_lock:
+            self.totals.clear()
+        self.t0_ns = time.perf_counter_ns()
+
+    # ------------------------------------------------------------------
+    # Участки
+    # ------------------------------------------------------------------
+    def span(self, name: str, **args) -> Any:
+        """Контекстный менеджер участка; args попадают в Chrome trace."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args or None)
+
+    def trace(self, name: Optional[str] = None) -> Callable:
+        """Декоратор: оборачивает вызов функции в участок name (по умолчанию модуль.функция)."""
+        def decorator(func: Callable) -> Callable:
+            span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, span_name, None):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _stack(self) -> List[_Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, name: str, start: int, duration: int, own: int, args: Optional[Dict]) -> None:
+        thread_id = threading.get_ident()
+        self.events.append((name, start, duration, thread_id, args))
+
+        with self._totals_lock:
+            total = self.totals.get(name)
+            if total is None:
+                total = self.totals[name] = [0, 0, 0, 0]
+            total[0] += 1
+            total[1] += duration
+            total[2] += own
+            if duration > total[3]:
+                total[3] = duration
+
+        frame_spans = self._frame_spans
+        if frame_spans is not None and thread_id == self._frame_thread:
+            stats = frame_spans.get(name)
+            if stats is None:
+                stats = frame_spans[name] = [0, 0, 0]
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] += own
+
+    # ------------------------------------------------------------------
+    # Кадры
+    # ------------------------------------------------------------------
+    def begin_frame(self) -> None:
+        """Начало кадра (вызывается в начале UpdateManager.update_all)."""
+        if not self.enabled:
+            return
+        if self._frame_span is not None:
+            self.end_frame()
+        self.frame_index += 1
+        self._frame_thread = threading.get_ident()
+        self._frame_spans = {}
+        self._frame_span = _Span(self, 'frame', {'index': self.frame_index})
+        self._frame_span.__enter__()
+
+    def end_frame(self) -> Optional[Dict]:
+        """Конец кадра: сохраняет агрегат кадра и печатает медленные кадры."""
+        frame_span = self._frame_span
+        if frame_span is None:
+            return None
+        frame_span.__exit__(None, None, None)
+        spans = self._frame_spans or {}
+        spans.pop('frame', None)
+        self._frame_span = None
+        self._frame_spans = None
+
+        frame = {
+            'index': self.frame_index,
+            'duration_ms': frame_span.duration / 1e6,
+            'spans': {name: [calls, total / 1e6, own / 1e6] for name, (calls, total, own) in spans.items()},
+        }
+        self.frames.append(frame)
+        if self.slow_frame_ms is not None and frame['duration_ms'] > self.slow_frame_ms:
+            self.print_frame(frame)
+        return frame
+
+    # ------------------------------------------------------------------
+    # Отчёты
+    # ------------------------------------------------------------------
+    def get_summary(self) -> Dict[str, Dict[str, float]]:
+        """Агрегат по участкам за всё время: вызовы, всего/собственное/максимум в мс."""
+        # Копия под замком: фоновые потоки дописывают totals во время чтения
+        with self._totals_lock:
+            totals = {name: tuple(total) for name, total in self.totals.items()}
+        return {name: {'calls': calls, 'total_ms': total / 1e6, 'self_ms': own / 1e6,
+                       'max_ms': longest / 1e6, 'mean_ms': total / 1e6 / calls}
+                for name, (calls, total, own, longest) in totals.items()}
+
+    def print_frame(self, frame: Dict, top_n: int = 8) -> None:
+        """Печатает разбивку кадра по собственному времени участков."""
+        print(f"🐢 Кадр #{frame['index']}: {frame['duration_ms']:.1f} мс")
+        ranked = sorted(frame['spans'].items(), key=lambda item: item[1][2], reverse=True)
+        for name, (calls, total_ms, own_ms) in ranked[:top_n]:
+            print(f"   {name:<44} {own_ms:8.2f} мс собств. / {total_ms:8.2f} мс ×{calls}")
+
+    def print_summary(self, top_n: int = 20) -> None:
+        """Печатает самые дорогие участки за всё время."""
+        summary = self.get_summary()
+        if not summary:
+            print("📊 Трассировка: участков нет")
+            return
+        print(f"\n📊 ТРАССИРОВКА (кадров: {self.frame_index}):")
+        print(f"   {'участок':<44} {'вызовы':>7} {'всего':>10} {'собств.':>10} {'макс.':>9}")
+        ranked = sorted(summary.items(), key=lambda item: item[1]['self_ms'], reverse=True)
+        for name, s in ranked[:top_n]:
+            print(f"   {name:<44} {s['calls']:>7} {s['total_ms']:>8.1f}мс {s['self_ms']:>8.1f}мс {s['max_ms']:>7.1f}мс")
+
+    def export_chrome_trace(self, path: str) -> str:
+        """
+        Сохраняет события в формате Chrome trace-event (complete events, ph='X').
+
+        Returns:
+            str: путь к файлу
+        """
+        pid = os.getpid()
+        trace_events = []
+        for name, start, duration, tid, args in list(self.events):
+            event = {'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                     'ts': (start - self.t0_ns) / 1000.0, 'dur': duration / 1000.0}
+            if args:
+                event['args'] = {key: value if isinstance(value, (int, float, str, bool)) else repr(value)
+                                 for key, value in args.items()}
+            trace_events.append(event)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+
+# Глобальный экземпляр (выключен, пока не включён конфигом или вручную)
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Возвращает глобальный трассировщик."""
+    return _tracer
+
+
+def init_tracer(config: Optional[Dict] = None) -> Tracer:
+    """
+    Настраивает глобальный трассировщик из секции debug.tracing конфига:
+        {"enabled": false, "slow_frame_ms": 50, "trace_path": "buffer/trace.json"}
+
+    Если задан trace_path, трасса сохраняется при выходе из программы.
+    """
+    tracing = (config or {}).get('debug', {}).get('tracing', {})
+    _tracer.enabled = bool(tracing.get('enabled', False))
+    _tracer.slow_frame_ms = tracing.get('slow_frame_ms')
+
+    trace_path = tracing.get('trace_path')
+    if _tracer.enabled and trace_path:
+        def _export_on_exit():
+            if _tracer.events:
+                print(f"💾 Трасса сохранена: {_tracer.export_chrome_trace(trace_path)}")
+        atexit.register(_export_on_exit)
+    return _tracer
+
+
+def span(name: str, **args) -> Any:
+    """Участок глобального трассировщика (см. Tracer.span)."""
+    if not _tracer.enabled:
+        return _NULL_SPAN
+    return _Span(_tracer, name, args or None)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Декоратор участка глобального трассировщика (см. Tracer.trace)."""
+    return _tracer.trace(name)
@@ -8,10 +8,17 @@ from pathlib import Path
 import select
 import threading
 
+if __package__:
+    from .hot_reload import RESTART_EXIT_CODE
+else:
+    # python src/utils/watcher.py: sys.path[0] — папка этого файла, hot_reload лежит рядом
+    from hot_reload import RESTART_EXIT_CODE
+
 # --- НАСТРОЙКИ ---
 PATH_TO_WATCH = "./"  # Директория для отслеживания
 PYTHON_EXECUTABLE = sys.executable  # Используем текущий интерпретатор Python
 EXTENSIONS_TO_WATCH = ['.py']  # Расширения файлов для отслеживания
+CHANGE_DEBOUNCE = 0.3  # Секунд тишины, после которых изменения считаются одним сохранением
 # --- КОНЕЦ НАСТРОЕК ---
 
 process = None
@@ -85,11 +92,17 @@ class FileWatcher:
         return False
 
 class ScriptRunner:
-    def __init__(self):
+    def __init__(self, hot=False, debounce=CHANGE_DEBOUNCE):
         self.process = None
         self.project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
         self.scripts_dir = os.path.join(self.project_root, 'scripts', 'run')
         self.running = True
+        # В горячем режиме логические модули перезагружает сам процесс демо
+        self.hot = hot
+        self.changed_paths = set()
+        self.changed_lock = threading.Lock()
+        self.last_change = 0.0
+        self.debounce = debounce
         
     def run_script(self, script_name):
         """Запуск скрипта из папки scripts"""
@@ -105,10 +118,18 @@ class ScriptRunner:
                 self.process.terminate()
                 self.process.wait(timeout=3)
             
+            # Новый процесс загрузит все уже сохранённые файлы — накопленные изменения покрыты
+            with self.changed_lock:
+                self.changed_paths.clear()
+
             print(f"Запуск скрипта: {script_name}")
+            env = dict(os.environ)
+            if self.hot:
+                env['SPORES_HOT_RELOAD'] = '1'
             self.process = subprocess.Popen(
                 [sys.executable, "-u", script_path],
-                cwd=self.scripts_dir
+                cwd=self.scripts_dir,
+                env=env
             )
             print(f"Скрипт запущен, PID: {self.process.pid}")
             return True
@@ -121,7 +142,10 @@ class ScriptRunner:
         """Проверка состояния процесса и перезапуск при необходимости"""
         if self.process and self.process.poll() is not None:
             exit_code = self.process.returncode
-            if exit_code == 0:
+            if exit_code == RESTART_EXIT_CODE:
+                print("Скрипт запросил перезапуск (изменены модули со сценой)...")
+                self.run_script(self.current_script)
+            elif exit_code == 0:
                 print(f"Скрипт успешно завершился, перезапуск...")
                 time.sleep(1)  # Небольшая пауза перед перезапуском
                 self.run_script(self.current_script)
@@ -129,6 +153,34 @@ class ScriptRunner:
                 print(f"Скрипт завершился с ошибкой (код {exit_code})")
                 self.running = False  # Останавливаем сторожа при ошибке
     
+    def on_file_changed(self, path):
+        """Вызывается наблюдателем из своего потока"""
+        with self.changed_lock:
+            self.changed_paths.add(os.path.abspath(path))
+            self.last_change = time.monotonic()
+
+    def check_changes(self):
+        """
+        Перезапуск при изменении файлов, не чаще одного раза на пачку событий.
+
+        Пачка — изменения, после которых debounce секунд не было новых.
+        В горячем режиме src/ отслеживает сам процесс демо: логические модули
+        он перезагружает, а при изменении модулей со сценой выходит с
+        RESTART_EXIT_CODE (перезапуск в check_and_restart). Сторож сам
+        перезапускает только для файлов вне src/ — иначе одно сохранение
+        давало бы два перезапуска.
+        """
+        with self.changed_lock:
+            if not self.changed_paths or time.monotonic() - self.last_change < self.debounce:
+                return
+            paths, self.changed_paths = self.changed_paths, set()
+        if self.hot:
+            src_dir = os.path.join(self.project_root, 'src') + os.sep
+            paths = {p for p in paths if not p.startswith(src_dir)}
+        if paths and self.process and self.process.poll() is None:
+            print(f"Перезапуск из-за изменений: {', '.join(sorted(os.path.basename(p) for p in paths))}")
+            self.run_script(self.current_script)
+
     def stop(self):
         """Остановить все процессы"""
         self.running = False
@@ -151,7 +203,24 @@ def input_thread(runner):
         except EOFError:
             break
 
+class RunnerChangeHandler(FileSystemEventHandler):
+    """Передаёт изменённые .py файлы в ScriptRunner"""
+    def __init__(self, runner):
+        self.runner = runner
+
+    def on_modified(self, event):
+        if event.is_directory:
+            return
+        if os.path.splitext(event.src_path)[1].lower() in EXTENSIONS_TO_WATCH:
+            self.runner.on_file_changed(event.src_path)
+
+    on_created = on_modified
+
 def main():
+    # --hot: логические модули перезагружаются внутри процесса, без перезапуска
+    hot = '--hot' in sys.argv
+    sys.argv = [arg for arg in sys.argv if arg != '--hot']
+
     # По умолчанию запускаем main_demo.py
     if len(sys.argv) < 2:
         script_name = "main_demo.py"
@@ -163,7 +232,7 @@ def main():
             script_name += '.py'
         print(f"Запуск указанного скрипта: {script_name}")
     
-    runner = ScriptRunner()
+    runner = ScriptRunner(hot=hot)
     runner.current_script = script_name
     
     if not runner.run_script(script_name):
@@ -177,13 +246,24 @@ def main():
             print("Папка scripts/run не найдена")
         sys.exit(1)
     
+    observer = Observer()
+    handler = RunnerChangeHandler(runner)
+    for directory in (os.path.join(runner.project_root, 'src'), runner.scripts_dir):
+        observer.schedule(handler, directory, recursive=True)
+    observer.daemon = True
+    observer.start()
+    if hot:
+        print("Горячий режим: src/logic перезагружается на лету, остальное — перезапуском")
+
     try:
         while runner.running:
             runner.check_and_restart()
+            runner.check_changes()
             time.sleep(0.1)
     except KeyboardInterrupt:
         print("\nПолучен сигнал прерывания, завершаем работу...")
     finally:
+        observer.stop()
         runner.stop()
         print("Программа завершена")
 
@@ -0,0 +1,139 @@
+"""
+Пул сущностей Ursina (споры, линки, столбы) для повторного использования.
+
+Создание сущности дорогое: загрузка модели, новый NodePath, регистрация
+в scene.entities. Призраки, ангелы и деревья-превью пересоздаются на
+каждое движение мыши, поэтому вместо destroy() сущность отключается и
+кладётся в пул, а acquire() достаёт её обратно и вызывает reinit() с
+теми же аргументами, что и конструктор. reinit() меняет только то, что
+отличается (модель не перезагружается, если не сменилась).
+
+Поля, которые вызывающий код навешивает на сущность после создания
+(id, _zoom_manager_key, control_value ...), при повторной выдаче
+сбрасываются — сущность выглядит как только что созданная.
+
+Использование:
+    spore = entity_pool.acquire(Spore, dt=0.1, pendulum=p, goal_position=(0, 0), ...)
+    ...
+    entity_pool.release(spore, zoom_manager)   # вместо destroy(spore)
+"""
+
+from typing import Any, Dict, List, Type, TypeVar
+
+from ursina import destroy
+
+T = TypeVar('T')
+
+# Атрибуты, которые внешний код добавляет уже созданной сущности
+TRANSIENT_FIELDS = ('id', '_zoom_manager_key', 'is_candidate', 'control_value', 'dt_value')
+
+
+class EntityPool:
+    """
+    Свободные сущности по классам и статистика выдачи.
+
+    Класс участвует в пуле, если у него есть метод reinit(*args, **kwargs)
+    с сигнатурой конструктора. Остальные сущности release() уничтожает.
+    """
+
+    def __init__(self, max_free: int = 512):
+        self.max_free = max_free
+        self._free: Dict[type, List[Any]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _kind_stats(self, cls: type) -> Dict[str, int]:
+        stats = self._stats.get(cls.__name__)
+        if stats is None:
+            stats = {'created': 0, 'reused': 0, 'released': 0, 'destroyed': 0}
+            self._stats[cls.__name__] = stats
+        return stats
+
+    def acquire(self, cls: Type[T], *args: Any, **kwargs: Any) -> T:
+        """Свободная сущность класса cls, переинициализированная аргументами конструктора."""
+        stats = self._kind_stats(cls)
+        free = self._free.get(cls)
+        while free:
+            entity = free.pop()
+            if getattr(entity, 'is_empty', None) is not None and entity.is_empty():
+                continue  # Узел уничтожен в обход пула
+            entity._in_pool = False
+            for field in TRANSIENT_FIELDS:
+                if field in entity.__dict__ and field not in entity._pool_base_fields:
+                    delattr(entity, field)
+            entity.reinit(*args, **kwargs)
+            entity.enabled = True
+            stats['reused'] += 1
+            return entity
+
+        entity = cls(*args, **kwargs)
+        entity._in_pool = False
+        entity._pool_base_fields = frozenset(field for field in TRANSIENT_FIELDS if field in entity.__dict__)
+        stats['created'] += 1
+        return entity
+
+    def release(self, entity: Any, zoom_manager=None) -> None:
+        """
+        Возвращает сущность в пул (вместо destroy).
+
+        Если передан zoom_manager и у сущности есть _zoom_manager_key,
+        она снимается с регистрации.
+        """
+        if entity is None or getattr(entity, '_in_pool', False):
+            return
+        if getattr(entity, 'is_empty', None) is not None and entity.is_empty():
+            return  # Узел уже уничтожен
+        key = getattr(entity, '_zoom_manager_key', None)
+        if zoom_manager is not None and key is not None:
+            zoom_manager.unregister_object(key)
+
+        cls = type(entity)
+        stats = self._kind_stats(cls)
+        free = self._free.setdefault(cls, [])
+        if not hasattr(entity, 'reinit') or not hasattr(entity, '_pool_base_fields') \
+                or len(free) >= self.max_free:
+            destroy(entity)
+            stats['destroyed'] += 1
+            return
+
+        entity.enabled = False
+        entity._in_pool = True
+        free.append(entity)
+        stats['released'] += 1
+
+    def release_all(self, entities, zoom_manager=None) -> None:
+        """release() для каждой сущности списка."""
+        for entity in entities:
+            self.release(entity, zoom_manager)
+
+    def clear(self) -> None:
+        """Уничтожает все свободные сущности."""
+        for cls, free in self._free.items():
+            stats = self._kind_stats(cls)
+            for entity in free:
+                destroy(entity)
+                stats['destroyed'] += 1
+            free.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Статистика по классам: created / reused / released / destroyed и free —
+        сколько сущностей сейчас лежит в пуле.
+        """
+        result = {}
+        for name, stats in self._stats.items():
+            result[name] = dict(stats)
+            result[name]['free'] = sum(len(free) for cls, free in self._free.items() if cls.__name__ == name)
+        return result
+
+    def print_stats(self) -> None:
+        """Выводит статистику пула."""
+        print("♻️ Пул сущностей:")
+        for name, stats in self.stats().items():
+            total = stats['created'] + stats['reused']
+            reuse = 100.0 * stats['reused'] / total if total else 0.0
+            print(f"   {name}: создано {stats['created']}, повторно {stats['reused']} ({reuse:.0f}%), "
+                  f"в пуле {stats['free']}, уничтожено {stats['destroyed']}")
+
+
+# Общий пул приложения
+entity_pool = EntityPool()
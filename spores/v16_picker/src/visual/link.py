@@ -18,6 +18,48 @@ class Link(Scalable):
                  id_manager=None,
                  link_id=None,  # Опциональный явный ID
                  **kwargs):
+        self._init_link_state(parent_spore, child_spore, zoom_manager, color_manager,
+                              config, link_type, max_length, id_manager, link_id)
+
+        super().__init__(
+            model='models/arrow.obj',
+            position=(0, 0, 0),  # Временная позиция, будет обновлена в update_geometry
+            color=self.color_manager.get_color('link', 'default'),
+            render_queue=0,
+            thickness=self.thickness,
+            **kwargs
+        )
+        
+        # Используем общий метод для настройки геометрии
+
+        self.update_geometry()
+
+    def reinit(self,
+               parent_spore: Spore,
+               child_spore: Spore,
+               zoom_manager: ZoomManager,
+               color_manager: Optional[ColorManager] = None,
+               config: Optional[Dict[str, Any]] = None,
+               link_type: str = 'default',
+               max_length: Optional[float] = None,
+               id_manager=None,
+               link_id=None,
+               **kwargs) -> None:
+        """Повторная инициализация линка из пула (visual/entity_pool.py), аргументы как у конструктора."""
+        self._init_link_state(parent_spore, child_spore, zoom_manager, color_manager,
+                              config, link_type, max_length, id_manager, link_id)
+        super().reinit(
+            model='models/arrow.obj',
+            color=self.color_manager.get_color('link', 'default'),
+            render_queue=0,
+            thickness=self.thickness,
+            **kwargs
+        )
+        self.update_geometry()
+
+    def _init_link_state(self, parent_spore, child_spore, zoom_manager, color_manager,
+                         config, link_type, max_length, id_manager, link_id) -> None:
+        """Концы, ID и толщина линка (общая часть __init__ и reinit)."""
         self.config: Dict[str, Any] = config if config is not None else {}
         
         # Поле идентификатора устанавливается извне (например, менеджером)
@@ -59,19 +101,6 @@ class Link(Scalable):
 
         self.max_length: Optional[float] = max_length
 
-        super().__init__(
-            model='models/arrow.obj',
-            position=(0, 0, 0),  # Временная позиция, будет обновлена в update_geometry
-            color=self.color_manager.get_color('link', 'default'),
-            render_queue=0,
-            thickness=self.thickness,
-            **kwargs
-        )
-        
-        # Используем общий метод для настройки геометрии
-
-        self.update_geometry()
-
     def set_max_length(self, max_length: Optional[float]) -> None:
         """Устанавливает максимальную визуальную длину линка."""
         self.max_length = max_length
@@ -1,9 +1,9 @@
-from ursina import destroy
 import numpy as np
 from typing import Dict, Optional
 
 from ..core.spore import Spore
 from ..visual.pillar import Pillar
+from ..visual.entity_pool import entity_pool
 from ..managers.color_manager import ColorManager
 from ..managers.zoom_manager import ZoomManager
 from ..logic.cost_function import CostFunction
@@ -20,6 +20,9 @@ class PredictionVisualizer:
 
     Класс позволяет включать и выключать отдельные части визуализации
     через параметры конфигурации.
+
+    Сущности берутся из entity_pool и возвращаются туда в destroy(),
+    поэтому пересоздание визуализаторов не создаёт новых узлов сцены.
     """
     ANGEL_HEIGHT_OFFSET_RATIO: float = 0.01
 
@@ -98,7 +101,8 @@ class PredictionVisualizer:
                 temp_pendulum = PendulumSystem()
                 
                 correct_scale = getattr(self.zoom_manager, 'config', {}).get('spore', {}).get('scale', 0.02)
-                self.ghost_spore = Spore(
+                self.ghost_spore = entity_pool.acquire(
+                    Spore,
                     dt=0.1,
                     pendulum=temp_pendulum,
                     goal_position=(0, 0),
@@ -129,7 +133,8 @@ class PredictionVisualizer:
             from ..logic.pendulum import PendulumSystem
             
             temp_pendulum = PendulumSystem()
-            self.ghost_spore = Spore(
+            self.ghost_spore = entity_pool.acquire(
+                Spore,
                 dt=0.1,
                 pendulum=temp_pendulum,
                 goal_position=(0, 0),
@@ -149,15 +154,18 @@ class PredictionVisualizer:
                 self.angel.id = f"ghost_angel_{self.id}"
                 self.angel.color = self.color_manager.get_color('angel', 'ghost')
                 self.zoom_manager.register_object(self.angel, self.angel.id)
+                self.angel._zoom_manager_key = self.angel.id
 
         # 3. Создаем столб
         if self.show_pillar and self.cost_function and self.ghost_spore:
-            self.pillar = Pillar(
+            self.pillar = entity_pool.acquire(
+                Pillar,
                 model='cube',
                 color=self.color_manager.get_color('angel', 'ghost_pillar')
             )
             self.pillar.id = f"ghost_pillar_{self.id}"
             self.zoom_manager.register_object(self.pillar, self.pillar.id)
+            self.pillar._zoom_manager_key = self.pillar.id
 
 
     def update(self, predicted_state_2d: np.ndarray) -> None:
@@ -239,13 +247,10 @@ class PredictionVisualizer:
             )
 
     def destroy(self) -> None:
-        """Уничтожает все связанные с этим предсказанием сущности."""
-        if self.ghost_spore:
-            destroy(self.ghost_spore)
-        if self.angel:
-            destroy(self.angel)
-        if self.pillar:
-            destroy(self.pillar)
+        """Возвращает все связанные с этим предсказанием сущности в пул."""
+        entity_pool.release(self.ghost_spore, self.zoom_manager)
+        entity_pool.release(self.angel, self.zoom_manager)
+        entity_pool.release(self.pillar, self.zoom_manager)
         
         self.ghost_spore = None
         self.angel = None
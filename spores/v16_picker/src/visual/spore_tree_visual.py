@@ -6,10 +6,10 @@ SporeTreeVisual - Графический класс дерева спор для
 
 import numpy as np
 from typing import List, Dict, Optional, Any
-from ursina import destroy
 
 from ..core.spore import Spore
 from ..visual.link import Link
+from ..visual.entity_pool import entity_pool
 from ..managers.color_manager import ColorManager
 from ..managers.zoom_manager import ZoomManager
 
@@ -20,6 +20,8 @@ class SporeTreeVisual:
     
     Читает готовые данные из SporeTree и отображает их в 3D.
     НЕ содержит математики - только graphics.
+
+    Споры и стрелки берутся из entity_pool; destroy_visual() возвращает их туда.
     """
     
     def __init__(self,
@@ -124,7 +126,8 @@ class SporeTreeVisual:
         """Создает визуальный корень."""
         root_data = self.tree_logic.root
         
-        self.root_spore = Spore(
+        self.root_spore = entity_pool.acquire(
+            Spore,
             pendulum=self.tree_logic.pendulum,  # Берем из логики
             dt=0.1,  # Для корня не важно
             goal_position=goal_position,
@@ -148,7 +151,8 @@ class SporeTreeVisual:
         
         for i, child_data in enumerate(self.tree_logic.children):
             # Создаем спору
-            child_spore = Spore(
+            child_spore = entity_pool.acquire(
+                Spore,
                 pendulum=self.tree_logic.pendulum,
                 dt=abs(child_data['dt']),  # Читаем из логики
                 goal_position=goal_position,
@@ -184,7 +188,8 @@ class SporeTreeVisual:
             child_link_spore = self.root_spore
             
         # Создаем линк
-        link = Link(
+        link = entity_pool.acquire(
+            Link,
             parent_spore=parent_spore,
             child_spore=child_link_spore,
             color_manager=self.color_manager,
@@ -223,7 +228,8 @@ class SporeTreeVisual:
         
         for i, gc_data in enumerate(self.tree_logic.grandchildren):
             # Создаем спору внука
-            grandchild_spore = Spore(
+            grandchild_spore = entity_pool.acquire(
+                Spore,
                 pendulum=self.tree_logic.pendulum,
                 dt=abs(gc_data['dt']),  # Читаем из логики
                 goal_position=goal_position,
@@ -274,7 +280,8 @@ class SporeTreeVisual:
         print(f"   📍 Направление: {direction} (dt={gc_data['dt']})")
 
         # Создаем ОДИН стандартный линк
-        link = Link(
+        link = entity_pool.acquire(
+            Link,
             parent_spore=parent_link,
             child_spore=child_link,
             color_manager=self.color_manager,
@@ -345,45 +352,15 @@ class SporeTreeVisual:
                     self.grandchild_links[i].update_geometry()
                     
     def destroy_visual(self) -> None:
-        """Уничтожает все визуальные объекты."""
-        # Уничтожаем стрелки внуков
-        for link in self.grandchild_links:
-            try:
-                destroy(link)
-            except:
-                pass
-        self.grandchild_links.clear()
-        
-        # Уничтожаем внуков
-        for spore in self.grandchild_spores:
-            try:
-                destroy(spore)
-            except:
-                pass
-        self.grandchild_spores.clear()
-        
-        # Уничтожаем стрелки детей
-        for link in self.child_links:
-            try:
-                destroy(link)
-            except:
-                pass
-        self.child_links.clear()
-        
-        # Уничтожаем детей
-        for spore in self.child_spores:
-            try:
-                destroy(spore)
-            except:
-                pass
-        self.child_spores.clear()
-        
-        # Уничтожаем корень
+        """Возвращает все визуальные объекты в пул."""
+        # Стрелки раньше спор, на которые они ссылаются
+        for objects in (self.grandchild_links, self.grandchild_spores,
+                        self.child_links, self.child_spores):
+            entity_pool.release_all(objects, self.zoom_manager)
+            objects.clear()
+
         if self.root_spore:
-            try:
-                destroy(self.root_spore)
-            except:
-                pass
+            entity_pool.release(self.root_spore, self.zoom_manager)
             self.root_spore = None
             
         self.visual_created = False
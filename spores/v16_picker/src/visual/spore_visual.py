@@ -27,7 +27,16 @@ class SporeVisual(Scalable):
             y_coordinate: Y координата для 3D визуализации (обычно 0)
         """
         super().__init__(model=model, *args, **kwargs)
-        
+        self._init_visual_state(color_manager, is_goal, y_coordinate)
+
+    def reinit(self, model='sphere', color_manager=None, is_goal=False,
+               y_coordinate=0.0, **kwargs) -> None:
+        """Повторная инициализация из пула с аргументами конструктора."""
+        super().reinit(model=model, **kwargs)
+        self._init_visual_state(color_manager, is_goal, y_coordinate)
+
+    def _init_visual_state(self, color_manager, is_goal, y_coordinate) -> None:
+        """Цвет, флаг цели и Y координата (общая часть __init__ и reinit)."""
         # Управление цветом
         if color_manager is None:
             color_manager = ColorManager()